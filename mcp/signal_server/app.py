@@ -11,6 +11,7 @@ import argparse
 import atexit
 import json
 import logging
+import os
 import signal
 import sys
 import time
@@ -25,7 +26,10 @@ try:
 except ImportError:
     PANDAS_AVAILABLE = False
 
+from alpha_core.microstructure.feature_writer import restore_parquet_feature_row
 from alpha_core.signals import CoreAlgorithm
+from alpha_core.utils.file_tail import DirWatcher
+from alpha_core.utils.ingest_tracker import FileIngestTracker
 
 # Configure logging
 logging.basicConfig(
@@ -51,6 +55,42 @@ def load_signal_config(config_path: Optional[str]) -> Dict:
     return signal_cfg
 
 
+def _normalize_parquet_record(record: Dict) -> Dict:
+    """Parquet 特征行 -> CoreAlgorithm 输入（NaN 置空、activity 还原、字段名映射、lag/consistency/warmup 补全）"""
+    # 处理 NaN 值
+    record = {k: (None if pd.isna(v) else v) for k, v in record.items()}
+    # FeaturePipe Parquet sink 的展平列还原（activity_tps -> activity.tps）
+    record = restore_parquet_feature_row(record)
+    
+    # 字段名映射：Parquet 字段名 -> CoreAlgorithm 期望的字段名
+    if "ofi_z" in record and "z_ofi" not in record:
+        record["z_ofi"] = record.get("ofi_z")
+    if "cvd_z" in record and "z_cvd" not in record:
+        record["z_cvd"] = record.get("cvd_z")
+    
+    # lag 字段转换：lag_ms_* -> lag_sec
+    if "lag_ms_ofi" in record or "lag_ms_cvd" in record or "lag_ms_fusion" in record:
+        # 使用最大的 lag_ms 值转换为秒
+        lag_ms_values = [
+            record.get("lag_ms_ofi"),
+            record.get("lag_ms_cvd"),
+            record.get("lag_ms_fusion")
+        ]
+        lag_ms = max([v for v in lag_ms_values if v is not None and not pd.isna(v)], default=0)
+        record["lag_sec"] = lag_ms / 1000.0 if lag_ms > 0 else 0.0
+    
+    # consistency 和 warmup 字段：如果不存在，设置默认值
+    if "consistency" not in record:
+        # TASK-07A: 使用保守的一致性估算，避免"低一致性抑制"失效
+        # 基于 |z_ofi| 和 |z_cvd| 的简单函数估算
+        z1 = abs(float(record.get("z_ofi") or record.get("ofi_z") or 0.0))
+        z2 = abs(float(record.get("z_cvd") or record.get("cvd_z") or 0.0))
+        record["consistency"] = min(0.6, max(0.0, (z1 + z2) * 0.15))
+    if "warmup" not in record:
+        record["warmup"] = False  # 默认非预热
+    return record
+
+
 def iter_feature_rows(source: Optional[str], symbols: Optional[Iterable[str]]) -> Iterator[Dict]:
     """迭代特征行，支持 JSONL 和 Parquet 格式"""
     allowed = set(s.upper() for s in symbols) if symbols else None
@@ -99,37 +139,7 @@ def iter_feature_rows(source: Optional[str], symbols: Optional[Iterable[str]]) -
                 logger.debug(f"[iter_feature_rows] Parquet 文件 {file_path} 包含 {len(df)} 行")
                 # 将 DataFrame 转换为字典列表
                 for _, row in df.iterrows():
-                    record = row.to_dict()
-                    # 处理 NaN 值
-                    record = {k: (None if pd.isna(v) else v) for k, v in record.items()}
-                    
-                    # 字段名映射：Parquet 字段名 -> CoreAlgorithm 期望的字段名
-                    if "ofi_z" in record and "z_ofi" not in record:
-                        record["z_ofi"] = record.get("ofi_z")
-                    if "cvd_z" in record and "z_cvd" not in record:
-                        record["z_cvd"] = record.get("cvd_z")
-                    
-                    # lag 字段转换：lag_ms_* -> lag_sec
-                    if "lag_ms_ofi" in record or "lag_ms_cvd" in record or "lag_ms_fusion" in record:
-                        # 使用最大的 lag_ms 值转换为秒
-                        lag_ms_values = [
-                            record.get("lag_ms_ofi"),
-                            record.get("lag_ms_cvd"),
-                            record.get("lag_ms_fusion")
-                        ]
-                        lag_ms = max([v for v in lag_ms_values if v is not None and not pd.isna(v)], default=0)
-                        record["lag_sec"] = lag_ms / 1000.0 if lag_ms > 0 else 0.0
-                    
-                    # consistency 和 warmup 字段：如果不存在，设置默认值
-                    if "consistency" not in record:
-                        # TASK-07A: 使用保守的一致性估算，避免"低一致性抑制"失效
-                        # 基于 |z_ofi| 和 |z_cvd| 的简单函数估算
-                        z1 = abs(float(record.get("z_ofi") or record.get("ofi_z") or 0.0))
-                        z2 = abs(float(record.get("z_cvd") or record.get("cvd_z") or 0.0))
-                        record["consistency"] = min(0.6, max(0.0, (z1 + z2) * 0.15))
-                    if "warmup" not in record:
-                        record["warmup"] = False  # 默认非预热
-                    
+                    record = _normalize_parquet_record(row.to_dict())
                     if allowed and record.get("symbol") not in allowed:
                         continue
                     file_row_count += 1
@@ -176,6 +186,10 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--out", help="Override output directory (default ./runtime)")
     parser.add_argument("--symbols", nargs="*", help="Optional symbol whitelist (e.g. BTCUSDT ETHUSDT)")
     parser.add_argument("--watch", action="store_true", help="Watch input directory for new files (continuous mode)")
+    parser.add_argument("--poll-interval", type=float, default=5.0,
+                        help="Watch mode: max seconds between directory checks (inotify wakes earlier)")
+    parser.add_argument("--ingest-checkpoint",
+                        help="Watch mode: ingest checkpoint file (default <out|./runtime>/signal_ingest_checkpoint.json)")
     parser.add_argument("--print", action="store_true", help="Print emitted decisions for inspection")
     return parser
 
@@ -274,8 +288,22 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
             # 监听模式：持续扫描目录中的新文件
             input_path = Path(args.input)
             if input_path.is_dir():
-                processed_files = set()
-                logger.info(f"监听模式：持续扫描 {input_path}")
+                # 增量摄取：按文件记录 (size, mtime, 字节偏移 / parquet 行组)，JSONL 增长时从偏移续读；
+                # 检查点落盘，重启后续读。inotify 唤醒（SIGNAL_INOTIFY=0 或不可用时按 --poll-interval 轮询）
+                checkpoint_path = (
+                    Path(args.ingest_checkpoint) if args.ingest_checkpoint
+                    else Path(args.out or "./runtime") / "signal_ingest_checkpoint.json"
+                )
+                tracker = FileIngestTracker(
+                    input_path,
+                    checkpoint_path=checkpoint_path,
+                    suffixes=(".jsonl", ".parquet") if PANDAS_AVAILABLE else (".jsonl",),
+                )
+                watcher = DirWatcher(input_path, use_inotify=os.getenv("SIGNAL_INOTIFY", "1") != "0")
+                allowed = set(s.upper() for s in args.symbols) if args.symbols else None
+                logger.info(
+                    f"监听模式：持续跟踪 {input_path}（唤醒方式={watcher.backend}，检查点={checkpoint_path}）"
+                )
                 
                 # TASK-07A: 使用标志控制循环，确保能及时响应终止信号
                 running = True
@@ -294,94 +322,38 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
                 except (AttributeError, ValueError):
                     pass
                 
+                def process_row(row: Dict) -> None:
+                    if allowed and row.get("symbol") not in allowed:
+                        return
+                    decision = algo.process_feature_row(row)
+                    if args.print and decision:
+                        sys.stdout.write(json.dumps(decision, ensure_ascii=False) + "\n")
+                
                 while running:
                     try:
-                        # 查找新的 JSONL 和 Parquet 文件
-                        jsonl_files = sorted(input_path.rglob("*.jsonl"))
-                        parquet_files = sorted(input_path.rglob("*.parquet")) if PANDAS_AVAILABLE else []
-                        all_files = jsonl_files + parquet_files
-                        
-                        for file_path in all_files:
+                        for file_path in tracker.changed_files():
                             if not running:  # 检查停止标志
                                 break
-                            file_key = str(file_path)
-                            if file_key in processed_files:
-                                continue
-                            
-                            # 处理新文件
-                            logger.info(f"处理新文件: {file_path}")
+                            logger.debug(f"处理新增数据: {file_path} (from {tracker.position(file_path)})")
                             try:
                                 if file_path.suffix == ".parquet":
-                                    # 处理 Parquet 文件
-                                    if not PANDAS_AVAILABLE:
-                                        logger.warning(f"跳过 Parquet 文件 {file_path}：pandas 未安装")
-                                        continue
-                                    
-                                    df = pd.read_parquet(file_path)
-                                    for _, row in df.iterrows():
-                                        record = row.to_dict()
-                                        # 处理 NaN 值
-                                        record = {k: (None if pd.isna(v) else v) for k, v in record.items()}
-                                        
-                                        # 字段名映射：Parquet 字段名 -> CoreAlgorithm 期望的字段名
-                                        if "ofi_z" in record and "z_ofi" not in record:
-                                            record["z_ofi"] = record.get("ofi_z")
-                                        if "cvd_z" in record and "z_cvd" not in record:
-                                            record["z_cvd"] = record.get("cvd_z")
-                                        
-                                        # lag 字段转换：lag_ms_* -> lag_sec
-                                        if "lag_ms_ofi" in record or "lag_ms_cvd" in record or "lag_ms_fusion" in record:
-                                            lag_ms_values = [
-                                                record.get("lag_ms_ofi"),
-                                                record.get("lag_ms_cvd"),
-                                                record.get("lag_ms_fusion")
-                                            ]
-                                            lag_ms = max([v for v in lag_ms_values if v is not None and not pd.isna(v)], default=0)
-                                            record["lag_sec"] = lag_ms / 1000.0 if lag_ms > 0 else 0.0
-                                        
-                                        # consistency 和 warmup 字段：如果不存在，设置默认值
-                                        if "consistency" not in record:
-                                            # TASK-07A: 使用保守的一致性估算，避免"低一致性抑制"失效
-                                            # 基于 |z_ofi| 和 |z_cvd| 的简单函数估算
-                                            z1 = abs(float(record.get("z_ofi") or record.get("ofi_z") or 0.0))
-                                            z2 = abs(float(record.get("z_cvd") or record.get("cvd_z") or 0.0))
-                                            record["consistency"] = min(0.6, max(0.0, (z1 + z2) * 0.15))
-                                        if "warmup" not in record:
-                                            record["warmup"] = False  # 默认非预热
-                                        
-                                        if args.symbols and record.get("symbol") not in [s.upper() for s in args.symbols]:
-                                            continue
-                                        decision = algo.process_feature_row(record)
-                                        if args.print and decision:
-                                            sys.stdout.write(json.dumps(decision, ensure_ascii=False) + "\n")
-                                elif file_path.suffix == ".jsonl":
-                                    # 处理 JSONL 文件
-                                    with file_path.open("r", encoding="utf-8") as fp:
-                                        for line in fp:
-                                            line = line.strip()
-                                            if not line:
-                                                continue
-                                            try:
-                                                row = json.loads(line)
-                                                if args.symbols and row.get("symbol") not in [s.upper() for s in args.symbols]:
-                                                    continue
-                                                decision = algo.process_feature_row(row)
-                                                if args.print and decision:
-                                                    sys.stdout.write(json.dumps(decision, ensure_ascii=False) + "\n")
-                                            except json.JSONDecodeError:
-                                                continue
-                                
-                                processed_files.add(file_key)
+                                    for table in tracker.iter_parquet_row_groups(file_path):
+                                        for _, row in table.to_pandas().iterrows():
+                                            process_row(_normalize_parquet_record(row.to_dict()))
+                                else:
+                                    for row in tracker.iter_jsonl(file_path):
+                                        process_row(row)
                             except Exception as e:
                                 logger.error(f"处理文件失败 {file_path}: {e}")
+                        tracker.save_checkpoint()
                         
-                        # TASK-07A: 使用可中断的sleep，确保能及时响应停止信号
-                        if running:
-                            # 分段sleep，每1秒检查一次running标志
-                            for _ in range(5):
-                                if not running:
-                                    break
-                                time.sleep(1)
+                        # TASK-07A: 可中断等待，每1秒检查一次running标志；有文件变更时立即唤醒
+                        waited = 0.0
+                        while running and waited < args.poll_interval:
+                            step = min(1.0, args.poll_interval - waited)
+                            if watcher.wait(step):
+                                break
+                            waited += step
                     except KeyboardInterrupt:
                         logger.info("收到中断信号，停止监听")
                         running = False
@@ -389,8 +361,10 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
                     except Exception as e:
                         logger.error(f"监听出错: {e}", exc_info=True)
                         if running:
-                            time.sleep(5)
+                            time.sleep(args.poll_interval)
                 
+                tracker.save_checkpoint()
+                watcher.close()
                 # 退出循环后，确保清理
                 logger.info("[signal_server] 监听循环已退出，准备清理...")
             else:
@@ -10,6 +10,7 @@ import argparse
 import builtins
 import json
 import logging
+import os
 import signal as signal_module
 import sqlite3
 import sys
@@ -21,6 +22,8 @@ import yaml
 
 from alpha_core.executors import create_executor, IExecutor, Order, Side, OrderType
 from alpha_core.backtest.reader import DataReader
+from alpha_core.utils.file_tail import DirWatcher
+from alpha_core.utils.jsonl_follow import JsonlFollower
 
 # Configure logging
 logging.basicConfig(
@@ -143,6 +146,15 @@ def load_config(config_path: Optional[str]) -> Dict:
         return yaml.safe_load(fp) or {}
 
 
+def _read_complete_lines(jsonl_file: Path, position: int) -> Tuple[List[bytes], int]:
+    """从 position 起读取完整行（不以换行结尾的尾行留待下次读取），返回 (行列表, 新位置)"""
+    with jsonl_file.open("rb") as f:
+        f.seek(position)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    return data[:end].splitlines(), position + end
+
+
 def read_signals_from_jsonl(signals_dir: Path, symbols: Optional[list] = None, processed_files: Optional[Set[str]] = None, last_positions: Optional[Dict[str, int]] = None) -> Iterator[Dict]:
     """从JSONL文件读取信号
     
@@ -159,6 +171,8 @@ def read_signals_from_jsonl(signals_dir: Path, symbols: Optional[list] = None, p
         - v2 标准命名：signals-YYYYMMDD-HH.jsonl（连字符，按小时轮转）
         - v1 兼容命名：signals_YYYYMMDD_HHMM.jsonl（下划线，按分钟轮转）
         - 优先读取 v2 格式，兼容 v1 格式
+        - 位置只推进到最后一个完整行；目录内最新文件（仍在追加）不计入 processed_files
+        - watch 模式使用 JsonlFollower（常驻句柄 + 偏移检查点 + inotify 唤醒）
     """
     if not signals_dir.exists():
         logger.warning(f"Signals directory not found: {signals_dir}")
@@ -168,41 +182,43 @@ def read_signals_from_jsonl(signals_dir: Path, symbols: Optional[list] = None, p
         processed_files = set()
     if last_positions is None:
         last_positions = {}
+    symbol_set = {s.upper() for s in symbols} if symbols else None
     
-    # TASK-B1: 补扫顶层signals文件（P0修复）
-    # 先处理顶层signals-*.jsonl / signals_*.jsonl文件
-    top_level_files_v2 = sorted(signals_dir.glob("signals-*.jsonl"))
-    top_level_files_v1 = sorted(signals_dir.glob("signals_*.jsonl"))
-    top_level_files = top_level_files_v2 + top_level_files_v1
-
-    for jsonl_file in top_level_files:
-        file_key = str(jsonl_file)
-        # 如果文件已完全处理过，跳过（避免无效打开）
-        if processed_files and file_key in processed_files:
-            continue
-        try:
-            with jsonl_file.open("r", encoding="utf-8") as f:
-                if file_key in last_positions:
-                    f.seek(last_positions[file_key])
-
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
+    def _read_dir(directory: Path, filter_symbols: bool) -> Iterator[Dict]:
+        # TASK-A4优化：同时匹配v2格式（signals-*.jsonl）和v1格式（signals_*.jsonl）
+        # 优先v2格式（新标准），然后兼容v1格式
+        files_v2 = sorted(directory.glob("signals-*.jsonl"))
+        files_v1 = sorted(directory.glob("signals_*.jsonl"))
+        # 各命名格式下最新的文件可能仍在追加
+        active = {files[-1] for files in (files_v2, files_v1) if files}
+        for jsonl_file in files_v2 + files_v1:
+            file_key = str(jsonl_file)
+            # 如果文件已完全处理过，跳过（避免无效打开）
+            if file_key in processed_files:
+                continue
+            try:
+                lines, position = _read_complete_lines(jsonl_file, last_positions.get(file_key, 0))
+            except FileNotFoundError as e:
+                logger.warning(f"Error reading JSONL file {jsonl_file}: {e}")
+                continue
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
                     signal = json.loads(line)
-                    # 顶层同样支持 symbols 过滤（如传入）
-                    if symbols and signal.get("symbol", "").upper() not in [s.upper() for s in symbols]:
-                        continue
-                    yield signal
-
-                # 读取到文件末尾，更新位置指针与处理标记
-                last_positions[file_key] = f.tell()
-                if processed_files is not None:
-                    processed_files.add(file_key)
-
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.warning(f"Error reading top-level JSONL file {jsonl_file}: {e}")
-            continue
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping malformed line in {jsonl_file}: {e}")
+                    continue
+                if filter_symbols and signal.get("symbol", "").upper() not in symbol_set:
+                    continue
+                yield signal
+            last_positions[file_key] = position
+            # 只有已被更新文件取代的旧文件才标记为完全处理
+            if jsonl_file not in active:
+                processed_files.add(file_key)
+    
+    # TASK-B1: 补扫顶层signals文件（P0修复），顶层同样支持 symbols 过滤
+    yield from _read_dir(signals_dir, symbol_set is not None)
 
     # 查找所有JSONL文件（兼容v2和v1命名）
     if symbols:
@@ -211,38 +227,8 @@ def read_signals_from_jsonl(signals_dir: Path, symbols: Optional[list] = None, p
         symbol_dirs = [d for d in signals_dir.iterdir() if d.is_dir()]
 
     for symbol_dir in symbol_dirs:
-        if not symbol_dir.exists():
-            continue
-
-        # TASK-A4优化：同时匹配v2格式（signals-*.jsonl）和v1格式（signals_*.jsonl）
-        # 优先v2格式（新标准），然后兼容v1格式
-        jsonl_files_v2 = sorted(symbol_dir.glob("signals-*.jsonl"))
-        jsonl_files_v1 = sorted(symbol_dir.glob("signals_*.jsonl"))
-        jsonl_files = jsonl_files_v2 + jsonl_files_v1
-        for jsonl_file in jsonl_files:
-            file_key = str(jsonl_file)
-            # 如果文件已完全处理过，跳过（避免无效打开）
-            if processed_files and file_key in processed_files:
-                continue
-            try:
-                with jsonl_file.open("r", encoding="utf-8") as f:
-                    # 如果是增量读取，跳转到上次位置
-                    if file_key in last_positions:
-                        f.seek(last_positions[file_key])
-                    
-                    # 读取新内容
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        signal = json.loads(line)
-                        yield signal
-                    
-                    # 更新位置
-                    last_positions[file_key] = f.tell()
-                    processed_files.add(file_key)
-            except Exception as e:
-                logger.error(f"Failed to read {jsonl_file}: {e}")
+        if symbol_dir.exists():
+            yield from _read_dir(symbol_dir, False)
 
 
 def _select_top_signals(signals: List[Dict]) -> Tuple[List[Dict], int]:
@@ -618,6 +604,11 @@ def main():
         default=1.0,
         help="Check interval in seconds for watch mode (default: 1.0)",
     )
+    parser.add_argument(
+        "--offsets-file",
+        type=str,
+        help="JSONL watch mode: byte-offset checkpoint file (default: <output>/strategy_jsonl_offsets.json)",
+    )
     
     args = parser.parse_args()
     
@@ -721,8 +712,11 @@ def main():
             pass
         
         # 用于增量读取的状态
-        processed_files: Set[str] = set()
-        last_positions: Dict[str, int] = {}
+        # JSONL：JsonlFollower 常驻当前小时文件句柄，偏移落盘检查点（重启续读）；
+        # DirWatcher 用 inotify 唤醒（不可用时按 check_interval 轮询），STRATEGY_INOTIFY=0 强制轮询
+        follower: Optional[JsonlFollower] = None
+        watcher: Optional[DirWatcher] = None
+        offsets_file = Path(args.offsets_file) if args.offsets_file else output_dir / "strategy_jsonl_offsets.json"
         last_ts_ms: Optional[int] = None
         cumulative_stats = {
             "total_signals": 0,
@@ -778,17 +772,30 @@ def main():
                         jsonl_dir = output_dir / "ready" / "signal"
                     
                     if jsonl_dir.exists():
-                        signals = read_signals_from_jsonl(jsonl_dir, args.symbols, processed_files, last_positions)
-                        signal_list = list(signals)
+                        if follower is None:
+                            follower = JsonlFollower(jsonl_dir, args.symbols, checkpoint_path=offsets_file)
+                            watcher = DirWatcher(jsonl_dir, use_inotify=os.getenv("STRATEGY_INOTIFY", "1") != "0")
+                            logger.info(
+                                f"[StrategyServer] Following {jsonl_dir} (wakeup={watcher.backend}, offsets={offsets_file})"
+                            )
+                        signal_list = follower.poll()
                         if signal_list:
-                            # 处理信号
-                            stats = process_signals(executor, iter(signal_list), executor_cfg)
+                            # 处理信号；处理完成后才确认偏移（至少一次语义），失败时回退重读
+                            try:
+                                stats = process_signals(executor, iter(signal_list), executor_cfg)
+                            except Exception:
+                                follower.rollback()
+                                raise
+                            follower.commit()
                             # 累计统计
                             for key in cumulative_stats:
                                 cumulative_stats[key] += stats.get(key, 0)
                 
-                # 等待下次检查
-                time.sleep(args.check_interval)
+                # 等待下次检查（inotify 模式下有文件变更立即唤醒）
+                if watcher is not None:
+                    watcher.wait(args.check_interval)
+                else:
+                    time.sleep(args.check_interval)
             except KeyboardInterrupt:
                 logger.info("[StrategyServer] Interrupted by user")
                 running = False
@@ -796,6 +803,10 @@ def main():
                 logger.error(f"[StrategyServer] Error in watch loop: {e}", exc_info=True)
                 time.sleep(args.check_interval)
         
+        if follower is not None:
+            follower.close()
+            watcher.close()
+        
         # 输出累计统计信息
         logger.info("[StrategyServer] Watch mode completed:")
         logger.info(f"  Total signals: {cumulative_stats['total_signals']}")
@@ -866,6 +866,8 @@ class Reporter:
         """分析 JSONL 文件
         返回: (匹配run_id的数量, 总数量)
         """
+        from alpha_core.utils import json_codec
+
         signal_dir = runtime_dir / "ready" / "signal"
         if not signal_dir.exists():
             report["warnings"].append("信号目录不存在")
@@ -896,7 +898,7 @@ class Reporter:
                             continue
                         
                         try:
-                            signal = json.loads(line)
+                            signal = json_codec.loads(line)
                             
                             # P0: 如果提供了run_id，只统计匹配的run_id
                             if run_id and signal.get("run_id") != run_id:
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FeaturePipe 去重窗口基准（DedupeWindow vs 原 deque 线性扫描）
+
+每毫秒一行、row_id 各不相同，窗口内记录数 ≈ window_ms：
+DedupeWindow 逐行成本应基本不随窗口变化，线性扫描随窗口线性增长。
+
+使用方法:
+python scripts/bench_dedupe_window.py
+python scripts/bench_dedupe_window.py --windows 10 1000 20000 --rows 30000
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alpha_core.microstructure.feature_pipe import DedupeWindow  # noqa: E402
+
+
+def linear_reference(window_ms: int) -> Callable[[int, Optional[str]], bool]:
+    """原实现：deque + 线性扫描"""
+    seen = deque()
+
+    def check(ts_ms: int, row_id: Optional[str]) -> bool:
+        while seen and (ts_ms - seen[0][0]) > window_ms:
+            seen.popleft()
+        for seen_ts, seen_id in seen:
+            if seen_ts == ts_ms or (row_id and seen_id == row_id):
+                return True
+        seen.append((ts_ms, row_id))
+        return False
+
+    return check
+
+
+def per_row_ns(check: Callable[[int, Optional[str]], bool], n: int) -> float:
+    ts0 = 1_700_000_000_000
+    t0 = time.perf_counter()
+    for i in range(n):
+        check(ts0 + i, f"id-{i}")
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="FeaturePipe 去重窗口基准")
+    parser.add_argument("--windows", type=int, nargs="+", default=[10, 1000, 20000], help="去重窗口（毫秒）")
+    parser.add_argument("--rows", type=int, default=30000, help="每次测量的行数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快）")
+    parser.add_argument("--linear-max-window", type=int, default=2000,
+                        help="线性扫描只测到该窗口（更大窗口耗时过长）")
+    args = parser.parse_args()
+
+    base = None
+    for window_ms in args.windows:
+        indexed = min(per_row_ns(DedupeWindow(window_ms).check_and_add, args.rows) for _ in range(args.repeat))
+        base = base or indexed
+        line = f"window={window_ms:6d}ms  DedupeWindow {indexed:8.0f} ns/row (x{indexed / base:.2f} vs smallest)"
+        if window_ms <= args.linear_max_window:
+            linear = min(per_row_ns(linear_reference(window_ms), args.rows) for _ in range(args.repeat))
+            line += f"  linear {linear:10.0f} ns/row"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
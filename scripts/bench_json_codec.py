@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 编解码后端基准（stdlib / orjson / msgspec）
+
+对 features / signals JSONL 文件逐行测：
+- decode: json_codec.loads(line)
+- encode: json_codec.dumps(row, sort_keys=True)（写入路径的稳定序列化）
+并校验各后端编码输出与标准库逐字节一致。
+
+使用方法:
+python scripts/bench_json_codec.py runtime/ready/features runtime/ready/signal
+python scripts/bench_json_codec.py --synthetic 50000        # 无数据时用合成的 feature/signal 行
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alpha_core.utils.json_codec import BACKENDS, JsonCodec  # noqa: E402
+
+
+def collect_lines(paths: List[str], limit: int) -> List[str]:
+    """读取 JSONL 行（目录递归 *.jsonl）"""
+    lines: List[str] = []
+    for p in paths:
+        path = Path(p)
+        files = sorted(path.rglob("*.jsonl")) if path.is_dir() else [path]
+        for f in files:
+            with f.open("r", encoding="utf-8") as fp:
+                for line in fp:
+                    line = line.strip()
+                    if line:
+                        lines.append(line)
+                        if len(lines) >= limit:
+                            return lines
+    return lines
+
+
+def synthetic_lines(n: int, seed: int = 0) -> Dict[str, List[str]]:
+    """合成与 FeaturePipe / CoreAlgorithm 输出同形的行"""
+    stdlib = JsonCodec("stdlib")
+    rng = random.Random(seed)
+    features, signals = [], []
+    ts = 1730790000000
+    for i in range(n):
+        ts += rng.randint(1, 200)
+        z_ofi, z_cvd = rng.gauss(0, 1.5), rng.gauss(0, 1.5)
+        features.append(stdlib.dumps({
+            "ts_ms": ts, "symbol": "BTCUSDT", "z_ofi": z_ofi, "z_cvd": z_cvd,
+            "price": 70000 + rng.random() * 100, "lag_sec": rng.random() * 0.5,
+            "spread_bps": rng.random() * 3, "fusion_score": (z_ofi + z_cvd) / 2,
+            "consistency": rng.random(), "dispersion": rng.random(), "sign_agree": rng.choice([-1, 0, 1]),
+            "div_type": rng.choice([None, "bull_div", "bear_div"]),
+            "activity": {"tps": rng.random() * 20}, "warmup": False,
+            "reason_codes": rng.sample(["lag", "spread", "weak_signal"], rng.randint(0, 2)),
+            "trade_rate": rng.random() * 600, "quote_rate": rng.random() * 20,
+            "realized_vol_bps": rng.random() * 10, "volume_usd": rng.random() * 1e6,
+        }, sort_keys=True))
+        signals.append(stdlib.dumps({
+            "schema_version": "signal/v2", "ts_ms": ts, "symbol": "BTCUSDT",
+            "signal_id": f"BTCUSDT-{ts}-{i}", "score": rng.gauss(0, 2), "side_hint": rng.choice(["buy", "sell", "flat"]),
+            "z_ofi": z_ofi, "z_cvd": z_cvd, "regime": rng.choice(["active", "quiet", "normal"]),
+            "div_type": None, "confirm": rng.random() < 0.3, "gating": rng.randint(0, 3),
+            "decision_code": "OK", "decision_reason": "", "config_hash": "a1b2c3d4", "run_id": "bench",
+            "meta": {"window_ms": 60000, "note": "合成"},
+        }, sort_keys=True))
+    return {"features": features, "signals": signals}
+
+
+def bench(lines: List[str], codec: JsonCodec, repeat: int) -> Dict[str, float]:
+    rows = [codec.loads(line) for line in lines]
+    best_dec = best_enc = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for line in lines:
+            codec.loads(line)
+        best_dec = min(best_dec, time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        for row in rows:
+            codec.dumps(row, sort_keys=True)
+        best_enc = min(best_enc, time.perf_counter() - t0)
+    n = max(1, len(lines))
+    return {"decode_us": best_dec / n * 1e6, "encode_us": best_enc / n * 1e6}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="JSON 编解码后端基准")
+    parser.add_argument("paths", nargs="*", help="JSONL 文件或目录（按 features/signals 分组时请分别传入）")
+    parser.add_argument("--synthetic", type=int, default=0, help="合成行数（不读文件）")
+    parser.add_argument("--limit", type=int, default=100000, help="每组最多读取行数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快）")
+    args = parser.parse_args()
+
+    if args.synthetic or not args.paths:
+        groups = synthetic_lines(args.synthetic or 20000)
+    else:
+        groups = {p: collect_lines([p], args.limit) for p in args.paths}
+
+    codecs = []
+    for name in sorted(BACKENDS, key=lambda b: b != "stdlib"):  # 以 stdlib 为倍数基准
+        try:
+            codecs.append(JsonCodec(name))
+        except ImportError:
+            print(f"[skip] {name} not installed")
+    stdlib = codecs[0]
+
+    for group, lines in groups.items():
+        if not lines:
+            print(f"[skip] {group}: no rows")
+            continue
+        rows = [stdlib.loads(line) for line in lines]
+        expected = [stdlib.dumps(r, sort_keys=True) for r in rows]
+        print(f"\n{group}: {len(lines)} rows")
+        base = None
+        for codec in codecs:
+            identical = all(codec.dumps(r, sort_keys=True) == e for r, e in zip(rows, expected))
+            res = bench(lines, codec, args.repeat)
+            base = base or res
+            print(
+                f"  {codec.backend:8s} decode {res['decode_us']:6.2f} us/row (x{base['decode_us'] / res['decode_us']:.2f})"
+                f"  encode {res['encode_us']:6.2f} us/row (x{base['encode_us'] / res['encode_us']:.2f})"
+                f"  byte-identical={identical}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,9 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
+from alpha_core.microstructure.feature_writer import restore_parquet_feature_row
+from alpha_core.utils import json_codec
+
 try:
     import pyarrow.parquet as pq
     PARQUET_AVAILABLE = True
@@ -245,7 +248,7 @@ class DataReader:
                 table = pq.read_table(file_path)
                 for batch in table.to_batches():
                     for row in batch.to_pylist():
-                        processed = self._process_row(row, kind)
+                        processed = self._process_parquet_row(row, kind)
                         if processed:
                             yield processed
             except Exception as schema_error:
@@ -258,7 +261,7 @@ class DataReader:
                         rg_table = parquet_file.read_row_group(i)
                         for batch in rg_table.to_batches():
                             for row in batch.to_pylist():
-                                processed = self._process_row(row, kind)
+                                processed = self._process_parquet_row(row, kind)
                                 if processed:
                                     yield processed
                     except Exception as rg_error:
@@ -267,6 +270,12 @@ class DataReader:
         except Exception as e:
             logger.error(f"Error reading Parquet file {file_path}: {e}")
     
+    def _process_parquet_row(self, row: Dict[str, Any], kind: str) -> Optional[Dict[str, Any]]:
+        """Restore flattened feature columns (activity_tps -> activity.tps), then process"""
+        if kind == "features":
+            row = restore_parquet_feature_row(row)
+        return self._process_row(row, kind)
+    
     def _read_jsonl(self, file_path: Path, kind: str) -> Iterator[Dict[str, Any]]:
         """Read JSONL file"""
         try:
@@ -276,7 +285,7 @@ class DataReader:
                     if not line:
                         continue
                     try:
-                        row = json.loads(line)
+                        row = json_codec.loads(line)
                         processed = self._process_row(row, kind)
                         if processed:
                             yield processed
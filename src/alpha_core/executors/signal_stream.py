@@ -15,6 +15,8 @@ from typing import AsyncIterator, Dict, List, Optional, Any
 from dataclasses import dataclass
 import logging
 
+from alpha_core.utils import json_codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -131,7 +133,7 @@ class JsonlSignalStream(SignalStream):
                         continue
 
                     try:
-                        data = json.loads(line)
+                        data = json_codec.loads(line)
                         signal = ExecutionSignal.from_dict(data)
 
                         # 跳过已处理过的信号
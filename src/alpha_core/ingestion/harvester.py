@@ -152,6 +152,12 @@ except ImportError as e1:
         DivergenceDetector = None
         DivergenceConfig = None
 
+# JSON 解码（orjson/msgspec 可选加速；降级模式下包不可导入时回落标准库）
+try:
+    from alpha_core.utils import json_codec
+except ImportError:
+    json_codec = json
+
 # 稳定hash函数
 def stable_row_id(s):
     """生成稳定的row_id"""
@@ -919,7 +925,7 @@ class SuccessOFICVDHarvester:
             
             # 补齐盘口强相关字段（精确时间对齐）
             max_lag_ms = 5000  # Features对齐宽松度：5秒
-            logger.debug(f"[FEATURES_ALIGNMENT] {symbol} 使用max_lag_ms={max_lag_ms}进行orderbook时间对齐")
+            logger.debug("[FEATURES_ALIGNMENT] %s 使用max_lag_ms=%s进行orderbook时间对齐", symbol, max_lag_ms)
             for second_ts in features_by_second:
                 # 使用精确的orderbook快照，确保时间对齐
                 ob_snapshot = self._pick_orderbook_snapshot(symbol, second_ts * 1000, max_lag_ms=max_lag_ms)
@@ -1069,7 +1075,7 @@ class SuccessOFICVDHarvester:
     def _parse_orderbook_message(self, message):
         """解析订单簿消息（兼容Binance b/a键的无包裹场景）"""
         try:
-            raw = json.loads(message) if isinstance(message, str) else message
+            raw = json_codec.loads(message) if isinstance(message, str) else message
             
             # 统一一个 data 视图，兼容两种形态
             data = raw["data"] if isinstance(raw, dict) and "data" in raw else raw
@@ -1208,10 +1214,12 @@ class SuccessOFICVDHarvester:
             
             # 使用RealOFICalculator核心组件
             if self.ofi_available and symbol in self.ofi_calculators:
+                # _parse_orderbook_message 已按交易所价格序取前K档，跳过排序检查
                 result = self.ofi_calculators[symbol].update_with_snapshot(
                     orderbook['bids'], 
                     orderbook['asks'],
-                    event_time_ms=orderbook.get('event_ts_ms')
+                    event_time_ms=orderbook.get('event_ts_ms'),
+                    presorted=True
                 )
                 if result:
                     meta = result.get('meta', {})
@@ -2074,7 +2082,7 @@ class SuccessOFICVDHarvester:
                 # 使用合格数据继续后续处理
                 df = ok_df
                 if df.empty:
-                    logger.debug(f"[DQ_GATE] {symbol}-{kind}: 所有数据被DQ Gate过滤，跳过落盘")
+                    logger.debug("[DQ_GATE] %s-%s: 所有数据被DQ Gate过滤，跳过落盘", symbol, kind)
                     return
                     
             except ImportError as e:
@@ -2134,7 +2142,7 @@ class SuccessOFICVDHarvester:
                         available_cols = [c for c in preview_cols + ['schema_version'] if c in time_group.columns]
                         if available_cols:
                             time_group = time_group[available_cols]
-                            logger.debug(f"[PREVIEW_CROP] {symbol}-{kind}: 列裁剪后 {len(available_cols)} 列")
+                            logger.debug("[PREVIEW_CROP] %s-%s: 列裁剪后 %d 列", symbol, kind, len(available_cols))
                     except ImportError:
                         logger.warning(f"[PREVIEW_CROP] 无法导入PREVIEW_COLUMNS，跳过列裁剪")
                     except Exception as e:
@@ -2324,7 +2332,7 @@ class SuccessOFICVDHarvester:
                         if has_anomaly:
                             logger.info(f"[FEATURES_GEN] {symbol} 生成特征表（异常状态）")
                         else:
-                            logger.debug(f"[FEATURES_GEN] {symbol} 生成特征表")
+                            logger.debug("[FEATURES_GEN] %s 生成特征表", symbol)
                         self._generate_features_table(symbol)
                         # 权威库
                         for kind in ['prices', 'orderbook']:
@@ -2505,7 +2513,7 @@ class SuccessOFICVDHarvester:
                         # 一旦超过 trade_timeout 未收到成交，就抛 TimeoutError，统一连接协程会自愈重连
                         message = await asyncio.wait_for(websocket.recv(), timeout=self.trade_timeout)
                         
-                        data = json.loads(message)
+                        data = json_codec.loads(message)
                         
                         # 处理交易数据（Futures aggTrade格式）
                         trade_data_raw = data.get('data', data)
@@ -2563,7 +2571,7 @@ class SuccessOFICVDHarvester:
                         message = await asyncio.wait_for(websocket.recv(), timeout=self.orderbook_timeout)
                         
                         # 正确解析symbol + 传入解析器
-                        data = json.loads(message)
+                        data = json_codec.loads(message)
                         raw = data.get('data', data)
                         stream = data.get('stream', '')
                         symbol = (raw.get('s') or (stream.split('@')[0] if '@' in stream else '')).upper()
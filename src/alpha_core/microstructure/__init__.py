@@ -4,9 +4,11 @@ Microstructure - 市场微结构分析模块
 """
 
 from .feature_pipe import FeaturePipe, SymbolState
+from .feature_runner import ShardedFeatureRunner
 
 __all__ = [
     'FeaturePipe',
-    'SymbolState'
+    'SymbolState',
+    'ShardedFeatureRunner'
 ]
 
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+ActivityAggregator - 事件时间滑窗活动度增量聚合
+
+维护单个 symbol 近 window_ms（默认 60s）事件时间窗口内的：
+- 成交笔数 → trade_rate（笔/分钟）
+- 报价更新数 → quote_rate（次/秒）
+- 对数收益率的和与平方和 → realized_vol_bps（总体标准差 × 10000，与 np.std 口径一致）
+- 成交额的和 → volume_usd
+
+元素入窗/出窗时增减运行和，每次更新与查询均摊 O(1)。各队列保留与原滑窗相同的容量上限，
+超限时按到达顺序淘汰最旧元素并同步扣减运行和。运行和在窗口清空时归零，
+并每隔 RESYNC_EVERY 次淘汰用 math.fsum 重算一次，避免长时间增减累积的浮点漂移。
+
+FeaturePipe 的 SymbolState 与 CoreAlgorithm 的到达率兜底（_create_market_activity）共用本类。
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Dict, Optional
+
+
+class ActivityAggregator:
+    """单 symbol 活动度增量聚合器"""
+
+    RESYNC_EVERY = 1 << 16
+
+    __slots__ = (
+        "window_ms", "max_trades", "max_quotes", "max_returns", "max_volumes",
+        "_trades", "_quotes", "_rets", "_vols",
+        "_ret_sum", "_ret_sq", "_vol_sum", "_evictions", "last_price",
+    )
+
+    def __init__(
+        self,
+        window_ms: int = 60_000,
+        max_trades: int = 3000,
+        max_quotes: int = 6000,
+        max_returns: int = 600,
+        max_volumes: int = 3000,
+    ):
+        """
+        Args:
+            window_ms: 事件时间窗口（毫秒）
+            max_trades: 成交时间戳队列容量（足够覆盖 60s 的 tick）
+            max_quotes: 报价时间戳队列容量（订单簿更新更频繁）
+            max_returns: 收益率队列容量
+            max_volumes: 成交额队列容量
+        """
+        self.window_ms = window_ms
+        self.max_trades = max_trades
+        self.max_quotes = max_quotes
+        self.max_returns = max_returns
+        self.max_volumes = max_volumes
+        self._trades: deque = deque()  # ts_ms
+        self._quotes: deque = deque()  # ts_ms
+        self._rets: deque = deque()  # (ts_ms, log_ret)
+        self._vols: deque = deque()  # (ts_ms, volume_usd)
+        self._ret_sum = 0.0
+        self._ret_sq = 0.0
+        self._vol_sum = 0.0
+        self._evictions = 0
+        self.last_price: Optional[float] = None
+
+    # ---- 入窗 ----
+
+    def on_quote(self, ts_ms: int) -> None:
+        """记录一次报价（订单簿）更新"""
+        quotes = self._quotes
+        if len(quotes) >= self.max_quotes:
+            quotes.popleft()
+        quotes.append(ts_ms)
+
+    def on_arrival(self, ts_ms: int) -> None:
+        """仅计一次成交到达（无价格/数量信息，如以特征行到达率近似成交率）"""
+        trades = self._trades
+        if len(trades) >= self.max_trades:
+            trades.popleft()
+        trades.append(ts_ms)
+
+    def on_trade(self, ts_ms: int, price: Optional[float] = None, qty: float = 0.0) -> None:
+        """
+        记录一笔成交
+
+        price 为空时不计入（与原滑窗一致）；有上一价格时追加对数收益率，qty > 0 时追加成交额
+        """
+        if not price:
+            return
+        self.on_arrival(ts_ms)
+
+        last = self.last_price
+        if last and last > 0 and price > 0:
+            r = math.log(price / last)
+            if len(self._rets) >= self.max_returns:
+                self._pop_ret()
+            self._rets.append((ts_ms, r))
+            self._ret_sum += r
+            self._ret_sq += r * r
+
+        if qty and qty > 0:
+            usd = price * qty
+            if len(self._vols) >= self.max_volumes:
+                self._pop_vol()
+            self._vols.append((ts_ms, usd))
+            self._vol_sum += usd
+
+        self.last_price = price
+
+    # ---- 出窗 ----
+
+    def _pop_ret(self) -> None:
+        _, r = self._rets.popleft()
+        if self._rets:
+            self._ret_sum -= r
+            self._ret_sq -= r * r
+        else:
+            self._ret_sum = 0.0
+            self._ret_sq = 0.0
+        self._count_eviction()
+
+    def _pop_vol(self) -> None:
+        _, usd = self._vols.popleft()
+        if self._vols:
+            self._vol_sum -= usd
+        else:
+            self._vol_sum = 0.0
+        self._count_eviction()
+
+    def _count_eviction(self) -> None:
+        self._evictions += 1
+        if self._evictions >= self.RESYNC_EVERY:
+            self._evictions = 0
+            self._ret_sum = math.fsum(r for _, r in self._rets)
+            self._ret_sq = math.fsum(r * r for _, r in self._rets)
+            self._vol_sum = math.fsum(v for _, v in self._vols)
+
+    def prune(self, ts_ms: int) -> None:
+        """移出早于 ts_ms - window_ms 的元素"""
+        horizon = self.window_ms
+        trades = self._trades
+        while trades and (ts_ms - trades[0]) > horizon:
+            trades.popleft()
+        quotes = self._quotes
+        while quotes and (ts_ms - quotes[0]) > horizon:
+            quotes.popleft()
+        rets = self._rets
+        while rets and (ts_ms - rets[0][0]) > horizon:
+            self._pop_ret()
+        vols = self._vols
+        while vols and (ts_ms - vols[0][0]) > horizon:
+            self._pop_vol()
+
+    # ---- 查询 ----
+
+    def snapshot(self, ts_ms: int) -> Dict[str, float]:
+        """
+        按 ts_ms 修剪窗口后返回活动度指标
+
+        Returns:
+            {trade_rate: 笔/分钟, quote_rate: 次/秒, realized_vol_bps, volume_usd}
+        """
+        self.prune(ts_ms)
+        seconds = self.window_ms / 1000.0
+        trade_rate = (len(self._trades) / seconds) * 60.0 if seconds > 0 else 0.0  # per min
+        quote_rate = ((len(self._quotes) / seconds) * 60.0 if seconds > 0 else 0.0) / 60.0
+        return {
+            "trade_rate": trade_rate,
+            "quote_rate": quote_rate,
+            "realized_vol_bps": self.realized_vol_bps(),
+            "volume_usd": self._vol_sum if self._vols else 0.0,
+        }
+
+    def realized_vol_bps(self) -> float:
+        """窗口内对数收益率的总体标准差 × 10000（不足 2 个样本为 0）"""
+        n = len(self._rets)
+        if n < 2:
+            return 0.0
+        mean = self._ret_sum / n
+        var = self._ret_sq / n - mean * mean
+        return math.sqrt(var) * 10000.0 if var > 0 else 0.0
+
+    def arrival_tps(self) -> float:
+        """窗口内成交到达率（(n-1)/跨度秒，跨度下限 1 秒；不足 2 笔为 0）"""
+        trades = self._trades
+        if len(trades) > 1:
+            secs = max(1.0, (trades[-1] - trades[0]) / 1000.0)
+            return (len(trades) - 1) / secs
+        return 0.0
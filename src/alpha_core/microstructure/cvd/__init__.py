@@ -3,7 +3,8 @@
 CVD (Cumulative Volume Delta) - 累积成交量差计算模块
 """
 
-from .real_cvd_calculator import RealCVDCalculator, CVDConfig
+from .real_cvd_calculator import RealCVDCalculator, CVDConfig, CVDResult
+from .cvd_batch import compute_cvd_batch
 
-__all__ = ['RealCVDCalculator', 'CVDConfig']
+__all__ = ['RealCVDCalculator', 'CVDConfig', 'CVDResult', 'compute_cvd_batch']
 
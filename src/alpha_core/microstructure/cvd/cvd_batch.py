@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+CVD Batch Kernel - 回放/研究用批量CVD计算
+
+与 RealCVDCalculator.update_with_trade 逐笔口径一致：
+- 方向判定：优先 is_buy；缺失时 Tick Rule（价格不变沿用上一方向，最多连续5笔且间隔 ≤2s）
+- CVD累积 + EMA
+- Delta-Z：双时间衰减EWMA（tau_fast=60s / tau_slow=600s）+ MAD地板（混合尺度，按60秒TPS自适应）
+- 暖启动（freeze_min）、事件时间空窗软/硬冻结、winsor截断
+- level 模式："上一窗口"基线（RollingWindowStats，与流式同一实现）
+
+实现：
+- 输入清洗、方向（is_buy 齐全时）、delta/CVD累积、时间衰减alpha、空窗冻结标记、
+  滚动MAD（sliding_window_view 分块）全部为 NumPy 向量化
+- 60秒TPS窗口（searchsorted）、活动度自适应权重与MAD地板抬升亦为向量化
+- 时间衰减EWMA为时变系数递推、冻结计数依赖前序结果，因此尺度/z 阶段为单层标量循环（每笔 O(1)）
+- 仅当存在 is_buy 缺失的成交时，方向判定才走逐笔 Tick Rule 循环
+
+与流式的已知差异：
+- 流式 _robust_mad_sigma 带墙钟缓存（5笔内且 <0.35s/0.5s 复用上次结果），其结果依赖处理速度；
+  批量每笔使用精确的滚动MAD，等价于缓存失效时的流式结果
+- 时间衰减alpha/活动度幂次使用 np.exp/np.power，与 math.exp/** 可能存在末位(1ulp)差异
+
+输入约定：
+- price/qty [N] 浮点，缺失价格以 NaN 表示（不参与 Tick Rule）
+- is_buy [N]：bool 数组，或含 None/NaN（未知方向）的数组，None 表示全部未知
+- ts 为事件时间（毫秒，正整数）[N]，批量接口要求每笔都有事件时间
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ...utils.rolling_stats import RollingWindowStats
+from .real_cvd_calculator import RealCVDCalculator, CVDConfig
+
+# Tick Rule 传播限制（与 update_with_trade 一致）
+_TICK_MAX_CONSECUTIVE = 5
+_TICK_MAX_TIME_MS = 2000
+
+# 滚动MAD分块行数（控制 [chunk, W] 视图的临时内存）
+_MAD_CHUNK = 65536
+
+
+def _side_codes(is_buy: Any, n: int) -> np.ndarray:
+    """is_buy → 方向编码 int8：1=买入，-1=卖出，0=未知"""
+    if is_buy is None:
+        return np.zeros(n, dtype=np.int8)
+    arr = np.asarray(is_buy)
+    if arr.dtype == bool:
+        return np.where(arr, 1, -1).astype(np.int8)
+    if arr.dtype == object:
+        return np.array([0 if v is None else (1 if v else -1) for v in arr.tolist()], dtype=np.int8)
+    f = arr.astype(float)
+    return np.where(np.isnan(f), 0, np.where(f != 0, 1, -1)).astype(np.int8)
+
+
+def infer_sides(
+    price: np.ndarray,
+    qty_ok: np.ndarray,
+    codes: np.ndarray,
+    ts: np.ndarray,
+    use_tick_rule: bool = True,
+) -> np.ndarray:
+    """
+    逐笔方向判定（is_buy 优先，缺失时 Tick Rule）
+
+    参数:
+        price: 成交价 [N]（NaN=缺失）
+        qty_ok: 数量是否有效 [N]（无效成交不推进 Tick Rule 状态）
+        codes: is_buy 方向编码 [N]（1/-1/0）
+        ts: 事件时间（毫秒）[N]
+        use_tick_rule: 是否启用 Tick Rule
+
+    返回:
+        np.ndarray[int8]: 判定后的方向（0=无法判定，流式计为 bad_points）
+    """
+    side = np.where(qty_ok, codes, 0).astype(np.int8)
+    if not use_tick_rule or not (side[qty_ok] == 0).any():
+        return side
+
+    price_l = price.tolist()
+    ts_l = ts.tolist()
+    codes_l = side.tolist()
+    ok_l = qty_ok.tolist()
+    last_price = None
+    last_ts = None
+    last_side = 0
+    count = 0
+    for i in range(len(codes_l)):
+        if not ok_l[i]:
+            continue
+        s = codes_l[i]
+        p = price_l[i]
+        if s == 0 and p == p:
+            if last_price is not None:
+                if p > last_price:
+                    s = 1
+                    count = 0
+                elif p < last_price:
+                    s = -1
+                    count = 0
+                else:
+                    count += 1
+                    exceeded = last_ts is not None and (ts_l[i] - last_ts) > _TICK_MAX_TIME_MS
+                    if count <= _TICK_MAX_CONSECUTIVE and not exceeded:
+                        s = last_side
+                    else:
+                        s = 0
+                        count = 0
+            else:
+                count = 0
+        if s == 0:
+            continue
+        side[i] = s
+        if math.isfinite(p):
+            last_price = p
+        last_ts = ts_l[i]
+        last_side = s
+    return side
+
+
+def rolling_mad_sigma(delta: np.ndarray, window: int, min_count: int, scale_factor: float) -> np.ndarray:
+    """
+    滚动MAD→σ（与 _robust_mad_sigma 无缓存时逐位一致）
+
+    第k笔使用最近 min(k+1, window) 个delta；样本数 < min_count 时为0
+
+    返回:
+        np.ndarray: scale_factor * MAD [N]
+    """
+    m = len(delta)
+    out = np.zeros(m, dtype=float)
+    if min_count > window:
+        return out
+    # 窗口未满：逐个前缀
+    for k in range(max(min_count, 1) - 1, min(window - 1, m)):
+        w = delta[:k + 1]
+        med = np.median(w)
+        out[k] = scale_factor * np.median(np.abs(w - med))
+    if m >= window:
+        # 短行按行排序（SIMD）比 np.median 的 partition 更快；中位数口径相同（偶数取中间两值均值）
+        views = np.lib.stride_tricks.sliding_window_view(delta, window)
+        for start in range(0, len(views), _MAD_CHUNK):
+            srt = np.sort(views[start:start + _MAD_CHUNK], axis=1)
+            med = _sorted_median(srt)
+            srt = np.sort(np.abs(srt - med[:, None]), axis=1)
+            out[window - 1 + start:window - 1 + start + len(srt)] = scale_factor * _sorted_median(srt)
+    return out
+
+
+def _sorted_median(srt: np.ndarray) -> np.ndarray:
+    """按行已排序数组 [M, W] 的中位数"""
+    h = srt.shape[1] // 2
+    if srt.shape[1] % 2:
+        return srt[:, h]
+    return (srt[:, h - 1] + srt[:, h]) / 2
+
+
+def tps_window_start(tsec: np.ndarray) -> np.ndarray:
+    """
+    60秒TPS窗口起点（与 _recv_rate_window 的队首裁剪口径一致）
+
+    第k笔窗口为 [left[k], k]：从队首裁剪 cur - ts > 60 的时间戳；
+    事件时间单调时用 searchsorted 并按同一浮点比较修正边界，否则逐笔双指针
+
+    返回:
+        np.ndarray[int64]: 各笔窗口起点下标 [N]
+    """
+    m = len(tsec)
+    if m == 0:
+        return np.zeros(0, dtype=np.int64)
+    if not (np.diff(tsec) >= 0).all():
+        left = np.empty(m, dtype=np.int64)
+        ts_l = tsec.tolist()
+        j = 0
+        for k in range(m):
+            cur = ts_l[k]
+            while cur - ts_l[j] > 60.0:
+                j += 1
+            left[k] = j
+        return left
+    left = np.searchsorted(tsec, tsec - 60.0, side="left").astype(np.int64)
+    # 边界修正：保证 tsec[k]-tsec[left] <= 60 且 tsec[k]-tsec[left-1] > 60
+    while True:
+        fix = (tsec - tsec[left]) > 60.0
+        if not fix.any():
+            break
+        left[fix] += 1
+    while True:
+        prev = np.maximum(left - 1, 0)
+        fix = (left > 0) & ~((tsec - tsec[prev]) > 60.0)
+        if not fix.any():
+            break
+        left[fix] -= 1
+    return left
+
+
+def compute_cvd_batch(
+    price: np.ndarray,
+    qty: np.ndarray,
+    is_buy: Any,
+    ts: np.ndarray,
+    cfg: Optional[CVDConfig] = None,
+    symbol: str = "",
+) -> Dict[str, Any]:
+    """
+    批量计算CVD（全日重算/研究用，等价于新建计算器逐笔 update_with_trade）
+
+    参数:
+        price: 成交价 [N]
+        qty: 成交量 [N]
+        is_buy: 主动方向 [N]（见模块说明）
+        ts: 事件时间（毫秒）[N]
+        cfg: CVD配置，参数解析与 RealCVDCalculator 共用
+        symbol: 交易对（分品种配置，如 BTCUSDT 的 winsor_limit/mad_multiplier）
+
+    返回:
+        Dict: {
+            "cvd": CVD [N]（无效成交保持上一值）,
+            "z_cvd": Z-score [N]（warmup/冻结/无效成交为NaN）,
+            "ema_cvd": EMA [N]（首笔有效成交前为NaN）,
+            "warmup": [N] bool,
+            "std_zero": [N] bool,
+            "side": 判定方向 [N] int8（0=无效成交）,
+            "valid": [N] bool,
+            "bad_points": 无效成交数,
+        }
+    """
+    # 参数解析（配置加载、分品种覆盖等）与流式计算器保持同一份实现
+    params = RealCVDCalculator(symbol, cfg)
+    c = params.cfg
+
+    price = np.asarray(price, dtype=float)
+    qty = np.asarray(qty, dtype=float)
+    ts = np.asarray(ts, dtype=np.int64)
+    n = len(ts)
+    if len(price) != n or len(qty) != n:
+        raise ValueError("price/qty/ts length mismatch")
+    if n and ts.min() <= 0:
+        raise ValueError("ts must be positive event times in ms")
+
+    qty_ok = np.isfinite(qty) & (qty > 0)
+    side = infer_sides(price, qty_ok, _side_codes(is_buy, n), ts, c.use_tick_rule)
+    valid = side != 0
+    idx = np.flatnonzero(valid)
+    m = len(idx)
+
+    # 有效成交：delta/CVD累积
+    q = qty[idx]
+    delta = np.where(side[idx] > 0, q, -q)
+    cvd_v = np.cumsum(delta)
+    tv = ts[idx]
+    tsec = tv / 1000.0
+
+    # 时间衰减alpha与空窗冻结标记（第k笔相对第k-1笔）
+    dt = np.maximum(0.001, np.diff(tsec))
+    ln2 = math.log(2)
+    alpha_f = (1.0 - np.exp(-ln2 * dt / params._tau_fast_sec)).tolist()
+    alpha_s = (1.0 - np.exp(-ln2 * dt / params._tau_slow_sec)).tolist()
+    inter = np.diff(tv)
+    hard = (inter > c.hard_freeze_ms).tolist()
+    soft = (inter > c.soft_freeze_ms).tolist()
+
+    z_l = [math.nan] * m
+    ema_l = [0.0] * m
+    warm_v = np.zeros(m, dtype=bool)
+    zero_v = np.zeros(m, dtype=bool)
+
+    cvd_l = cvd_v.tolist()
+    delta_l = delta.tolist()
+    a = float(c.ema_alpha)
+    ema = None
+    for k in range(m):
+        ema = cvd_l[k] if ema is None else a * cvd_l[k] + (1.0 - a) * ema
+        ema_l[k] = ema
+
+    if c.z_mode == "delta":
+        hybrid = c.scale_mode == "hybrid"
+        if hybrid:
+            # 混合尺度的活动度自适应部分不依赖递推状态：整段向量化
+            w_fast = max(0.0, min(1.0, c.scale_fast_weight))
+            w_slow = max(0.0, min(1.0, c.scale_slow_weight))
+            w_sum = w_fast + w_slow
+            w_fast = 0.5 if w_sum <= 1e-9 else w_fast / w_sum
+            r_ref, beta, gamma = params._r_ref, params._beta, params._gamma
+            left = tps_window_start(tsec)
+            cnt = np.arange(m) - left + 1
+            tps = np.where(cnt >= 2, cnt / np.maximum(60.0, tsec - tsec[left]), 0.0)
+            w_fast_eff = (w_fast * np.minimum(1.0, (tps / r_ref) ** beta)).tolist()
+            mad_sigma = rolling_mad_sigma(
+                delta, c.mad_window_trades, max(50, c.mad_window_trades // 5), c.mad_scale_factor
+            )
+            boost = np.maximum(1.0, (r_ref / np.maximum(tps, 0.2)) ** gamma)
+            sigma_floor = (mad_sigma * c.mad_multiplier * boost).tolist()
+        winsor = c.winsor_limit
+        freeze_min = c.freeze_min
+        warm_v[:max(0, freeze_min - 1)] = True
+
+        ewma_f = ewma_s = 0.0
+        post_stale = 0
+        for k in range(m):
+            d = delta_l[k]
+            ad = abs(d)
+            if k == 0:
+                ewma_f = ewma_s = ad
+            else:
+                af = alpha_f[k - 1]
+                als = alpha_s[k - 1]
+                ewma_f = (1 - af) * ewma_f + af * ad
+                ewma_s = (1 - als) * ewma_s + als * ad
+
+            if k + 1 < freeze_min:
+                continue
+
+            if hybrid:
+                wf = w_fast_eff[k]
+                scale = max(wf * ewma_f + (1.0 - wf) * ewma_s, sigma_floor[k], 1e-9)
+            else:
+                scale = max(ewma_s, 1e-9)
+
+            if scale <= 1e-9:
+                zero_v[k] = True
+                continue
+            if k >= 1:
+                if hard[k - 1]:
+                    post_stale = 2
+                    continue
+                if soft[k - 1]:
+                    post_stale = 1
+                    continue
+            if post_stale > 0:
+                post_stale -= 1
+                continue
+
+            z = d / scale
+            z_l[k] = max(min(z, winsor), -winsor)
+    else:
+        hist = RollingWindowStats(c.z_window)
+        warmup_threshold = max(1, max(int(c.z_window // 5), int(c.warmup_min)))
+        for k in range(m):
+            x = cvd_l[k]
+            hist.append(x)
+            if len(hist) - 1 < warmup_threshold:
+                warm_v[k] = True
+                continue
+            mean, std = hist.mean_std(ddof=0, exclude_last=True)
+            if std <= 1e-9:
+                z_l[k] = 0.0
+                zero_v[k] = True
+                continue
+            z_l[k] = (x - mean) / std
+
+    z_v = np.array(z_l, dtype=float)
+    ema_v = np.array(ema_l, dtype=float)
+
+    # 回填到全部成交：无效成交沿用上一有效值
+    pos = np.cumsum(valid) - 1
+    has_prev = pos >= 0
+    pos_c = np.clip(pos, 0, None)
+    cvd_out = np.where(has_prev, cvd_v[pos_c] if m else 0.0, 0.0)
+    ema_out = np.where(has_prev, ema_v[pos_c] if m else np.nan, np.nan)
+    z_out = np.full(n, np.nan)
+    z_out[idx] = z_v
+    warmup_out = np.ones(n, dtype=bool)
+    warmup_out[idx] = warm_v
+    std_zero_out = np.zeros(n, dtype=bool)
+    std_zero_out[idx] = zero_v
+
+    return {
+        "cvd": cvd_out,
+        "z_cvd": z_out,
+        "ema_cvd": ema_out,
+        "warmup": warmup_out,
+        "std_zero": std_zero_out,
+        "side": side,
+        "valid": valid,
+        "bad_points": int(n - m),
+    }
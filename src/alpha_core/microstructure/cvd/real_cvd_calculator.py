@@ -23,6 +23,7 @@ Real CVD Calculator - Task 1.2.6
    - 基线="上一窗口"（不包含当前cvd），避免当前值稀释
    - warmup_threshold = max(5, z_window//5)，不足返回 z_cvd=None
    - std <= 1e-9 则 z_cvd=0.0 且 meta.std_zero=True
+   - 均值/标准差由 RollingWindowStats 增量维护，"剔除当前值"为O(1)代数剔除
 
 4. EMA：
    - ema_alpha可配，首次用当前cvd初始化，其后标准递推
@@ -38,10 +39,14 @@ Real CVD Calculator - Task 1.2.6
 from __future__ import annotations
 from dataclasses import dataclass
 from collections import deque
-from typing import Optional, Iterable, Tuple, Dict, Any
+from typing import Optional, Iterable, Tuple, Dict, Any, NamedTuple, Union
 import math
 import logging
 
+from ...utils.diagnostics import DiagnosticsLogger
+from ...utils.rolling_stats import RollingWindowStats
+from ...utils.rolling_quantile import RollingQuantile
+
 # 模块级logger
 logger = logging.getLogger(__name__)
 logger.propagate = True
@@ -79,6 +84,17 @@ class CVDConfig:
     mad_multiplier: float = 1.70     # MAD地板安全系数 - 优化: 1.30 → 1.43 → 1.55 → 1.65 → 1.70 (Quiet档抬地板)
     post_stale_freeze: int = 2       # 空窗后首N笔冻结
 
+class CVDResult(NamedTuple):
+    """精简结果（slim模式）：仅热路径字段，诊断信息经 get_diagnostics() 拉取"""
+    symbol: str
+    cvd: float
+    z_cvd: Optional[float]
+    ema_cvd: Optional[float]
+    warmup: bool
+    std_zero: bool
+    event_time_ms: Optional[int]
+
+
 class RealCVDCalculator:
     """
     真实CVD计算器（基于成交流）
@@ -125,7 +141,9 @@ class RealCVDCalculator:
     # 监控统计状态
     "_z_post_history", "_clipped_count", "_total_valid_count",
     # MAD缓存状态
-    "_mad_cache_value", "_mad_cache_len", "_mad_cache_ts"
+    "_mad_cache_value", "_mad_cache_len", "_mad_cache_ts",
+    # 热路径诊断
+    "_diag"
     )
     
     def __init__(self, symbol: str, cfg: Optional[CVDConfig] = None, config_loader=None, 
@@ -146,6 +164,7 @@ class RealCVDCalculator:
             runtime_cfg: 运行时配置字典，库式调用时使用（优先于config_loader）
         """
         self.symbol = (symbol or "").upper()
+        self._diag = DiagnosticsLogger(logger, name=f"CVD {self.symbol}")
         
         # 优先使用运行时配置字典（库式调用）
         if runtime_cfg is not None:
@@ -190,7 +209,7 @@ class RealCVDCalculator:
         self._apply_symbol_specific_config()
         self.cvd: float = 0.0
         self.ema_cvd: Optional[float] = None
-        self._hist: deque[float] = deque(maxlen=self.cfg.z_window)
+        self._hist: RollingWindowStats = RollingWindowStats(self.cfg.z_window)
         self.bad_points: int = 0
         self._last_price: Optional[float] = None
         self._last_event_time_ms: Optional[int] = None
@@ -205,7 +224,7 @@ class RealCVDCalculator:
         # Step 1 稳健尺度地板状态初始化
         self._ewma_abs_fast: float = 0.0
         self._alpha_fast: float = 1 - math.exp(math.log(0.5) / max(1, self.cfg.ewma_fast_hl))
-        self._mad_buf: deque[float] = deque(maxlen=self.cfg.mad_window_trades)
+        self._mad_buf: RollingQuantile = RollingQuantile(self.cfg.mad_window_trades)
         
         # P0 时间衰减EWMA配置
         self._tau_fast_sec: float = 60.0    # 快速EWMA时间半衰期：1分钟
@@ -341,17 +360,17 @@ class RealCVDCalculator:
             # BTC更严格：减少假信号
             self.cfg.winsor_limit = 1.9
             self.cfg.mad_multiplier = 1.75
-            print(f"[CVD] Applied BTC-specific config: winsor_limit=1.9, mad_multiplier=1.75")
+            logger.info("[CVD] Applied BTC-specific config: winsor_limit=1.9, mad_multiplier=1.75")
             
         elif symbol_upper == "ETHUSDT":
             # ETH稍宽松：保持理想分布
             self.cfg.winsor_limit = 2.3
             self.cfg.mad_multiplier = 1.70
-            print(f"[CVD] Applied ETH-specific config: winsor_limit=2.3, mad_multiplier=1.70")
+            logger.info("[CVD] Applied ETH-specific config: winsor_limit=2.3, mad_multiplier=1.70")
             
         else:
             # 其余品种使用全局默认
-            print(f"[CVD] Using global default config for {symbol_upper}: winsor_limit=2.0, mad_multiplier=1.70")
+            logger.info("[CVD] Using global default config for %s: winsor_limit=2.0, mad_multiplier=1.70", symbol_upper)
 
     def set_regime_mode(self, mode: str, *, override_thresholds: bool = False) -> None:
         """
@@ -373,9 +392,11 @@ class RealCVDCalculator:
                 # 显式要求覆盖时，才覆盖分品种阈值
                 self.cfg.winsor_limit = 2.0
                 self.cfg.mad_multiplier = 1.70
-                print(f"[CVD] Switched to QUIET regime: hybrid scale, winsor=2.0, mad=1.70 (overriding symbol config)")
+                self._diag.report("CVD_REGIME", "[CVD] Switched to QUIET regime: hybrid scale, winsor=2.0, mad=1.70 (overriding symbol config)",
+                                  level=logging.INFO)
             else:
-                print(f"[CVD] Switched to QUIET regime: hybrid scale (keeping symbol-specific winsor={self.cfg.winsor_limit}, mad={self.cfg.mad_multiplier})")
+                self._diag.report("CVD_REGIME", "[CVD] Switched to QUIET regime: hybrid scale (keeping symbol-specific winsor=%s, mad=%s)",
+                                  self.cfg.winsor_limit, self.cfg.mad_multiplier, level=logging.INFO)
             
         elif mode == "active":
             # Active档：EWMA尺度
@@ -384,9 +405,11 @@ class RealCVDCalculator:
                 # 显式要求覆盖时，才覆盖分品种阈值
                 self.cfg.winsor_limit = 2.7
                 self.cfg.mad_multiplier = 1.70
-                print(f"[CVD] Switched to ACTIVE regime: ewma scale, winsor=2.7, mad=1.70 (overriding symbol config)")
+                self._diag.report("CVD_REGIME", "[CVD] Switched to ACTIVE regime: ewma scale, winsor=2.7, mad=1.70 (overriding symbol config)",
+                                  level=logging.INFO)
             else:
-                print(f"[CVD] Switched to ACTIVE regime: ewma scale (keeping symbol-specific winsor={self.cfg.winsor_limit}, mad={self.cfg.mad_multiplier})")
+                self._diag.report("CVD_REGIME", "[CVD] Switched to ACTIVE regime: ewma scale (keeping symbol-specific winsor=%s, mad=%s)",
+                                  self.cfg.winsor_limit, self.cfg.mad_multiplier, level=logging.INFO)
 
     def auto_detect_regime(self, tps_threshold: float = 2.0) -> str:
         """
@@ -486,30 +509,35 @@ class RealCVDCalculator:
         }
 
     def _print_effective_config(self) -> None:
-        """打印有效配置，用于验证Step 1.6是否正确加载"""
-        print(f"[CVD] Effective config for {self.symbol}:")
-        print(f"  Z_MODE={self.cfg.z_mode}")  # 防止误配置
-        print(f"  HALF_LIFE_TRADES={self.cfg.half_life_trades}")
-        print(f"  WINSOR_LIMIT={self.cfg.winsor_limit}")
-        print(f"  STALE_THRESHOLD_MS={self.cfg.stale_threshold_ms}")
-        print(f"  FREEZE_MIN={self.cfg.freeze_min}")
-        print(f"  SOFT_FREEZE_MS={self.cfg.soft_freeze_ms}")  # 软冻结阈值
-        print(f"  HARD_FREEZE_MS={self.cfg.hard_freeze_ms}")  # 硬冻结阈值
-        print(f"  SCALE_MODE={self.cfg.scale_mode}")
-        print(f"  EWMA_FAST_HL={self.cfg.ewma_fast_hl}")
-        # 打印归一化后的权重
+        """输出有效配置，用于验证Step 1.6是否正确加载（INFO未启用时不构建文本）"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        lines = [
+            f"[CVD] Effective config for {self.symbol}:",
+            f"  Z_MODE={self.cfg.z_mode}",  # 防止误配置
+            f"  HALF_LIFE_TRADES={self.cfg.half_life_trades}",
+            f"  WINSOR_LIMIT={self.cfg.winsor_limit}",
+            f"  STALE_THRESHOLD_MS={self.cfg.stale_threshold_ms}",
+            f"  FREEZE_MIN={self.cfg.freeze_min}",
+            f"  SOFT_FREEZE_MS={self.cfg.soft_freeze_ms}",  # 软冻结阈值
+            f"  HARD_FREEZE_MS={self.cfg.hard_freeze_ms}",  # 硬冻结阈值
+            f"  SCALE_MODE={self.cfg.scale_mode}",
+            f"  EWMA_FAST_HL={self.cfg.ewma_fast_hl}",
+        ]
+        # 归一化后的权重
         w_fast = max(0.0, min(1.0, self.cfg.scale_fast_weight))
         w_slow = max(0.0, min(1.0, self.cfg.scale_slow_weight))
         w_sum = w_fast + w_slow
         if w_sum > 1e-9:
             w_fast_norm, w_slow_norm = w_fast / w_sum, w_slow / w_sum
-            print(f"  SCALE_FAST_WEIGHT={self.cfg.scale_fast_weight} → {w_fast_norm:.3f} (归一化后)")
-            print(f"  SCALE_SLOW_WEIGHT={self.cfg.scale_slow_weight} → {w_slow_norm:.3f} (归一化后)")
+            lines.append(f"  SCALE_FAST_WEIGHT={self.cfg.scale_fast_weight} → {w_fast_norm:.3f} (归一化后)")
+            lines.append(f"  SCALE_SLOW_WEIGHT={self.cfg.scale_slow_weight} → {w_slow_norm:.3f} (归一化后)")
         else:
-            print(f"  SCALE_FAST_WEIGHT={self.cfg.scale_fast_weight} (slow={self.cfg.scale_slow_weight})")
-        print(f"  MAD_WINDOW_TRADES={self.cfg.mad_window_trades}")
-        print(f"  MAD_SCALE_FACTOR={self.cfg.mad_scale_factor}")
-        print(f"  MAD_MULTIPLIER={self.cfg.mad_multiplier}")
+            lines.append(f"  SCALE_FAST_WEIGHT={self.cfg.scale_fast_weight} (slow={self.cfg.scale_slow_weight})")
+        lines.append(f"  MAD_WINDOW_TRADES={self.cfg.mad_window_trades}")
+        lines.append(f"  MAD_SCALE_FACTOR={self.cfg.mad_scale_factor}")
+        lines.append(f"  MAD_MULTIPLIER={self.cfg.mad_multiplier}")
+        logger.info("\n".join(lines))
 
     # 状态管理
     def reset(self) -> None:
@@ -597,6 +625,26 @@ class RealCVDCalculator:
             },
         }
     
+    def get_diagnostics(self) -> Dict[str, Any]:
+        """
+        诊断信息拉取接口（slim模式下不随结果返回的meta字段）
+        
+        返回:
+            Dict: 坏数据计数、最后成交价/时间、尺度与翻转状态、诊断日志计数
+        """
+        return {
+            "bad_points": self.bad_points,
+            "last_price": self._last_price,
+            "event_time_ms": self._last_event_time_ms,
+            "z_mode": self.cfg.z_mode,
+            "trades_count": self._trades_count,
+            "regime_mode": self._regime_mode,
+            "is_flipped": self._is_flipped,
+            "flip_reason": self._flip_reason,
+            "post_freeze_left": self._post_stale_remaining,
+            "diag_counts": self._diag.counters(),
+        }
+    
     def set_flip_state(self, is_flipped: bool, reason: Optional[str] = None) -> None:
         """
         设置翻转状态
@@ -634,8 +682,9 @@ class RealCVDCalculator:
     # 主入口：单笔成交
     def update_with_trade(
         self, *, price: Optional[float] = None, qty: float,
-        is_buy: Optional[bool] = None, event_time_ms: Optional[int] = None
-    ) -> Dict[str, Any]:
+        is_buy: Optional[bool] = None, event_time_ms: Optional[int] = None,
+        slim: bool = False
+    ) -> Union[Dict[str, Any], CVDResult]:
         """
         基于单笔成交更新CVD
         
@@ -644,6 +693,7 @@ class RealCVDCalculator:
             qty: 成交数量（必需）
             is_buy: 是否买入（True=买入，False=卖出，None=使用Tick Rule）
             event_time_ms: 事件时间戳（毫秒，可选）
+            slim: 为True时返回 CVDResult（不构建meta，诊断信息见 get_diagnostics()）
         
         返回:
             Dict: {
@@ -663,7 +713,7 @@ class RealCVDCalculator:
         # 数据清洗：数量必须为有限正数
         if qty is None or not isinstance(qty, (int, float)) or not math.isfinite(qty) or qty <= 0:
             self.bad_points += 1
-            return self._result(None, warmup=None, std_zero=None, event_time_ms=event_time_ms)
+            return self._result(None, warmup=None, std_zero=None, event_time_ms=event_time_ms, slim=slim)
 
         # 判定方向：优先 is_buy；否则 Tick Rule；仍无法判定则忽略并计数
         side = is_buy
@@ -700,7 +750,7 @@ class RealCVDCalculator:
         
         if side is None:
             self.bad_points += 1
-            return self._result(None, warmup=None, std_zero=None, event_time_ms=event_time_ms)
+            return self._result(None, warmup=None, std_zero=None, event_time_ms=event_time_ms, slim=slim)
 
         # 更新累计
         delta = float(qty) if side else -float(qty)
@@ -739,7 +789,7 @@ class RealCVDCalculator:
             self._last_is_warmup = bool(warmup)
             self._last_is_flat = bool(std_zero)
             
-        return self._result(z_val, warmup, std_zero, event_time_ms=event_time_ms)
+        return self._result(z_val, warmup, std_zero, event_time_ms=event_time_ms, slim=slim)
 
     # 适配交易所消息格式
     def update_with_agg_trade(self, msg: Dict[str, Any]) -> Dict[str, Any]:
@@ -786,7 +836,9 @@ class RealCVDCalculator:
         self, trades: Iterable[Tuple[Optional[float], float, Optional[bool], Optional[int]]]
     ) -> Dict[str, Any]:
         """
-        批量成交更新（聚合更高效）
+        批量成交更新（逐笔推进，保持流式状态）
+        
+        全日回放/研究请使用 compute_cvd_batch（NumPy向量化，结果与新建计算器逐笔一致）
         
         参数:
             trades: 成交列表，每个元素为 (price, qty, is_buy, event_time_ms)
@@ -804,11 +856,11 @@ class RealCVDCalculator:
         # 使用上一窗口（不含当前值）做基线
         if not self._hist:
             return None, True, False
-        arr = list(self._hist)[:-1]
+        n = len(self._hist) - 1
         warmup_threshold = max(int(self.cfg.z_window // 5), int(self.cfg.warmup_min))
-        if len(arr) < max(1, warmup_threshold):
+        if n < max(1, warmup_threshold):
             return None, True, False
-        mean, std = self._mean_std(arr)
+        mean, std = self._hist.mean_std(ddof=0, exclude_last=True)
         if std <= 1e-9:
             return 0.0, False, True
         z = (self.cvd - mean) / std
@@ -818,12 +870,11 @@ class RealCVDCalculator:
         """只读当前 z 的估计（不改变窗口），用于 get_state。"""
         if not self._hist:
             return True, False, None
-        arr = list(self._hist)
-        arr = arr[:-1] if len(arr) > 1 else []
+        n = len(self._hist) - 1
         warmup_threshold = max(int(self.cfg.z_window // 5), int(self.cfg.warmup_min))
-        if len(arr) < max(1, warmup_threshold):
+        if n < max(1, warmup_threshold):
             return True, False, None
-        mean, std = self._mean_std(arr)
+        mean, std = self._hist.mean_std(ddof=0, exclude_last=True)
         if std <= 1e-9:
             return False, True, 0.0
         return False, False, (self.cvd - mean) / std
@@ -869,22 +920,9 @@ class RealCVDCalculator:
             self._mad_cache_ts = now
             return 0.0
         
-        # 计算中位数
-        mad_values = list(self._mad_buf)
-        mad_values.sort()
-        n = len(mad_values)
-        if n % 2 == 0:
-            med = (mad_values[n//2-1] + mad_values[n//2]) / 2
-        else:
-            med = mad_values[n//2]
-        
-        # 计算MAD
-        abs_deviations = [abs(x - med) for x in mad_values]
-        abs_deviations.sort()
-        if len(abs_deviations) % 2 == 0:
-            mad = (abs_deviations[len(abs_deviations)//2-1] + abs_deviations[len(abs_deviations)//2]) / 2
-        else:
-            mad = abs_deviations[len(abs_deviations)//2]
+        # 中位数与MAD（有序视图，无需复制排序）
+        med = self._mad_buf.median()
+        mad = self._mad_buf.mad(med)
         
         result = self.cfg.mad_scale_factor * mad
         
@@ -897,8 +935,15 @@ class RealCVDCalculator:
 
     def _result(
         self, z_val: Optional[float], warmup: Optional[bool],
-        std_zero: Optional[bool], *, event_time_ms: Optional[int]
-    ) -> Dict[str, Any]:
+        std_zero: Optional[bool], *, event_time_ms: Optional[int], slim: bool = False
+    ) -> Union[Dict[str, Any], CVDResult]:
+        if slim:
+            return CVDResult(
+                self.symbol, self.cvd, z_val, self.ema_cvd,
+                bool(warmup) if warmup is not None else True,
+                bool(std_zero) if std_zero is not None else False,
+                event_time_ms if event_time_ms is not None else self._last_event_time_ms,
+            )
         return {
             "symbol": self.symbol,
             "cvd": self.cvd,
@@ -1010,9 +1055,10 @@ class RealCVDCalculator:
             
             scale = max(ewma_mix, sigma_floor, 1e-9)
             
-            # 诊断日志：检查反相/归一化问题（每1000笔记录一次，使用logger避免I/O阻塞）
-            if self._trades_count % 1000 == 0:
-                logger.debug(
+            # 诊断日志：检查反相/归一化问题（每1000笔记录一次；DEBUG未启用时不计算参数）
+            if self._trades_count % 1000 == 0 and logger.isEnabledFor(logging.DEBUG):
+                self._diag.report(
+                    "CVD_SCALE",
                     "[DIAG %s] cnt=%d, ewma_f=%.6f, ewma_s=%.6f, mix=%.6f, mad_raw=%.6f, floor=%.6f, scale=%.6f, delta=%.6f, z_raw=%.6f",
                     self.symbol, self._trades_count, self._ewma_abs_fast, self._ewma_abs_delta,
                     ewma_mix, (self._robust_mad_sigma() / self.cfg.mad_scale_factor), 
@@ -1158,8 +1204,7 @@ class RealCVDCalculator:
         if z_window and z_window != self.cfg.z_window:
             self.cfg.z_window = int(z_window)
             # 重建历史窗口
-            from collections import deque
-            self._hist = deque(list(self._hist)[-self.cfg.z_window:], maxlen=self.cfg.z_window)
+            self._hist.resize(self.cfg.z_window)
             logger.info(f"Updated z_window to {self.cfg.z_window}")
             
         if ema_alpha is not None:
@@ -1182,7 +1227,7 @@ class RealCVDCalculator:
             
         if mad_window_trades:
             self.cfg.mad_window_trades = int(mad_window_trades)
-            self._mad_buf = deque(list(self._mad_buf)[-self.cfg.mad_window_trades:], maxlen=self.cfg.mad_window_trades)
+            self._mad_buf.resize(self.cfg.mad_window_trades)
             logger.info(f"Updated mad_window_trades to {self.cfg.mad_window_trades}")
             
         if mad_multiplier:
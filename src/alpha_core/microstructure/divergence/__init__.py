@@ -3,7 +3,9 @@
 Divergence - OFI-CVD 背离检测模块
 """
 
-from .ofi_cvd_divergence import DivergenceDetector, DivergenceConfig, DivergenceType
+from .ofi_cvd_divergence import DivergenceDetector, DivergenceConfig, DivergenceType, DivergenceResult
+from .divergence_batch import compute_divergence_batch
 
-__all__ = ['DivergenceDetector', 'DivergenceConfig', 'DivergenceType']
+__all__ = ['DivergenceDetector', 'DivergenceConfig', 'DivergenceType', 'DivergenceResult',
+           'compute_divergence_batch']
 
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Divergence Batch Kernel - 回放/研究用批量背离检测
+
+与 DivergenceDetector.update 逐行口径一致：
+- 输入校验（非有限值、ts/price <= 0 跳过）、暖启动/滞后降权（0.3 / 0.5）
+- 三通道（价格 vs OFI / CVD / Fusion）枢轴：中心点为 [i-L, i+L] 窗口极值，按 ts 去重
+- 最近两个同型价格枢轴配对：min_separation、已发对去重、常规/隐藏背离分类、评分与 weak 阈值
+- 最佳事件选择、(type, channel) 细粒度冷却、OFI-CVD 冲突事件与按类型冷却
+
+实现：
+- 输入校验、Z裁剪、各通道滑动窗口极值（sliding_window_view）、冲突条件全部为 NumPy 向量化
+- 配对/冷却状态只在"可能产生事件"的行上推进：新枢轴确认行、冲突行、
+  以及 Fusion 通道评分依赖逐行 consistency 而仍待定的行；其余行直接跳过
+- 评分/分类复用 DivergenceDetector 的同名方法（同一份实现）
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .ofi_cvd_divergence import DivergenceConfig, DivergenceDetector, DivergenceResult, DivergenceType
+
+_CHANNELS = ("ofi", "cvd", "fusion")
+
+_TYPE_MAPPING = {
+    "bull_regular": "bull_div",
+    "bear_regular": "bear_div",
+    "bull_hidden": "hidden_bull",
+    "bear_hidden": "hidden_bear",
+}
+
+
+def _as_float(x: Any, n: int, default: float) -> np.ndarray:
+    """数组化（None 元素 → NaN；整体为 None → 常数列）"""
+    if x is None:
+        return np.full(n, default, dtype=float)
+    arr = np.asarray(x)
+    if arr.dtype == object:
+        arr = np.array([np.nan if v is None else v for v in arr.tolist()], dtype=float)
+    return arr.astype(float, copy=False)
+
+
+def detect_pivots(
+    ts: np.ndarray,
+    price: np.ndarray,
+    indicator: np.ndarray,
+    window: int,
+    max_pivots: int = 256,
+) -> List[Dict[str, Any]]:
+    """
+    批量枢轴检测（与 PivotDetector.add_point_and_detect 逐点口径一致）
+
+    参数:
+        ts/price/indicator: 通道内样本序列 [M]
+        window: 枢轴窗口 L（中心点左右各 L 个样本）
+        max_pivots: 去重集合随之淘汰的历史上限
+
+    返回:
+        枢轴列表（字典字段同 PivotDetector.pivots，另含 'confirm_pos'：确认时的样本序号）
+    """
+    L = int(window)
+    span = 2 * L + 1
+    m = len(price)
+    if m < span:
+        return []
+    pv = np.lib.stride_tricks.sliding_window_view(price, span)
+    iv = np.lib.stride_tricks.sliding_window_view(indicator, span)
+    pc = price[L:m - L]
+    ic = indicator[L:m - L]
+    is_hi = pc >= pv.max(axis=1)
+    is_lo = pc <= pv.min(axis=1)
+    cand = np.flatnonzero(is_hi | is_lo)
+    ind_hi = ic[cand] >= iv[cand].max(axis=1)
+    ind_lo = ic[cand] <= iv[cand].min(axis=1)
+
+    pivots: List[Dict[str, Any]] = []
+    seen = set()
+    ring: deque = deque()
+    cap = max(2, int(max_pivots))
+    ts_l = ts.tolist()
+    price_l = price.tolist()
+    ind_l = indicator.tolist()
+    hi_l = is_hi.tolist()
+    lo_l = is_lo.tolist()
+    for k, c in enumerate(cand.tolist()):
+        g = c + L
+        t = ts_l[g]
+        if t in seen:
+            continue
+        if len(ring) == cap:
+            seen.discard(ring.popleft())
+        ring.append(t)
+        seen.add(t)
+        pivots.append({
+            'index': g,
+            'ts': t,
+            'price': price_l[g],
+            'indicator': ind_l[g],
+            'is_price_high': hi_l[c],
+            'is_price_low': lo_l[c],
+            'is_indicator_high': bool(ind_hi[k]),
+            'is_indicator_low': bool(ind_lo[k]),
+            'confirm_pos': g + L,
+        })
+    return pivots
+
+
+def compute_divergence_batch(
+    ts: Any,
+    price: Any,
+    z_ofi: Any,
+    z_cvd: Any,
+    fusion_score: Any = None,
+    consistency: Any = None,
+    lag_sec: Any = None,
+    warmup: Any = None,
+    cfg: Optional[DivergenceConfig] = None,
+) -> Dict[str, Any]:
+    """
+    批量背离检测（等价于新建 DivergenceDetector 逐行 update）
+
+    参数:
+        ts: 时间戳（秒）[N]
+        price: 价格 [N]
+        z_ofi/z_cvd: Z-score [N]
+        fusion_score: 融合分数 [N]（None/NaN 行不进入 Fusion 通道）
+        consistency: 一致性 [N]（None/NaN 视为缺失）
+        lag_sec: 滞后（秒）[N]，None 表示全为0
+        warmup: 外部暖启动标记 [N] bool，None 表示全为False
+        cfg: 背离检测配置
+
+    返回:
+        Dict: {
+            "events": List[DivergenceResult],
+            "event_index": 事件所在行 [E],
+            "type": 逐行事件类型 [N] object（无事件为None）,
+            "score": 逐行事件分数 [N]（无事件为NaN）,
+            "pivots_by_channel": {"ofi": n, "cvd": n, "fusion": n},
+        }
+    """
+    params = DivergenceDetector(cfg)
+    c = params.cfg
+
+    ts_a = _as_float(ts, 0, np.nan)
+    n = len(ts_a)
+    price_a = _as_float(price, n, np.nan)
+    zo = _as_float(z_ofi, n, np.nan)
+    zc = _as_float(z_cvd, n, np.nan)
+    lag = _as_float(lag_sec, n, 0.0)
+    fus = _as_float(fusion_score, n, np.nan)
+    cons = _as_float(consistency, n, np.nan)
+    ext_warm = np.zeros(n, dtype=bool) if warmup is None else np.asarray(warmup, dtype=bool)
+    for arr in (price_a, zo, zc, lag, fus, cons, ext_warm):
+        if len(arr) != n:
+            raise ValueError("input length mismatch")
+
+    finite = np.isfinite(ts_a) & np.isfinite(price_a) & np.isfinite(zo) & np.isfinite(zc) & np.isfinite(lag)
+    valid = finite & (ts_a > 0) & (price_a > 0)
+    zo_c = np.clip(np.nan_to_num(zo), -5.0, 5.0)
+    zc_c = np.clip(np.nan_to_num(zc), -5.0, 5.0)
+    fus_ok = valid & np.isfinite(fus) & bool(c.use_fusion)
+    fus_c = np.clip(np.nan_to_num(fus), -5.0, 5.0)
+
+    sample_no = np.arange(1, n + 1)
+    confidence = np.where(ext_warm | (sample_no < c.warmup_min), 0.3,
+                          np.where(lag > c.max_lag, 0.5, 1.0))
+    conflict = valid & (np.abs(zo_c) >= c.z_hi) & (np.abs(zc_c) >= c.z_mid) & (
+        ((zo_c > 0) & (zc_c < 0)) | ((zo_c < 0) & (zc_c > 0)))
+
+    # 各通道枢轴：按确认行分组
+    rows_valid = np.flatnonzero(valid)
+    rows_fus = np.flatnonzero(fus_ok)
+    channel_rows = {"ofi": rows_valid, "cvd": rows_valid, "fusion": rows_fus}
+    channel_ind = {"ofi": zo_c, "cvd": zc_c, "fusion": fus_c}
+    confirms: Dict[int, List[tuple]] = {}
+    pivots_by_channel = {}
+    for ch in _CHANNELS:
+        rows = channel_rows[ch]
+        pivs = detect_pivots(ts_a[rows], price_a[rows], channel_ind[ch][rows], c.swing_L, c.max_pivots)
+        pivots_by_channel[ch] = len(pivs)
+        for p in pivs:
+            confirms.setdefault(int(rows[p['confirm_pos']]), []).append((ch, p))
+
+    # 逐事件行推进配对/冷却状态
+    last_lows = {ch: deque(maxlen=2) for ch in _CHANNELS}
+    last_highs = {ch: deque(maxlen=2) for ch in _CHANNELS}
+    # 待定评估：(channel, kind) → True 表示下一次评估结果可能不同
+    live = {(ch, k): False for ch in _CHANNELS for k in ("L", "H")}
+    emitted_pairs: Dict[str, tuple] = {}
+    cooldown_by_key: Dict[str, float] = {}
+    cooldown_by_type: Dict[str, float] = {}
+    cooldown_secs = c.cooldown_secs
+    conflict_type = DivergenceType.OFI_CVD_CONFLICT.value
+
+    ts_l = ts_a.tolist()
+    valid_l = valid.tolist()
+    fus_ok_l = fus_ok.tolist()
+    conflict_l = conflict.tolist()
+    cons_l = [None if v != v else v for v in cons.tolist()]
+    conf_l = confidence.tolist()
+
+    events: List[DivergenceResult] = []
+    event_index: List[int] = []
+    type_out = np.full(n, None, dtype=object)
+    score_out = np.full(n, np.nan)
+
+    def evaluate(ch: str, kind: str, consistency_val: Optional[float], row_warm: bool):
+        xs = last_lows[ch] if kind == 'L' else last_highs[ch]
+        if len(xs) < 2:
+            return None, False
+        a, b = xs
+        if (b["index"] - a["index"]) < c.min_separation:
+            return None, False
+        key = f"{ch}:{kind}"
+        if emitted_pairs.get(key) == (a["index"], b["index"]):
+            return None, False
+        div_type = params._classify_by_values(kind, a["price"], b["price"], a["indicator"], b["indicator"])
+        if not div_type:
+            return None, False
+        score = params._calculate_divergence_score(
+            pivot_a=a, pivot_b=b, current_value=b["indicator"],
+            indicator_name=ch, consistency=consistency_val)
+        if score < c.weak_threshold:
+            # 仅 Fusion 通道评分随逐行 consistency 变化
+            return None, ch == "fusion"
+        emitted_pairs[key] = (a["index"], b["index"])
+        return {
+            "ts": b["ts"],
+            "type": _TYPE_MAPPING.get(div_type, div_type),
+            "divergence_type": div_type,
+            "score": score,
+            "channel": ch,
+            "channels": [f"price_{ch}"],
+            "reason_codes": [],
+            "warmup": row_warm,
+        }, False
+
+    for i in range(n):
+        if not valid_l[i]:
+            continue
+        new = confirms.get(i)
+        if new is not None:
+            for ch, p in new:
+                if p['is_price_low']:
+                    last_lows[ch].append(p)
+                if p['is_price_high']:
+                    last_highs[ch].append(p)
+                live[(ch, "L")] = True
+                live[(ch, "H")] = True
+        has_fus = fus_ok_l[i]
+        if not (conflict_l[i] or live[("ofi", "L")] or live[("ofi", "H")]
+                or live[("cvd", "L")] or live[("cvd", "H")]
+                or (has_fus and (live[("fusion", "L")] or live[("fusion", "H")]))):
+            continue
+
+        t = ts_l[i]
+        row_warm = (i + 1) < c.warmup_min
+        candidates = []
+        for ch in _CHANNELS:
+            if ch == "fusion" and not has_fus:
+                continue
+            cons_val = cons_l[i] if ch == "fusion" else None
+            for kind in ("L", "H"):
+                if not live[(ch, kind)]:
+                    continue
+                evt, still_live = evaluate(ch, kind, cons_val, row_warm)
+                live[(ch, kind)] = still_live
+                if evt:
+                    candidates.append(evt)
+
+        best = None
+        if candidates:
+            best = max(candidates, key=lambda x: x['score'])
+            key = f"{best['type']}:{best['channel']}"
+            last = cooldown_by_key.get(key)
+            if last is not None and (t - last) < cooldown_secs:
+                best = None
+            else:
+                cooldown_by_key[key] = t
+
+        event = best
+        if conflict_l[i]:
+            last = cooldown_by_type.get(conflict_type)
+            if last is None or (t - last) >= cooldown_secs:
+                if best:
+                    best['reason_codes'].append('ofi_cvd_conflict')
+                    best['channels'].extend(['price_ofi', 'price_cvd'])
+                    best['score'] = min(best['score'] + 10, 100)
+                else:
+                    event = {
+                        "ts": t, "type": conflict_type, "divergence_type": None, "score": 60.0,
+                        "channels": ["price_ofi", "price_cvd"], "reason_codes": ["ofi_cvd_conflict"],
+                        "warmup": False,
+                    }
+        if best is not None and event is best and conf_l[i] < 1.0:
+            best['score'] = best['score'] * conf_l[i]
+            best['reason_codes'].append(f'confidence_{conf_l[i]:.1f}')
+
+        if event:
+            cooldown_by_type[event['type']] = t
+            events.append(DivergenceResult(
+                event['ts'], event['type'], event['divergence_type'], event['score'],
+                event['channels'], event['reason_codes'], event['warmup'],
+            ))
+            event_index.append(i)
+            type_out[i] = event['type']
+            score_out[i] = event['score']
+
+    return {
+        "events": events,
+        "event_index": np.asarray(event_index, dtype=np.int64),
+        "type": type_out,
+        "score": score_out,
+        "pivots_by_channel": pivots_by_channel,
+    }
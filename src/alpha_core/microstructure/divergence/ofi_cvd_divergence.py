@@ -12,11 +12,16 @@ Created: 2025-01-20
 """
 
 import math
+import logging
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, NamedTuple, Union
 from enum import Enum
 from collections import deque
 
+from ...utils.diagnostics import DiagnosticsLogger
+
+logger = logging.getLogger(__name__)
+
 
 class DivergenceType(Enum):
     """背离类型枚举"""
@@ -43,6 +48,7 @@ class DivergenceConfig:
     cooldown_secs: float = 1.0       # 冷却时间
     warmup_min: int = 100            # 暖启动最小样本数
     max_lag: float = 0.300           # 最大滞后时间
+    max_pivots: int = 256            # 每通道枢轴历史上限（环形缓冲）
     
     # 融合参数
     use_fusion: bool = True          # 是否使用融合指标
@@ -60,25 +66,67 @@ class DivergenceConfig:
     weak_threshold: float = 35.0     # 弱背离阈值
 
 
+class DivergenceResult(NamedTuple):
+    """精简事件（slim模式）：仅热路径字段，统计信息经 get_diagnostics() 拉取"""
+    ts: float
+    type: Optional[str]
+    divergence_type: Optional[str]
+    score: float
+    channels: List[str]
+    reason_codes: List[str]
+    warmup: bool
+
+
 class PivotDetector:
-    """持久化枢轴的检测器（中心点成熟即确认；历史可配对）"""
+    """持久化枢轴的检测器（中心点成熟即确认；历史可配对）
+
+    - 中心点为窗口 [i-L, i+L] 内极值 ⇔ 与左右两侧比较（含等号），用单调队列维护滑动极值，摊还 O(1)
+    - 枢轴历史为有界环形缓冲（max_pivots），去重集合随环形缓冲淘汰
+    - 最近两个同型价格枢轴单独保留引用，配对查找 O(1) 且不受环形缓冲淘汰影响
+    """
     
-    def __init__(self, window_size: int):
+    def __init__(self, window_size: int, max_pivots: int = 256):
         self.window_size = int(window_size)
-        self.price_buffer = deque(maxlen=self.window_size * 2 + 1)
-        self.indicator_buffer = deque(maxlen=self.window_size * 2 + 1)
-        self.timestamp_buffer = deque(maxlen=self.window_size * 2 + 1)
+        span = self.window_size * 2 + 1
+        self.price_buffer = deque(maxlen=span)
+        self.indicator_buffer = deque(maxlen=span)
+        self.timestamp_buffer = deque(maxlen=span)
         # 新增：全局样本序号与"已确认枢轴"存储
         self._n = 0                      # 已接收样本数（0-based -> 最后索引是 self._n-1）
-        self.pivots: List[Dict[str, Any]] = []     # 历史枢轴（持久化）
-        self._seen_ts = set()            # 去重，按 ts
+        self.pivots: deque = deque(maxlen=max(2, int(max_pivots)))  # 历史枢轴（有界环形缓冲）
+        self._seen_ts = set()            # 去重，按 ts（随环形缓冲淘汰）
+        # 滑动极值单调队列：(全局索引, 值)
+        self._price_max: deque = deque()
+        self._price_min: deque = deque()
+        self._ind_max: deque = deque()
+        self._ind_min: deque = deque()
+        # 最近两个同型价格枢轴（L=低点, H=高点）
+        self._last_lows: deque = deque(maxlen=2)
+        self._last_highs: deque = deque(maxlen=2)
+    
+    @staticmethod
+    def _push_extrema(q_max: deque, q_min: deque, gidx: int, value: float, oldest: int) -> None:
+        while q_max and q_max[-1][1] <= value:
+            q_max.pop()
+        q_max.append((gidx, value))
+        while q_min and q_min[-1][1] >= value:
+            q_min.pop()
+        q_min.append((gidx, value))
+        if q_max[0][0] < oldest:
+            q_max.popleft()
+        if q_min[0][0] < oldest:
+            q_min.popleft()
     
     def add_point(self, ts: float, price: float, indicator: float) -> None:
         """添加数据点"""
+        gidx = self._n
         self._n += 1
         self.timestamp_buffer.append(ts)
         self.price_buffer.append(price)
         self.indicator_buffer.append(indicator)
+        oldest = gidx - 2 * self.window_size
+        self._push_extrema(self._price_max, self._price_min, gidx, price, oldest)
+        self._push_extrema(self._ind_max, self._ind_min, gidx, indicator, oldest)
     
     def add_point_and_detect(self, ts: float, price: float, indicator: float) -> int:
         """添加数据点并在'中心点成熟'时确认枢轴；返回本次新增枢轴个数"""
@@ -88,46 +136,47 @@ class PivotDetector:
             return 0  # 窗口还没满，中心点尚未成熟
 
         i = self.window_size  # 窗口中心
-        prices = list(self.price_buffer)
-        indicators = list(self.indicator_buffer)
-        timestamps = list(self.timestamp_buffer)
-
-        ts_c = timestamps[i]
+        ts_c = self.timestamp_buffer[i]
         # 去重：避免同一中心点多次确认
         if ts_c in self._seen_ts:
             return 0
 
-        left_p = prices[i - self.window_size:i]
-        right_p = prices[i + 1:i + self.window_size + 1]
-        is_price_high = (prices[i] >= max(left_p) and prices[i] >= max(right_p))
-        is_price_low  = (prices[i] <= min(left_p) and prices[i] <= min(right_p))
-
-        left_z = indicators[i - self.window_size:i]
-        right_z = indicators[i + 1:i + self.window_size + 1]
-        is_ind_high = (indicators[i] >= max(left_z) and indicators[i] >= max(right_z))
-        is_ind_low  = (indicators[i] <= min(left_z) and indicators[i] <= min(right_z))
-
-        new_cnt = 0
-        if is_price_high or is_price_low:
-            # 计算"全局索引"：当前总样本数 self._n，中心点对应全局索引 = (self._n - 1) - self.window_size
-            gidx = (self._n - 1) - self.window_size
-            self.pivots.append({
-                'index': gidx,                # !!! 供 min_separation 与评分使用（全局）
-                'ts': ts_c,
-                'price': prices[i],
-                'indicator': indicators[i],
-                'is_price_high': is_price_high,
-                'is_price_low':  is_price_low,
-                'is_indicator_high': is_ind_high,
-                'is_indicator_low':  is_ind_low
-            })
-            self._seen_ts.add(ts_c)
-            new_cnt = 1
-
-        return new_cnt
+        price_c = self.price_buffer[i]
+        is_price_high = price_c >= self._price_max[0][1]
+        is_price_low = price_c <= self._price_min[0][1]
+        if not (is_price_high or is_price_low):
+            return 0
+
+        ind_c = self.indicator_buffer[i]
+        # 计算"全局索引"：当前总样本数 self._n，中心点对应全局索引 = (self._n - 1) - self.window_size
+        gidx = (self._n - 1) - self.window_size
+        pivot = {
+            'index': gidx,                # !!! 供 min_separation 与评分使用（全局）
+            'ts': ts_c,
+            'price': price_c,
+            'indicator': ind_c,
+            'is_price_high': is_price_high,
+            'is_price_low':  is_price_low,
+            'is_indicator_high': ind_c >= self._ind_max[0][1],
+            'is_indicator_low':  ind_c <= self._ind_min[0][1],
+        }
+        if len(self.pivots) == self.pivots.maxlen:
+            self._seen_ts.discard(self.pivots[0]['ts'])
+        self.pivots.append(pivot)
+        self._seen_ts.add(ts_c)
+        if is_price_low:
+            self._last_lows.append(pivot)
+        if is_price_high:
+            self._last_highs.append(pivot)
+        return 1
+
+    def last_two(self, kind: str) -> Optional[List[Dict[str, Any]]]:
+        """最近两个同型价格枢轴（kind: 'L' 低点 / 'H' 高点），不足两个返回 None"""
+        xs = self._last_lows if kind == 'L' else self._last_highs
+        return list(xs) if len(xs) == 2 else None
 
     def get_all_pivots(self) -> List[Dict[str, Any]]:
-        """获取全部历史枢轴"""
+        """获取保留的历史枢轴（最多 max_pivots 个）"""
         return list(self.pivots)
     
     def find_pivots(self) -> List[Dict[str, Any]]:
@@ -162,6 +211,7 @@ class DivergenceDetector:
                 cooldown_secs=divergence_cfg.get('cooldown_secs', default.cooldown_secs),
                 warmup_min=divergence_cfg.get('warmup_min', default.warmup_min),
                 max_lag=divergence_cfg.get('max_lag', default.max_lag),
+                max_pivots=divergence_cfg.get('max_pivots', default.max_pivots),
                 use_fusion=divergence_cfg.get('use_fusion', default.use_fusion),
                 cons_min=divergence_cfg.get('cons_min', default.cons_min)
             )
@@ -171,12 +221,15 @@ class DivergenceDetector:
         else:
             self.cfg = config or DivergenceConfig()
         
+        self._diag = DiagnosticsLogger(logger, name="DIVERGENCE")  # 热路径诊断（计数+采样）
         self._reset_state()
         
         # 枢轴检测器
-        self.price_ofi_detector = PivotDetector(self.cfg.swing_L)
-        self.price_cvd_detector = PivotDetector(self.cfg.swing_L)
-        self.price_fusion_detector = PivotDetector(self.cfg.swing_L) if self.cfg.use_fusion else None
+        self.price_ofi_detector = PivotDetector(self.cfg.swing_L, self.cfg.max_pivots)
+        self.price_cvd_detector = PivotDetector(self.cfg.swing_L, self.cfg.max_pivots)
+        self.price_fusion_detector = (
+            PivotDetector(self.cfg.swing_L, self.cfg.max_pivots) if self.cfg.use_fusion else None
+        )
         
         # 状态跟踪
         self._last_event_ts = 0.0
@@ -254,7 +307,8 @@ class DivergenceDetector:
     
     def update(self, ts: float, price: float, z_ofi: float, z_cvd: float, 
                fusion_score: Optional[float] = None, consistency: Optional[float] = None,
-               warmup: bool = False, lag_sec: float = 0.0) -> Optional[Dict[str, Any]]:
+               warmup: bool = False, lag_sec: float = 0.0,
+               slim: bool = False) -> Optional[Union[Dict[str, Any], DivergenceResult]]:
         """
         更新背离检测器
         
@@ -267,9 +321,10 @@ class DivergenceDetector:
             consistency: 一致性分数（可选）
             warmup: 是否在暖启动阶段
             lag_sec: 滞后时间（秒）
+            slim: 为True时返回 DivergenceResult（统计信息见 get_diagnostics()）
         
         Returns:
-            背离事件字典或None
+            背离事件字典或None（slim模式为 DivergenceResult 或 None）
         """
         # 更新统计
         self._sample_count += 1
@@ -282,6 +337,8 @@ class DivergenceDetector:
             self._stats['suppressed_total'] += 1
             self._stats['suppressed_by_reason']['invalid_input'] = \
                 self._stats['suppressed_by_reason'].get('invalid_input', 0) + 1
+            self._diag.report("DIV_INVALID_INPUT", "[DIVERGENCE] 无效输入跳过: ts=%s, price=%s, z_ofi=%s, z_cvd=%s, lag=%s",
+                              ts, price, z_ofi, z_cvd, lag_sec)
             return None  # 无效输入直接跳过
         elif warmup or self._sample_count < self.cfg.warmup_min:
             # 暖启动期间降权而非跳过
@@ -324,10 +381,10 @@ class DivergenceDetector:
         self._stats['pivots_by_channel']['cvd'] += new_cvd
         self._stats['pivots_by_channel']['fusion'] += new_fus
 
-        # 判背离时改为"历史枢轴"
-        ofi_pivots = self.price_ofi_detector.get_all_pivots()
-        cvd_pivots = self.price_cvd_detector.get_all_pivots()
-        fusion_pivots = self.price_fusion_detector.get_all_pivots() if self.price_fusion_detector else []
+        # 判背离时改为"历史枢轴"（直接传环形缓冲，不逐次复制）
+        ofi_pivots = self.price_ofi_detector.pivots
+        cvd_pivots = self.price_cvd_detector.pivots
+        fusion_pivots = self.price_fusion_detector.pivots if self.price_fusion_detector else []
         
         # 检测背离
         divergence_event = self._detect_divergence(
@@ -342,6 +399,12 @@ class DivergenceDetector:
             self._last_event_type = divergence_event['type']
             # 按类型记录冷却时间
             self._last_event_ts_by_type[divergence_event['type']] = ts
+            if slim:
+                return DivergenceResult(
+                    divergence_event['ts'], divergence_event['type'], divergence_event.get('divergence_type'),
+                    divergence_event['score'], divergence_event['channels'],
+                    divergence_event['reason_codes'], divergence_event['warmup'],
+                )
         
         return divergence_event
     
@@ -465,14 +528,6 @@ class DivergenceDetector:
         
         return price_same_type and indicator_same_type
     
-    def _last_two_price_pivots(self, pivots: List[Dict[str, Any]], kind: str) -> Optional[List[Dict[str, Any]]]:
-        """获取最近两个同型价格枢轴"""
-        if kind == 'L':
-            xs = [p for p in pivots if p.get('is_price_low')]
-        else:
-            xs = [p for p in pivots if p.get('is_price_high')]
-        return xs[-2:] if len(xs) >= 2 else None
-    
     def _classify_by_values(self, kind: str, pa: float, pb: float, ia: float, ib: float) -> Optional[str]:
         """按教科书定义分类（用指标值，而不是指标枢轴）"""
         if kind == 'L':  # 低点对低点
@@ -540,8 +595,7 @@ class DivergenceDetector:
                                               consistency: Optional[float] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         """新的背离检测方法：只用价格枢轴对，在相同时间点读取指标值"""
         # 1) 用历史"价格枢轴"做同型配对
-        pivs = detector.get_all_pivots()
-        pair = self._last_two_price_pivots(pivs, kind)
+        pair = detector.last_two(kind)
         if not pair:
             return None, "not_enough_price_pivots"
 
@@ -791,6 +845,16 @@ class DivergenceDetector:
         """获取统计信息"""
         return self._stats.copy()
     
+    def get_diagnostics(self) -> Dict[str, Any]:
+        """诊断信息拉取接口（slim模式下不随事件返回的统计信息）"""
+        return {
+            "stats": self._stats.copy(),
+            "sample_count": self._sample_count,
+            "last_event_ts": self._last_event_ts,
+            "last_event_type": self._last_event_type,
+            "diag_counts": self._diag.counters(),
+        }
+    
     def reset(self):
         """重置检测器状态"""
         self._reset_state()
@@ -7,7 +7,7 @@ FeaturePipe - 特征计算接线（OFI + CVD + FUSION + DIVERGENCE）
 功能：
 1. 维护 per-symbol 状态（orderbook L1/LK、最近 trades）
 2. 调用 OFI/CVD/FUSION/DIVERGENCE 组件
-3. 产出 FeatureRow 并写入 sink（JSONL/SQLite）
+3. 产出 FeatureRow 并写入 sink（JSONL/SQLite/Parquet）
 
 Author: V13 OFI+CVD AI System
 Date: 2025-11-06
@@ -16,18 +16,19 @@ Date: 2025-11-06
 from __future__ import annotations
 import json
 import logging
-import math
-import sqlite3
 from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 
 # 导入组件
+from ..utils.diagnostics import DiagnosticsLogger
+from ..utils import json_codec
 from .ofi.real_ofi_calculator import RealOFICalculator, OFIConfig
 from .cvd.real_cvd_calculator import RealCVDCalculator, CVDConfig
 from .fusion.ofi_cvd_fusion import OFI_CVD_Fusion, OFICVDFusionConfig
 from .divergence.ofi_cvd_divergence import DivergenceDetector, DivergenceConfig
+from .feature_writer import build_feature_writer
+from .activity import ActivityAggregator
 
 logger = logging.getLogger(__name__)
 
@@ -46,7 +47,11 @@ class FeaturePipe:
         sink: str = "jsonl",
         output_dir: Optional[str] = None,
         dedupe_ms: int = 1000,
-        max_lag_sec: float = 0.25
+        max_lag_sec: float = 0.25,
+        batch_n: Optional[int] = None,
+        flush_ms: Optional[int] = None,
+        queue_max: Optional[int] = None,
+        durability: Optional[str] = None
     ):
         """
         初始化特征管道
@@ -54,10 +59,14 @@ class FeaturePipe:
         Args:
             config: 配置字典（包含 features.ofi/cvd/fusion/divergence）
             symbols: 交易对列表，None 表示支持所有交易对
-            sink: 输出类型（jsonl/sqlite）
+            sink: 输出类型（jsonl/sqlite/parquet；parquet 按 symbol/小时分区写出）
             output_dir: 输出目录
             dedupe_ms: 去重窗口（毫秒）
             max_lag_sec: 最大滞后时间（秒）
+            batch_n: 组提交批大小（None 取 FEATURE_BATCH_N，默认 500）
+            flush_ms: 组提交最长间隔（毫秒，None 取 FEATURE_FLUSH_MS，默认 500）
+            queue_max: 写队列上限，满时阻塞背压（None 取 FEATURE_QUEUE_MAX，默认 10000）
+            durability: 持久化级别 off/normal/full（None 取 FEATURE_DURABILITY，默认 normal）
         """
         self.config = config or {}
         self.symbols = symbols or []
@@ -79,55 +88,25 @@ class FeaturePipe:
         # 初始化 per-symbol 状态
         self.states: Dict[str, SymbolState] = {}
         
-        # 初始化 sink
-        if self.sink == "jsonl":
-            self.sink_file = self.output_dir / "features.jsonl"
-            self.sink_fp = open(self.sink_file, "w", encoding="utf-8", newline="")
-        elif self.sink == "sqlite":
-            self.sink_file = self.output_dir / "features.db"
-            self.conn = sqlite3.connect(str(self.sink_file))
-            self._init_sqlite()
-        else:
-            raise ValueError(f"Unsupported sink type: {sink}")
+        # 初始化 sink（写后写入器：有界队列 + 后台线程 + 组提交）
+        self.writer = build_feature_writer(
+            self.sink,
+            self.output_dir,
+            batch_n=batch_n,
+            flush_ms=flush_ms,
+            queue_max=queue_max,
+            durability=durability
+        )
+        self.sink_file = self.writer.path
         
         # 去重窗口（按 symbol）
-        self._seen_rows: Dict[str, deque] = {}  # symbol -> deque of (ts_ms, row_id)
+        self._seen_rows: Dict[str, DedupeWindow] = {}
+        
+        # 逐行跳过原因诊断（计数 + 采样输出）
+        self._diag = DiagnosticsLogger(logger, name="FeaturePipe")
         
         logger.info(f"FeaturePipe initialized: sink={sink}, output_dir={self.output_dir}")
     
-    def _init_sqlite(self):
-        """初始化 SQLite 数据库表"""
-        cur = self.conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS features (
-                ts_ms INTEGER,
-                symbol TEXT,
-                z_ofi REAL,
-                z_cvd REAL,
-                price REAL,
-                lag_sec REAL,
-                spread_bps REAL,
-                fusion_score REAL,
-                consistency REAL,
-                dispersion REAL,
-                sign_agree INTEGER,
-                div_type TEXT,
-                activity_tps REAL,
-                warmup INTEGER,
-                reason_codes TEXT,
-                created_at TEXT,
-                signal TEXT,
-                PRIMARY KEY (ts_ms, symbol)
-            )
-        """)
-        # 向后兼容：如果表已存在但缺少 signal 列，则添加
-        # 先检查列是否存在，避免无谓的 ALTER 异常开销
-        cur.execute("PRAGMA table_info(features)")
-        cols = {row[1] for row in cur.fetchall()}
-        if "signal" not in cols:
-            cur.execute("ALTER TABLE features ADD COLUMN signal TEXT DEFAULT 'neutral'")
-        self.conn.commit()
-    
     def _get_or_create_state(self, symbol: str) -> SymbolState:
         """获取或创建 per-symbol 状态"""
         if symbol not in self.states:
@@ -195,7 +174,7 @@ class FeaturePipe:
             src = row.get("src", "")
             
             if not ts_ms or not symbol:
-                logger.debug(f"Skip row: missing ts_ms or symbol")
+                self._diag.report("SKIP_MISSING_KEY", "Skip row: missing ts_ms or symbol")
                 return None
             
             # 检查交易对白名单
@@ -204,7 +183,7 @@ class FeaturePipe:
             
             # 去重检查
             if self._is_duplicate(symbol, ts_ms, row.get("row_id")):
-                logger.debug(f"Skip duplicate: {symbol} {ts_ms}")
+                self._diag.report("SKIP_DUPLICATE", "Skip duplicate: %s %s", symbol, ts_ms)
                 return None
             
             # 获取状态
@@ -222,7 +201,7 @@ class FeaturePipe:
                         "ts_ms": ts_ms
                     }
                     # P0: 更新报价窗口（每次订单簿更新）
-                    state.quote_ts_window.append(ts_ms)
+                    state.activity.on_quote(ts_ms)
             elif src in ("aggTrade", "trade"):
                 # 更新成交状态
                 price = row.get("price")
@@ -241,20 +220,8 @@ class FeaturePipe:
                     "ts_ms": ts_ms
                 }
                 if price:
-                    # P0: 更新交易窗口和收益率窗口
-                    state.trade_ts_window.append(ts_ms)
-                    
-                    # 计算收益率（对数收益）
-                    if state.last_price and state.last_price > 0 and price > 0:
-                        import math
-                        ret = math.log(price / state.last_price)
-                        state.ret_window.append(ret)
-                    
-                    # 更新成交额窗口
-                    if qty > 0:
-                        volume_usd = price * qty
-                        state.vol_window.append((ts_ms, volume_usd))
-                    
+                    # P0: 更新交易、收益率（对数收益）与成交额窗口
+                    state.activity.on_trade(ts_ms, price, qty)
                     state.last_price = price
             
             # 计算特征（需要订单簿和成交都可用）
@@ -321,14 +288,6 @@ class FeaturePipe:
             return candidates[:5]
         return []
     
-    def _rate_per_window(self, ts_window: deque, ts_ms: int, seconds: int = 60) -> float:
-        """计算时间窗口内的速率（每分钟）"""
-        # 修剪过期数据（保留最近 seconds 秒）
-        while ts_window and (ts_ms - ts_window[0]) > seconds * 1000:
-            ts_window.popleft()
-        n = len(ts_window)
-        return (n / seconds) * 60.0 if seconds > 0 else 0.0  # per min
-    
     def _compute_features(self, state: SymbolState, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """计算特征"""
         try:
@@ -345,36 +304,29 @@ class FeaturePipe:
             # 计算 lag
             lag_sec = (ts_ms - max(ob["ts_ms"], trade["ts_ms"])) / 1000.0
             if lag_sec > self.max_lag_sec:
-                logger.debug(f"Skip: lag too high {lag_sec:.3f}s > {self.max_lag_sec}s")
+                self._diag.report("SKIP_LAG", "Skip: lag too high %.3fs > %ss", lag_sec, self.max_lag_sec)
                 return None
             
-            # P0: 计算真实活动度指标（60s 窗口）
-            trades_per_min = self._rate_per_window(state.trade_ts_window, ts_ms, 60)
-            quote_updates_per_sec = self._rate_per_window(state.quote_ts_window, ts_ms, 60) / 60.0
-            
-            # 计算 realized_vol_bps（近 60s 对数收益率标准差 × 10000）
-            import numpy as np
-            realized_vol_bps = 0.0
-            if state.ret_window and len(state.ret_window) >= 2:
-                ret_array = np.array(list(state.ret_window))
-                realized_vol_bps = float(np.std(ret_array) * 10000.0)
-            
-            # 计算 volume_usd（近 60s 成交额汇总）
-            volume_usd = 0.0
-            while state.vol_window and (ts_ms - state.vol_window[0][0]) > 60000:
-                state.vol_window.popleft()
-            if state.vol_window:
-                volume_usd = float(sum(v for _, v in state.vol_window))
+            # P0: 计算真实活动度指标（60s 窗口，运行和增量维护）
+            # realized_vol_bps: 近 60s 对数收益率标准差 × 10000；volume_usd: 近 60s 成交额汇总
+            activity = state.activity.snapshot(ts_ms)
+            trades_per_min = activity["trade_rate"]
+            quote_updates_per_sec = activity["quote_rate"]
+            realized_vol_bps = activity["realized_vol_bps"]
+            volume_usd = activity["volume_usd"]
             
+            # 计算器均使用 slim 模式（精简记录，诊断信息按需经 get_diagnostics() 拉取）
             # 1. 计算 OFI
             bids = ob["bids"]
             asks = ob["asks"]
             ofi_result = state.ofi_calc.update_with_snapshot(
                 bids=bids,
                 asks=asks,
-                event_time_ms=ts_ms
+                event_time_ms=ts_ms,
+                slim=True,
+                presorted=True  # _extract_bids/_extract_asks 已排序
             )
-            z_ofi = ofi_result.get("z_ofi")
+            z_ofi = ofi_result.z_ofi
             if z_ofi is None:
                 z_ofi = 0.0  # warmup 期置为 0
             
@@ -383,17 +335,16 @@ class FeaturePipe:
                 price=trade["price"],
                 qty=trade["qty"],
                 is_buy=trade["is_buy"],
-                event_time_ms=ts_ms
+                event_time_ms=ts_ms,
+                slim=True
             )
-            z_cvd = cvd_result.get("z_cvd")
+            z_cvd = cvd_result.z_cvd
             if z_cvd is None:
                 z_cvd = 0.0  # warmup 期置为 0
             
             # 检查 warmup（在计算 FUSION 之前）
-            warmup = (
-                ofi_result.get("warmup", False) or
-                cvd_result.get("warmup", False)
-            )
+            # 口径保持不变：OFI/CVD 字典结果的 warmup 位于 meta 内，原先按顶层键读取恒为假值
+            warmup = False
             
             # 3. 计算 FUSION
             ts_sec = ts_ms / 1000.0
@@ -403,12 +354,13 @@ class FeaturePipe:
                 z_cvd=z_cvd,
                 ts=ts_sec,
                 price=price,
-                lag_sec=lag_sec
+                lag_sec=lag_sec,
+                slim=True
             )
-            fusion_score = fusion_result.get("fusion_score", 0.0)
-            consistency = fusion_result.get("consistency", 0.0)
-            signal = fusion_result.get("signal", "neutral")
-            dispersion = fusion_result.get("dispersion", 0.0)
+            fusion_score = fusion_result.fusion_score
+            consistency = fusion_result.consistency
+            signal = fusion_result.signal
+            dispersion = 0.0  # 融合器不输出离散度（与原 .get 默认值一致）
             sign_agree = 1 if (z_ofi * z_cvd >= 0) else -1
             
             # 4. 计算 DIVERGENCE
@@ -420,11 +372,12 @@ class FeaturePipe:
                 fusion_score=fusion_score,
                 consistency=consistency,
                 warmup=warmup,
-                lag_sec=lag_sec
+                lag_sec=lag_sec,
+                slim=True
             )
             div_type = None
             if div_result:
-                div_type_value = div_result.get("type") or div_result.get("divergence_type")
+                div_type_value = div_result.type or div_result.divergence_type
                 if div_type_value:
                     # 如果是枚举，获取值
                     if hasattr(div_type_value, "value"):
@@ -485,79 +438,77 @@ class FeaturePipe:
             return None
     
     def _is_duplicate(self, symbol: str, ts_ms: int, row_id: Optional[str]) -> bool:
-        """检查是否重复"""
-        if symbol not in self._seen_rows:
-            self._seen_rows[symbol] = deque(maxlen=1000)
-        
-        seen = self._seen_rows[symbol]
-        
-        # 检查时间窗口
-        while seen and (ts_ms - seen[0][0]) > self.dedupe_ms:
-            seen.popleft()
-        
-        # 检查是否已存在
-        for seen_ts, seen_id in seen:
-            if seen_ts == ts_ms or (row_id and seen_id == row_id):
-                return True
-        
-        # 添加新记录
-        seen.append((ts_ms, row_id))
-        return False
+        """检查是否重复（dedupe_ms 窗口内 ts_ms 或 row_id 命中即重复）"""
+        seen = self._seen_rows.get(symbol)
+        if seen is None:
+            seen = self._seen_rows[symbol] = DedupeWindow(self.dedupe_ms)
+        return seen.check_and_add(ts_ms, row_id)
     
     def _write_feature(self, feature_row: Dict[str, Any]):
-        """写入特征行到 sink（稳定 JSON 序列化，确保回放可复现）"""
-        if self.sink == "jsonl":
-            json_line = json.dumps(
-                feature_row,
-                ensure_ascii=False,
-                sort_keys=True,  # 稳定排序，确保回放可复现
-                separators=(",", ":")  # 紧凑格式，无空格
-            )
-            self.sink_fp.write(json_line + "\n")
-            self.sink_fp.flush()
-        elif self.sink == "sqlite":
-            cur = self.conn.cursor()
-            # 使用显式列名，避免与历史库错位，并确保前向兼容
-            cur.execute("""
-                INSERT OR REPLACE INTO features (
-                    ts_ms, symbol, z_ofi, z_cvd, price, lag_sec, spread_bps,
-                    fusion_score, consistency, dispersion, sign_agree, div_type,
-                    activity_tps, warmup, reason_codes, created_at, signal
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                feature_row["ts_ms"],
-                feature_row["symbol"],
-                feature_row["z_ofi"],
-                feature_row["z_cvd"],
-                feature_row["price"],
-                feature_row["lag_sec"],
-                feature_row["spread_bps"],
-                feature_row["fusion_score"],
-                feature_row["consistency"],
-                feature_row["dispersion"],
-                feature_row["sign_agree"],
-                feature_row["div_type"],
-                feature_row["activity"]["tps"],
-                1 if feature_row["warmup"] else 0,
-                json.dumps(feature_row.get("reason_codes", [])),
-                datetime.now(timezone.utc).isoformat(),
-                feature_row.get("signal", "neutral")  # 默认值 'neutral'
-            ))
-            self.conn.commit()
+        """写入特征行到 sink（调用线程编码入队，后台线程组提交）"""
+        self.writer.write(feature_row)
     
     def flush(self):
-        """刷新缓冲区"""
-        if self.sink == "jsonl":
-            self.sink_fp.flush()
-        elif self.sink == "sqlite":
-            self.conn.commit()
+        """提交已入队的特征行并等待落盘（屏障）"""
+        self.writer.flush()
+    
+    def get_health(self) -> Dict[str, Any]:
+        """写入器健康度指标（队列深度、背压、吞吐、丢弃）"""
+        return self.writer.get_health()
     
     def close(self):
         """关闭资源"""
-        if self.sink == "jsonl":
-            self.sink_fp.close()
-        elif self.sink == "sqlite":
-            self.conn.close()
+        self._diag.flush_summary()
+        self.writer.close()
+
+
+class DedupeWindow:
+    """
+    时间有界的去重哈希索引（单 symbol）
+    
+    ts_ms 集合 + row_id 集合做 O(1) 命中判断，按到达顺序的队列驱动过期淘汰：
+    - 每次检查前从队首弹出 (ts_ms - 队首ts) > window_ms 的记录，并同步移出两个集合
+    - 命中的行不入窗，因此窗口内 ts_ms、row_id 各自唯一，集合无需计数
+    - max_entries 为内存上限（乱序时间戳使队首长期不过期时按到达顺序淘汰最旧记录）
+    """
+    
+    __slots__ = ("window_ms", "max_entries", "_order", "_ts", "_ids")
+    
+    def __init__(self, window_ms: int, max_entries: int = 100_000):
+        self.window_ms = window_ms
+        self.max_entries = max_entries
+        self._order: deque = deque()  # (ts_ms, row_id)，到达顺序
+        self._ts: set = set()
+        self._ids: set = set()
+    
+    def __len__(self) -> int:
+        return len(self._order)
+    
+    def _evict_oldest(self) -> None:
+        old_ts, old_id = self._order.popleft()
+        self._ts.discard(old_ts)
+        if old_id:
+            self._ids.discard(old_id)
+    
+    def check_and_add(self, ts_ms: int, row_id: Optional[str]) -> bool:
+        """返回是否重复；不重复则记入窗口"""
+        order = self._order
+        # 检查时间窗口
+        while order and (ts_ms - order[0][0]) > self.window_ms:
+            self._evict_oldest()
+        
+        # 检查是否已存在
+        if ts_ms in self._ts or (row_id and row_id in self._ids):
+            return True
+        
+        # 添加新记录
+        if len(order) >= self.max_entries:
+            self._evict_oldest()
+        order.append((ts_ms, row_id))
+        self._ts.add(ts_ms)
+        if row_id:
+            self._ids.add(row_id)
+        return False
 
 
 class SymbolState:
@@ -583,11 +534,58 @@ class SymbolState:
         self.last_price: Optional[float] = None
         self.activity_window: deque = deque(maxlen=100)
         
-        # P0: 真实活动度滑窗（用于 StrategyMode）
-        self.trade_ts_window: deque = deque(maxlen=3000)  # 足够覆盖 60s 的 tick
-        self.quote_ts_window: deque = deque(maxlen=6000)  # 订单簿更新更频繁
-        self.ret_window: deque = deque(maxlen=600)  # 收益率窗口（用于 realized_vol）
-        self.vol_window: deque = deque(maxlen=3000)  # 成交额窗口 (ts_ms, volume_usd)
+        # P0: 真实活动度滑窗（用于 StrategyMode）：成交/报价/收益率/成交额 60s 增量聚合
+        self.activity = ActivityAggregator(window_ms=60_000)
+
+
+def find_input_files(input_spec: str) -> List[Path]:
+    """收集输入文件（文件 / 目录递归 Parquet+JSONL / glob 模式），按路径排序"""
+    input_path = Path(input_spec)
+    input_files: List[Path] = []
+    if input_path.is_file():
+        input_files = [input_path]
+    elif input_path.is_dir():
+        # 递归查找 Parquet 和 JSONL 文件
+        input_files.extend(input_path.rglob("*.parquet"))
+        input_files.extend(input_path.rglob("*.jsonl"))
+    else:
+        # 支持 glob 模式
+        import glob
+        input_files = [Path(f) for f in glob.glob(str(input_path))]
+    return sorted(input_files)
+
+
+def iter_file_rows(file_path: Path) -> Iterator[Dict[str, Any]]:
+    """逐行读取单个输入文件（Parquet/JSONL），坏行记录警告后跳过"""
+    if file_path.suffix.lower() == ".parquet":
+        # 读取 Parquet 文件
+        import pandas as pd
+        df = pd.read_parquet(file_path)
+        logger.debug(f"Loaded {len(df)} rows from {file_path}")
+        
+        # 转换为字典列表
+        for _, row in df.iterrows():
+            row_dict = row.to_dict()
+            # 转换 numpy 类型为 Python 原生类型
+            for k, v in row_dict.items():
+                if hasattr(v, 'item'):  # numpy scalar
+                    row_dict[k] = v.item()
+                elif isinstance(v, (list, tuple)) and len(v) > 0:
+                    # 处理列表中的 numpy 类型
+                    row_dict[k] = [x.item() if hasattr(x, 'item') else x for x in v]
+            yield row_dict
+    elif file_path.suffix.lower() == ".jsonl":
+        # 读取 JSONL 文件
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json_codec.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Invalid JSON at {file_path}:{line_num}: {e}")
+    else:
+        logger.warning(f"Unsupported file type: {file_path}")
 
 
 def main():
@@ -596,12 +594,16 @@ def main():
     
     parser = argparse.ArgumentParser(description="FeaturePipe - 特征计算接线")
     parser.add_argument("--input", type=str, help="输入文件/目录（Parquet/JSONL）")
-    parser.add_argument("--sink", type=str, default="jsonl", choices=["jsonl", "sqlite"])
+    parser.add_argument("--sink", type=str, default="jsonl", choices=["jsonl", "sqlite", "parquet"])
     parser.add_argument("--out", type=str, default="./runtime/features.jsonl")
     parser.add_argument("--symbols", type=str, nargs="+", help="交易对列表")
     parser.add_argument("--config", type=str, default="./config/defaults.yaml")
     parser.add_argument("--dedupe-ms", type=int, default=1000)
     parser.add_argument("--max-lag-sec", type=float, default=0.25)
+    parser.add_argument("--batch-n", type=int, default=None, help="组提交批大小")
+    parser.add_argument("--flush-ms", type=int, default=None, help="组提交最长间隔（毫秒）")
+    parser.add_argument("--durability", type=str, default=None, choices=["off", "normal", "full"])
+    parser.add_argument("--workers", type=int, default=1, help="按 symbol 哈希分片的工作进程数（>1 启用多进程）")
     
     args = parser.parse_args()
     
@@ -615,36 +617,43 @@ def main():
         except Exception as e:
             logger.warning(f"Failed to load config: {e}")
     
-    # 创建 FeaturePipe
     output_dir = Path(args.out).parent
-    pipe = FeaturePipe(
+    pipe_kwargs = dict(
         config=config,
         symbols=args.symbols,
         sink=args.sink,
         output_dir=str(output_dir),
         dedupe_ms=args.dedupe_ms,
-        max_lag_sec=args.max_lag_sec
+        max_lag_sec=args.max_lag_sec,
+        batch_n=args.batch_n,
+        flush_ms=args.flush_ms,
+        durability=args.durability
     )
     
+    # 多进程分片（需要输入文件；stdin 模式保持单进程）
+    if args.workers > 1 and args.input:
+        from .feature_runner import ShardedFeatureRunner
+        input_files = find_input_files(args.input)
+        if not input_files:
+            logger.warning(f"No input files found: {args.input}")
+            return 1
+        logger.info(f"Found {len(input_files)} input files, workers={args.workers}")
+        runner = ShardedFeatureRunner(n_workers=args.workers, **pipe_kwargs)
+        stats = runner.run_files(input_files)
+        logger.info(f"Total processed: {stats['feature_rows']} feature rows from {len(input_files)} files "
+                    f"({stats['rows_in']} input rows, {args.workers} shards)")
+        return 0
+    
+    # 创建 FeaturePipe
+    pipe = FeaturePipe(**pipe_kwargs)
+    
     try:
         # 读取输入文件
         if args.input:
-            input_path = Path(args.input)
             logger.info(f"Reading from {args.input}")
             
             # 收集所有输入文件
-            input_files = []
-            if input_path.is_file():
-                input_files = [input_path]
-            elif input_path.is_dir():
-                # 递归查找 Parquet 和 JSONL 文件
-                input_files.extend(input_path.rglob("*.parquet"))
-                input_files.extend(input_path.rglob("*.jsonl"))
-            else:
-                # 支持 glob 模式
-                import glob
-                input_files = [Path(f) for f in glob.glob(str(input_path))]
-            
+            input_files = find_input_files(args.input)
             if not input_files:
                 logger.warning(f"No input files found: {args.input}")
                 return 1
@@ -653,49 +662,18 @@ def main():
             
             # 处理每个文件
             total_rows = 0
-            for file_path in sorted(input_files):
+            for file_path in input_files:
                 logger.info(f"Processing {file_path}")
                 file_rows = 0
                 
                 try:
-                    if file_path.suffix.lower() == ".parquet":
-                        # 读取 Parquet 文件
-                        import pandas as pd
-                        df = pd.read_parquet(file_path)
-                        logger.debug(f"Loaded {len(df)} rows from {file_path}")
-                        
-                        # 转换为字典列表
-                        for _, row in df.iterrows():
-                            row_dict = row.to_dict()
-                            # 转换 numpy 类型为 Python 原生类型
-                            for k, v in row_dict.items():
-                                if hasattr(v, 'item'):  # numpy scalar
-                                    row_dict[k] = v.item()
-                                elif isinstance(v, (list, tuple)) and len(v) > 0:
-                                    # 处理列表中的 numpy 类型
-                                    row_dict[k] = [x.item() if hasattr(x, 'item') else x for x in v]
-                            
-                            if pipe.on_row(row_dict):
+                    for row in iter_file_rows(file_path):
+                        try:
+                            if pipe.on_row(row):
                                 file_rows += 1
                                 total_rows += 1
-                    elif file_path.suffix.lower() == ".jsonl":
-                        # 读取 JSONL 文件
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            for line_num, line in enumerate(f, 1):
-                                if not line.strip():
-                                    continue
-                                try:
-                                    row = json.loads(line)
-                                    if pipe.on_row(row):
-                                        file_rows += 1
-                                        total_rows += 1
-                                except json.JSONDecodeError as e:
-                                    logger.warning(f"Invalid JSON at {file_path}:{line_num}: {e}")
-                                except Exception as e:
-                                    logger.warning(f"Error processing line {file_path}:{line_num}: {e}")
-                    else:
-                        logger.warning(f"Unsupported file type: {file_path}")
-                        continue
+                        except Exception as e:
+                            logger.warning(f"Error processing row in {file_path}: {e}")
                     
                     logger.info(f"Processed {file_rows} feature rows from {file_path}")
                 except Exception as e:
@@ -710,7 +688,7 @@ def main():
                 if not line.strip():
                     continue
                 try:
-                    row = json.loads(line)
+                    row = json_codec.loads(line)
                     pipe.on_row(row)
                 except Exception as e:
                     logger.warning(f"Error processing line: {e}")
@@ -721,4 +699,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
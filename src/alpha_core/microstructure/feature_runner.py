@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+ShardedFeatureRunner - 按 symbol 分片的多进程 FeaturePipe 运行器
+
+per-symbol 状态（OFI/CVD/FUSION/DIVERGENCE 计算器、去重窗口、活动度窗口）在 symbol 之间完全独立，
+因此按 symbol 哈希分片即可并行且不改变任何单 symbol 的计算口径：
+
+1. 主进程读取输入并按 crc32(symbol) % N 分发（分块入队，队列有界形成背压）
+2. 每个工作进程持有独立的 FeaturePipe（自己的 SymbolState 与 sink 分片）
+3. 全部结束后合并：
+   - jsonl: 分片 features.jsonl 按 (ts_ms, symbol) 归并为 {output_dir}/features.jsonl
+   - sqlite: 分片库按 ts_ms, symbol 顺序导入 {output_dir}/features.db
+   - parquet: 分区路径按 symbol 区分、互不冲突，各分片直接写入 {output_dir}
+4. 统计汇总：输入/产出行数、诊断计数、写入器健康度按键求和，并保留逐分片明细
+
+同一输入与分片数下分发是确定的，合并顺序只取决于分片内容，与进程调度无关。
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import multiprocessing as mp
+import queue
+import shutil
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..utils import json_codec
+from .feature_pipe import FeaturePipe, iter_file_rows
+from .feature_writer import init_features_table
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(symbol: str, n_shards: int) -> int:
+    """symbol → 分片号（crc32，跨进程/跨运行稳定；内置 hash 带随机盐不可用）"""
+    return zlib.crc32(symbol.encode("utf-8")) % n_shards
+
+
+def _shard_worker(shard_id: int, pipe_kwargs: Dict[str, Any], in_queue: Any, out_queue: Any) -> None:
+    """工作进程：消费行块 → FeaturePipe → 分片 sink，结束时回传统计"""
+    rows_in = 0
+    feature_rows = 0
+    error = None
+    pipe = FeaturePipe(**pipe_kwargs)
+    try:
+        while True:
+            chunk = in_queue.get()
+            if chunk is None:
+                break
+            for row in chunk:
+                rows_in += 1
+                if pipe.on_row(row):
+                    feature_rows += 1
+    except Exception as e:  # pragma: no cover - 防御：on_row 内部已兜底
+        error = repr(e)
+        logger.error(f"[ShardedFeatureRunner] shard {shard_id} failed: {e}", exc_info=True)
+    finally:
+        pipe.close()
+    out_queue.put({
+        "shard": shard_id,
+        "rows_in": rows_in,
+        "feature_rows": feature_rows,
+        "symbols": sorted(pipe.states),
+        "diagnostics": pipe._diag.counters(),
+        "writer": pipe.get_health(),
+        "error": error,
+    })
+
+
+class ShardedFeatureRunner:
+    """按 symbol 哈希分片的多进程 FeaturePipe 运行器"""
+
+    def __init__(
+        self,
+        n_workers: Optional[int] = None,
+        chunk_rows: int = 1000,
+        queue_chunks: int = 8,
+        keep_shards: bool = False,
+        start_method: Optional[str] = None,
+        **pipe_kwargs: Any
+    ):
+        """
+        初始化运行器
+
+        Args:
+            n_workers: 工作进程数，None 表示 CPU 核数
+            chunk_rows: 每次入队的行块大小（摊薄进程间通信开销）
+            queue_chunks: 每个分片队列最多缓存的行块数（背压）
+            keep_shards: 合并后是否保留分片目录（jsonl/sqlite）
+            start_method: multiprocessing 启动方式（None 为平台默认）
+            **pipe_kwargs: 透传给每个分片的 FeaturePipe 参数（output_dir 为合并输出目录）
+        """
+        self.n_workers = max(1, int(n_workers or mp.cpu_count() or 1))
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.queue_chunks = max(1, int(queue_chunks))
+        self.keep_shards = keep_shards
+        self.start_method = start_method
+        self.pipe_kwargs = dict(pipe_kwargs)
+        self.sink = str(self.pipe_kwargs.get("sink", "jsonl")).lower()
+        self.output_dir = Path(self.pipe_kwargs.get("output_dir") or "./runtime")
+        self.symbols = self.pipe_kwargs.get("symbols") or []
+
+    def shard_dir(self, shard_id: int) -> Path:
+        """分片输出目录（parquet 直接写入合并目录）"""
+        if self.sink == "parquet":
+            return self.output_dir
+        return self.output_dir / "shards" / f"shard-{shard_id:02d}"
+
+    def run_files(self, input_files: Iterable[Path]) -> Dict[str, Any]:
+        """按文件顺序读取输入并分片处理"""
+        def rows():
+            for file_path in input_files:
+                logger.info(f"Processing {file_path}")
+                try:
+                    yield from iter_file_rows(Path(file_path))
+                except Exception as e:
+                    logger.error(f"Error processing {file_path}: {e}", exc_info=True)
+        return self.run(rows())
+
+    def run(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """分发输入行、等待各分片完成、合并输出并返回汇总统计"""
+        t0 = time.perf_counter()
+        n = self.n_workers
+        ctx = mp.get_context(self.start_method)
+        in_queues = [ctx.Queue(maxsize=self.queue_chunks) for _ in range(n)]
+        out_queue = ctx.Queue()
+        procs = []
+        for k in range(n):
+            kwargs = dict(self.pipe_kwargs, output_dir=str(self.shard_dir(k)))
+            p = ctx.Process(target=_shard_worker, args=(k, kwargs, in_queues[k], out_queue),
+                            name=f"FeatureShard-{k}", daemon=True)
+            p.start()
+            procs.append(p)
+
+        try:
+            rows_dispatched = self._dispatch(rows, in_queues, procs)
+            results = self._collect(out_queue, procs)
+        finally:
+            for p in procs:
+                p.join(timeout=5)
+                if p.is_alive():  # pragma: no cover - 异常路径
+                    p.terminate()
+
+        merged_path = self._merge()
+        stats = self._aggregate(results)
+        stats["rows_dispatched"] = rows_dispatched
+        stats["output"] = str(merged_path)
+        stats["elapsed_sec"] = time.perf_counter() - t0
+        logger.info(
+            f"[ShardedFeatureRunner] done: shards={n}, rows_in={stats['rows_in']}, "
+            f"feature_rows={stats['feature_rows']}, elapsed={stats['elapsed_sec']:.2f}s → {merged_path}"
+        )
+        return stats
+
+    # ---- 分发 / 回收 ----
+
+    def _dispatch(self, rows: Iterable[Dict[str, Any]], in_queues: List[Any], procs: List[Any]) -> int:
+        n = self.n_workers
+        buffers: List[List[Dict[str, Any]]] = [[] for _ in range(n)]
+        shard_cache: Dict[str, int] = {}
+        symbols = self.symbols
+        dispatched = 0
+        for row in rows:
+            symbol = str(row.get("symbol", "") or "").upper()
+            # 与 FeaturePipe.on_row 的白名单口径一致，提前过滤以省去进程间传输
+            if symbols and symbol and symbol not in symbols:
+                continue
+            k = shard_cache.get(symbol)
+            if k is None:
+                k = shard_cache[symbol] = shard_of(symbol, n)
+            buf = buffers[k]
+            buf.append(row)
+            dispatched += 1
+            if len(buf) >= self.chunk_rows:
+                self._put(in_queues[k], buf, procs[k])
+                buffers[k] = []
+        for k in range(n):
+            if buffers[k]:
+                self._put(in_queues[k], buffers[k], procs[k])
+            self._put(in_queues[k], None, procs[k])
+        return dispatched
+
+    @staticmethod
+    def _put(q: Any, item: Any, proc: Any) -> None:
+        """有界入队；工作进程异常退出时报错而不是永久阻塞"""
+        while True:
+            try:
+                q.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                if not proc.is_alive():
+                    raise RuntimeError(f"{proc.name} exited with code {proc.exitcode}")
+
+    def _collect(self, out_queue: Any, procs: List[Any]) -> List[Dict[str, Any]]:
+        results: Dict[int, Dict[str, Any]] = {}
+        while len(results) < len(procs):
+            try:
+                res = out_queue.get(timeout=1.0)
+                results[res["shard"]] = res
+            except queue.Empty:
+                for k, p in enumerate(procs):
+                    if k not in results and not p.is_alive() and p.exitcode not in (0, None):
+                        raise RuntimeError(f"{p.name} exited with code {p.exitcode}")
+        return [results[k] for k in sorted(results)]
+
+    # ---- 合并 ----
+
+    def _merge(self) -> Path:
+        if self.sink == "jsonl":
+            path = self._merge_jsonl()
+        elif self.sink == "sqlite":
+            path = self._merge_sqlite()
+        else:
+            return self.output_dir
+        if not self.keep_shards:
+            shutil.rmtree(self.output_dir / "shards", ignore_errors=True)
+        return path
+
+    def _merge_jsonl(self) -> Path:
+        """各分片按 (ts_ms, symbol) 归并（同键只可能来自同一分片，保持分片内顺序）"""
+        target = self.output_dir / "features.jsonl"
+        files = [open(self.shard_dir(k) / "features.jsonl", "r", encoding="utf-8")
+                 for k in range(self.n_workers)]
+        try:
+            def keyed(fp):
+                for line in fp:
+                    if line.strip():
+                        row = json_codec.loads(line)
+                        yield (row["ts_ms"], row["symbol"]), line
+
+            with open(target, "w", encoding="utf-8", newline="") as out:
+                for _, line in heapq.merge(*(keyed(fp) for fp in files), key=lambda x: x[0]):
+                    out.write(line)
+        finally:
+            for fp in files:
+                fp.close()
+        return target
+
+    def _merge_sqlite(self) -> Path:
+        target = self.output_dir / "features.db"
+        conn = sqlite3.connect(str(target))
+        try:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            init_features_table(conn)
+            for k in range(self.n_workers):
+                conn.execute("ATTACH DATABASE ? AS shard", (str(self.shard_dir(k) / "features.db"),))
+                conn.execute("""
+                    INSERT OR REPLACE INTO features (
+                        ts_ms, symbol, z_ofi, z_cvd, price, lag_sec, spread_bps,
+                        fusion_score, consistency, dispersion, sign_agree, div_type,
+                        activity_tps, warmup, reason_codes, created_at, signal
+                    )
+                    SELECT ts_ms, symbol, z_ofi, z_cvd, price, lag_sec, spread_bps,
+                           fusion_score, consistency, dispersion, sign_agree, div_type,
+                           activity_tps, warmup, reason_codes, created_at, signal
+                    FROM shard.features ORDER BY ts_ms, symbol
+                """)
+                conn.commit()
+                conn.execute("DETACH DATABASE shard")
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE);")
+        finally:
+            conn.close()
+        return target
+
+    # ---- 统计 ----
+
+    def _aggregate(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        diagnostics: Dict[str, int] = {}
+        writer: Dict[str, float] = {}
+        for res in results:
+            for key, cnt in res["diagnostics"].items():
+                diagnostics[key] = diagnostics.get(key, 0) + cnt
+            for key in ("enqueued", "written", "batches", "dropped_count",
+                        "backpressure_count", "backpressure_wait_ms"):
+                writer[key] = writer.get(key, 0) + res["writer"].get(key, 0)
+            writer["max_queue_depth"] = max(writer.get("max_queue_depth", 0), res["writer"].get("max_queue_depth", 0))
+        return {
+            "shards": len(results),
+            "rows_in": sum(r["rows_in"] for r in results),
+            "feature_rows": sum(r["feature_rows"] for r in results),
+            "symbols": sorted(s for r in results for s in r["symbols"]),
+            "diagnostics": diagnostics,
+            "writer": writer,
+            "errors": [r["error"] for r in results if r["error"]],
+            "per_shard": results,
+        }
@@ -0,0 +1,580 @@
+# -*- coding: utf-8 -*-
+"""
+FeatureWriter - FeaturePipe 写后（write-behind）写入器
+
+有界队列 + 后台写线程 + 组提交：
+1. 调用线程只做编码（JSONL 行 / SQLite 元组）并入队，不触碰磁盘
+2. 后台线程攒批，达到 batch_n 条或距批首超过 flush_ms 毫秒时一次性写入并提交
+   （JSONL 一次 write + flush，SQLite 一次 executemany + commit，Parquet 追加列缓冲）
+3. 队列满时调用方阻塞等待（背压），阻塞次数/时长与队列深度经 get_health() 暴露
+
+持久化级别（durability）：
+- off: 不主动同步（JSONL 仅在 flush()/close() 时落到 OS；SQLite synchronous=OFF）
+- normal: 每批 flush 到 OS（SQLite WAL + synchronous=NORMAL，与 SqliteSink 一致）
+- full: 每批 fsync（SQLite WAL + synchronous=FULL；Parquet 在文件发布前 fsync）
+
+参数默认值可经环境变量覆盖（与 SqliteSink 的 SQLITE_BATCH_N/SQLITE_FLUSH_MS 同一风格）：
+FEATURE_BATCH_N / FEATURE_FLUSH_MS / FEATURE_QUEUE_MAX / FEATURE_DURABILITY
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from alpha_core.utils import json_codec
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("off", "normal", "full")
+
+_STOP = object()  # 关闭哨兵
+
+
+class FeatureWriter:
+    """写后写入器基类（子类实现 _encode/_write_batch/_sync/_close_backend）"""
+
+    kind = "base"
+
+    def __init__(
+        self,
+        batch_n: Optional[int] = None,
+        flush_ms: Optional[int] = None,
+        queue_max: Optional[int] = None,
+        durability: Optional[str] = None,
+    ) -> None:
+        if batch_n is None:
+            batch_n = int(os.getenv("FEATURE_BATCH_N", "500"))
+        if flush_ms is None:
+            flush_ms = int(os.getenv("FEATURE_FLUSH_MS", "500"))
+        if queue_max is None:
+            queue_max = int(os.getenv("FEATURE_QUEUE_MAX", "10000"))
+        if durability is None:
+            durability = os.getenv("FEATURE_DURABILITY", "normal")
+        durability = durability.lower()
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unsupported durability mode: {durability} (expected one of {DURABILITY_MODES})")
+
+        self.batch_n = max(1, int(batch_n))
+        self.flush_ms = max(0, int(flush_ms))
+        self.queue_max = max(1, int(queue_max))
+        self.durability = durability
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.queue_max)
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        # 指标
+        self._enqueued = 0
+        self._written = 0
+        self._batches = 0
+        self._dropped_count = 0
+        self._max_queue_depth = 0
+        self._backpressure_count = 0
+        self._backpressure_wait_ms = 0.0
+        self._last_batch_size = 0
+        self._last_commit_ms = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def _start(self) -> None:
+        """子类完成后端初始化后启动写线程"""
+        self._thread = threading.Thread(target=self._run, name=f"FeatureWriter-{self.kind}", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"[FeatureWriter] {self.kind}: batch_n={self.batch_n}, flush_ms={self.flush_ms}ms, "
+            f"queue_max={self.queue_max}, durability={self.durability}"
+        )
+
+    # ---- 调用线程 ----
+
+    def write(self, feature_row: Dict[str, Any]) -> None:
+        """编码并入队（队列满时阻塞，计入背压指标）"""
+        if self._closed:
+            with self._stats_lock:
+                self._dropped_count += 1
+            logger.warning(f"[FeatureWriter] {self.kind}: write after close, row dropped")
+            return
+        item = self._encode(feature_row)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            t0 = time.perf_counter()
+            self._queue.put(item)
+            waited_ms = (time.perf_counter() - t0) * 1000.0
+            with self._stats_lock:
+                self._backpressure_count += 1
+                self._backpressure_wait_ms += waited_ms
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._enqueued += 1
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """提交已入队的全部数据并等待完成（屏障），返回是否在超时前完成"""
+        if self._closed or self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """排空队列、提交剩余批次并关闭后端"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+        try:
+            self._close_backend()
+        except Exception as e:
+            logger.error(f"[FeatureWriter] {self.kind}: close failed: {e}", exc_info=True)
+        health = self.get_health()
+        logger.info(
+            f"[FeatureWriter] {self.kind} closed: written={health['written']}, batches={health['batches']}, "
+            f"dropped={health['dropped_count']}, backpressure={health['backpressure_count']}"
+        )
+
+    def get_health(self) -> Dict[str, Any]:
+        """健康度指标（队列深度、背压、吞吐、丢弃）"""
+        with self._stats_lock:
+            return {
+                "kind": self.kind,
+                "durability": self.durability,
+                "queue_size": self._queue.qsize(),
+                "queue_max": self.queue_max,
+                "max_queue_depth": self._max_queue_depth,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "batches": self._batches,
+                "last_batch_size": self._last_batch_size,
+                "last_commit_ms": self._last_commit_ms,
+                "backpressure_count": self._backpressure_count,
+                "backpressure_wait_ms": self._backpressure_wait_ms,
+                "dropped_count": self._dropped_count,
+            }
+
+    # ---- 写线程 ----
+
+    def _run(self) -> None:
+        batch: List[Any] = []
+        batch_t0 = 0.0
+        flush_s = self.flush_ms / 1000.0
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(0.0, flush_s - (time.monotonic() - batch_t0))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._commit(batch)  # 时间触发
+                batch = []
+                continue
+
+            if item is _STOP:
+                self._commit(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._commit(batch)
+                batch = []
+                self._sync_safe()
+                item.set()
+                continue
+
+            if not batch:
+                batch_t0 = time.monotonic()
+            batch.append(item)
+            if len(batch) >= self.batch_n or (time.monotonic() - batch_t0) >= flush_s:
+                self._commit(batch)
+                batch = []
+
+    def _commit(self, batch: List[Any]) -> None:
+        if not batch:
+            return
+        t0 = time.perf_counter()
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            logger.error(f"[FeatureWriter] {self.kind}: batch write failed ({len(batch)} rows): {e}", exc_info=True)
+            with self._stats_lock:
+                self._dropped_count += len(batch)
+            return
+        with self._stats_lock:
+            self._written += len(batch)
+            self._batches += 1
+            self._last_batch_size = len(batch)
+            self._last_commit_ms = (time.perf_counter() - t0) * 1000.0
+
+    def _sync_safe(self) -> None:
+        try:
+            self._sync()
+        except Exception as e:
+            logger.warning(f"[FeatureWriter] {self.kind}: sync failed: {e}")
+
+    # ---- 后端（子类实现）----
+
+    def _encode(self, feature_row: Dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+    def _write_batch(self, batch: List[Any]) -> None:
+        raise NotImplementedError
+
+    def _sync(self) -> None:
+        """flush() 屏障时调用：将已提交数据推到 OS"""
+        return None
+
+    def _close_backend(self) -> None:
+        return None
+
+
+class JsonlFeatureWriter(FeatureWriter):
+    """JSONL 写入器（稳定 JSON 序列化，每批一次 write）"""
+
+    kind = "jsonl"
+
+    def __init__(self, path: Path, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self._fp = open(self.path, "w", encoding="utf-8", newline="")
+        self._start()
+
+    def _encode(self, feature_row: Dict[str, Any]) -> str:
+        # 在调用线程序列化：行内容定格于入队时刻，且保持回放可复现
+        # 稳定排序 + 紧凑格式，与标准库输出逐字节一致，确保回放可复现
+        return json_codec.dumps(feature_row, sort_keys=True) + "\n"
+
+    def _write_batch(self, batch: List[str]) -> None:
+        self._fp.write("".join(batch))
+        if self.durability != "off":
+            self._fp.flush()
+            if self.durability == "full":
+                os.fsync(self._fp.fileno())
+
+    def _sync(self) -> None:
+        self._fp.flush()
+
+    def _close_backend(self) -> None:
+        self._fp.flush()
+        if self.durability == "full":
+            os.fsync(self._fp.fileno())
+        self._fp.close()
+
+
+def init_features_table(conn: sqlite3.Connection) -> None:
+    """初始化 features 表（幂等；旧表缺 signal 列时补齐）"""
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS features (
+            ts_ms INTEGER,
+            symbol TEXT,
+            z_ofi REAL,
+            z_cvd REAL,
+            price REAL,
+            lag_sec REAL,
+            spread_bps REAL,
+            fusion_score REAL,
+            consistency REAL,
+            dispersion REAL,
+            sign_agree INTEGER,
+            div_type TEXT,
+            activity_tps REAL,
+            warmup INTEGER,
+            reason_codes TEXT,
+            created_at TEXT,
+            signal TEXT,
+            PRIMARY KEY (ts_ms, symbol)
+        )
+    """)
+    # 向后兼容：如果表已存在但缺少 signal 列，则添加
+    # 先检查列是否存在，避免无谓的 ALTER 异常开销
+    cur.execute("PRAGMA table_info(features)")
+    cols = {row[1] for row in cur.fetchall()}
+    if "signal" not in cols:
+        cur.execute("ALTER TABLE features ADD COLUMN signal TEXT DEFAULT 'neutral'")
+    conn.commit()
+
+
+class SqliteFeatureWriter(FeatureWriter):
+    """SQLite 写入器（WAL，executemany + 单次 commit）"""
+
+    kind = "sqlite"
+
+    _INSERT_SQL = """
+        INSERT OR REPLACE INTO features (
+            ts_ms, symbol, z_ofi, z_cvd, price, lag_sec, spread_bps,
+            fusion_score, consistency, dispersion, sign_agree, div_type,
+            activity_tps, warmup, reason_codes, created_at, signal
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    _SYNCHRONOUS = {"off": "OFF", "normal": "NORMAL", "full": "FULL"}
+
+    def __init__(self, path: Path, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        # 连接在调用线程完成建表（错误同步抛出），之后仅由写线程使用
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute(f"PRAGMA synchronous={self._SYNCHRONOUS[self.durability]};")
+        self.conn.execute("PRAGMA temp_store=MEMORY;")
+        self.conn.execute("PRAGMA cache_size=-20000;")  # 约 20MB
+        self.conn.execute("PRAGMA busy_timeout=5000;")
+        self._init_schema()
+        self._start()
+
+    def _init_schema(self) -> None:
+        """初始化 SQLite 数据库表"""
+        init_features_table(self.conn)
+
+    def _encode(self, feature_row: Dict[str, Any]) -> tuple:
+        # 使用显式列名顺序，避免与历史库错位，并确保前向兼容
+        return (
+            feature_row["ts_ms"],
+            feature_row["symbol"],
+            feature_row["z_ofi"],
+            feature_row["z_cvd"],
+            feature_row["price"],
+            feature_row["lag_sec"],
+            feature_row["spread_bps"],
+            feature_row["fusion_score"],
+            feature_row["consistency"],
+            feature_row["dispersion"],
+            feature_row["sign_agree"],
+            feature_row["div_type"],
+            feature_row["activity"]["tps"],
+            1 if feature_row["warmup"] else 0,
+            json.dumps(feature_row.get("reason_codes", [])),
+            datetime.now(timezone.utc).isoformat(),
+            feature_row.get("signal", "neutral")  # 默认值 'neutral'
+        )
+
+    def _write_batch(self, batch: List[tuple]) -> None:
+        try:
+            self.conn.executemany(self._INSERT_SQL, batch)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _close_backend(self) -> None:
+        try:
+            self.conn.execute("PRAGMA wal_checkpoint(PASSIVE);")
+        except Exception as e:
+            logger.warning(f"[FeatureWriter] sqlite: WAL checkpoint failed: {e}")
+        self.conn.close()
+
+
+class _ParquetHourFile:
+    """单个 (symbol, 小时) 输出文件：类型化列缓冲 + 打开中的 ParquetWriter"""
+
+    def __init__(self, final_path: Path, n_cols: int) -> None:
+        self.final_path = final_path
+        self.tmp_path = final_path.with_name(final_path.name + ".tmp")
+        self.columns: List[List[Any]] = [[] for _ in range(n_cols)]
+        self.writer: Optional["pq.ParquetWriter"] = None
+        self.rows = 0
+
+
+class ParquetFeatureWriter(FeatureWriter):
+    """Parquet 写入器（列式，按 symbol/小时 轮转，行组按 ts_ms 排序）
+
+    布局与 harvester 的小时分区一致，DataReader（date 分区）与 PriceCache（preview 格式）可直接读取：
+        {output_dir}/date=YYYY-MM-DD/hour=HH/symbol={symbol小写}/kind=features/features-YYYYMMDD-HH.parquet
+
+    - 嵌套的 activity.tps 展平为 activity_tps 列（与 SQLite 列名一致）；读方经
+      restore_parquet_feature_row() 还原为 activity.tps，与 JSONL 回放输入同形
+    - 行组在缓冲达到 row_group_rows、flush() 或小时轮转时写出；写出前按 ts_ms 排序
+    - 文件以 .tmp 写入，小时轮转或 close() 时原子改名发布（读方 glob *.parquet 不会读到半成品）
+    """
+
+    kind = "parquet"
+
+    if PARQUET_AVAILABLE:
+        SCHEMA = pa.schema([
+            ("ts_ms", pa.int64()),
+            ("symbol", pa.string()),
+            ("z_ofi", pa.float64()),
+            ("z_cvd", pa.float64()),
+            ("price", pa.float64()),
+            ("lag_sec", pa.float64()),
+            ("spread_bps", pa.float64()),
+            ("fusion_score", pa.float64()),
+            ("consistency", pa.float64()),
+            ("dispersion", pa.float64()),
+            ("sign_agree", pa.int8()),
+            ("div_type", pa.string()),
+            ("activity_tps", pa.float64()),
+            ("trade_rate", pa.float64()),
+            ("quote_rate", pa.float64()),
+            ("realized_vol_bps", pa.float64()),
+            ("volume_usd", pa.float64()),
+            ("warmup", pa.bool_()),
+            ("signal", pa.string()),
+        ])
+
+    def __init__(self, base_dir: Path, row_group_rows: Optional[int] = None, **kwargs: Any) -> None:
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Parquet sink requires pyarrow: pip install pyarrow")
+        super().__init__(**kwargs)
+        if row_group_rows is None:
+            row_group_rows = int(os.getenv("FEATURE_PARQUET_ROW_GROUP", "50000"))
+        self.row_group_rows = max(1, int(row_group_rows))
+        self.path = Path(base_dir)
+        self._files: Dict[Tuple[str, int], _ParquetHourFile] = {}
+        self._current_hour: Dict[str, int] = {}  # symbol -> 最新小时（用于轮转）
+        self.published: List[Path] = []
+        self._start()
+
+    def _encode(self, feature_row: Dict[str, Any]) -> tuple:
+        activity = feature_row.get("activity") or {}
+        return (
+            int(feature_row["ts_ms"]),
+            feature_row["symbol"],
+            feature_row["z_ofi"],
+            feature_row["z_cvd"],
+            feature_row["price"],
+            feature_row["lag_sec"],
+            feature_row["spread_bps"],
+            feature_row["fusion_score"],
+            feature_row["consistency"],
+            feature_row["dispersion"],
+            feature_row["sign_agree"],
+            feature_row["div_type"],
+            activity.get("tps"),
+            feature_row.get("trade_rate"),
+            feature_row.get("quote_rate"),
+            feature_row.get("realized_vol_bps"),
+            feature_row.get("volume_usd"),
+            bool(feature_row["warmup"]),
+            feature_row.get("signal", "neutral"),
+        )
+
+    def _hour_file(self, symbol: str, hour: int) -> _ParquetHourFile:
+        key = (symbol, hour)
+        hf = self._files.get(key)
+        if hf is None:
+            dt = datetime.fromtimestamp(hour * 3600, tz=timezone.utc)
+            part_dir = (self.path / f"date={dt.strftime('%Y-%m-%d')}" / f"hour={dt.strftime('%H')}"
+                        / f"symbol={symbol.lower()}" / "kind=features")
+            part_dir.mkdir(parents=True, exist_ok=True)
+            stem = f"features-{dt.strftime('%Y%m%d-%H')}"
+            final_path = part_dir / f"{stem}.parquet"
+            n = 0
+            # 同一小时已发布过（重启/乱序迟到行）：追加分片序号，不覆盖已有文件
+            while final_path.exists() or final_path.with_name(final_path.name + ".tmp").exists():
+                n += 1
+                final_path = part_dir / f"{stem}-{n}.parquet"
+            hf = _ParquetHourFile(final_path, len(self.SCHEMA))
+            self._files[key] = hf
+        return hf
+
+    def _write_batch(self, batch: List[tuple]) -> None:
+        for rec in batch:
+            symbol = rec[1]
+            hour = rec[0] // 3_600_000
+            cur = self._current_hour.get(symbol)
+            if cur is None or hour > cur:
+                self._current_hour[symbol] = hour
+                if cur is not None:
+                    self._rotate(symbol, hour)
+            hf = self._hour_file(symbol, hour)
+            for col, value in zip(hf.columns, rec):
+                col.append(value)
+            if len(hf.columns[0]) >= self.row_group_rows:
+                self._write_row_group(hf)
+
+    def _write_row_group(self, hf: _ParquetHourFile) -> None:
+        n = len(hf.columns[0])
+        if n == 0:
+            return
+        ts = hf.columns[0]
+        order = sorted(range(n), key=ts.__getitem__)  # 稳定排序：同 ts_ms 保持到达顺序
+        arrays = [
+            pa.array([col[i] for i in order], type=field.type)
+            for col, field in zip(hf.columns, self.SCHEMA)
+        ]
+        table = pa.Table.from_arrays(arrays, schema=self.SCHEMA)
+        if hf.writer is None:
+            hf.writer = pq.ParquetWriter(str(hf.tmp_path), self.SCHEMA, compression="snappy")
+        hf.writer.write_table(table, row_group_size=n)
+        hf.rows += n
+        hf.columns = [[] for _ in hf.columns]
+
+    def _publish(self, key: Tuple[str, int]) -> None:
+        hf = self._files.pop(key)
+        self._write_row_group(hf)
+        if hf.writer is None:
+            return
+        hf.writer.close()
+        if self.durability == "full":
+            with open(hf.tmp_path, "rb") as fp:
+                os.fsync(fp.fileno())
+        os.replace(hf.tmp_path, hf.final_path)
+        self.published.append(hf.final_path)
+        logger.debug(f"[FeatureWriter] parquet: published {hf.final_path} ({hf.rows} rows)")
+
+    def _rotate(self, symbol: str, hour: int) -> None:
+        """小时轮转：发布该 symbol 早于 hour 的全部文件"""
+        for key in [k for k in self._files if k[0] == symbol and k[1] < hour]:
+            self._publish(key)
+
+    def _sync(self) -> None:
+        # 屏障：缓冲写成行组（文件在轮转/关闭时发布）
+        for hf in self._files.values():
+            self._write_row_group(hf)
+
+    def _close_backend(self) -> None:
+        for key in list(self._files):
+            self._publish(key)
+
+
+# 可缺省的 Parquet 列：行中缺失时写为 null，读回时丢弃 null，与原 JSONL 行保持一致
+_PARQUET_OPTIONAL_COLUMNS = ("trade_rate", "quote_rate", "realized_vol_bps", "volume_usd")
+
+
+def restore_parquet_feature_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """ParquetFeatureWriter 写出的行 -> JSONL 特征行形态（原地修改并返回）
+
+    activity_tps 列还原为嵌套的 activity.tps（CoreAlgorithm 的 regime 推断与 MarketActivity 读取该字段，
+    缺失时会退回 trade_rate/60，导致 Parquet 与 JSONL 回放同一数据得到不同的 regime）。
+    不含 activity_tps 的行（如 harvester 特征）原样返回。
+    """
+    if "activity_tps" not in row:
+        return row
+    tps = row.pop("activity_tps")
+    if tps is not None:
+        row["activity"] = {"tps": tps}
+    for column in _PARQUET_OPTIONAL_COLUMNS:
+        if column in row and row[column] is None:
+            del row[column]
+    return row
+
+
+def build_feature_writer(kind: str, output_dir: Path, **kwargs: Any) -> FeatureWriter:
+    """按 sink 类型构建写入器（features.jsonl / features.db / 小时分区 Parquet）"""
+    kind = (kind or "jsonl").lower()
+    output_dir = Path(output_dir)
+    if kind == "jsonl":
+        return JsonlFeatureWriter(output_dir / "features.jsonl", **kwargs)
+    if kind == "sqlite":
+        return SqliteFeatureWriter(output_dir / "features.db", **kwargs)
+    if kind == "parquet":
+        return ParquetFeatureWriter(output_dir, **kwargs)
+    raise ValueError(f"Unsupported sink type: {kind}")
@@ -3,7 +3,9 @@
 Fusion - OFI+CVD 融合指标模块
 """
 
-from .ofi_cvd_fusion import OFI_CVD_Fusion, OFICVDFusionConfig, SignalType
+from .ofi_cvd_fusion import OFI_CVD_Fusion, OFICVDFusionConfig, SignalType, FusionResult
+from .fusion_batch import compute_fusion_batch, advance_fusion_consistency, SIGNAL_NAMES
 
-__all__ = ['OFI_CVD_Fusion', 'OFICVDFusionConfig', 'SignalType']
+__all__ = ['OFI_CVD_Fusion', 'OFICVDFusionConfig', 'SignalType', 'FusionResult',
+           'compute_fusion_batch', 'advance_fusion_consistency', 'SIGNAL_NAMES']
 
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Fusion Batch Kernel - 回放/研究用批量融合计算
+
+与 OFI_CVD_Fusion.update 逐行口径一致：
+- 输入校验（z 为 None/NaN/Inf → invalid_input）、暖启动（前 min_warmup_samples 个有效行）
+- Z裁剪、滞后超限单因子降级（保留更强一侧，一致性按1.0）
+- 加权融合、方向/强度一致性、阈值判定
+- 去噪：连击计数、冷却（自适应冷却 + 方向翻转重臂）、一致性加权迟滞、一致性升级/节流、最小持续
+
+实现：
+- 校验、暖启动、裁剪、降级、融合分数、一致性、原始信号判定全部为 NumPy 向量化
+- 去噪状态机依赖上一发射信号/时间与连击计数，为单层标量循环（仅整数/浮点运算，不构造结果字典）
+
+信号编码（signal_code）：2=strong_buy, 1=buy, 0=neutral, -1=sell, -2=strong_sell
+
+advance_fusion_consistency 面向已有引擎（如 CoreAlgorithm 持有的一致性引擎）：从引擎当前暖启动进度出发批量计算
+一致性，并推进暖启动计数与统计
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .ofi_cvd_fusion import OFI_CVD_Fusion, OFICVDFusionConfig, SignalType
+
+# 信号编码 → SignalType.value
+SIGNAL_NAMES = {
+    2: SignalType.STRONG_BUY.value,
+    1: SignalType.BUY.value,
+    0: SignalType.NEUTRAL.value,
+    -1: SignalType.SELL.value,
+    -2: SignalType.STRONG_SELL.value,
+}
+
+
+def _as_float(x: Any, n: int, default: float) -> np.ndarray:
+    """数组化（None 元素 → NaN；整体为 None → 常数列）"""
+    if x is None:
+        return np.full(n, default, dtype=float)
+    arr = np.asarray(x)
+    if arr.dtype == object:
+        arr = np.array([np.nan if v is None else v for v in arr.tolist()], dtype=float)
+    return arr.astype(float, copy=False)
+
+
+def fusion_consistency(z_ofi: np.ndarray, z_cvd: np.ndarray) -> np.ndarray:
+    """
+    方向/强度一致性（与 OFI_CVD_Fusion._consistency 一致）
+
+    返回:
+        np.ndarray: 同号时 min(|z|)/max(|z|)，任一接近0或异号为0
+    """
+    a = np.abs(z_ofi)
+    b = np.abs(z_cvd)
+    same = np.copysign(1.0, z_ofi) == np.copysign(1.0, z_cvd)
+    ok = (a >= 1e-9) & (b >= 1e-9) & same
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.minimum(a, b) / np.maximum(a, b)
+    return np.where(ok, ratio, 0.0)
+
+
+def compute_fusion_batch(
+    z_ofi: Any,
+    z_cvd: Any,
+    ts: Any,
+    lag_sec: Any = None,
+    cfg: Optional[OFICVDFusionConfig] = None,
+    with_reasons: bool = False,
+) -> Dict[str, Any]:
+    """
+    批量计算融合分数与去噪信号（等价于新建 OFI_CVD_Fusion 逐行 update）
+
+    参数:
+        z_ofi: OFI Z-score [N]（None/NaN 视为无效输入）
+        z_cvd: CVD Z-score [N]
+        ts: 事件时间戳（秒）[N]
+        lag_sec: OFI/CVD时间差（秒）[N]，None 表示全为0
+        cfg: 融合配置，权重归一化与 OFI_CVD_Fusion 共用
+        with_reasons: 为True时额外返回逐行 reason_codes 列表
+
+    返回:
+        Dict: {
+            "fusion_score": [N],
+            "consistency": [N],
+            "signal_code": [N] int8（见模块说明）,
+            "ofi_weight": [N],
+            "cvd_weight": [N],
+            "warmup": [N] bool,
+            "invalid": [N] bool,
+            "reason_codes": List[List[str]]（仅 with_reasons=True）,
+        }
+    """
+    params = OFI_CVD_Fusion(cfg)
+    c = params.cfg
+
+    zo = _as_float(z_ofi, 0, np.nan)
+    n = len(zo)
+    zc = _as_float(z_cvd, n, np.nan)
+    ts_arr = _as_float(ts, n, 0.0)
+    lag = _as_float(lag_sec, n, 0.0)
+    if len(zc) != n or len(ts_arr) != n or len(lag) != n:
+        raise ValueError("z_ofi/z_cvd/ts/lag_sec length mismatch")
+
+    invalid = ~(np.isfinite(zo) & np.isfinite(zc))
+    valid_rank = np.cumsum(~invalid)  # 含本行的有效行数
+    warm = c.min_warmup_samples
+    # 暖启动：前 warm 个有效行；无效行沿用当时的 _is_warmup 状态
+    in_warmup = ~invalid & (valid_rank <= warm)
+    warmup = np.where(invalid, valid_rank <= warm, in_warmup)
+    active = ~invalid & ~in_warmup
+
+    z_clip = c.z_clip
+    zo_c = np.clip(np.nan_to_num(zo), -z_clip, z_clip)
+    zc_c = np.clip(np.nan_to_num(zc), -z_clip, z_clip)
+
+    degraded = active & (lag > c.max_lag)
+    ofi_only = np.abs(zo_c) >= np.abs(zc_c)
+    w_ofi = np.where(degraded, np.where(ofi_only, 1.0, 0.0), params.w_ofi)
+    w_cvd = np.where(degraded, np.where(ofi_only, 0.0, 1.0), params.w_cvd)
+
+    score = np.where(active, w_ofi * zo_c + w_cvd * zc_c, 0.0)
+    consistency = np.where(active, np.where(degraded, 1.0, fusion_consistency(zo_c, zc_c)), 0.0)
+
+    raw = np.select(
+        [
+            (score > c.fuse_strong_buy) & (consistency > c.strong_min_consistency),
+            (score > c.fuse_buy) & (consistency > c.min_consistency),
+            (score < c.fuse_strong_sell) & (consistency > c.strong_min_consistency),
+            (score < c.fuse_sell) & (consistency > c.min_consistency),
+        ],
+        [2, 1, -2, -1],
+        default=0,
+    ).astype(np.int8)
+
+    signal = np.zeros(n, dtype=np.int8)
+    reasons: Optional[List[List[str]]] = None
+    if with_reasons:
+        reasons = [[] for _ in range(n)]
+        for i in np.flatnonzero(invalid).tolist():
+            reasons[i].append("invalid_input")
+        for i in np.flatnonzero(in_warmup).tolist():
+            reasons[i].append("warmup")
+        for i in np.flatnonzero(degraded).tolist():
+            reasons[i].append("lag_exceeded")
+            reasons[i].append("degraded_ofi_only" if ofi_only[i] else "degraded_cvd_only")
+
+    # 去噪状态机
+    fuse_buy_abs = abs(c.fuse_buy)
+    strength_span = abs(c.fuse_strong_buy) - fuse_buy_abs
+    rearm_thr = fuse_buy_abs * (1 + c.flip_rearm_margin)
+    boost_buy = c.fuse_buy * 0.8
+    boost_sell = c.fuse_sell * 0.8
+    cooldown = c.cooldown_secs
+    min_consecutive = c.min_consecutive
+
+    score_l = score.tolist()
+    cons_l = consistency.tolist()
+    raw_l = raw.tolist()
+    ts_l = ts_arr.tolist()
+    out = [0] * n
+
+    last_signal = 0
+    last_emit_ts = None
+    last_dir = 0
+    streak = 0
+    prev_raw = None
+    for i in np.flatnonzero(active).tolist():
+        sig = raw_l[i]
+        fs = score_l[i]
+        cons = cons_l[i]
+        t = ts_l[i]
+        rs = reasons[i] if reasons is not None else None
+        direction = 1 if sig > 0 else (-1 if sig < 0 else 0)
+
+        if sig != 0:
+            streak = streak + 1 if prev_raw == sig else 1
+        else:
+            streak = 0
+        prev_raw = sig
+
+        if last_emit_ts:
+            elapsed = t - last_emit_ts
+            effective = cooldown
+            if c.adaptive_cooldown_enabled and elapsed < cooldown:
+                strength = 0.0
+                if abs(fs) >= fuse_buy_abs:
+                    strength = min(1.0, (abs(fs) - fuse_buy_abs) / strength_span)
+                effective = max(c.adaptive_cooldown_min_secs,
+                                cooldown * (1 - c.adaptive_cooldown_k * strength))
+            rearm = False
+            if (c.rearm_on_flip and direction != 0 and last_dir != 0
+                    and direction != last_dir and abs(fs) >= rearm_thr):
+                rearm = True
+                if rs is not None:
+                    rs.append("flip_rearm")
+            if not rearm and elapsed < effective and sig != 0:
+                if rs is not None:
+                    rs.append("cooldown")
+                continue
+
+        if sig != 0:
+            last_dir = direction
+
+        # 一致性加权迟滞
+        hyst = c.hysteresis_exit + max(0.0, cons - 0.3) * 0.5
+        if last_signal == 2 and sig == 1 and fs > hyst:
+            sig = 2
+            held = True
+        elif last_signal == -2 and sig == -1 and fs < -hyst:
+            sig = -2
+            held = True
+        elif last_signal > 0 and sig == 0 and fs > hyst:
+            sig = last_signal
+            held = True
+        elif last_signal < 0 and sig == 0 and fs < -hyst:
+            sig = last_signal
+            held = True
+        else:
+            held = False
+        if held and rs is not None:
+            rs.append("hysteresis_hold")
+
+        bypass = False
+        if cons > 0.7:
+            if sig == 0:
+                if fs > boost_buy:
+                    sig = 1
+                    bypass = True
+                elif fs < boost_sell:
+                    sig = -1
+                    bypass = True
+                if bypass and rs is not None:
+                    rs.append("consistency_boost")
+        elif cons < 0.3 and sig != 0:
+            sig = 0
+            if rs is not None:
+                rs.append("low_consistency_throttle")
+
+        if sig != 0 and streak < min_consecutive and not bypass:
+            sig = 0
+            if rs is not None:
+                rs.append("min_duration")
+
+        if sig != 0:
+            last_emit_ts = t
+            last_signal = sig
+            out[i] = sig
+
+    signal[:] = out
+    result = {
+        "fusion_score": score,
+        "consistency": consistency,
+        "signal_code": signal,
+        "ofi_weight": w_ofi,
+        "cvd_weight": w_cvd,
+        "warmup": warmup,
+        "invalid": invalid,
+    }
+    if reasons is not None:
+        result["reason_codes"] = reasons
+    return result
+
+
+def advance_fusion_consistency(
+    engine: OFI_CVD_Fusion,
+    z_ofi: Any,
+    z_cvd: Any,
+    lag_sec: Any = None,
+) -> np.ndarray:
+    """
+    在已有引擎上批量推进一致性（等价于逐行 engine.update(...)["consistency"]）
+
+    一致性只取决于输入校验、暖启动进度、Z裁剪与滞后降级，与去噪状态无关；
+    因此本函数只推进暖启动计数（_warmup_count/_is_warmup）与对应统计，不推进去噪状态机
+    （last_signal/streak/冷却）。仅把引擎用作一致性来源时，后续逐行 update 的一致性与全程逐行调用一致。
+
+    参数:
+        engine: 融合引擎（就地推进）
+        z_ofi: OFI Z-score [N]（None/NaN/Inf 视为无效输入）
+        z_cvd: CVD Z-score [N]
+        lag_sec: OFI/CVD时间差（秒）[N]，None 表示全为0
+
+    返回:
+        np.ndarray: 一致性 [N]（无效/暖启动行为0，降级行为1）
+    """
+    c = engine.cfg
+    zo = _as_float(z_ofi, 0, np.nan)
+    n = len(zo)
+    zc = _as_float(z_cvd, n, np.nan)
+    lag = _as_float(lag_sec, n, 0.0)
+    if len(zc) != n or len(lag) != n:
+        raise ValueError("z_ofi/z_cvd/lag_sec length mismatch")
+
+    invalid = ~(np.isfinite(zo) & np.isfinite(zc))
+    valid_rank = np.cumsum(~invalid)  # 含本行的有效行数
+    warm_before = engine._warmup_count
+    in_warmup = ~invalid & (warm_before + valid_rank <= c.min_warmup_samples)
+    active = ~invalid & ~in_warmup
+
+    zo_c = np.clip(np.nan_to_num(zo), -c.z_clip, c.z_clip)
+    zc_c = np.clip(np.nan_to_num(zc), -c.z_clip, c.z_clip)
+    degraded = active & (lag > c.max_lag)
+    consistency = np.where(active, np.where(degraded, 1.0, fusion_consistency(zo_c, zc_c)), 0.0)
+
+    n_valid = int(valid_rank[-1]) if n else 0
+    n_warm = int(in_warmup.sum())
+    n_degraded = int(degraded.sum())
+    engine._warmup_count = max(warm_before, min(c.min_warmup_samples, warm_before + n_valid))
+    if active.any():
+        engine._is_warmup = False
+    stats = engine._stats
+    stats['total_updates'] += n
+    stats['invalid_inputs'] += n - n_valid
+    stats['warmup_returns'] += n_warm
+    stats['lag_exceeded'] += n_degraded
+    stats['downgrades'] += n_degraded
+    return consistency
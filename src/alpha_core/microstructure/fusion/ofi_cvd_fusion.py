@@ -9,13 +9,15 @@ Date: 2025-10-19
 """
 
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, NamedTuple
 import math
 import time
 import logging
 from enum import Enum
 from pathlib import Path
 
+from ...utils.diagnostics import DiagnosticsLogger
+
 
 class SignalType(Enum):
     """信号类型枚举"""
@@ -26,6 +28,17 @@ class SignalType(Enum):
     STRONG_SELL = "strong_sell"
 
 
+class FusionResult(NamedTuple):
+    """精简结果（slim模式）：仅热路径字段，统计信息经 get_diagnostics() 拉取"""
+    fusion_score: float
+    signal: str
+    consistency: float
+    ofi_weight: float
+    cvd_weight: float
+    reason_codes: List[str]
+    warmup: bool
+
+
 @dataclass
 class OFICVDFusionConfig:
     """OFI+CVD融合配置"""
@@ -92,6 +105,7 @@ class OFI_CVD_Fusion:
         self._config_loader = config_loader  # 保存配置来源，便于可观测
         self._verbose = verbose  # 日志开关
         self._logger = logging.getLogger(__name__)  # 模块级logger
+        self._diag = DiagnosticsLogger(self._logger, name="FUSION")  # 热路径诊断（计数+采样）
         
         # 优先使用运行时配置字典（库式调用）
         if runtime_cfg is not None:
@@ -431,7 +445,8 @@ class OFI_CVD_Fusion:
         return signal, denoising_reasons
     
     def update(self, z_ofi: float, z_cvd: float, ts: float,
-               price: Optional[float] = None, lag_sec: float = 0.0) -> Dict[str, Any]:
+               price: Optional[float] = None, lag_sec: float = 0.0,
+               slim: bool = False) -> Union[Dict[str, Any], FusionResult]:
         """
         更新融合信号
         
@@ -441,9 +456,10 @@ class OFI_CVD_Fusion:
             ts: 事件时间戳
             price: 可选价格信息
             lag_sec: OFI/CVD时间差(秒)
+            slim: 为True时返回 FusionResult（不复制stats，统计信息见 get_diagnostics()）
             
         Returns:
-            融合结果字典
+            融合结果字典（slim模式为 FusionResult）
         """
         self._stats['total_updates'] += 1
         reason_codes = []
@@ -452,6 +468,9 @@ class OFI_CVD_Fusion:
         if any(x is None or math.isinf(x) or math.isnan(x) 
                for x in [z_ofi, z_cvd]):
             self._stats['invalid_inputs'] += 1
+            if slim:
+                return FusionResult(0.0, SignalType.NEUTRAL.value, 0.0, self.w_ofi, self.w_cvd,
+                                    ["invalid_input"], self._is_warmup)
             return {
                 "fusion_score": 0.0,
                 "signal": SignalType.NEUTRAL.value,
@@ -467,6 +486,9 @@ class OFI_CVD_Fusion:
         # 2. 暖启动检查
         if self._check_warmup():
             self._stats['warmup_returns'] += 1
+            if slim:
+                return FusionResult(0.0, SignalType.NEUTRAL.value, 0.0, self.w_ofi, self.w_cvd,
+                                    ["warmup"], True)
             return {
                 "fusion_score": 0.0,
                 "signal": SignalType.NEUTRAL.value,
@@ -506,49 +528,50 @@ class OFI_CVD_Fusion:
             # 单因子时一致性按 1.0 处理，避免"降级=不可信"的误判
             consistency = 1.0
         
-        # 融合分数诊断日志（每10秒汇总一次）
-        current_time = time.time()
-        if not hasattr(self, '_last_fusion_log'):
-            self._last_fusion_log = current_time
-            self._fusion_samples = []
-        
-        # 收集样本用于统计
-        self._fusion_samples.append({
-            'z_ofi': z_ofi_clipped,
-            'z_cvd': z_cvd_clipped,
-            'w_ofi': w_ofi,
-            'w_cvd': w_cvd,
-            'raw_fusion': raw_fusion,
-            'consistency': consistency,
-            'ts': current_time
-        })
-        
-        # 每10秒打印一次融合分数统计（带numpy try/except保护）
-        if current_time - self._last_fusion_log >= 10:
-            if self._fusion_samples:
-                try:
-                    import numpy as np
-                    raw_fusions = [s['raw_fusion'] for s in self._fusion_samples]
-                    consistencies = [s['consistency'] for s in self._fusion_samples]
+        # 融合分数诊断日志（每10秒汇总一次；INFO未启用时不收集样本）
+        if self._logger.isEnabledFor(logging.INFO):
+            current_time = time.time()
+            if not hasattr(self, '_last_fusion_log'):
+                self._last_fusion_log = current_time
+                self._fusion_samples = []
+        
+            # 收集样本用于统计
+            self._fusion_samples.append({
+                'z_ofi': z_ofi_clipped,
+                'z_cvd': z_cvd_clipped,
+                'w_ofi': w_ofi,
+                'w_cvd': w_cvd,
+                'raw_fusion': raw_fusion,
+                'consistency': consistency,
+                'ts': current_time
+            })
+        
+            # 每10秒打印一次融合分数统计（带numpy try/except保护）
+            if current_time - self._last_fusion_log >= 10:
+                if self._fusion_samples:
+                    try:
+                        import numpy as np
+                        raw_fusions = [s['raw_fusion'] for s in self._fusion_samples]
+                        consistencies = [s['consistency'] for s in self._fusion_samples]
                     
-                    self._logger.info(f"[FUSION_DIAG] n={len(self._fusion_samples)} samples")
-                    self._logger.info(f"[FUSION_DIAG] Raw fusion stats: p50={np.percentile(raw_fusions, 50):.3f}, "
-                          f"p95={np.percentile(raw_fusions, 95):.3f}, p99={np.percentile(raw_fusions, 99):.3f}, max={np.max(raw_fusions):.3f}")
-                    self._logger.info(f"[FUSION_DIAG] Consistency stats: p50={np.percentile(consistencies, 50):.3f}, "
-                          f"p95={np.percentile(consistencies, 95):.3f}")
-                    self._logger.info(f"[FUSION_DIAG] Sample: z_ofi={z_ofi_clipped:.3f}, z_cvd={z_cvd_clipped:.3f}, "
-                          f"w_ofi={w_ofi:.2f}, w_cvd={w_cvd:.2f}, raw_fusion={raw_fusion:.3f}, consistency={consistency:.3f}")
+                        self._logger.info(f"[FUSION_DIAG] n={len(self._fusion_samples)} samples")
+                        self._logger.info(f"[FUSION_DIAG] Raw fusion stats: p50={np.percentile(raw_fusions, 50):.3f}, "
+                              f"p95={np.percentile(raw_fusions, 95):.3f}, p99={np.percentile(raw_fusions, 99):.3f}, max={np.max(raw_fusions):.3f}")
+                        self._logger.info(f"[FUSION_DIAG] Consistency stats: p50={np.percentile(consistencies, 50):.3f}, "
+                              f"p95={np.percentile(consistencies, 95):.3f}")
+                        self._logger.info(f"[FUSION_DIAG] Sample: z_ofi={z_ofi_clipped:.3f}, z_cvd={z_cvd_clipped:.3f}, "
+                              f"w_ofi={w_ofi:.2f}, w_cvd={w_cvd:.2f}, raw_fusion={raw_fusion:.3f}, consistency={consistency:.3f}")
                     
-                    # 检查是否需要校准策略A
-                    if np.percentile(raw_fusions, 95) < 0.3:
-                        self._logger.warning(f"[FUSION_DIAG] Raw fusion p95 < 0.3, may need calibration strategy A")
-                except ImportError:
-                    self._logger.warning("[FUSION_DIAG] numpy not available, skipping statistics")
-            else:
-                self._logger.debug("[FUSION_DIAG] No samples collected in 10s window")
+                        # 检查是否需要校准策略A
+                        if np.percentile(raw_fusions, 95) < 0.3:
+                            self._logger.warning(f"[FUSION_DIAG] Raw fusion p95 < 0.3, may need calibration strategy A")
+                    except ImportError:
+                        self._logger.warning("[FUSION_DIAG] numpy not available, skipping statistics")
+                else:
+                    self._logger.debug("[FUSION_DIAG] No samples collected in 10s window")
             
-            self._last_fusion_log = current_time
-            self._fusion_samples = []
+                self._last_fusion_log = current_time
+                self._fusion_samples = []
         
         fusion_score = raw_fusion
         
@@ -578,19 +601,26 @@ class OFI_CVD_Fusion:
         
         # 添加融合器可观测性护栏（受verbose控制）
         if self._verbose:
-            self._logger.debug(f"[FUSION_OBSERVABILITY] Input: z_ofi={z_ofi_clipped:.6f}, z_cvd={z_cvd_clipped:.6f}")
-            self._logger.debug(f"[FUSION_OBSERVABILITY] Weights: w_ofi={w_ofi:.3f}, w_cvd={w_cvd:.3f}")
-            self._logger.debug(f"[FUSION_OBSERVABILITY] Raw fusion: {raw_fusion:.6f}, consistency={consistency:.3f}")
-            self._logger.debug(f"[FUSION_OBSERVABILITY] Regime: {self._current_regime}, thresholds: fuse_buy={self.cfg.fuse_buy}, fuse_sell={self.cfg.fuse_sell}")
-            self._logger.debug(f"[FUSION_OBSERVABILITY] Consistency thresholds: min={self.cfg.min_consistency:.3f}, strong={self.cfg.strong_min_consistency:.3f}")
-            self._logger.debug(f"[FUSION_OBSERVABILITY] Config source: unified_config={self._config_loader is not None}")
+            self._diag.report(
+                "FUSION_OBSERVABILITY",
+                "[FUSION_OBSERVABILITY] Input: z_ofi=%.6f, z_cvd=%.6f; Weights: w_ofi=%.3f, w_cvd=%.3f; "
+                "Raw fusion: %.6f, consistency=%.3f; Regime: %s, thresholds: fuse_buy=%s, fuse_sell=%s; "
+                "Consistency thresholds: min=%.3f, strong=%.3f; Config source: unified_config=%s",
+                z_ofi_clipped, z_cvd_clipped, w_ofi, w_cvd, raw_fusion, consistency,
+                self._current_regime, self.cfg.fuse_buy, self.cfg.fuse_sell,
+                self.cfg.min_consistency, self.cfg.strong_min_consistency, self._config_loader is not None,
+            )
         
         # 当融合分数接近0时，记录详细原因
         if abs(raw_fusion) < 1e-6:
             reason_code = "due_to_warmup" if "warmup" in reason_codes else "zero_inputs" if (abs(z_ofi_clipped) < 1e-6 and abs(z_cvd_clipped) < 1e-6) else "consistency_fail"
-            self._logger.debug(f"[FUSION_ZERO] Raw fusion={raw_fusion:.6f}, reason_code={reason_code}, reason_codes={reason_codes}")
+            self._diag.report("FUSION_ZERO", "[FUSION_ZERO] Raw fusion=%.6f, reason_code=%s, reason_codes=%s",
+                              raw_fusion, reason_code, reason_codes)
         
-        self._logger.debug(f"[FUSION_INTERNAL] Signal: {signal.value}, reason_codes: {reason_codes}")
+        self._diag.report("FUSION_INTERNAL", "[FUSION_INTERNAL] Signal: %s, reason_codes: %s", signal.value, reason_codes)
+        
+        if slim:
+            return FusionResult(fusion_score, signal.value, consistency, w_ofi, w_cvd, reason_codes, False)
         
         return {
             "fusion_score": fusion_score,
@@ -613,6 +643,16 @@ class OFI_CVD_Fusion:
         """获取统计信息"""
         return self._stats.copy()
     
+    def get_diagnostics(self) -> Dict[str, Any]:
+        """诊断信息拉取接口（slim模式下不随结果返回的stats/连击状态）"""
+        return {
+            "stats": self._stats.copy(),
+            "last_signal": self._last_signal.value,
+            "streak": self._streak,
+            "regime": self._current_regime,
+            "diag_counts": self._diag.counters(),
+        }
+    
     def reset(self):
         """重置状态"""
         self._last_signal = SignalType.NEUTRAL
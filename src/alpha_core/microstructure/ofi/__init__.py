@@ -3,7 +3,9 @@
 OFI (Order Flow Imbalance) - 订单流不平衡计算模块
 """
 
-from .real_ofi_calculator import RealOFICalculator, OFIConfig
+from .real_ofi_calculator import RealOFICalculator, OFIConfig, OFIResult
+from .ofi_batch import compute_ofi_batch
+from .l2_book import L2OrderBook
 
-__all__ = ['RealOFICalculator', 'OFIConfig']
+__all__ = ['RealOFICalculator', 'OFIConfig', 'OFIResult', 'compute_ofi_batch', 'L2OrderBook']
 
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+L2 Order Book - 增量价格档位订单簿
+
+功能：
+- 按价格维护两侧档位（bisect 有序价格数组 + 价格→数量字典），单档更新 O(log n) 定位
+- 应用深度增量（Binance depthUpdate 语义：数量为该价位的绝对值，0 表示删除该价位）
+- 序列号缺口检测（first_id=U / last_id=u / prev_last_id=pu，与 harvester 记录字段一致）
+- O(K) 读取 top-K，供 RealOFICalculator 直接计算 OFI
+
+序列规则：
+- 有 prev_last_id（合约 pu）时：要求 pu == 上一事件的 last_id
+- 否则有 first_id（现货 U）时：要求 U <= 上一事件 last_id + 1
+- last_id 早于当前簿的事件视为过期丢弃（快照后的回放重叠）
+- 检测到缺口后簿进入未同步状态，拒绝后续增量，直到 load_snapshot 重新对齐
+- 未加载快照且事件不带序列号时直接按增量构建（便于回放已落盘的增量流）
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+APPLIED = "applied"
+STALE = "stale"
+GAP = "gap"
+UNSYNCED = "unsynced"
+
+
+class L2OrderBook:
+    """增量L2订单簿"""
+
+    __slots__ = (
+        "symbol", "_bid_px", "_ask_px", "_bid_qty", "_ask_qty",
+        "last_id", "synced", "_after_snapshot",
+        "gap_count", "stale_count", "bad_levels",
+    )
+
+    def __init__(self, symbol: str = ""):
+        self.symbol = (symbol or "").upper()
+        self._bid_px: List[float] = []  # 升序，最优买价在末尾
+        self._ask_px: List[float] = []  # 升序，最优卖价在开头
+        self._bid_qty: Dict[float, float] = {}
+        self._ask_qty: Dict[float, float] = {}
+        self.last_id: Optional[int] = None
+        self.synced = True
+        self._after_snapshot = False
+        self.gap_count = 0
+        self.stale_count = 0
+        self.bad_levels = 0
+
+    def reset(self) -> None:
+        """清空订单簿与序列状态"""
+        self._bid_px.clear()
+        self._ask_px.clear()
+        self._bid_qty.clear()
+        self._ask_qty.clear()
+        self.last_id = None
+        self.synced = True
+        self._after_snapshot = False
+
+    def load_snapshot(
+        self,
+        bids: Iterable[Sequence[float]],
+        asks: Iterable[Sequence[float]],
+        last_update_id: Optional[int] = None,
+    ) -> None:
+        """
+        以全量快照重建订单簿（REST depth 快照或缺口后的重新对齐）
+
+        参数:
+            bids/asks: [(价格, 数量), ...]，顺序不限
+            last_update_id: 快照对应的 lastUpdateId
+        """
+        self._bid_px.clear()
+        self._ask_px.clear()
+        self._bid_qty.clear()
+        self._ask_qty.clear()
+        for p, q in bids or []:
+            self._set_level(self._bid_px, self._bid_qty, p, q)
+        for p, q in asks or []:
+            self._set_level(self._ask_px, self._ask_qty, p, q)
+        self.last_id = int(last_update_id) if last_update_id is not None else None
+        self.synced = True
+        self._after_snapshot = self.last_id is not None
+
+    def apply_delta(
+        self,
+        bids: Iterable[Sequence[float]],
+        asks: Iterable[Sequence[float]],
+        first_id: Optional[int] = None,
+        last_id: Optional[int] = None,
+        prev_last_id: Optional[int] = None,
+    ) -> str:
+        """
+        应用一条深度增量
+
+        返回:
+            str: "applied" | "stale"（过期丢弃）| "gap"（检测到缺口）| "unsynced"（等待快照）
+        """
+        if not self.synced:
+            return UNSYNCED
+
+        if last_id is not None and self.last_id is not None:
+            last_id = int(last_id)
+            if last_id < self.last_id:
+                self.stale_count += 1
+                return STALE
+            if self._after_snapshot:
+                # 快照后的首个事件：只要求覆盖 lastUpdateId 的下一条
+                if first_id is not None and int(first_id) > self.last_id + 1:
+                    return self._mark_gap()
+            elif prev_last_id is not None:
+                if int(prev_last_id) != self.last_id:
+                    return self._mark_gap()
+            elif first_id is not None and int(first_id) > self.last_id + 1:
+                return self._mark_gap()
+
+        for p, q in bids or []:
+            self._set_level(self._bid_px, self._bid_qty, p, q)
+        for p, q in asks or []:
+            self._set_level(self._ask_px, self._ask_qty, p, q)
+
+        if last_id is not None:
+            self.last_id = int(last_id)
+        self._after_snapshot = False
+        return APPLIED
+
+    def _mark_gap(self) -> str:
+        self.gap_count += 1
+        self.synced = False
+        return GAP
+
+    def _set_level(self, px_list: List[float], qty_map: Dict[float, float], p, q) -> None:
+        """设置单个价位数量（q<=0 删除）"""
+        try:
+            p = float(p)
+            q = float(q)
+        except (TypeError, ValueError):
+            self.bad_levels += 1
+            return
+        if not (math.isfinite(p) and math.isfinite(q)):
+            self.bad_levels += 1
+            return
+        if q <= 0.0:
+            if p in qty_map:
+                del qty_map[p]
+                del px_list[bisect_left(px_list, p)]
+            return
+        if p not in qty_map:
+            insort(px_list, p)
+        qty_map[p] = q
+
+    def top_k(self, k: int) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+        """
+        读取前K档（bids降序、asks升序），不足K档不补齐
+
+        返回:
+            (bids, asks)
+        """
+        bq = self._bid_qty
+        aq = self._ask_qty
+        bids = [(p, bq[p]) for p in reversed(self._bid_px[-k:])] if k > 0 else []
+        asks = [(p, aq[p]) for p in self._ask_px[:k]]
+        return bids, asks
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        if not self._bid_px:
+            return None
+        p = self._bid_px[-1]
+        return p, self._bid_qty[p]
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        if not self._ask_px:
+            return None
+        p = self._ask_px[0]
+        return p, self._ask_qty[p]
+
+    def depth(self) -> Tuple[int, int]:
+        """两侧档位数 (bids, asks)"""
+        return len(self._bid_px), len(self._ask_px)
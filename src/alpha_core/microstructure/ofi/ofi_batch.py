@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+OFI Batch Kernel - 回放/研究用批量OFI计算
+
+与 RealOFICalculator.update_with_snapshot 逐行口径一致：
+- L1价跃迁敏感OFI（价跃迁冲击项与数量变化项在代数上等价，逐档 w_k*(Δbid_k-Δask_k)）
+- 会话化重置：时间间隔 > reset_on_gap_ms、UTC日切换时清空窗口与EMA（订单簿上一帧保留）
+- Z-score："上一窗口"基线（样本标准差）+ std_floor + MAD软截 + z_clip
+- EMA：基于软截后的OFI
+
+实现：
+- 输入清洗、上一帧对齐、k_components、OFI、会话切分全部为 NumPy 向量化
+- MAD软截后的OFI会回写入基线窗口（后续z依赖前序软截结果），因此z/EMA阶段为
+  单层标量循环，窗口统计复用 RollingWindowStats / RollingQuantile（每行 O(log n)）
+
+输入约定：
+- bids/asks 形状 [N, K, 2]（价格, 数量），已按价格排序（bids降序、asks升序）并零填充到K档，
+  与 FeaturePipe/harvester 输出的快照一致（批量接口不做排序）
+- ts 为事件时间（毫秒）[N]
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ...utils.rolling_stats import RollingWindowStats
+from ...utils.rolling_quantile import RollingQuantile
+from .real_ofi_calculator import RealOFICalculator, OFIConfig
+
+_DAY_MS = 24 * 60 * 60 * 1000
+
+
+def _sanitize_book(book: np.ndarray, K: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    按 _fill_snapshot 口径清洗：价格非有限→0，数量非有限或为负→0
+
+    返回:
+        (清洗后的 [N, K, 2] 数组, 每行是否存在坏数据 [N])
+    """
+    arr = np.asarray(book, dtype=float)
+    if arr.ndim != 3 or arr.shape[2] != 2:
+        raise ValueError(f"book must have shape [N, K, 2], got {arr.shape}")
+    n, k_in, _ = arr.shape
+    out = np.zeros((n, K, 2), dtype=float)
+    k = min(k_in, K)
+    out[:, :k, :] = arr[:, :k, :]
+    px = out[:, :, 0]
+    qty = out[:, :, 1]
+    bad_px = ~np.isfinite(px)
+    bad_qty = ~np.isfinite(qty) | (qty < 0)
+    px[bad_px] = 0.0
+    qty[bad_qty] = 0.0
+    bad_row = bad_px.any(axis=1) | bad_qty.any(axis=1)
+    return out, bad_row
+
+
+def session_reset_mask(ts: np.ndarray, reset_on_gap_ms: int, reset_on_session_change: bool) -> np.ndarray:
+    """
+    会话重置标记：与流式口径一致，首行不重置
+
+    参数:
+        ts: 事件时间（毫秒）[N]
+        reset_on_gap_ms: 间隔重置阈值
+        reset_on_session_change: 是否在UTC日切换时重置
+
+    返回:
+        np.ndarray[bool]: 第i行处理前是否重置会话
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    mask = np.zeros(len(ts), dtype=bool)
+    if len(ts) < 2:
+        return mask
+    mask[1:] = np.diff(ts) > reset_on_gap_ms
+    if reset_on_session_change:
+        day = ts // _DAY_MS
+        mask[1:] |= day[1:] != day[:-1]
+    return mask
+
+
+def compute_ofi_batch(
+    bids: np.ndarray,
+    asks: np.ndarray,
+    ts: np.ndarray,
+    cfg: Optional[OFIConfig] = None,
+) -> Dict[str, Any]:
+    """
+    批量计算OFI（全日重算/研究用）
+
+    参数:
+        bids: 买盘快照 [N, K, 2]
+        asks: 卖盘快照 [N, K, 2]
+        ts: 事件时间（毫秒）[N]
+        cfg: OFI配置，参数解析与 RealOFICalculator 共用
+
+    返回:
+        Dict: {
+            "ofi": OFI（软截后）[N],
+            "k_components": 各档贡献 [N, K],
+            "z_ofi": Z-score [N]（warmup期间为NaN）,
+            "ema_ofi": EMA [N],
+            "warmup": [N] bool,
+            "std_zero": [N] bool,
+            "session_reset": [N] bool,
+            "bad_row": [N] bool,
+        }
+    """
+    # 参数解析（权重归一化、默认值回退等）与流式计算器保持同一份实现
+    params = RealOFICalculator("", cfg)
+    K = params.K
+
+    ts = np.asarray(ts, dtype=np.int64)
+    b, bad_b = _sanitize_book(bids, K)
+    a, bad_a = _sanitize_book(asks, K)
+    n = len(ts)
+    if b.shape[0] != n or a.shape[0] != n:
+        raise ValueError("bids/asks/ts length mismatch")
+
+    # 上一帧：首行与全零订单簿比较（新建计算器的初始状态）
+    prev_bq = np.zeros((n, K), dtype=float)
+    prev_aq = np.zeros((n, K), dtype=float)
+    bq = b[:, :, 1]
+    aq = a[:, :, 1]
+    if n > 1:
+        prev_bq[1:] = bq[:-1]
+        prev_aq[1:] = aq[:-1]
+
+    w = np.asarray(params.w, dtype=float)
+    k_components = w * ((bq - prev_bq) - (aq - prev_aq))
+    # 与流式一致的逐档累加顺序（保证逐位一致）
+    ofi_raw = np.zeros(n, dtype=float)
+    for k in range(K):
+        ofi_raw += k_components[:, k]
+
+    session_reset = session_reset_mask(ts, params.reset_on_gap_ms, params.reset_on_session_change)
+
+    # Z-score/EMA：软截后的OFI回写基线窗口，逐行推进
+    z_out = np.full(n, np.nan)
+    ema_out = np.empty(n)
+    ofi_out = np.empty(n)
+    warmup_out = np.zeros(n, dtype=bool)
+    std_zero_out = np.zeros(n, dtype=bool)
+
+    hist = RollingWindowStats(params.z_window)
+    order = RollingQuantile(params.z_window)
+    warmup_threshold = max(5, params.z_window // 5)
+    std_floor = params.std_floor
+    k_mad = params.winsor_k_mad
+    z_clip = params.z_clip
+    clip_on = z_clip is not None and 0 < z_clip < 1e6
+    alpha = params.ema_alpha
+    ema = None
+
+    raw_list = ofi_raw.tolist()
+    reset_list = session_reset.tolist()
+    for i in range(n):
+        if reset_list[i]:
+            hist.clear()
+            order.clear()
+            ema = None
+        v = raw_list[i]
+        nh = len(hist)
+        if nh < warmup_threshold:
+            warmup_out[i] = True
+        else:
+            m, s = hist.mean_std(ddof=1)
+            if s < std_floor:
+                s = std_floor
+                std_zero_out[i] = True
+            z = (v - m) / s
+            if nh > 10:
+                med = order.median()
+                mad = order.mad(med)
+                thr = k_mad * mad
+                if mad > 0 and abs(v - med) > thr:
+                    v = med + (thr if v > med else -thr)
+                    z = (v - m) / s
+            if clip_on and abs(z) > z_clip:
+                z = z_clip if z > 0 else -z_clip
+            z_out[i] = z
+        ema = v if ema is None else alpha * v + (1.0 - alpha) * ema
+        ema_out[i] = ema
+        ofi_out[i] = v
+        hist.append(v)
+        order.append(v)
+
+    return {
+        "ofi": ofi_out,
+        "k_components": k_components,
+        "z_ofi": z_out,
+        "ema_ofi": ema_out,
+        "warmup": warmup_out,
+        "std_zero": std_zero_out,
+        "session_reset": session_reset,
+        "bad_row": bad_b | bad_a,
+    }
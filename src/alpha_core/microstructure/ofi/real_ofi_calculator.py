@@ -38,30 +38,39 @@ Real OFI Calculator - Task 1.2.1 (L1 OFI版本)
    - 按K档裁剪/填充并归一化，负值截为0，权重和为1
 
 3. 输入清洗：
-   - _pad_snapshot 保障价格为有限值、数量非负
+   - _fill_snapshot 保障价格为有限值、数量非负
    - 异常数据计入 bad_points
+   - 订单簿为双缓冲：每侧两块预分配的K×2档位数组，每帧交换当前/上一帧并原地写入
+   - presorted=True 时跳过排序检查（调用方保证 bids降序、asks升序）
 
 4. Z-score（优化版）：
    - 基线="上一窗口"（不包含当前ofi），避免当前值稀释
    - warmup_threshold = max(5, z_window//5)，不足返回 z_ofi=None
    - std <= 1e-9 则 z_ofi=0.0 且 meta.std_zero=True
+   - 均值/标准差由 RollingWindowStats 增量维护（O(1)/tick，周期性重锚定，舍入级误差）
 
 5. EMA：
    - ema_alpha可配，首次用当前ofi初始化，其后标准递推
 
 6. 状态与边界：
    - reset()/get_state() 可观测
-   - L2增量模式显式 NotImplementedError（后续任务再做）
+   - L2增量模式：update_with_l2_delta 维护增量订单簿（L2OrderBook），按事件从top-K计算OFI
 
 作者: V13 OFI+CVD+AI System
 创建时间: 2025-10-17
 最后优化: 2025-10-21 (L1 OFI价跃迁敏感版本)
 """
 from __future__ import annotations
-from collections import deque
+import logging
 from dataclasses import dataclass
-from typing import Optional, List, Tuple, Dict, Any
-import numpy as np
+from typing import Optional, List, Tuple, Dict, Any, NamedTuple, Union
+
+from ...utils.diagnostics import DiagnosticsLogger
+from ...utils.rolling_stats import RollingWindowStats
+from ...utils.rolling_quantile import RollingQuantile
+from .l2_book import L2OrderBook, APPLIED, GAP, UNSYNCED
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class OFIConfig:
@@ -99,6 +108,18 @@ def _is_finite_number(x: float) -> bool:
     except Exception:
         return False
 
+class OFIResult(NamedTuple):
+    """精简结果（slim模式）：仅热路径字段，诊断信息经 get_diagnostics() 拉取"""
+    symbol: str
+    event_time_ms: Optional[int]
+    ofi: float
+    z_ofi: Optional[float]
+    ema_ofi: float
+    warmup: bool
+    std_zero: bool
+    session_reset: bool
+
+
 class RealOFICalculator:
     """
     真实OFI计算器（快照模式）
@@ -129,11 +150,11 @@ class RealOFICalculator:
         "reset_on_gap_ms", "reset_on_session_change", "per_symbol_window",
         "std_floor", "winsor_k_mad", "config", "cfg",
         "bids", "asks", "prev_bids", "prev_asks",
-        "ofi_hist", "ema_ofi", "bad_points",
+        "ofi_hist", "_ofi_order", "ema_ofi", "bad_points",
         "bid_jump_up_cnt", "bid_jump_down_cnt", "ask_jump_up_cnt", "ask_jump_down_cnt",
         "bid_jump_up_impact_sum", "bid_jump_down_impact_sum", 
         "ask_jump_up_impact_sum", "ask_jump_down_impact_sum",
-        "_last_event_time_ms", "_last_utc_day", "_z_zero_streak",
+        "_last_event_time_ms", "_last_utc_day", "_z_zero_streak", "_l2_book", "_diag",
         "p_gt2_cnt", "p_gt3_cnt", "total_cnt"  # 尾部监控计数器
     )
     
@@ -207,14 +228,15 @@ class RealOFICalculator:
         self.config = cfg
         self.cfg = cfg  # 修复：与 update_params 对齐
         
-        # 初始化订单簿缓存
+        # 初始化订单簿缓存（双缓冲：每帧交换 bids/prev_bids、asks/prev_asks 后原地写入）
         self.bids = [[0.0, 0.0] for _ in range(self.K)]
         self.asks = [[0.0, 0.0] for _ in range(self.K)]
         self.prev_bids = [[0.0, 0.0] for _ in range(self.K)]
         self.prev_asks = [[0.0, 0.0] for _ in range(self.K)]
         
-        # 初始化历史数据
-        self.ofi_hist = deque(maxlen=self.z_window)
+        # 初始化历史数据（滑动窗口自带O(1)均值/方差）
+        self.ofi_hist = RollingWindowStats(self.z_window)
+        self._ofi_order = RollingQuantile(self.z_window)  # 同窗口有序视图（中位数/MAD）
         self.ema_ofi: Optional[float] = None
         self.bad_points = 0
         
@@ -232,6 +254,12 @@ class RealOFICalculator:
         self.p_gt2_cnt = 0  # |z| > 2 的计数
         self.p_gt3_cnt = 0  # |z| > 3 的计数
         self.total_cnt = 0  # 总计数
+        
+        # 热路径诊断（按键计数 + 采样输出，替代逐条print）
+        self._diag = DiagnosticsLogger(logger, name=f"OFI {self.symbol}")
+        
+        # L2增量订单簿（首次调用增量接口时创建）
+        self._l2_book: Optional[L2OrderBook] = None
     
     def _load_from_config_loader(self, config_loader, symbol: str) -> OFIConfig:
         """
@@ -270,18 +298,18 @@ class RealOFICalculator:
             logger.warning(f"Failed to load OFI config from config_loader: {e}. Using default config.")
             return OFIConfig()  # 坏数据点计数器
 
-    def _pad_snapshot(self, arr: List[Tuple[float, float]]) -> List[List[float]]:
+    def _fill_snapshot(self, out: List[List[float]], arr: List[Tuple[float, float]]) -> bool:
         """
-        填充订单簿快照到K档，处理无效数据
+        将订单簿快照原地写入K档缓冲区（不足K档补零），处理无效数据
         
         参数:
+            out: 预分配的K档缓冲区 [[价格, 数量], ...]
             arr: 订单簿数据 [(价格, 数量), ...]
         
         返回:
-            List[List[float]]: K档订单簿 [[价格, 数量], ...]
+            bool: 是否存在无效数据（已置零）
         """
-        out = [[0.0, 0.0] for _ in range(self.K)]
-        n = min(len(arr or []), self.K)
+        n = min(len(arr), self.K) if arr else 0
         bad = False
         
         for i in range(n):
@@ -294,13 +322,16 @@ class RealOFICalculator:
             if not _is_finite_number(q) or float(q) < 0:
                 bad = True
                 q = 0.0
-            out[i][0] = float(p)
-            out[i][1] = float(q)
+            level = out[i]
+            level[0] = float(p)
+            level[1] = float(q)
         
-        if bad:
-            self.bad_points += 1
+        for i in range(n, self.K):
+            level = out[i]
+            level[0] = 0.0
+            level[1] = 0.0
         
-        return out
+        return bad
 
     def _sort_if_needed(self, side: List[Tuple[float, float]], reverse: bool) -> List[Tuple[float, float]]:
         """
@@ -362,8 +393,10 @@ class RealOFICalculator:
             self.prev_asks[i][0] = self.prev_asks[i][1] = 0.0
         
         self.ofi_hist.clear()
+        self._ofi_order.clear()
         self.ema_ofi = None
         self.bad_points = 0
+        self._l2_book = None  # L2增量订单簿一并丢弃，需重新 load_l2_snapshot 对齐
 
     def get_state(self) -> Dict:
         """
@@ -381,12 +414,14 @@ class RealOFICalculator:
             "bad_points": self.bad_points,
             "ema_ofi": self.ema_ofi,
             "ofi_hist_len": len(self.ofi_hist),
+            "diag_counts": self._diag.counters(),
         }
     
     def _reset_session(self):
         """重置会话状态，清空历史数据避免跨段污染"""
-        print(f"[OFI_SESSION_RESET] 重置会话状态，清空历史数据")
+        self._diag.report("OFI_SESSION_RESET", "[OFI_SESSION_RESET] %s 重置会话状态，清空历史数据", self.symbol)
         self.ofi_hist.clear()
+        self._ofi_order.clear()
         self.ema_ofi = None
         self.bad_points = 0
         # 重置跳价统计
@@ -409,8 +444,10 @@ class RealOFICalculator:
         bids: List[Tuple[float, float]], 
         asks: List[Tuple[float, float]], 
         event_time_ms: Optional[int] = None,
-        current_symbol: Optional[str] = None
-    ) -> Dict:
+        current_symbol: Optional[str] = None,
+        slim: bool = False,
+        presorted: bool = False
+    ) -> Union[Dict, OFIResult]:
         """
         基于订单簿快照更新OFI
         
@@ -419,6 +456,8 @@ class RealOFICalculator:
             asks: 卖单列表 [(价格, 数量), ...] 按价格升序
             event_time_ms: 事件时间戳（毫秒），可选
             current_symbol: 当前交易对，用于检测交易对切换
+            slim: 为True时返回 OFIResult（不构建meta，诊断信息见 get_diagnostics()）
+            presorted: 为True时调用方保证已排序（bids降序、asks升序），跳过排序检查
         
         返回:
             Dict: {
@@ -444,14 +483,16 @@ class RealOFICalculator:
         if hasattr(self, '_last_event_time_ms') and event_time_ms is not None:
             time_gap = event_time_ms - self._last_event_time_ms
             if time_gap > getattr(self, 'reset_on_gap_ms', 2000):
-                print(f"[OFI_SESSION_RESET] 时间间隔过大: {time_gap}ms > {getattr(self, 'reset_on_gap_ms', 2000)}ms")
+                self._diag.report("OFI_GAP_RESET", "[OFI_SESSION_RESET] 时间间隔过大: %sms > %sms",
+                                  time_gap, getattr(self, 'reset_on_gap_ms', 2000), level=logging.INFO)
                 self._reset_session()
                 session_reset = True
         
         # 2. 检查交易对切换重置
         if (hasattr(self, 'per_symbol_window') and self.per_symbol_window and 
             current_symbol is not None and current_symbol.upper() != self.symbol):
-            print(f"[OFI_SYMBOL_RESET] 交易对切换: {self.symbol} -> {current_symbol.upper()}")
+            self._diag.report("OFI_SYMBOL_RESET", "[OFI_SYMBOL_RESET] 交易对切换: %s -> %s",
+                              self.symbol, current_symbol.upper(), level=logging.INFO)
             self._reset_session()
             session_reset = True
         
@@ -462,7 +503,8 @@ class RealOFICalculator:
             if hasattr(self, '_last_utc_day'):
                 current_utc_day = event_time_ms // (24 * 60 * 60 * 1000)
                 if current_utc_day != self._last_utc_day:
-                    print(f"[OFI_DAY_RESET] UTC日切换: {self._last_utc_day} -> {current_utc_day}")
+                    self._diag.report("OFI_DAY_RESET", "[OFI_DAY_RESET] UTC日切换: %s -> %s",
+                                      self._last_utc_day, current_utc_day, level=logging.INFO)
                     self._reset_session()
                     session_reset = True
                 self._last_utc_day = current_utc_day
@@ -473,20 +515,23 @@ class RealOFICalculator:
         if event_time_ms is not None:
             self._last_event_time_ms = event_time_ms
         
-        # 保存上一帧订单簿
-        for i in range(self.K):
-            self.prev_bids[i][0] = self.bids[i][0]
-            self.prev_bids[i][1] = self.bids[i][1]
-            self.prev_asks[i][0] = self.asks[i][0]
-            self.prev_asks[i][1] = self.asks[i][1]
+        # 交换缓冲区：当前帧成为上一帧，旧的上一帧缓冲区原地写入新快照
+        self.prev_bids, self.bids = self.bids, self.prev_bids
+        self.prev_asks, self.asks = self.asks, self.prev_asks
         
-        # 安全排序：确保bids降序、asks升序
-        bids_sorted = self._sort_if_needed(bids or [], reverse=True)
-        asks_sorted = self._sort_if_needed(asks or [], reverse=False)
+        # 安全排序：确保bids降序、asks升序（presorted时跳过）
+        if presorted:
+            bids_sorted = bids
+            asks_sorted = asks
+        else:
+            bids_sorted = self._sort_if_needed(bids or [], reverse=True)
+            asks_sorted = self._sort_if_needed(asks or [], reverse=False)
         
         # 更新当前订单簿
-        self.bids = self._pad_snapshot(bids_sorted)
-        self.asks = self._pad_snapshot(asks_sorted)
+        if self._fill_snapshot(self.bids, bids_sorted):
+            self.bad_points += 1
+        if self._fill_snapshot(self.asks, asks_sorted):
+            self.bad_points += 1
 
         # 计算L1 OFI（最优价跃迁敏感版本）
         k_components = []
@@ -566,30 +611,31 @@ class RealOFICalculator:
         warmup_threshold = max(5, self.z_window // 5)
         
         # 统一从历史窗口获取数据（不包含当前值）
-        arr = list(self.ofi_hist)
-        if len(arr) < warmup_threshold:
+        hist_len = len(self.ofi_hist)
+        if hist_len < warmup_threshold:
             warmup = True
             # 严格区分"未就绪(None)"与"就绪但弱(数值)"
             z_ofi = None  # warmup期间返回None，而不是0.0
-            print(f"[OFI_WARMUP] Samples: {len(arr)}, threshold: {warmup_threshold}, z_ofi=None")
+            self._diag.report("OFI_WARMUP", "[OFI_WARMUP] Samples: %d, threshold: %d, z_ofi=None",
+                              hist_len, warmup_threshold)
         else:
-            m, s = self._mean_std(arr)
+            # 样本标准差口径与 _mean_std 一致（ddof=1）
+            m, s = self.ofi_hist.mean_std(ddof=1)
             
             # 稳健化守护：标准差下限保护
             if s < self.std_floor:
                 s = self.std_floor
                 std_zero = True  # 标记使用了标准差下限
-                print(f"[OFI_STD_FLOOR] 标准差过小，使用下限: {s:.6f}")
+                self._diag.report("OFI_STD_FLOOR", "[OFI_STD_FLOOR] 标准差过小，使用下限: %.6f", s)
             
             # 计算Z-score
             z_ofi = (ofi_val - m) / s
             
             # 稳健化守护：OFI值MAD软截
-            if hasattr(self, 'ofi_hist') and len(self.ofi_hist) > 10:
-                # 计算MAD（中位数绝对偏差）
-                ofi_values = np.array(list(self.ofi_hist), dtype=float)
-                median_ofi = np.median(ofi_values)
-                mad = np.median(np.abs(ofi_values - median_ofi))
+            if len(self._ofi_order) > 10:
+                # 计算MAD（中位数绝对偏差，有序视图 O(log n)）
+                median_ofi = self._ofi_order.median()
+                mad = self._ofi_order.mad(median_ofi)
                 mad_threshold = self.winsor_k_mad * mad
                 
                 # 软截极值
@@ -597,7 +643,8 @@ class RealOFICalculator:
                     ofi_val_original = ofi_val
                     ofi_val = median_ofi + (mad_threshold if ofi_val > median_ofi else -mad_threshold)
                     z_ofi = (ofi_val - m) / s
-                    print(f"[OFI_WINSORIZE] 软截极值: {ofi_val_original:.3f} -> {ofi_val:.3f}")
+                    self._diag.report("OFI_WINSORIZE", "[OFI_WINSORIZE] 软截极值: %.3f -> %.3f",
+                                      ofi_val_original, ofi_val)
             
             # 应用z_clip裁剪（支持关闭模式）
             z_clip = getattr(self, 'z_clip', 3.0)
@@ -606,7 +653,7 @@ class RealOFICalculator:
                 if abs(z_ofi) > z_clip:
                     pre = z_ofi  # 修复：先保存裁剪前的值
                     z_ofi = z_clip if z_ofi > 0 else -z_clip
-                    print(f"[OFI_Z_CLIP] 裁剪Z-score: {pre:.3f} -> {z_ofi:.3f}")
+                    self._diag.report("OFI_Z_CLIP", "[OFI_Z_CLIP] 裁剪Z-score: %.3f -> %.3f", pre, z_ofi)
                 # 重置Z-score为零的计数
                 if hasattr(self, '_z_zero_streak'):
                     self._z_zero_streak = 0
@@ -620,6 +667,7 @@ class RealOFICalculator:
         
         # 更新OFI历史（放在Z-score计算后，确保"上一窗口"口径）
         self.ofi_hist.append(ofi_val)
+        self._ofi_order.append(ofi_val)
         
         # 尾部监控计数
         if z_ofi is not None:
@@ -629,6 +677,10 @@ class RealOFICalculator:
             if abs(z_ofi) > 3:
                 self.p_gt3_cnt += 1
 
+        if slim:
+            return OFIResult(self.symbol, event_time_ms, ofi_val, z_ofi, self.ema_ofi,
+                             warmup, std_zero, session_reset)
+
         return {
             "symbol": self.symbol,
             "event_time_ms": event_time_ms,
@@ -661,17 +713,114 @@ class RealOFICalculator:
             },
         }
 
-    def update_with_l2_delta(self, deltas, event_time_ms: Optional[int] = None):
+    def get_diagnostics(self) -> Dict[str, Any]:
         """
-        基于L2增量更新OFI（Task 1.2.1暂不实现）
+        诊断信息拉取接口（slim模式下不随结果返回的meta字段）
+        
+        返回:
+            Dict: 档位/权重、坏数据计数、L1价跃迁统计、尾部监控、诊断日志计数及L2订单簿状态
+        """
+        total = self.total_cnt
+        diag = {
+            "levels": self.K,
+            "weights": list(self.w),
+            "bad_points": self.bad_points,
+            "bid_jump_up_cnt": self.bid_jump_up_cnt,
+            "bid_jump_down_cnt": self.bid_jump_down_cnt,
+            "ask_jump_up_cnt": self.ask_jump_up_cnt,
+            "ask_jump_down_cnt": self.ask_jump_down_cnt,
+            "bid_jump_up_impact_sum": self.bid_jump_up_impact_sum,
+            "bid_jump_down_impact_sum": self.bid_jump_down_impact_sum,
+            "ask_jump_up_impact_sum": self.ask_jump_up_impact_sum,
+            "ask_jump_down_impact_sum": self.ask_jump_down_impact_sum,
+            "p_gt2_cnt": self.p_gt2_cnt,
+            "p_gt3_cnt": self.p_gt3_cnt,
+            "total_cnt": total,
+            "p_gt2_percent": (self.p_gt2_cnt / total * 100) if total > 0 else 0.0,
+            "p_gt3_percent": (self.p_gt3_cnt / total * 100) if total > 0 else 0.0,
+            "diag_counts": self._diag.counters(),
+        }
+        if self._l2_book is not None:
+            book = self._l2_book
+            diag["l2_last_id"] = book.last_id
+            diag["l2_synced"] = book.synced
+            diag["l2_gap_count"] = book.gap_count
+            diag["l2_stale_count"] = book.stale_count
+        return diag
+
+    def load_l2_snapshot(self, bids: List[Tuple[float, float]], asks: List[Tuple[float, float]],
+                         last_update_id: Optional[int] = None) -> None:
+        """
+        加载L2全量快照（订阅增量流前或检测到序列缺口后重新对齐）
+        
+        参数:
+            bids/asks: 全量档位 [(价格, 数量), ...]
+            last_update_id: 快照 lastUpdateId
         
         注意:
-            Task 1.2.1仅实现快照模式，增量模式将在后续任务中实现
+            只重建增量订单簿，不产出OFI；下一条增量将以上一次产出的top-K为基准计算
+        """
+        if self._l2_book is None:
+            self._l2_book = L2OrderBook(self.symbol)
+        self._l2_book.load_snapshot(bids, asks, last_update_id)
+
+    def update_with_l2_delta(self, deltas: Dict[str, Any], event_time_ms: Optional[int] = None,
+                             slim: bool = False) -> Optional[Union[Dict, OFIResult]]:
+        """
+        基于L2增量更新OFI
+        
+        参数:
+            deltas: 深度增量，支持 Binance depthUpdate 键（b/a/U/u/pu/E）
+                    或 harvester 键（bids/asks/first_id/last_id/prev_last_id/event_ts_ms）
+            event_time_ms: 事件时间戳（毫秒），缺省取 deltas 中的 E/event_ts_ms
+            slim: 为True时返回 OFIResult（l2_last_id 见 get_diagnostics()）
+        
+        返回:
+            Dict: 与 update_with_snapshot 相同结构（meta 增加 l2_last_id）；
+            过期事件、序列缺口或等待快照对齐时返回 None（缺口后需调用 load_l2_snapshot）
         
-        异常:
-            NotImplementedError: 此版本暂不支持增量模式
+        注意:
+            OFI 按档位序号（第i档对第i档，含最优价跃迁冲击）定义，档位插入/删除会使其后各档整体移位，
+            因此仍以增量后的 top-K 经 update_with_snapshot 计算，保证与快照回放逐值一致
         """
-        raise NotImplementedError("Task 1.2.1 implements snapshot mode only.")
+        if self._l2_book is None:
+            self._l2_book = L2OrderBook(self.symbol)
+        book = self._l2_book
+        
+        def pick(*keys):
+            for k in keys:
+                v = deltas.get(k)
+                if v is not None:
+                    return v
+            return None
+        
+        status = book.apply_delta(
+            pick("b", "bids") or [],
+            pick("a", "asks") or [],
+            first_id=pick("U", "first_id"),
+            last_id=pick("u", "last_id"),
+            prev_last_id=pick("pu", "prev_last_id"),
+        )
+        if status != APPLIED:
+            if status == GAP:
+                # 每个缺口只告警一次；等待快照期间的后续增量（UNSYNCED）仅计数，见 diag_counts
+                self._diag.report("OFI_L2_GAP", "[OFI_L2] %s: sequence gap (last_id=%s), awaiting snapshot resync",
+                                  self.symbol, book.last_id, level=logging.WARNING)
+            elif status == UNSYNCED:
+                self._diag.count("OFI_L2_UNSYNCED")
+            return None
+        
+        if event_time_ms is None:
+            ts = pick("E", "event_ts_ms", "T")
+            event_time_ms = int(ts) if ts is not None else None
+        
+        top_bids, top_asks = book.top_k(self.K)
+        result = self.update_with_snapshot(top_bids, top_asks, event_time_ms=event_time_ms,
+                                           slim=slim, presorted=True)
+        if not slim:
+            result["meta"]["l2_last_id"] = book.last_id
+        return result
+
     def update_params(self, **kwargs):
         """Safely update calculator parameters at runtime.
         Only known keys are applied; others are ignored.
@@ -700,9 +849,10 @@ class RealOFICalculator:
             self.z_window = new_window
             if new_window != len(self.ofi_hist):
                 # 重建ofi_hist队列
-                old_data = list(self.ofi_hist)
-                self.ofi_hist = deque(old_data[-new_window:], maxlen=new_window)
-                logger.info(f"Rebuilt ofi_hist queue: {len(old_data)} -> {len(self.ofi_hist)}")
+                old_len = len(self.ofi_hist)
+                self.ofi_hist.resize(new_window)
+                self._ofi_order.resize(new_window)
+                logger.info(f"Rebuilt ofi_hist queue: {old_len} -> {len(self.ofi_hist)}")
         
         # 特殊处理weights/levels变化
         if 'weights' in updated or 'levels' in updated:
@@ -8,7 +8,7 @@ import subprocess
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -224,6 +224,56 @@ class ParameterOptimizer:
         logger.info(f"[ParameterOptimizer] 生成 {len(trials)} 个试验配置（方法: {method}）")
         return trials
     
+    def _signal_config(self, trial_config: Dict[str, Any]) -> Dict[str, Any]:
+        """试验配置 → CoreAlgorithm 配置（与 replay_harness 组装 signal 配置的口径一致，Sink 置空）"""
+        signal_config = copy.deepcopy(trial_config.get("signal", {}) or {})
+        for key in ("components", "core", "use_signal_v2"):
+            if key in trial_config:
+                signal_config[key] = trial_config[key]
+        signal_config["sink"] = {"kind": "null"}
+        signal_config["replay_mode"] = 1
+        return signal_config
+
+    def screen_signal_trials(
+        self,
+        trials: List[Dict[str, Any]],
+        features: Iterable[Dict[str, Any]],
+        chunk_size: int = 20000,
+    ) -> List[Dict[str, Any]]:
+        """信号层快速初筛：单遍特征流同时评估所有试验的 CoreAlgorithm 配置
+
+        不跑撮合/PnL，只给出每个试验的信号统计（确认数、各档位、漏斗），用于在完整回测前
+        剔除明显无效的参数组合。上游计算按 MultiConfigEvaluator 的分组共享。
+
+        Args:
+            trials: generate_trials 的输出
+            features: 特征行（与 replay_harness 的输入相同）
+            chunk_size: 每批转列的行数
+
+        Returns:
+            与 trials 同序的列表，每项含 trial_id/params/signal_stats/confirm_rate
+        """
+        from dataclasses import asdict
+
+        from alpha_core.signals.multi_eval import MultiConfigEvaluator
+
+        evaluator = MultiConfigEvaluator([self._signal_config(trial["config"]) for trial in trials])
+        evaluator.process_rows(features, chunk_size=chunk_size)
+        logger.info(
+            f"[ParameterOptimizer] 信号初筛: {len(trials)} 个试验, 上游共享组 {evaluator.n_groups} 个"
+        )
+
+        screened = []
+        for trial_id, (trial, result) in enumerate(zip(trials, evaluator.results()), start=1):
+            stats = result.stats
+            screened.append({
+                "trial_id": trial_id,
+                "params": trial.get("params", {}),
+                "signal_stats": asdict(stats),
+                "confirm_rate": stats.emitted / stats.processed if stats.processed else 0.0,
+            })
+        return screened
+
     def run_trial(
         self,
         trial_config: Dict[str, Any],
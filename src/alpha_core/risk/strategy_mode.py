@@ -21,7 +21,8 @@ from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 from collections import deque
 import pytz
-import numpy as np
+
+from ..utils.rolling_quantile import RollingQuantile
 
 logger = logging.getLogger(__name__)
 
@@ -118,6 +119,9 @@ class StrategyModeManager:
     4. 记录切换事件和指标
     """
     
+    # 市场窗口统计的指标字段（MarketActivity 属性名）
+    _MARKET_FIELDS = ('trades_per_min', 'quote_updates_per_sec', 'spread_bps', 'volatility_bps', 'volume_usd')
+    
     def __init__(self, config: Dict[str, Any] = None, config_loader=None,
                  runtime_cfg: Optional[Dict[str, Any]] = None):
         """
@@ -233,6 +237,8 @@ class StrategyModeManager:
         # 动态上限：基于采样频率上限，避免 maxlen 假设采样频率
         self.max_samples_per_sec = market_config.get('max_samples_per_sec', 2)  # 默认上限2Hz
         self.market_samples = deque(maxlen=int(self.market_window_secs * self.max_samples_per_sec))
+        # 与 market_samples 同步增删的各指标有序视图（窗口中位数/分位数 O(log n)）
+        self._market_order = {name: RollingQuantile() for name in self._MARKET_FIELDS}
         self._samples_lock = threading.RLock()  # 样本窗口并发安全锁
         
         # 活跃度判定历史（用于迟滞逻辑）
@@ -570,11 +576,11 @@ class StrategyModeManager:
         # 将当前活跃度样本加入窗口（加锁保护并发写入）
         with self._samples_lock:
             activity.timestamp = time.time()  # 刷新为当前入窗时刻（避免复用旧实例导致TTL漂移）
-            self.market_samples.append(activity)
+            self._append_market_sample(activity)
             # TTL修剪：按时间窗口修剪过期样本，保持"最近N秒"的真实语义
             now = time.time()
             while self.market_samples and (now - self.market_samples[0].timestamp) > self.market_window_secs:
-                self.market_samples.popleft()
+                self._popleft_market_sample()
             
             # 指标补强：窗口规模与覆盖秒数（便于运维监控）
             first_ts = self.market_samples[0].timestamp if self.market_samples else now
@@ -612,54 +618,18 @@ class StrategyModeManager:
         # 样本充足时，使用质量门槛
         quality_conditions = self._get_quality_conditions(current_mode, activity)
         
-        # 基于滑动窗口计算稳健统计量
-        # 本地快照，避免遍历过程中被修改（并发读稳健）
-        samples = list(self.market_samples)
-        trades = [s.trades_per_min for s in samples]
-        quotes = [s.quote_updates_per_sec for s in samples]
-        spreads = [s.spread_bps for s in samples]
-        volatilities = [s.volatility_bps for s in samples]
-        volumes = [s.volume_usd for s in samples]
-        
-        # spread 非负保底（避免精度/解析错误产生的负值）
-        spreads = [max(0.0, s) for s in spreads]
-        
-        # 应用 winsorize（去极值）
-        def winsorize_two_sided(values, p_low, p_high):
-            """两端截断：将低于p_low分位数和高于p_high分位数的值截断"""
-            if not values:
-                return values
-            lo, hi = np.percentile(values, [p_low, p_high])
-            return [max(lo, min(v, hi)) for v in values]
-        
-        def winsorize_spread(values, percentile):
-            """spread 特殊处理：截断上界（spread 越小越好）"""
-            if not values:
-                return values
-            threshold = np.percentile(values, percentile)
-            return [min(v, threshold) for v in values]
-        
-        if self.winsorize_percentile < 100:
-            p = self.winsorize_percentile
-            trades = winsorize_two_sided(trades, 100-p, p)
-            quotes = winsorize_two_sided(quotes, 100-p, p)
-            spreads = winsorize_spread(spreads, p)  # 仅截上界
-            volatilities = winsorize_two_sided(volatilities, 100-p, p)
-            volumes = winsorize_two_sided(volumes, 100-p, p)
-        
-        # 使用中位数或平均值
-        if self.use_median:
-            avg_trades = np.median(trades)
-            avg_quotes = np.median(quotes)
-            avg_spread = np.median(spreads)  # spread 越小越好，用中位数
-            avg_volatility = np.median(volatilities)
-            avg_volume = np.median(volumes)
-        else:
-            avg_trades = np.mean(trades)
-            avg_quotes = np.mean(quotes)
-            avg_spread = np.mean(spreads)
-            avg_volatility = np.mean(volatilities)
-            avg_volume = np.mean(volumes)
+        # 基于滑动窗口计算稳健统计量（有序视图，无需每行复制/排序整个窗口）
+        with self._samples_lock:
+            order = self._market_order
+            if self.winsorize_percentile < 100:
+                p_low, p_high = 100 - self.winsorize_percentile, self.winsorize_percentile
+            else:
+                p_low = p_high = None
+            avg_trades = self._winsorized_center(order['trades_per_min'], p_low, p_high)
+            avg_quotes = self._winsorized_center(order['quote_updates_per_sec'], p_low, p_high)
+            avg_spread = self._winsorized_center(order['spread_bps'], None, p_high)  # 仅截上界（spread 越小越好）
+            avg_volatility = self._winsorized_center(order['volatility_bps'], p_low, p_high)
+            avg_volume = self._winsorized_center(order['volume_usd'], p_low, p_high)
         
         # 所有条件必须同时满足（基于窗口统计量）
         conditions = [
@@ -677,6 +647,57 @@ class StrategyModeManager:
         _metrics.set_gauge('strategy_market_gate_window_pass', 1.0 if window_pass else 0.0)
         return quality_pass and window_pass
     
+    def _append_market_sample(self, activity: MarketActivity) -> None:
+        """样本入窗（同步维护各指标有序视图，需持有 _samples_lock）"""
+        samples = self.market_samples
+        if samples.maxlen is not None and len(samples) >= samples.maxlen:
+            if samples.maxlen == 0:
+                return
+            self._popleft_market_sample()
+        samples.append(activity)
+        order = self._market_order
+        order['trades_per_min'].append(activity.trades_per_min)
+        order['quote_updates_per_sec'].append(activity.quote_updates_per_sec)
+        order['spread_bps'].append(max(0.0, activity.spread_bps))  # spread 非负保底（避免精度/解析错误产生的负值）
+        order['volatility_bps'].append(activity.volatility_bps)
+        order['volume_usd'].append(activity.volume_usd)
+    
+    def _popleft_market_sample(self) -> None:
+        """最旧样本出窗（需持有 _samples_lock）"""
+        self.market_samples.popleft()
+        for rq in self._market_order.values():
+            rq.popleft()
+    
+    def _winsorized_center(self, rq: RollingQuantile, p_low: Optional[float], p_high: Optional[float]) -> float:
+        """
+        窗口去极值后的中心统计量（中位数或均值）
+        
+        winsorize 为单调变换，不改变排序：截断后的中位数 = 截断前中间位次元素再截断，
+        因此中位数口径只需 O(1) 读取分位数与中间位次元素。
+        
+        Args:
+            rq: 指标有序视图
+            p_low: 下界百分位（None 表示不截下界）
+            p_high: 上界百分位（None 表示不截上界）
+        """
+        lo = rq.percentile(p_low) if p_low is not None else None
+        hi = rq.percentile(p_high) if p_high is not None else None
+        
+        def clip(v: float) -> float:
+            if hi is not None:
+                v = min(v, hi)
+            if lo is not None:
+                v = max(lo, v)
+            return v
+        
+        n = len(rq)
+        if self.use_median:
+            h = n // 2
+            if n % 2:
+                return clip(rq.kth(h))
+            return (clip(rq.kth(h - 1)) + clip(rq.kth(h))) / 2
+        return sum(clip(v) for v in rq) / n
+    
     def decide_mode(self, activity: Optional[MarketActivity] = None) -> Tuple[StrategyMode, TriggerReason, Dict[str, Any]]:
         """
         决策当前应处于何种模式
@@ -17,6 +17,7 @@ from __future__ import annotations
 import json
 import logging
 import os
+import queue
 import sqlite3
 import threading
 import time
@@ -24,19 +25,22 @@ import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
 
 # TASK-A4: 导入 signal/v2 相关组件
 try:
     from .decision_engine import DecisionEngine
     from .signal_writer import SignalWriterV2
-    from .signal_schema import SignalV2, SideHint, Regime, DecisionCode, DivType
+    from .signal_schema import SignalV2, SignalV2Record, SideHint, Regime, DecisionCode, DivType
     from .config_hash import calculate_config_hash, extract_core_config
     SIGNAL_V2_AVAILABLE = True
 except ImportError:
     DecisionEngine = None
     SignalWriterV2 = None
     SignalV2 = None
+    SignalV2Record = None
     SideHint = None
     Regime = None
     DecisionCode = None
@@ -49,13 +53,32 @@ except ImportError:
 import logging
 logger = logging.getLogger(__name__)
 
+from alpha_core.utils.diagnostics import DiagnosticsLogger
+from alpha_core.microstructure.activity import ActivityAggregator
+from alpha_core.utils import json_codec
+from alpha_core.utils.jsonl_pool import JsonlHandlePool
+from .threshold_plan import ThresholdPlan
+from .core_batch import (
+    FrameInputs,
+    advance_dir_streak,
+    decide_frame,
+    decide_row,
+    fallback_consistency,
+    fallback_regimes,
+    first_truthy,
+    parse_columns,
+    resolve_scores,
+    to_float_array,
+)
+
 # 导入Fusion引擎用于consistency计算
 try:
-    from alpha_core.microstructure.fusion import OFI_CVD_Fusion, OFICVDFusionConfig
+    from alpha_core.microstructure.fusion import OFI_CVD_Fusion, OFICVDFusionConfig, advance_fusion_consistency
     FUSION_AVAILABLE = True
 except ImportError:
     OFI_CVD_Fusion = None
     OFICVDFusionConfig = None
+    advance_fusion_consistency = None
     FUSION_AVAILABLE = False
     logger.warning("[CoreAlgorithm] Fusion engine not available for consistency calculation")
 
@@ -157,12 +180,88 @@ class SignalStats:
     weak_tier_confirm: int = 0
 
 
+JSONL_WRITER_WATERMARK = "core_jsonl_v406"
+
+
+def _sqlite_row(entry: Dict[str, Any], run_id: str) -> tuple:
+    """signals 表一行（列顺序与 SqliteSink 的 INSERT 一致）"""
+    return (
+        int(entry["ts_ms"]),
+        entry.get("symbol"),
+        entry.get("score"),
+        entry.get("z_ofi"),
+        entry.get("z_cvd"),
+        entry.get("regime"),
+        entry.get("div_type"),
+        entry.get("signal_type"),
+        1 if entry.get("confirm") else 0,
+        1 if entry.get("gating") else 0,
+        entry.get("guard_reason"),
+        run_id,  # P0: run_id 用于按run_id对账
+    )
+
+
+class SignalRecord:
+    """规范化后的 v1 信号（不可变）：多 Sink 扇出时只规范化、只序列化一次
+
+    构造时就地补齐 run_id / signal_type / created_at / _writer 水印（与 JsonlSink 口径一致）；
+    JSONL 行（稳定 sort_keys 序列化）与 SQLite 行元组在首次访问时生成并缓存，各子 Sink 只取所需表示。
+    """
+
+    __slots__ = ("entry", "run_id", "_json_line", "_sqlite_row")
+
+    def __init__(self, entry: Dict[str, Any], run_id: str) -> None:
+        """
+        Args:
+            entry: 决策字典（就地规范化；需要保留原字典时传入副本）
+            run_id: 运行 ID
+        """
+        # P1: 统一run_id贯穿JSONL/SQLite，确保包含所有必需字段（signal_type、created_at）
+        entry["run_id"] = run_id
+        if "signal_type" not in entry:
+            entry["signal_type"] = "neutral"
+        if "created_at" not in entry:
+            entry["created_at"] = datetime.now(timezone.utc).isoformat()
+        # P0: 添加水印字段，用于验证是否使用了CORE_ALGO的JsonlSink
+        entry.setdefault("_writer", JSONL_WRITER_WATERMARK)
+        set_ = object.__setattr__
+        set_(self, "entry", entry)
+        set_(self, "run_id", run_id)
+        set_(self, "_json_line", None)
+        set_(self, "_sqlite_row", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @property
+    def json_line(self) -> str:
+        """JSONL 行（不含换行；TASK-A4 修复6: 稳定序列化 sort_keys=True）"""
+        line = self._json_line
+        if line is None:
+            line = json_codec.dumps(self.entry, sort_keys=True)
+            object.__setattr__(self, "_json_line", line)
+        return line
+
+    @property
+    def sqlite_row(self) -> tuple:
+        """signals 表一行"""
+        row = self._sqlite_row
+        if row is None:
+            row = _sqlite_row(self.entry, self.run_id)
+            object.__setattr__(self, "_sqlite_row", row)
+        return row
+
+
 class SignalSink:
     """Sink interface for downstream persistence."""
 
     def emit(self, entry: Dict[str, Any]) -> None:
         raise NotImplementedError
 
+    def emit_record(self, record: SignalRecord) -> None:
+        """扇出路径：消费已规范化的记录（默认退化为 emit 独立副本）"""
+        self.emit(dict(record.entry))
+
     def close(self) -> None:  # pragma: no cover - default no-op
         return None
 
@@ -178,90 +277,52 @@ class NullSink(SignalSink):
 class JsonlSink(SignalSink):
     """Append-only JSONL sink matching TASK-05 contract."""
 
-    def __init__(self, base_dir: Path, fsync_every_n: int = 50) -> None:
+    def __init__(self, base_dir: Path, fsync_every_n: int = 50, max_open: int = 64) -> None:
         self.base_dir = Path(base_dir)
         self.ready_root = self.base_dir / "ready" / "signal"
         self.ready_root.mkdir(parents=True, exist_ok=True)
         # P0: JSONL Writer 的 fsync 频率改为可配置
         # 引入 FSYNC_EVERY_N 环境变量（默认 50），在后台线程场景下按批次 fsync
         self.fsync_every_n = int(os.getenv("FSYNC_EVERY_N", str(fsync_every_n)))
-        self._write_count = 0
-        self._last_minute = None  # P0: 跟踪上一个文件的minute，用于检测文件切换
-        
+        # 运行级常量只读一次（run_id 贯穿整个进程）
+        self._run_id = os.getenv("RUN_ID", "")
+        # 常驻句柄池：按 (symbol, 小时) 复用追加句柄，小时轮转/淘汰时 fsync 后关闭
+        self._pool = JsonlHandlePool(
+            self.ready_root,
+            fsync_every_n=self.fsync_every_n,
+            max_open=int(os.getenv("JSONL_MAX_OPEN", str(max_open))),
+            name="JsonlSink",
+        )
+        # 小时字符串缓存：同一小时内的 ts_ms 复用格式化结果
+        self._hour_start_ms = -1
+        self._hour_str = ""
+
         # P0.5: 启动时打印最终生效的fsync策略，便于复现与比对
         logger.info(f"[JsonlSink] fsync策略: every_n={self.fsync_every_n}（每{self.fsync_every_n}次写入执行一次fsync）")
 
+    def _hour_for(self, ts_ms: int) -> str:
+        hour_start = ts_ms - ts_ms % 3_600_000
+        if hour_start != self._hour_start_ms:
+            dt = datetime.fromtimestamp(hour_start / 1000.0, tz=timezone.utc)
+            self._hour_str = dt.strftime("%Y%m%d-%H")
+            self._hour_start_ms = hour_start
+        return self._hour_str
+
     def emit(self, entry: Dict[str, Any]) -> None:
-        # P0: 在JSONL中追加run_id字段，用于按run_id对账
-        # P1: 统一run_id贯穿JSONL/SQLite，确保JSONL包含所有必需字段（signal_type、created_at）
-        # 强制从环境变量读取run_id（覆盖entry中可能存在的空值）
-        run_id_env = os.getenv("RUN_ID", "")
-        # 始终设置run_id字段（即使环境变量为空，也要写入字段）
-        entry["run_id"] = run_id_env
-        
-        # P1: 确保signal_type字段存在（与SQLite对齐）
-        if "signal_type" not in entry:
-            entry["signal_type"] = "neutral"
-        
-        # P1: 确保created_at字段存在（与SQLite对齐）
-        if "created_at" not in entry:
-            entry["created_at"] = datetime.now(timezone.utc).isoformat()
-        
-        ts_ms = int(entry["ts_ms"])
-        dt = datetime.fromtimestamp(ts_ms / 1000.0, tz=timezone.utc)
+        # P0: 在JSONL中追加run_id字段，用于按run_id对账（就地补齐，与历史行为一致）
+        self.emit_record(SignalRecord(entry, self._run_id))
+
+    def emit_record(self, record: SignalRecord) -> None:
+        entry = record.entry
         # P0 修复5: JSONL 命名/轮转与路径风格统一 - 统一到 v2 风格（小时轮转、连字符）
-        hour_str = dt.strftime("%Y%m%d-%H")
+        hour_str = self._hour_for(int(entry["ts_ms"]))
         symbol = entry.get("symbol", "UNKNOWN")
-        target_dir = self.ready_root / symbol
-        target_dir.mkdir(parents=True, exist_ok=True)
-        target_file = target_dir / f"signals-{hour_str}.jsonl"
-        
-        # P0: 添加水印字段，用于验证是否使用了CORE_ALGO的JsonlSink
-        entry.setdefault("_writer", "core_jsonl_v406")
-        
-        # TASK-A4 修复6: 稳定序列化统一，JSONL 写入统一 sort_keys=True
-        serialized = json.dumps(entry, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
-        
-        # TASK-A4 修复2: 按批次 fsync，仅在达到阈值或小时轮转时 fsync
-        # 移除收尾兜底 fsync，避免每条写入都 fsync（抵消批量策略）
-        # P0 修复5: 统一到小时轮转（与 v2 风格一致）
-        prev_hour = getattr(self, '_last_minute', None)  # 保持变量名兼容，但实际是小时
-        current_hour = hour_str
-        
-        # 如果文件切换（小时轮转），对上一个文件执行补偿 fsync
-        if prev_hour is not None and prev_hour != current_hour:
-            prev_file = target_dir / f"signals-{prev_hour}.jsonl"
-            if prev_file.exists():
-                try:
-                    with prev_file.open("r+b") as prev_fp:
-                        prev_fp.flush()
-                        os.fsync(prev_fp.fileno())
-                except Exception as e:
-                    logger.warning(f"[JsonlSink] Failed to fsync previous file {prev_file}: {e}")
-        
-        with target_file.open("a", encoding="utf-8") as fp:
-            fp.write(serialized + "\n")
-            self._write_count += 1
-            
-            # TASK-A4 修复2: 只在达到阈值时 fsync，移除收尾兜底 fsync
-            if self._write_count >= self.fsync_every_n:
-                fp.flush()
-                os.fsync(fp.fileno())
-                self._write_count = 0
-            else:
-                # 仍然 flush，但不 fsync（减少系统调用）
-                fp.flush()
-        
-        self._last_minute = current_hour  # P0 修复5: 实际存储的是小时字符串
+        # TASK-A4 修复2: 按句柄批次 fsync，仅在达到阈值或小时轮转时 fsync
+        self._pool.write(symbol, hour_str, record.json_line)
 
     def close(self) -> None:
-        """P0: 关闭时清理状态"""
-        # 由于JsonlSink每次emit都打开和关闭文件，且在文件关闭前已fsync
-        # 这里只需要清理状态
-        if self._write_count > 0:
-            logger.warning(f"[JsonlSink] 关闭时检测到未fsync的写入计数: {self._write_count}（应在emit中处理）")
-        self._write_count = 0
-        self._last_minute = None
+        """P0: 关闭时对所有打开的文件 fsync 并关闭句柄"""
+        self._pool.close()
     
     def get_health(self) -> Dict[str, Any]:
         """P1: 返回健康度指标（目前JsonlSink无队列，返回基础信息）"""
@@ -270,11 +331,22 @@ class JsonlSink(SignalSink):
             "base_dir": str(self.base_dir),
             "queue_size": 0,  # JsonlSink无队列
             "dropped_count": 0,  # JsonlSink无dropped计数
+            "open_files": self._pool.open_count,
+            "pending_fsync": self._pool.pending_writes,
         }
 
 
+_SQLITE_STOP = object()  # SqliteSink 写线程关闭哨兵
+
+
 class SqliteSink(SignalSink):
-    """SQLite sink (WAL) with async batch processing for better throughput."""
+    """SQLite sink (WAL) with a background writer thread.
+
+    emit() 只编码并入有界队列；写线程独占连接，按 batch_n 条或 flush_ms 定时器组提交，
+    按 checkpoint_sec 周期执行 wal_checkpoint。写失败的退避重试与补偿文件都在写线程内完成，
+    信号计算不会因磁盘阻塞。队列满时默认丢弃并计数（回放模式 V13_REPLAY_MODE=1 下默认阻塞等待，
+    保证回测完整），可经 SQLITE_QUEUE_FULL=drop|block 覆盖。
+    """
 
     def __init__(self, base_dir: Path, batch_n: int = None, flush_ms: int = None) -> None:
         # TASK-07A: 支持环境变量调参，便于在不同盘型/Windows上调优批量提交
@@ -284,6 +356,7 @@ class SqliteSink(SignalSink):
             flush_ms = int(os.getenv("SQLITE_FLUSH_MS", "500"))
         base_dir = Path(base_dir)
         base_dir.mkdir(parents=True, exist_ok=True)
+        self.base_dir = base_dir
         self.db_path = base_dir / "signals.db"
         
         # P0.5: 启动时打印最终生效的批量参数，便于复现与比对
@@ -371,15 +444,31 @@ class SqliteSink(SignalSink):
             batch_n = int(os.getenv("SQLITE_BATCH_N", "500"))
         if flush_ms is None:
             flush_ms = int(os.getenv("SQLITE_FLUSH_MS", "500"))
-        self.batch_n = batch_n
-        self.flush_ms = flush_ms
-        self._batch_queue: List[tuple] = []
-        # P1: 添加dropped计数（用于健康度指标）
+        self.batch_n = max(1, int(batch_n))
+        self.flush_ms = max(0, int(flush_ms))
+        self.queue_max = max(1, int(os.getenv("SQLITE_QUEUE_MAX", "10000")))
+        self.checkpoint_sec = float(os.getenv("SQLITE_CHECKPOINT_SEC", "60"))
+        default_full_policy = "block" if os.getenv("V13_REPLAY_MODE") == "1" else "drop"
+        self.queue_full_policy = os.getenv("SQLITE_QUEUE_FULL", default_full_policy).lower()
+        # 运行级常量只读一次（run_id 贯穿整个进程）
+        self._run_id = os.getenv("RUN_ID", "")
+
+        # 建表/迁移用的连接到此为止，之后由写线程独占自己的连接
+        self.conn.close()
+        self.conn = None
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.queue_max)
+        self._closed = False
+        self._lock = threading.Lock()  # 保护指标
         self._dropped_count = 0
-        # TASK-07B: 初始化_last_flush_time为0，确保第一次emit时立即刷新（如果flush_ms>0）
-        # 如果flush_ms=0，会在emit中特殊处理
-        self._last_flush_time = 0.0  # 初始化为0，确保第一次刷新立即触发
-        self._lock = threading.Lock()
+        self._written = 0
+        self._batches = 0
+        self._max_queue_depth = 0
+        self._last_commit_ms = 0.0
+        self._max_commit_ms = 0.0
+        self._checkpoints = 0
+        self._thread = threading.Thread(target=self._run, name="SqliteSink-writer", daemon=True)
+        self._thread.start()
         
         # TASK-07B: SQLite初始化时打印关键参数，便于验证环境变量是否生效
         env_source = "env" if os.getenv("SQLITE_BATCH_N") or os.getenv("SQLITE_FLUSH_MS") else "default"
@@ -389,7 +478,9 @@ class SqliteSink(SignalSink):
             f"journal_mode=WAL, "
             f"synchronous=NORMAL, "
             f"batch_n={self.batch_n} (来源: {env_source}), "
-            f"flush_ms={self.flush_ms}ms (来源: {env_source})"
+            f"flush_ms={self.flush_ms}ms (来源: {env_source}), "
+            f"queue_max={self.queue_max}, queue_full={self.queue_full_policy}, "
+            f"checkpoint_sec={self.checkpoint_sec}"
         )
     
     def _migrate_schema_if_needed(self) -> None:
@@ -509,152 +600,225 @@ class SqliteSink(SignalSink):
             logger.error(f"[SqliteSink] 表结构迁移失败: {e}", exc_info=True)
 
     def emit(self, entry: Dict[str, Any]) -> None:
-        # P0: 从环境变量读取run_id，用于按run_id对账
-        run_id = os.getenv("RUN_ID", "")
-        payload = (
-            int(entry["ts_ms"]),
-            entry.get("symbol"),
-            entry.get("score"),
-            entry.get("z_ofi"),
-            entry.get("z_cvd"),
-            entry.get("regime"),
-            entry.get("div_type"),
-            entry.get("signal_type"),
-            1 if entry.get("confirm") else 0,
-            1 if entry.get("gating") else 0,
-            entry.get("guard_reason"),
-            run_id,
-        )
-        
-        # P0: 批量处理模式
-        # TASK-07B: 修复批量刷新逻辑，确保batch_n=1和flush_ms=0时立即刷新
-        with self._lock:
-            self._batch_queue.append(payload)
-            current_time = time.time()
-            # 修复：如果flush_ms=0，应该立即刷新（不考虑时间间隔）
-            time_elapsed_ms = (current_time - self._last_flush_time) * 1000 if self.flush_ms > 0 else float('inf')
-            should_flush = (
-                len(self._batch_queue) >= self.batch_n or
-                time_elapsed_ms >= self.flush_ms
-            )
-            
-            if should_flush:
-                self._flush_batch()
-    
-    def _flush_batch(self) -> None:
-        """批量写入数据库"""
-        if not self._batch_queue:
+        self._enqueue(_sqlite_row(entry, self._run_id))
+
+    def emit_record(self, record: SignalRecord) -> None:
+        self._enqueue(record.sqlite_row)
+
+    def _enqueue(self, payload: tuple) -> None:
+        if self._closed:
+            with self._lock:
+                self._dropped_count += 1
+            logger.warning("[SqliteSink] emit after close, signal dropped")
+            return
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            if self.queue_full_policy == "block":
+                self._queue.put(payload)
+            else:
+                with self._lock:
+                    self._dropped_count += 1
+                    dropped = self._dropped_count
+                if dropped == 1 or dropped % 1000 == 0:
+                    logger.warning(f"[SqliteSink] 队列已满（queue_max={self.queue_max}），累计丢弃 {dropped} 条")
+                return
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """提交已入队的全部信号并等待完成（屏障），返回是否在超时前完成"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    # ---- 写线程 ----
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute("PRAGMA cache_size=-20000;")
+        conn.execute("PRAGMA busy_timeout=5000;")
+        return conn
+
+    def _run(self) -> None:
+        try:
+            self.conn = self._connect()
+        except Exception as e:
+            # 连接失败时批次走重试→补偿文件路径
+            logger.error(f"[SqliteSink] 写线程连接数据库失败: {e}", exc_info=True)
+        batch: List[tuple] = []
+        batch_t0 = 0.0
+        flush_s = self.flush_ms / 1000.0
+        next_checkpoint = time.monotonic() + self.checkpoint_sec if self.checkpoint_sec > 0 else None
+        while True:
+            deadlines = []
+            if batch:
+                deadlines.append(batch_t0 + flush_s)
+            if next_checkpoint is not None:
+                deadlines.append(next_checkpoint)
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _SQLITE_STOP:
+                self._flush_batch(batch)
+                self._shutdown_connection()
+                return
+            if isinstance(item, threading.Event):
+                self._flush_batch(batch)
+                batch = []
+                item.set()
+            elif item is not None:
+                if not batch:
+                    batch_t0 = time.monotonic()
+                batch.append(item)
+
+            now = time.monotonic()
+            if batch and (len(batch) >= self.batch_n or now - batch_t0 >= flush_s):
+                self._flush_batch(batch)
+                batch = []
+            if next_checkpoint is not None and now >= next_checkpoint:
+                self._checkpoint()
+                next_checkpoint = now + self.checkpoint_sec
+
+    def _checkpoint(self) -> None:
+        if self.conn is None:
+            return
+        try:
+            self.conn.execute("PRAGMA wal_checkpoint(PASSIVE);")
+            with self._lock:
+                self._checkpoints += 1
+        except Exception as e:
+            logger.warning(f"[SqliteSink] WAL检查点失败: {e}")
+
+    def _flush_batch(self, batch: List[tuple]) -> None:
+        """批量写入数据库（写线程内执行）"""
+        if not batch:
             return
         
-        batch_size = len(self._batch_queue)
+        batch_size = len(batch)
+        sql = "INSERT OR IGNORE INTO signals (ts_ms, symbol, score, z_ofi, z_cvd, regime, div_type, signal_type, confirm, gating, guard_reason, run_id) VALUES (?,?,?,?,?,?,?,?,?,?,?,?);"
+        t0 = time.perf_counter()
         try:
             # P0: 使用INSERT OR IGNORE，避免主键冲突导致整批失败
             # 主键(run_id, ts_ms, symbol)允许同一毫秒多次回放/多次测试而不互相覆盖
             # P1: executemany批量提交的异常保护（重试+补偿）
-            self.conn.executemany(
-                "INSERT OR IGNORE INTO signals (ts_ms, symbol, score, z_ofi, z_cvd, regime, div_type, signal_type, confirm, gating, guard_reason, run_id) VALUES (?,?,?,?,?,?,?,?,?,?,?,?);",
-                self._batch_queue,
-            )
+            self.conn.executemany(sql, batch)
             self.conn.commit()
-            flushed_count = len(self._batch_queue)
-            self._batch_queue.clear()
-            self._last_flush_time = time.time()
+            self._record_commit(batch_size, t0)
             # TASK-07B: 添加批量刷新日志（短跑场景下总是输出，便于调试）
             if batch_size >= 10 or os.getenv("SQLITE_DEBUG", "0") == "1" or self.batch_n <= 10:
-                logger.info(f"[SqliteSink] 批量刷新: {flushed_count}条数据已写入数据库（batch_n={self.batch_n}, flush_ms={self.flush_ms}ms）")
-        except (sqlite3.IntegrityError, sqlite3.OperationalError, Exception) as e:
+                logger.info(f"[SqliteSink] 批量刷新: {batch_size}条数据已写入数据库（batch_n={self.batch_n}, flush_ms={self.flush_ms}ms）")
+            return
+        except Exception as e:
             logger.error(f"[SqliteSink] 批量刷新失败: {e}", exc_info=True)
-            # P1: 失败时不丢弃，加入退避重试与本地补偿文件
-            # 重试3次
-            retry_count = 0
-            max_retries = 3
-            while retry_count < max_retries:
-                try:
-                    time.sleep(0.1 * (retry_count + 1))  # 退避：0.1s, 0.2s, 0.3s
-                    self.conn.executemany(
-                        "INSERT OR IGNORE INTO signals (ts_ms, symbol, score, z_ofi, z_cvd, regime, div_type, signal_type, confirm, gating, guard_reason, run_id) VALUES (?,?,?,?,?,?,?,?,?,?,?,?);",
-                        self._batch_queue,
-                    )
-                    self.conn.commit()
-                    logger.info(f"[SqliteSink] 批量刷新重试成功（第{retry_count + 1}次）")
-                    flushed_count = len(self._batch_queue)
-                    self._batch_queue.clear()
-                    self._last_flush_time = time.time()
-                    if batch_size >= 10 or os.getenv("SQLITE_DEBUG", "0") == "1" or self.batch_n <= 10:
-                        logger.info(f"[SqliteSink] 批量刷新: {flushed_count}条数据已写入数据库（重试后）")
-                    return
-                except Exception as retry_e:
-                    retry_count += 1
-                    logger.warning(f"[SqliteSink] 批量刷新重试失败（第{retry_count}次）: {retry_e}")
-            
-            # 重试失败，写入补偿文件
-            # P0 修复4: 失败批次补偿文件写入当前 output_dir（而非固定 runtime）
-            failed_batch_file = self.base_dir / "failed_batches.jsonl"
+        
+        # P1: 失败时不丢弃，加入退避重试与本地补偿文件（写线程内退避，不阻塞调用方）
+        for retry_count in range(1, 4):
             try:
-                with failed_batch_file.open("a", encoding="utf-8", newline="") as f:
-                    for payload in self._batch_queue:
-                        # 将payload转换为字典格式写入
-                        record = {
-                            "ts_ms": payload[0],
-                            "symbol": payload[1],
-                            "score": payload[2],
-                            "z_ofi": payload[3],
-                            "z_cvd": payload[4],
-                            "regime": payload[5],
-                            "div_type": payload[6],
-                            "signal_type": payload[7],
-                            "confirm": payload[8],
-                            "gating": payload[9],
-                            "guard_reason": payload[10],
-                            "run_id": payload[11] if len(payload) > 11 else "",
-                        }
-                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
-                logger.error(f"[SqliteSink] 批量刷新失败，已写入补偿文件: {failed_batch_file} ({batch_size}条)")
-            except Exception as save_e:
-                logger.error(f"[SqliteSink] 写入补偿文件失败: {save_e}", exc_info=True)
-            
-            # 清空队列（已保存到补偿文件）
-            # P1: 记录dropped计数
+                time.sleep(0.1 * retry_count)  # 退避：0.1s, 0.2s, 0.3s
+                self.conn.executemany(sql, batch)
+                self.conn.commit()
+                self._record_commit(batch_size, t0)
+                logger.info(f"[SqliteSink] 批量刷新重试成功（第{retry_count}次）: {batch_size}条数据已写入数据库")
+                return
+            except Exception as retry_e:
+                logger.warning(f"[SqliteSink] 批量刷新重试失败（第{retry_count}次）: {retry_e}")
+        
+        # 重试失败，写入补偿文件
+        # P0 修复4: 失败批次补偿文件写入当前 output_dir（而非固定 runtime）
+        failed_batch_file = self.base_dir / "failed_batches.jsonl"
+        try:
+            with failed_batch_file.open("a", encoding="utf-8", newline="") as f:
+                for payload in batch:
+                    # 将payload转换为字典格式写入
+                    record = {
+                        "ts_ms": payload[0],
+                        "symbol": payload[1],
+                        "score": payload[2],
+                        "z_ofi": payload[3],
+                        "z_cvd": payload[4],
+                        "regime": payload[5],
+                        "div_type": payload[6],
+                        "signal_type": payload[7],
+                        "confirm": payload[8],
+                        "gating": payload[9],
+                        "guard_reason": payload[10],
+                        "run_id": payload[11] if len(payload) > 11 else "",
+                    }
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            logger.error(f"[SqliteSink] 批量刷新失败，已写入补偿文件: {failed_batch_file} ({batch_size}条)")
+        except Exception as save_e:
+            logger.error(f"[SqliteSink] 写入补偿文件失败: {save_e}", exc_info=True)
+        
+        # P1: 记录dropped计数（已保存到补偿文件）
+        with self._lock:
             self._dropped_count += batch_size
-            self._batch_queue.clear()
-    
-    def close(self) -> None:
-        """关闭时刷新剩余批次（确保所有队列数据写入数据库）"""
-        # TASK-07B: 增强关闭流程，确保批量队列正确刷新
+
+    def _record_commit(self, batch_size: int, t0: float) -> None:
+        commit_ms = (time.perf_counter() - t0) * 1000.0
+        with self._lock:
+            self._written += batch_size
+            self._batches += 1
+            self._last_commit_ms = commit_ms
+            if commit_ms > self._max_commit_ms:
+                self._max_commit_ms = commit_ms
+
+    def _shutdown_connection(self) -> None:
+        if self.conn is None:
+            return
+        # TASK-07B: 执行WAL检查点，确保数据可见
         try:
-            queue_size = 0
-            with self._lock:
-                queue_size = len(self._batch_queue)
-                if queue_size > 0:
-                    logger.info(f"[SqliteSink] 关闭时刷新剩余批次: {queue_size}条数据")
-                    self._flush_batch()
-                else:
-                    logger.debug("[SqliteSink] 关闭时批量队列为空，无需刷新")
-            
-            if self.conn:
-                # TASK-07B: 执行WAL检查点，确保数据可见
-                try:
-                    self.conn.execute("PRAGMA wal_checkpoint(PASSIVE);")
-                    logger.debug("[SqliteSink] WAL检查点完成")
-                except Exception as e:
-                    logger.warning(f"[SqliteSink] WAL检查点失败: {e}")
-                
-                self.conn.close()
-                # P0: SQLite关闭路径再确认：先刷剩余批次→checkpoint→close，并打印实际flush数
-                logger.info(f"[SqliteSink] 关闭完成：已刷新剩余批次{queue_size}条数据，WAL检查点已执行，数据库连接已关闭")
+            self.conn.execute("PRAGMA wal_checkpoint(PASSIVE);")
+            logger.debug("[SqliteSink] WAL检查点完成")
         except Exception as e:
-            logger.error(f"[SqliteSink] 关闭时出错: {e}", exc_info=True)
+            logger.warning(f"[SqliteSink] WAL检查点失败: {e}")
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"[SqliteSink] 关闭数据库连接失败: {e}", exc_info=True)
+        self.conn = None
+    
+    def close(self) -> None:
+        """关闭时排空队列、刷新剩余批次、执行 WAL 检查点并关闭连接"""
+        if self._closed:
+            return
+        self._closed = True
+        queue_size = self._queue.qsize()
+        if queue_size > 0:
+            logger.info(f"[SqliteSink] 关闭时刷新剩余批次: {queue_size}条数据")
+        self._queue.put(_SQLITE_STOP)
+        self._thread.join()
+        # P0: SQLite关闭路径再确认：先刷剩余批次→checkpoint→close，并打印实际flush数
+        logger.info(
+            f"[SqliteSink] 关闭完成：已写入{self._written}条数据（{self._batches}批），"
+            f"丢弃{self._dropped_count}条，WAL检查点已执行，数据库连接已关闭"
+        )
 
     def get_health(self) -> Dict[str, Any]:
-        """P1: 返回健康度指标（queue_size, dropped_count）"""
+        """P1: 返回健康度指标（队列深度、提交延迟、丢弃计数）"""
         with self._lock:
-            queue_size = len(self._batch_queue)
-        return {
-            "kind": "sqlite",
-            "path": str(self.db_path),
-            "queue_size": queue_size,
-            "dropped_count": self._dropped_count,
-        }
+            return {
+                "kind": "sqlite",
+                "path": str(self.db_path),
+                "queue_size": self._queue.qsize(),
+                "queue_max": self.queue_max,
+                "max_queue_depth": self._max_queue_depth,
+                "written": self._written,
+                "batches": self._batches,
+                "last_commit_ms": self._last_commit_ms,
+                "max_commit_ms": self._max_commit_ms,
+                "checkpoints": self._checkpoints,
+                "dropped_count": self._dropped_count,
+            }
 
 
 class MultiSink(SignalSink):
@@ -662,12 +826,18 @@ class MultiSink(SignalSink):
     
     def __init__(self, sinks: List[SignalSink]) -> None:
         self.sinks = sinks
+        self._run_id = os.getenv("RUN_ID", "")
     
     def emit(self, entry: Dict[str, Any]) -> None:
-        # P0: 固定MultiSink顺序与数据一致性（每个子Sink独立副本，避免字段被"串改"）
-        # 在循环内copy，确保每个子Sink都有独立的entry副本
+        # 扇出：规范化一次（基于副本，不改动调用方的 entry），序列化结果由子 Sink 共享
+        # 各子Sink按固定顺序消费同一不可变记录，字段不会被"串改"
+        record = SignalRecord(entry.copy(), self._run_id)
+        for sink in self.sinks:
+            sink.emit_record(record)
+
+    def emit_record(self, record: SignalRecord) -> None:
         for sink in self.sinks:
-            sink.emit(entry.copy())
+            sink.emit_record(record)
     
     def close(self) -> None:
         """TASK-07A: 确保所有Sink正确关闭（只调用标准接口，不访问私有属性）
@@ -715,6 +885,44 @@ def build_sink(kind: str, output_dir: Path) -> SignalSink:
     return JsonlSink(output_dir)
 
 
+def build_core_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """解析 CoreAlgorithm 的生效配置（默认值 + 用户覆写）
+
+    "总 config + signal 小节"风格时取 signal 小节（并带上 strategy_mode/strategy/版本信息），
+    否则整个 config 即为 Core 配置。
+    """
+    raw_cfg = config or {}
+
+    # 如果是"总 config + signal 小节"的风格，则优先使用 signal 小节作为 Core 的配置
+    # 条件：存在 raw_cfg["signal"]，且顶层没有显式传入 weak_signal_threshold / consistency_min 等
+    if (
+        isinstance(raw_cfg, dict)
+        and "signal" in raw_cfg
+        and not any(
+            k in raw_cfg
+            for k in (
+                "weak_signal_threshold",
+                "consistency_min",
+                "consistency_min_per_regime",
+                "thresholds",
+                "sink",
+                "activity",
+            )
+        )
+    ):
+        effective_cfg = dict(raw_cfg["signal"])  # 拿 signal 小节作为 core 的配置起点
+
+        # 把跟 Core 相关的其他段落"抄"进来（strategy_mode / strategy / 版本信息等）
+        for extra_key in ("strategy_mode", "strategy", "rules_ver", "features_ver"):
+            if extra_key in raw_cfg and extra_key not in effective_cfg:
+                effective_cfg[extra_key] = raw_cfg[extra_key]
+    else:
+        # 兼容旧调用：直接认为整个 config 就是 Core 的配置
+        effective_cfg = raw_cfg
+
+    return _merge_dict(DEFAULT_SIGNAL_CONFIG, effective_cfg)
+
+
 class CoreAlgorithm:
     """Process FeaturePipe rows and emit signals to sinks."""
 
@@ -726,37 +934,8 @@ class CoreAlgorithm:
         sink_kind: Optional[str] = None,
         output_dir: Optional[str | Path] = None,
     ) -> None:
-        raw_cfg = config or {}
-
-        # 如果是"总 config + signal 小节"的风格，则优先使用 signal 小节作为 Core 的配置
-        # 条件：存在 raw_cfg["signal"]，且顶层没有显式传入 weak_signal_threshold / consistency_min 等
-        if (
-            isinstance(raw_cfg, dict)
-            and "signal" in raw_cfg
-            and not any(
-                k in raw_cfg
-                for k in (
-                    "weak_signal_threshold",
-                    "consistency_min",
-                    "consistency_min_per_regime",
-                    "thresholds",
-                    "sink",
-                    "activity",
-                )
-            )
-        ):
-            effective_cfg = dict(raw_cfg["signal"])  # 拿 signal 小节作为 core 的配置起点
-
-            # 把跟 Core 相关的其他段落"抄"进来（strategy_mode / strategy / 版本信息等）
-            for extra_key in ("strategy_mode", "strategy", "rules_ver", "features_ver"):
-                if extra_key in raw_cfg and extra_key not in effective_cfg:
-                    effective_cfg[extra_key] = raw_cfg[extra_key]
-        else:
-            # 兼容旧调用：直接认为整个 config 就是 Core 的配置
-            effective_cfg = raw_cfg
-
         # 真正生效的配置 = 默认 + 用户覆写
-        self.config = _merge_dict(DEFAULT_SIGNAL_CONFIG, effective_cfg)
+        self.config = build_core_config(config)
 
         # 临时日志：验证配置生效（用于调试 config["signal"] 生效问题）
         logger.info(
@@ -829,6 +1008,9 @@ class CoreAlgorithm:
                 core_config_with_versions["rules_ver"] = rules_ver
                 core_config_with_versions["features_ver"] = features_ver
                 self._config_hash = calculate_config_hash(core_config_with_versions) if calculate_config_hash else "unknown"
+            # 规则/特征版本只在启动时解析一次（与 config_hash 口径一致），逐条信号直接复用
+            self._features_ver = features_ver
+            self._rules_ver = rules_ver
             
             # 生成 run_id（如果环境变量未设置）
             self._run_id = os.getenv("RUN_ID", f"r{str(uuid.uuid4())[:8]}")
@@ -863,10 +1045,14 @@ class CoreAlgorithm:
         self._base_dir = base_dir
         self._stats = SignalStats()
         self._last_ts_per_symbol: Dict[str, int] = {}
+        # 逐行诊断（计数 + 采样输出，替代逐行 f-string debug）
+        self._diag = DiagnosticsLogger(logger, name="CoreAlgorithm")
         
         # P0修复: B组回测端重算融合 + 连击确认
         self.recompute_fusion = bool(self.config.get("recompute_fusion", False))
         self.min_consecutive_same_dir = int(self.config.get("min_consecutive_same_dir", 1))
+        # 逐行判定用的预编译阈值计划（配置只在构造/reconfigure 时解析）
+        self._plan = ThresholdPlan(self.config, self.min_consecutive_same_dir)
         # 方向streak跟踪: symbol -> (direction, count)
         self._dir_streak_state: Dict[str, tuple] = {}  # symbol -> (last_direction, consecutive_count)
 
@@ -911,8 +1097,7 @@ class CoreAlgorithm:
         self._strategy_mode_log_interval_ms = 10000  # 10 seconds
         
         # P0: SMOKE 兜底：用特征行到达率估算 tps（仅当缺少 trade_rate/quote_rate）
-        from collections import deque
-        self._arrival_ts_window: Dict[str, deque] = {}  # symbol -> deque of ts_ms
+        self._arrival_activity: Dict[str, ActivityAggregator] = {}  # symbol -> 到达率聚合器
         self._arrival_window_ms = 60000  # 60 seconds
         
         # Initialize StrategyModeManager if available
@@ -965,6 +1150,7 @@ class CoreAlgorithm:
         return self._stats
 
     def close(self) -> None:
+        self._diag.flush_summary()
         # TASK_CONFIRM_PIPELINE_TUNING: Phase A - 输出确认漏斗统计
         enable_funnel_diagnostics = (
             self.config.get("enable_confirm_funnel_diagnostics") or
@@ -1086,8 +1272,9 @@ class CoreAlgorithm:
             self._sink.close()
 
     def process_feature_row(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        plan = self._plan
         # TASK-CORE-CONFIRM: 添加早期退出诊断
-        core_confirm_trace = self.config.get("debug", {}).get("core_confirm_trace", False)
+        core_confirm_trace = plan.core_confirm_trace
 
         if core_confirm_trace:
             logger.info(f"[CORE_CONFIRM_TRACE_EARLY] Processing row: ts_ms={row.get('ts_ms')}, symbol={row.get('symbol')}")
@@ -1117,325 +1304,60 @@ class CoreAlgorithm:
         # 处理 None 值（Parquet 文件可能包含 None）
         spread_bps_val = row.get("spread_bps")
         lag_sec_val = row.get("lag_sec")
-        spread_bps = float(spread_bps_val if spread_bps_val is not None else 0.0)
-        lag_sec = float(lag_sec_val if lag_sec_val is not None else 0.0)
-        warmup = bool(row.get("warmup", False))
-        reason_codes = row.get("reason_codes", []) or []
 
         # TASK-CORE-CONFIRM: 使用Fusion引擎计算consistency，而不是从feature文件读取
         consistency_raw = self._calculate_consistency_with_fusion(row)
-
-        # P0: consistency 保守底座（避免 93% 被 low_consistency 一刀切）
-        consistency = consistency_raw  # 初始化为raw值
-        if consistency_raw <= 0.0:
-            consistency_floor_when_abs_score_ge = self.config.get("consistency_floor_when_abs_score_ge", 0.4)
-            consistency_floor = self.config.get("consistency_floor", 0.10)
-            consistency_floor_on_divergence = self.config.get("consistency_floor_on_divergence", 0.12)
-            
-            if abs(score) >= consistency_floor_when_abs_score_ge:
-                consistency = max(consistency, consistency_floor)
-            elif row.get("div_type"):  # 出现任何背离信号
-                consistency = max(consistency, consistency_floor_on_divergence)
-
         regime = self._infer_regime(row)
-        
-        # F4修复: 场景化阈值覆写
+        # F4修复: 场景化阈值覆写；分模式一致性阈值（场景覆写优先，其次 regime，最后全局 consistency_min）
         scenario_2x2 = row.get("scenario_2x2")  # A_H, Q_H, A_L, Q_L
-        effective_weak_signal_threshold = self.config["weak_signal_threshold"]
-        effective_consistency_min = self.config["consistency_min"]
-        effective_min_consecutive = self.min_consecutive_same_dir
-        
-        scenario_overrides = self.config.get("scenario_overrides", {})
-        if scenario_overrides and scenario_2x2:
-            scenario_override = scenario_overrides.get(scenario_2x2, {})
-            if scenario_override:
-                # 应用场景化偏移
-                weak_offset = scenario_override.get("weak_signal_threshold_offset", 0.0)
-                consistency_offset = scenario_override.get("consistency_min_offset", 0.0)
-                min_consecutive_offset = scenario_override.get("min_consecutive_offset", 0)
-                
-                effective_weak_signal_threshold = self.config["weak_signal_threshold"] + weak_offset
-                effective_consistency_min = self.config["consistency_min"] + consistency_offset
-                effective_min_consecutive = self.min_consecutive_same_dir + min_consecutive_offset
-                
-                logger.debug(f"[CoreAlgorithm] F4: 场景{scenario_2x2}覆写: weak={effective_weak_signal_threshold:.3f}, consistency={effective_consistency_min:.3f}, min_consecutive={effective_min_consecutive}")
-        
-        thresholds = self._thresholds_for_regime(regime)
-        
-        # 分模式/分场景的一致性阈值（优先级高于全局 consistency_min）
-        consistency_min_per_regime = self.config.get("consistency_min_per_regime", {})
-        if consistency_min_per_regime and regime in consistency_min_per_regime:
-            # 如果场景化覆写已应用，使用覆写后的值；否则使用regime特定值
-            if not (scenario_overrides and scenario_2x2 and scenario_overrides.get(scenario_2x2)):
-                effective_consistency_min = consistency_min_per_regime[regime]
-
-        gating_reasons: List[str] = []
-
-        # TASK_CONFIRM_PIPELINE_TUNING: Phase A - 漏斗统计初始化
-        enable_funnel_diagnostics = (
-            self.config.get("enable_confirm_funnel_diagnostics") or
-            self.config.get("signal", {}).get("enable_confirm_funnel_diagnostics", False)
-        )
-        if enable_funnel_diagnostics:
-            self._stats.total_signals += 1
-
-        # F3修复: 退出后冷静期检查（需要在ReplayFeeder中调用record_exit来更新）
-        if self.cooldown_after_exit_sec > 0:
-            last_exit_ts = self._last_exit_ts_per_symbol.get(symbol)
-            if last_exit_ts is not None:
-                elapsed_sec = (ts_ms - last_exit_ts) / 1000.0
-                if elapsed_sec < self.cooldown_after_exit_sec:
-                    # 仍在冷静期内，阻止信号
-                    gating_reasons.append(f"cooldown_after_exit({elapsed_sec:.1f}s<{self.cooldown_after_exit_sec}s)")
-                    self._stats.suppressed += 1
-        if warmup:
-            gating_reasons.append("warmup")
-            self._stats.warmup_blocked += 1
-        if spread_bps > self.config["spread_bps_cap"]:
-            gating_reasons.append(f"spread_bps>{self.config['spread_bps_cap']}")
-        if lag_sec > self.config["lag_cap_sec"]:
-            gating_reasons.append(f"lag_sec>{self.config['lag_cap_sec']}")
-
-        # TASK_CONFIRM_PIPELINE_TUNING: Phase A - 一致性过滤统计
-        consistency_passed = consistency >= effective_consistency_min
-        if enable_funnel_diagnostics and consistency_passed:
-            self._stats.pass_consistency_filter += 1
-
-        if consistency < effective_consistency_min:
-            gating_reasons.append("low_consistency")
-
-        # TASK_CONFIRM_PIPELINE_TUNING: Phase A - 弱信号过滤统计
-        weak_signal_passed = abs(score) >= effective_weak_signal_threshold or warmup
-        if enable_funnel_diagnostics and weak_signal_passed:
-            self._stats.pass_weak_signal_filter += 1
-
-        if abs(score) < effective_weak_signal_threshold and not warmup:
-            gating_reasons.append("weak_signal")
-        if reason_codes:
-            gating_reasons.extend(f"reason:{code}" for code in reason_codes)
-
-        candidate_direction = 0
-        if score >= thresholds["buy"]:
-            candidate_direction = 1
-        elif score <= thresholds["sell"]:
-            candidate_direction = -1
-
-        # TASK-CORE-CONFIRM: debug/QA 输出开关
-        core_confirm_trace = self.config.get("debug", {}).get("core_confirm_trace", False)
-
-        # TASK_CONFIRM_PIPELINE_TUNING: Phase A - 候选确认统计
-        candidate_confirm = candidate_direction != 0 and not gating_reasons
-        if enable_funnel_diagnostics and candidate_confirm:
-            self._stats.candidate_confirm_true += 1
-
-        # TASK_CONFIRM_PIPELINE_TUNING: Phase C - 三档质量分层逻辑
-        confirm_mode = self.config.get("confirm_mode", "v1")  # 先尝试直接读取
-        if confirm_mode == "v1":  # 如果没找到，尝试从signal小节读取
-            confirm_mode = self.config.get("signal", {}).get("confirm_mode", "v1")
-
-        # DEBUG: 记录confirm_mode读取结果
-        if core_confirm_trace:
-            logger.info(f"[CONFIRM_MODE_DEBUG] confirm_mode={confirm_mode}, config_keys={list(self.config.keys())}")
-
-        # Phase C: 获取strong_threshold
-        strong_threshold = self.config.get("strong_threshold", 0.8)
-        effective_strong_threshold = strong_threshold  # TODO: 可以后续添加场景化覆写
 
-        # Phase C: 质量分档 - 根据score绝对值确定档位
-        abs_score = abs(score)
-        if abs_score >= effective_strong_threshold:
-            quality_tier = "strong"
-            self._stats.strong_tier_signals += 1
-        elif abs_score >= effective_weak_signal_threshold:
-            quality_tier = "normal"
-            self._stats.normal_tier_signals += 1
-        else:
-            quality_tier = "weak"
-            self._stats.weak_tier_signals += 1
-
-        # Phase C: 构建质量标签
-        quality_flags = []
-        if abs(score) < effective_weak_signal_threshold:
-            quality_flags.append("weak_signal")
-        if consistency < effective_consistency_min:
-            quality_flags.append("low_consistency")
-
-        # confirm_v1: 现有逻辑（向后兼容）
-        confirm = candidate_direction != 0 and not gating_reasons
-
-        # confirm_v2: Phase C - 三档质量分层逻辑
-        confirm_v2 = False
-        soft_guard_reasons = []
-
-        if candidate_direction != 0:
-            # 硬护栏：永远阻塞
-            hard_gating_reasons = [
-                reason for reason in gating_reasons
-                if reason == "warmup"  # 完全匹配
-                or reason.startswith("cooldown_after_exit")  # 前缀匹配，处理 "cooldown_after_exit(3.5s<10s)" 格式
-                or reason.startswith(("spread_bps>", "lag_sec>", "reason:"))
-            ]
-
-            # Phase C: 三档策略判断
-            if not hard_gating_reasons:
-                if quality_tier == "strong":
-                    # strong 档：只要 not hard_block ⇒ 可以 confirm=True（即使有 soft guard）
-                    confirm_v2 = True
-                    soft_guard_reasons = quality_flags  # 记录软护栏用于诊断，但不阻塞
-                elif quality_tier == "normal":
-                    # normal 档：需要 not hard_block AND not weak_signal AND consistency >= consistency_min
-                    if not any(flag in ("weak_signal", "low_consistency") for flag in quality_flags):
-                        confirm_v2 = True
-                    else:
-                        # 有软护栏时记录原因
-                        soft_guard_reasons = quality_flags
-                # weak 档：统一 confirm=False，不记录soft_guard_reasons（因为已经是weak档）
-            else:
-                # 有硬护栏时，记录所有原因到soft_guard_reasons用于诊断
-                soft_guard_reasons = gating_reasons
-
-        # TASK_CONFIRM_PIPELINE_TUNING: Phase B - 根据模式选择confirm逻辑
-        if confirm_mode == "v2":
-            # confirm_v2: 三档质量分层逻辑，硬护栏仍需检查
-            confirm = confirm_v2
-            # 在v2模式下，区分硬护栏和软护栏：
-            # - gating字段只反映硬护栏状态（confirm=True ⇒ gating=1）
-            # - 软护栏信息保留在soft_guard_reasons中用于诊断
-        # confirm_v1: 保持现有逻辑不变（gating反映所有护栏）
-
-        # Phase C: 记录各档位确认统计
-        if confirm:
-            if quality_tier == "strong":
-                self._stats.strong_tier_confirm += 1
-            elif quality_tier == "normal":
-                self._stats.normal_tier_confirm += 1
-            else:  # weak
-                self._stats.weak_tier_confirm += 1
-
-        # P0修复: B组连击确认（避免一跳即确认）
-        # F4修复: 使用场景化覆写后的min_consecutive
-        if confirm and effective_min_consecutive > 1:
-            streak = self._get_dir_streak(symbol, score)
-            if streak < effective_min_consecutive:
-                confirm = False
-                gating_reasons.append(f"reverse_cooldown_insufficient_ticks({streak}<{effective_min_consecutive})")
-                self._stats.suppressed += 1
-                # TASK_CONFIRM_PIPELINE_TUNING: Phase A - 反向防抖拦截统计
-                if enable_funnel_diagnostics:
-                    self._stats.reverse_prevention_blocked += 1
-
-        # TASK-CORE-CONFIRM: debug/QA 输出 - 记录详细决策过程
+        trace = None
         if core_confirm_trace:
-            confirm_reason = "ok" if confirm else ",".join(gating_reasons) if gating_reasons else "no_direction"
-            if confirm and effective_min_consecutive > 1:
-                confirm_reason = f"streak_ok({streak}>={effective_min_consecutive})"
-
-            debug_record = {
-                "ts_ms": ts_ms,
-                "symbol": symbol,
-                "score": score,
-                "direction": candidate_direction,
-                "regime": regime,
-                "activity_tps": row.get("activity_tps", 0),
-                "consistency_score": consistency,
-                "consistency_min": effective_consistency_min,
-                "consistency_min_per_regime": consistency_min_per_regime.get(regime),
-                "gating_reasons": gating_reasons,
-                "is_weak_signal": abs(score) < effective_weak_signal_threshold,
-                "is_low_consistency": consistency < effective_consistency_min,
-                "confirm": confirm,
-                "confirm_reason": confirm_reason,
-                "min_consecutive": effective_min_consecutive,
-                "streak": streak if effective_min_consecutive > 1 else None
-            }
-
-            # 输出到logger（结构化格式）
-            logger.info(f"[CORE_CONFIRM_TRACE] {json.dumps(debug_record, default=str)}")
-        
-        signal_type = "neutral"
-        if confirm:
-            if candidate_direction > 0:
-                signal_type = "strong_buy" if score >= thresholds["strong_buy"] else "buy"
-            else:
-                signal_type = "strong_sell" if score <= thresholds["strong_sell"] else "sell"
-        elif candidate_direction != 0:
-            signal_type = "pending"
-
-        # P0: 从环境变量读取run_id，添加到decision中用于按run_id对账
-        # P1: 统一run_id贯穿JSONL/SQLite，确保JSONL包含所有必需字段（signal_type、created_at）
-        run_id = os.getenv("RUN_ID", "")
-        # P1: 添加created_at字段，与SQLite的created_at对齐
-        from datetime import datetime, timezone
-        created_at = datetime.now(timezone.utc).isoformat()
-        # P1 修复3: 契约字段统一 - v1 路径统一使用 decision_reason（与 v2 一致）
-        # 保留 gate_reason/guard_reason 作为向后兼容字段，但主要使用 decision_reason
-        decision_reason = ",".join(gating_reasons) if gating_reasons else None
-        # TASK_CONFIRM_PIPELINE_TUNING: Phase B - 添加confirm_v2和软护栏诊断字段
-        # 在v2模式下，gating字段只反映硬护栏状态，确保confirm=True ⇒ gating=1
-        if confirm_mode == "v2":
-            gating_value = 1 if not hard_gating_reasons else 0
-            gating_blocked_value = bool(hard_gating_reasons)
-        else:
-            # v1模式：保持现有逻辑，所有护栏都影响gating
-            gating_value = 1 if not gating_reasons else 0
-            gating_blocked_value = bool(gating_reasons)
-
-        decision = {
-            "ts_ms": ts_ms,
-            "symbol": symbol,
-            "score": score,
-            "z_ofi": row.get("z_ofi"),
-            "z_cvd": row.get("z_cvd"),
-            "regime": regime,
-            "div_type": row.get("div_type"),
-            "consistency_raw": consistency_raw,  # 原始consistency（Fusion输出）
-            "consistency": consistency,  # 应用floor后的consistency（用于gating）
-            "confirm": confirm,
-            "confirm_v2": confirm_v2,  # Phase B: confirm_v2 并行输出
-            "soft_guard_reasons": soft_guard_reasons,  # Phase B: 软护栏诊断信息
-            "quality_tier": quality_tier,  # Phase C: 质量档位 (strong/normal/weak)
-            "quality_flags": quality_flags,  # Phase C: 质量标签 (weak_signal/low_consistency)
-            "gating": gating_value,  # TASK-A4 修复3: v2模式下只考虑硬护栏，确保语义一致性
-            "gating_blocked": gating_blocked_value,  # v2模式下只反映硬护栏阻塞状态
-            "signal_type": signal_type,
-            "decision_reason": decision_reason,  # 统一字段名（与 v2 一致）
-            "gate_reason": decision_reason,  # 兼容旧字段
-            "guard_reason": decision_reason,  # 兼容旧字段
-            "run_id": run_id,
-            "created_at": created_at,  # P1: 与SQLite的created_at对齐
-        }
-
-        # TASK_CONFIRM_PIPELINE_TUNING: Phase A - 最终确认统计
-        if enable_funnel_diagnostics and confirm:
-            self._stats.confirm_true += 1
-
-        if confirm:
-            self._stats.emitted += 1
-        else:
-            self._stats.suppressed += 1
-
-        try:
-            self._sink.emit(decision)
-        except Exception:  # pragma: no cover - robust against sink errors
-            logger.exception("failed to emit signal for %s", symbol)
+            logger.info(f"[CONFIRM_MODE_DEBUG] confirm_mode={plan.confirm_mode}, config_keys={list(self.config.keys())}")
+            trace = {"activity_tps": row.get("activity_tps", 0)}
 
+        # 下游判定（护栏、质量分档、confirm v1/v2、连击、决策）与 process_frame 共用 decide_row
+        decision = decide_row(
+            ts_ms=ts_ms,
+            symbol=symbol,
+            score=score,
+            consistency_raw=consistency_raw,
+            has_divergence=bool(row.get("div_type")),
+            thresholds=plan.lookup(regime, scenario_2x2),
+            scenario=scenario_2x2,
+            regime=regime,
+            warmup=bool(row.get("warmup", False)),
+            spread_bps=float(spread_bps_val if spread_bps_val is not None else 0.0),
+            lag_sec=float(lag_sec_val if lag_sec_val is not None else 0.0),
+            reason_codes=row.get("reason_codes", []) or [],
+            z_ofi=row.get("z_ofi"),
+            z_cvd=row.get("z_cvd"),
+            div_type=row.get("div_type"),
+            plan=plan,
+            stats=self._stats,
+            dir_streak=self._dir_streak_state,
+            last_exit_ts=self._last_exit_ts_per_symbol,
+            cooldown_after_exit_sec=self.cooldown_after_exit_sec,
+            # P0: run_id 贯穿 JSONL/SQLite，用于按 run_id 对账
+            run_id=os.getenv("RUN_ID", ""),
+            diag=self._diag,
+            trace=trace,
+        )
+        self._emit_decision(decision)
         return decision
-    
+
     def _process_feature_row_v2(self, row: Dict[str, Any], ts_ms: int, symbol: str) -> Optional[Dict[str, Any]]:
         """TASK-A4: 使用 signal/v2 路径处理特征行（单点判定）"""
         # TASK_P3: 为v2路径添加漏斗诊断统计
-        enable_funnel_diagnostics = (
-            self.config.get("enable_confirm_funnel_diagnostics") or
-            self.config.get("signal", {}).get("enable_confirm_funnel_diagnostics", False)
-        )
+        enable_funnel_diagnostics = self._plan.funnel_diagnostics
         if enable_funnel_diagnostics:
             self._stats.total_signals += 1
 
         # Phase C: v2路径质量分档逻辑
-        strong_threshold = self.config.get("strong_threshold", 0.8)
-        effective_strong_threshold = strong_threshold
-        weak_signal_threshold = self.config.get("weak_signal_threshold", 0.2)
+        effective_strong_threshold = self._plan.strong_threshold
+        weak_signal_threshold = self._plan.weak_signal_threshold
 
+        score = self._resolve_score(row)
         abs_score = abs(score)
         if abs_score >= effective_strong_threshold:
             quality_tier = "strong"
@@ -1453,7 +1375,6 @@ class CoreAlgorithm:
             quality_flags.append("weak_signal")
         # 注意：v2路径中consistency相关信息需要在decision_result中获取
 
-        score = self._resolve_score(row)
         z_ofi = row.get("z_ofi")
         z_cvd = row.get("z_cvd")
         div_type_raw = row.get("div_type")
@@ -1502,11 +1423,9 @@ class CoreAlgorithm:
             except ValueError:
                 div_type_enum = None
         
-        # P0 修复3: 规范 symbol 大写化（与契约一致）
-        symbol_upper = str(symbol).upper()
-        
-        # 创建 SignalV2 对象
-        signal_v2 = SignalV2(
+        # 创建 signal/v2 记录（受信快速路径：DecisionEngine 输出跳过逐条 pydantic 校验，
+        # 由 SignalWriterV2 按 SIGNAL_V2_VALIDATE_EVERY_N 采样强校验）
+        signal_v2 = SignalV2Record(
             ts_ms=ts_ms,
             symbol=symbol_upper,
             signal_id=signal_id,
@@ -1526,8 +1445,8 @@ class CoreAlgorithm:
             run_id=self._run_id,
             meta={
                 "window_ms": self.config.get("window_ms"),
-                "features_ver": os.getenv("CORE_FEATURES_VER", self.config.get("features_ver", "ofi/cvd v3")),
-                "rules_ver": os.getenv("CORE_RULES_VER", self.config.get("rules_ver", "core v1")),
+                "features_ver": self._features_ver,
+                "rules_ver": self._rules_ver,
                 "quality_tier": quality_tier,  # Phase C: 质量档位
                 "quality_flags": quality_flags,  # Phase C: 质量标签
             },
@@ -1598,6 +1517,141 @@ class CoreAlgorithm:
                 emitted.append(decision)
         return emitted
 
+    def process_frame(self, columns: Mapping[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+        """列式批量处理特征（回放用），输出与逐行 process_rows 一致
+
+        无状态部分（分数解析与截断、回退 regime、一致性底座、spread/lag 护栏、regime 阈值比较、质量分档，
+        见 core_batch.frame_gates）在 NumPy 数组上批量计算；去重、融合一致性、退出冷静期、连击确认、
+        StrategyMode、统计与 Sink 仍按行序推进（decide_row，与逐行路径共用）。
+        v2 路径与 core_confirm_trace 调试模式回落逐行处理。
+
+        Args:
+            columns: 列名 → 等长序列（dict of list / NumPy 数组 / pandas DataFrame 均可），缺列视为全 None
+
+        Returns:
+            非 None 的决策列表（与 process_rows 相同）
+        """
+        col, n = parse_columns(columns)
+        if (self._use_v2 and self._decision_engine and self._signal_writer_v2) or self._plan.core_confirm_trace:
+            return self.process_rows({k: v[i] for k, v in col.items()} for i in range(n))
+
+        inputs = self._frame_inputs(col, n)
+        if inputs is None:
+            return []
+        return decide_frame(
+            inputs, self._plan, self._stats, self._dir_streak_state,
+            self._last_exit_ts_per_symbol, self.cooldown_after_exit_sec,
+            emit=self._emit_decision, diag=self._diag,
+        )
+
+    def _emit_decision(self, decision: Dict[str, Any]) -> None:
+        try:
+            self._sink.emit(decision)
+        except Exception:  # pragma: no cover - robust against sink errors
+            logger.exception("failed to emit signal for %s", decision.get("symbol"))
+
+    def _frame_inputs(self, col: Dict[str, List[Any]], n: int) -> Optional[FrameInputs]:
+        """process_frame 的上游阶段：校验、去重、计数、融合一致性与 regime（推进本实例状态）
+
+        Args:
+            col: parse_columns 的列字典
+            n: 行数
+
+        Returns:
+            通过校验与去重的行的 FrameInputs；无此类行时为 None
+        """
+        plan = self._plan
+
+        def get(name: str) -> List[Any]:
+            return col[name] if name in col else [None] * n
+
+        ts_col, sym_col = get("ts_ms"), get("symbol")
+        z_ofi_col, z_cvd_col = get("z_ofi"), get("z_cvd")
+        optional_cols = [(f, get(f)) for f in ("lag_sec", "consistency", "warmup", "spread_bps")]
+        optional_missing = [None in values for values in zip(*(values for _, values in optional_cols))]
+        use_strategy_mode = STRATEGY_MODE_AVAILABLE and bool(self._strategy_mode_config)
+
+        # 逐行、有状态：校验 → 去重 → 计数 → StrategyMode regime
+        idx: List[int] = []
+        ts_list: List[int] = []
+        symbols: List[str] = []
+        mode_regimes: List[str] = []
+        for i in range(n):
+            if z_ofi_col[i] is None:
+                self._diag.report("Z_OFI_MISSING", "[CoreAlgorithm] z_ofi missing for symbol=%s, will use 0.0", sym_col[i])
+            if z_cvd_col[i] is None:
+                self._diag.report("Z_CVD_MISSING", "[CoreAlgorithm] z_cvd missing for symbol=%s, will use 0.0", sym_col[i])
+            if ts_col[i] is None or sym_col[i] is None:
+                missing_critical = [f for f, v in (("ts_ms", ts_col[i]), ("symbol", sym_col[i])) if v is None]
+                logger.warning("feature row missing critical fields: %s", missing_critical)
+                continue
+            if optional_missing[i]:
+                missing_optional = [f for f, values in optional_cols if values[i] is None]
+                self._diag.report("OPTIONAL_MISSING", "feature row missing optional fields (will use defaults): %s", missing_optional)
+
+            ts_ms = int(ts_col[i])
+            symbol = str(sym_col[i]).upper()
+            if self._is_duplicate(symbol, ts_ms):
+                continue
+            self._stats.processed += 1
+            idx.append(i)
+            ts_list.append(ts_ms)
+            symbols.append(symbol)
+            if use_strategy_mode:
+                mode_regimes.append(self._infer_regime({k: v[i] for k, v in col.items()}))
+
+        m = len(idx)
+        if m == 0:
+            return None
+
+        def pick(name: str) -> List[Any]:
+            values = get(name)
+            return [values[i] for i in idx]
+
+        # 向量化：分数、护栏输入
+        z_ofi = first_truthy(pick("z_ofi"), pick("ofi_z"))
+        z_cvd = first_truthy(pick("z_cvd"), pick("cvd_z"))
+        score = resolve_scores(pick("fusion_score"), z_ofi, z_cvd, plan.w_ofi, plan.w_cvd, self.recompute_fusion)
+
+        # 一致性：融合引擎只对 z 齐全的行推进（与逐行口径一致）
+        consistency_raw = np.zeros(m, dtype=float)
+        have_z = [a is not None and b is not None for a, b in zip(z_ofi, z_cvd)]
+        for _ in range(m - sum(have_z)):
+            self._diag.report("CONSISTENCY_Z_MISSING", "[CoreAlgorithm] Missing z_ofi or z_cvd for consistency calculation, using 0.0")
+        rows = [j for j in range(m) if have_z[j]]
+        if rows:
+            zo = [float(z_ofi[j]) for j in rows]
+            zc = [float(z_cvd[j]) for j in rows]
+            if self._fusion_engine is not None:
+                engine_lag = [float(v or 0) for v in pick("lag_sec")]
+                consistency_raw[rows] = np.clip(
+                    advance_fusion_consistency(self._fusion_engine, zo, zc, [engine_lag[j] for j in rows]), 0.0, 1.0
+                )
+            else:
+                consistency_raw[rows] = [fallback_consistency(a, b) for a, b in zip(zo, zc)]
+
+        if use_strategy_mode:
+            regimes = mode_regimes
+        else:
+            regimes = fallback_regimes(pick("activity"), pick("trade_rate"), plan.active_min_tps, plan.normal_min_tps)
+
+        return FrameInputs(
+            ts_ms=ts_list,
+            symbols=symbols,
+            score=score,
+            consistency_raw=consistency_raw,
+            spread_bps=to_float_array(pick("spread_bps")),
+            lag_sec=to_float_array(pick("lag_sec")),
+            warmup=np.array([bool(v) for v in pick("warmup")], dtype=bool),
+            has_divergence=np.array([bool(v) for v in pick("div_type")], dtype=bool),
+            reason_codes=[v or [] for v in pick("reason_codes")],
+            regimes=regimes,
+            scenarios=pick("scenario_2x2"),
+            z_ofi=pick("z_ofi"),
+            z_cvd=pick("z_cvd"),
+            div_type=pick("div_type"),
+        )
+
     def _validate_row(self, row: Dict[str, Any]) -> bool:
         # P0 修复5: 输入校验过严导致丢行 - z_ofi/z_cvd 降级为可选（缺失告警但继续计算）
         # 检查关键字段（ts_ms, symbol）必须存在且不为None
@@ -1608,9 +1662,9 @@ class CoreAlgorithm:
         
         # P0 修复5: z_ofi/z_cvd 缺失时告警但不丢弃
         if "z_ofi" not in row or row.get("z_ofi") is None:
-            logger.debug(f"[CoreAlgorithm] z_ofi missing for symbol={row.get('symbol')}, will use 0.0")
+            self._diag.report("Z_OFI_MISSING", "[CoreAlgorithm] z_ofi missing for symbol=%s, will use 0.0", row.get('symbol'))
         if "z_cvd" not in row or row.get("z_cvd") is None:
-            logger.debug(f"[CoreAlgorithm] z_cvd missing for symbol={row.get('symbol')}, will use 0.0")
+            self._diag.report("Z_CVD_MISSING", "[CoreAlgorithm] z_cvd missing for symbol=%s, will use 0.0", row.get('symbol'))
         if missing_critical:
             logger.warning("feature row missing critical fields: %s", missing_critical)
             return False
@@ -1619,14 +1673,14 @@ class CoreAlgorithm:
         optional_fields = ["lag_sec", "consistency", "warmup", "spread_bps"]
         missing_optional = [field for field in optional_fields if field not in row or row.get(field) is None]
         if missing_optional:
-            logger.debug("feature row missing optional fields (will use defaults): %s", missing_optional)
+            self._diag.report("OPTIONAL_MISSING", "feature row missing optional fields (will use defaults): %s", missing_optional)
         
         return True
 
     def _is_duplicate(self, symbol: str, ts_ms: int) -> bool:
         last_ts = self._last_ts_per_symbol.get(symbol)
         if last_ts is not None:
-            if abs(ts_ms - last_ts) < self.config["dedupe_ms"]:
+            if abs(ts_ms - last_ts) < self._plan.dedupe_ms:
                 self._stats.deduplicated += 1
                 return True
         self._last_ts_per_symbol[symbol] = ts_ms
@@ -1643,8 +1697,8 @@ class CoreAlgorithm:
         score = row.get("fusion_score")
         if self.recompute_fusion or score is None:
             # 回测端重算融合分数
-            w_ofi = self.config["weights"].get("w_ofi", 0.6)
-            w_cvd = self.config["weights"].get("w_cvd", 0.4)
+            w_ofi = self._plan.w_ofi
+            w_cvd = self._plan.w_cvd
             # 处理 None 值（Parquet 文件可能包含 None）
             # 支持多种字段名格式：z_ofi/z_cvd 或 ofi_z/cvd_z
             z_ofi_val = row.get("z_ofi") or row.get("ofi_z")
@@ -1678,7 +1732,7 @@ class CoreAlgorithm:
         z_cvd_val = row.get("z_cvd") or row.get("cvd_z")
 
         if z_ofi_val is None or z_cvd_val is None:
-            logger.debug("[CoreAlgorithm] Missing z_ofi or z_cvd for consistency calculation, using 0.0")
+            self._diag.report("CONSISTENCY_Z_MISSING", "[CoreAlgorithm] Missing z_ofi or z_cvd for consistency calculation, using 0.0")
             return 0.0
 
         # 转换为float
@@ -1713,40 +1767,14 @@ class CoreAlgorithm:
                 logger.warning(f"[CoreAlgorithm] Fusion engine consistency calculation failed: {e}, using fallback")
 
         # Fallback: 使用简化的consistency计算
-        eps = 1e-9
-        if abs(z_ofi) < eps or abs(z_cvd) < eps:
-            return 0.0
-
-        # 方向不同 → 直接 0
-        if math.copysign(1, z_ofi) != math.copysign(1, z_cvd):
-            return 0.0
-
-        # 强度一致性：较小 / 较大
-        abs_ofi, abs_cvd = abs(z_ofi), abs(z_cvd)
-        consistency = min(abs_ofi, abs_cvd) / max(abs_ofi, abs_cvd)
-
-        # clamp到[0,1]范围
-        consistency = max(0.0, min(1.0, consistency))
-        return consistency
+        return fallback_consistency(z_ofi, z_cvd)
     
     def _get_dir_streak(self, symbol: str, score: float) -> int:
         """计算方向streak（连续同向tick数）
         
         P0修复: B组连击确认逻辑
         """
-        direction = 1 if score > 0 else (-1 if score < 0 else 0)
-        if symbol not in self._dir_streak_state:
-            self._dir_streak_state[symbol] = (direction, 1)
-            return 1
-        
-        last_dir, count = self._dir_streak_state[symbol]
-        if direction == last_dir and direction != 0:
-            count += 1
-        else:
-            count = 1 if direction != 0 else 0
-        
-        self._dir_streak_state[symbol] = (direction, count)
-        return count
+        return advance_dir_streak(self._dir_streak_state, symbol, score)
 
     def _get_strategy_mode_manager(self, symbol: str) -> Optional[StrategyModeManager]:
         """Get or create StrategyModeManager for a symbol."""
@@ -1773,7 +1801,7 @@ class CoreAlgorithm:
             activity.trades_per_min = float(trade_rate)
         else:
             # Fallback: 从 activity.tps 推导
-            activity_data = row.get("activity", {})
+            activity_data = row.get("activity") or {}
             tps = activity_data.get("tps")
             if tps is not None and tps > 0:
                 activity.trades_per_min = float(tps) * 60.0
@@ -1782,18 +1810,15 @@ class CoreAlgorithm:
                 symbol = str(row.get("symbol", "UNK"))
                 ts_ms = int(row.get("ts_ms", 0))
                 if ts_ms > 0:
-                    from collections import deque
-                    dq = self._arrival_ts_window.setdefault(symbol, deque(maxlen=6000))
-                    dq.append(ts_ms)
-                    # 修剪 60s 窗口
-                    while dq and (ts_ms - dq[0]) > self._arrival_window_ms:
-                        dq.popleft()
-                    if len(dq) > 1:
-                        secs = max(1.0, (dq[-1] - dq[0]) / 1000.0)
-                        est_tps = (len(dq) - 1) / secs
-                        activity.trades_per_min = est_tps * 60.0
-                    else:
-                        activity.trades_per_min = 0.0
+                    # 与 FeaturePipe 共用 60s 增量活动度聚合器（特征行到达视作成交）
+                    agg = self._arrival_activity.get(symbol)
+                    if agg is None:
+                        agg = self._arrival_activity[symbol] = ActivityAggregator(
+                            window_ms=self._arrival_window_ms, max_trades=6000
+                        )
+                    agg.on_arrival(ts_ms)
+                    agg.prune(ts_ms)
+                    activity.trades_per_min = agg.arrival_tps() * 60.0
                 else:
                     activity.trades_per_min = 0.0
         
@@ -1853,21 +1878,19 @@ class CoreAlgorithm:
                     manager.update_mode(activity)
                     current_mode = manager.get_current_mode()
                     
-                    # P0: 调试日志（每 1000 行打印一次）
-                    if self._stats.processed % 1000 == 0:
-                        mode_stats = manager.get_mode_stats()
+                    # P0: 调试日志（每 1000 行打印一次；DEBUG未启用时不构建触发器快照）
+                    if self._stats.processed % 1000 == 0 and logger.isEnabledFor(logging.DEBUG):
                         triggers = manager._get_trigger_snapshot(activity)
-                        logger.debug(
-                            f"[StrategyMode Debug] {symbol} @ {ts_ms}: "
-                            f"mode={current_mode.value}, "
-                            f"trades/min={activity.trades_per_min:.1f}, "
-                            f"quotes/sec={activity.quote_updates_per_sec:.1f}, "
-                            f"spread_bps={activity.spread_bps:.2f}, "
-                            f"volatility_bps={activity.volatility_bps:.2f}, "
-                            f"volume_usd={activity.volume_usd:.0f}, "
-                            f"schedule_active={triggers.get('schedule_active', False)}, "
-                            f"market_active={triggers.get('market_active', False)}, "
-                            f"history_size={len(manager.activity_history)}"
+                        self._diag.report(
+                            "STRATEGY_MODE_DEBUG",
+                            "[StrategyMode Debug] %s @ %s: mode=%s, trades/min=%.1f, quotes/sec=%.1f, "
+                            "spread_bps=%.2f, volatility_bps=%.2f, volume_usd=%.0f, "
+                            "schedule_active=%s, market_active=%s, history_size=%d",
+                            symbol, ts_ms, current_mode.value,
+                            activity.trades_per_min, activity.quote_updates_per_sec,
+                            activity.spread_bps, activity.volatility_bps, activity.volume_usd,
+                            triggers.get('schedule_active', False), triggers.get('market_active', False),
+                            len(manager.activity_history),
                         )
                     
                     # P0: StrategyMode 可观测性日志（每 10s 心跳快照）
@@ -1899,27 +1922,27 @@ class CoreAlgorithm:
                     logger.exception("Failed to update StrategyModeManager, falling back")
         
         # Fallback to simple logic
-        activity_data = row.get("activity", {})
+        activity_data = row.get("activity") or {}
         tps = activity_data.get("tps")
         if tps is None:
             trade_rate = row.get("trade_rate")
             tps = (float(trade_rate) / 60.0) if trade_rate is not None else None
         if tps is None:
             return "normal"
-        active_min = self.config["activity"].get("active_min_tps", 3.0)
-        normal_min = self.config["activity"].get("normal_min_tps", 1.0)
-        if tps >= active_min:
+        if tps >= self._plan.active_min_tps:
             return "active"
-        if tps >= normal_min:
+        if tps >= self._plan.normal_min_tps:
             return "normal"
         return "quiet"
 
     def _thresholds_for_regime(self, regime: str) -> Dict[str, float]:
-        thresholds = self.config["thresholds"]
-        regime = regime or "base"
-        regime_cfg = thresholds.get(regime, {})
-        base_cfg = thresholds.get("base", {})
-        return _merge_dict(base_cfg, regime_cfg)
+        return self._plan.regime_thresholds(regime)
+
+    def reconfigure(self, overrides: Dict[str, Any]) -> None:
+        """合并配置覆写并重建阈值计划（运行中调参用；直接修改 self.config 不会生效）"""
+        self.config = _merge_dict(self.config, overrides)
+        self.min_consecutive_same_dir = int(self.config.get("min_consecutive_same_dir", 1))
+        self._plan = ThresholdPlan(self.config, self.min_consecutive_same_dir)
     
     def record_exit(self, symbol: str, ts_ms: int) -> None:
         """F3修复: 记录退出时间，用于退出后冷静期
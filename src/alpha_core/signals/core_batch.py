@@ -0,0 +1,618 @@
+# -*- coding: utf-8 -*-
+"""
+CoreAlgorithm 列式批量内核（回放用）
+
+CoreAlgorithm.process_frame 的批量部分：列读取、分数解析与 tanh 截断、回退 regime 推断、
+无状态判定量 frame_gates（一致性底座、spread/lag 护栏、regime 阈值比较、质量分档），
+以及下游判定 decide_frame（冷静期、confirm、连击、决策）。
+下游判定的单行实现 decide_row 同时被逐行 process_feature_row 调用，两条路径共用一份判定逻辑。
+与 process_feature_row 逐行口径逐位一致：
+- 字段回退沿用 row.get(a) or row.get(b) 的真值语义（0/0.0 会回退到别名列）
+- tanh 截断逐元素使用 math.tanh（NumPy 的 SIMD tanh 可能与 libm 相差 1 ulp）
+- 其余运算为逐元素 IEEE 运算，与标量路径结果相同
+
+上游有状态部分（去重、融合暖启动、StrategyMode）由 CoreAlgorithm 推进；decide_frame 的有状态输入
+（统计、连击、退出时间戳）显式传入，因此同一份 FrameInputs 可在多套阈值配置上分别判定（见 multi_eval）。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .threshold_plan import RegimeThresholds, ThresholdPlan
+
+logger = logging.getLogger(__name__)
+
+
+def column_values(columns: Mapping[str, Sequence[Any]], name: str, n: int) -> List[Any]:
+    """取列为 Python 列表（NumPy 数组/pandas Series 转为 Python 标量；缺列视为全 None）"""
+    if name not in columns:
+        return [None] * n
+    col = columns[name]
+    values = col.tolist() if hasattr(col, "tolist") else list(col)
+    if len(values) != n:
+        raise ValueError(f"column {name!r} has {len(values)} rows, expected {n}")
+    return values
+
+
+def parse_columns(columns: Mapping[str, Sequence[Any]]) -> Tuple[Dict[str, List[Any]], int]:
+    """列输入 → (列名 → Python 列表, 行数)；各列长度须一致"""
+    names = list(columns)
+    n = len(columns[names[0]]) if names else 0
+    return {name: column_values(columns, name, n) for name in names}, n
+
+
+def first_truthy(primary: List[Any], fallback: List[Any]) -> List[Any]:
+    """逐元素 primary or fallback（与 row.get(a) or row.get(b) 一致）"""
+    return [a if a else b for a, b in zip(primary, fallback)]
+
+
+def to_float_array(values: List[Any], default: float = 0.0) -> np.ndarray:
+    """None → default，其余 float(v)（NaN 保留）"""
+    return np.array([default if v is None else float(v) for v in values], dtype=float)
+
+
+def tanh_clip(x: np.ndarray) -> np.ndarray:
+    """tanh(x/3)*5 截断（逐元素 math.tanh，保证与标量路径逐位一致）"""
+    return np.fromiter(map(math.tanh, (x / 3.0).tolist()), dtype=float, count=len(x)) * 5.0
+
+
+def resolve_scores(
+    fusion_score: List[Any],
+    z_ofi: List[Any],
+    z_cvd: List[Any],
+    w_ofi: float,
+    w_cvd: float,
+    recompute: bool,
+) -> np.ndarray:
+    """
+    批量解析融合分数（等价于逐行 CoreAlgorithm._resolve_score）
+
+    参数:
+        fusion_score: 行内 fusion_score（None 表示缺失，需重算）
+        z_ofi/z_cvd: 已做别名回退的 Z 值（None/NaN 按 0.0）
+        w_ofi/w_cvd: 重算权重
+        recompute: 为 True 时忽略 fusion_score 全部重算
+
+    返回:
+        np.ndarray: 最终分数（已二次 tanh 截断）
+    """
+    n = len(fusion_score)
+    need = np.ones(n, dtype=bool) if recompute else np.array([v is None for v in fusion_score], dtype=bool)
+    score = np.zeros(n, dtype=float)
+    if need.any():
+        zo = np.nan_to_num(to_float_array(z_ofi, np.nan), nan=0.0, posinf=np.inf, neginf=-np.inf)
+        zc = np.nan_to_num(to_float_array(z_cvd, np.nan), nan=0.0, posinf=np.inf, neginf=-np.inf)
+        rows = np.flatnonzero(need)
+        score[rows] = w_ofi * tanh_clip(zo[rows]) + w_cvd * tanh_clip(zc[rows])
+    if not need.all():
+        rows = np.flatnonzero(~need)
+        score[rows] = [float(fusion_score[i]) for i in rows.tolist()]
+    return tanh_clip(score)
+
+
+def fallback_consistency(z_ofi: float, z_cvd: float) -> float:
+    """无融合引擎时的一致性（同号时 min/max，任一接近0或异号为0，clamp 到 [0,1]）"""
+    eps = 1e-9
+    if abs(z_ofi) < eps or abs(z_cvd) < eps:
+        return 0.0
+    # 方向不同 → 直接 0
+    if math.copysign(1, z_ofi) != math.copysign(1, z_cvd):
+        return 0.0
+    # 强度一致性：较小 / 较大
+    abs_ofi, abs_cvd = abs(z_ofi), abs(z_cvd)
+    consistency = min(abs_ofi, abs_cvd) / max(abs_ofi, abs_cvd)
+    return max(0.0, min(1.0, consistency))
+
+
+def fallback_regimes(
+    activity: List[Any],
+    trade_rate: List[Any],
+    active_min_tps: float,
+    normal_min_tps: float,
+) -> List[str]:
+    """无 StrategyMode 时按 tps 分档（activity.tps 优先，其次 trade_rate/60，均缺失为 normal）"""
+    regimes: List[str] = []
+    for act, rate in zip(activity, trade_rate):
+        tps = act.get("tps") if act is not None else None
+        if tps is None and rate is not None:
+            tps = float(rate) / 60.0
+        if tps is None:
+            regimes.append("normal")
+        elif tps >= active_min_tps:
+            regimes.append("active")
+        elif tps >= normal_min_tps:
+            regimes.append("normal")
+        else:
+            regimes.append("quiet")
+    return regimes
+
+
+def advance_dir_streak(state: Dict[str, Tuple[int, int]], symbol: str, score: float) -> int:
+    """推进 symbol 的同向连击计数并返回当前次数（state: symbol → (方向, 次数)）"""
+    direction = 1 if score > 0 else (-1 if score < 0 else 0)
+    if symbol not in state:
+        state[symbol] = (direction, 1)
+        return 1
+
+    last_dir, count = state[symbol]
+    if direction == last_dir and direction != 0:
+        count += 1
+    else:
+        count = 1 if direction != 0 else 0
+
+    state[symbol] = (direction, count)
+    return count
+
+
+class FrameInputs:
+    """上游阶段输出：通过校验与去重的行（与配置阈值无关，可供多套配置共享）"""
+
+    __slots__ = (
+        "ts_ms", "symbols", "score", "consistency_raw", "spread_bps", "lag_sec", "warmup",
+        "has_divergence", "reason_codes", "regimes", "scenarios", "z_ofi", "z_cvd", "div_type",
+    )
+
+    def __init__(
+        self,
+        ts_ms: List[int],
+        symbols: List[str],
+        score: np.ndarray,
+        consistency_raw: np.ndarray,
+        spread_bps: np.ndarray,
+        lag_sec: np.ndarray,
+        warmup: np.ndarray,
+        has_divergence: np.ndarray,
+        reason_codes: List[List[str]],
+        regimes: List[str],
+        scenarios: List[Optional[str]],
+        z_ofi: List[Any],
+        z_cvd: List[Any],
+        div_type: List[Any],
+    ):
+        self.ts_ms = ts_ms
+        self.symbols = symbols
+        self.score = score
+        self.consistency_raw = consistency_raw
+        self.spread_bps = spread_bps
+        self.lag_sec = lag_sec
+        self.warmup = warmup
+        self.has_divergence = has_divergence
+        self.reason_codes = reason_codes
+        self.regimes = regimes
+        self.scenarios = scenarios
+        self.z_ofi = z_ofi
+        self.z_cvd = z_cvd
+        self.div_type = div_type
+
+    def __len__(self) -> int:
+        return len(self.ts_ms)
+
+
+QUALITY_TIERS = ("strong", "normal", "weak")
+
+
+def row_gates(
+    score: float,
+    consistency_raw: float,
+    has_divergence: bool,
+    spread_bps: float,
+    lag_sec: float,
+    thresholds: RegimeThresholds,
+    plan: ThresholdPlan,
+) -> Tuple[float, bool, bool, int, str, bool, bool]:
+    """
+    单行的无状态判定量（frame_gates 的标量版本，逐行路径用）
+
+    返回:
+        (consistency, low_consistency, is_weak, candidate_direction, quality_tier, spread_blocked, lag_blocked)
+        consistency 为应用底座后的一致性；NaN 参与的比较均为 False
+    """
+    abs_score = abs(score)
+    # P0: consistency 保守底座（避免 93% 被 low_consistency 一刀切）
+    consistency = consistency_raw
+    if consistency_raw <= 0.0:
+        if abs_score >= plan.consistency_floor_when_abs_score_ge:
+            consistency = max(consistency, plan.consistency_floor)
+        elif has_divergence:
+            consistency = max(consistency, plan.consistency_floor_on_divergence)
+
+    weak_threshold = thresholds.weak_signal_threshold
+    candidate_direction = 0
+    if score >= thresholds.buy:
+        candidate_direction = 1
+    elif score <= thresholds.sell:
+        candidate_direction = -1
+
+    # Phase C: 质量分档
+    if abs_score >= plan.strong_threshold:
+        quality_tier = "strong"
+    elif abs_score >= weak_threshold:
+        quality_tier = "normal"
+    else:
+        quality_tier = "weak"
+    return (
+        consistency,
+        consistency < thresholds.consistency_min,
+        abs_score < weak_threshold,
+        candidate_direction,
+        quality_tier,
+        spread_bps > plan.spread_bps_cap,
+        lag_sec > plan.lag_cap_sec,
+    )
+
+
+def frame_gates(
+    inputs: FrameInputs,
+    thresholds: Sequence[RegimeThresholds],
+    plan: ThresholdPlan,
+) -> List[Tuple[float, bool, bool, int, str, bool, bool]]:
+    """
+    在 NumPy 数组上批量计算 row_gates（一致性底座、spread/lag 护栏、低一致性/弱信号、候选方向、质量分档）
+
+    参数:
+        inputs: 上游阶段输出
+        thresholds: 每行的生效阈值（plan.lookup(regime, scenario)）
+        plan: 阈值计划
+
+    返回:
+        每行一个与 row_gates 相同的元组（Python 标量，逐位一致）
+    """
+    score = inputs.score
+    abs_score = np.abs(score)
+    raw = inputs.consistency_raw
+    # max(raw, floor) 的逐位等价写法（相等时取 raw）
+    floor = plan.consistency_floor
+    div_floor = plan.consistency_floor_on_divergence
+    floored = np.where(
+        abs_score >= plan.consistency_floor_when_abs_score_ge,
+        np.where(floor > raw, floor, raw),
+        np.where(inputs.has_divergence & (div_floor > raw), div_floor, raw),
+    )
+    consistency = np.where(raw <= 0.0, floored, raw)
+
+    m = len(thresholds)
+    buy = np.fromiter((t.buy for t in thresholds), dtype=float, count=m)
+    sell = np.fromiter((t.sell for t in thresholds), dtype=float, count=m)
+    weak = np.fromiter((t.weak_signal_threshold for t in thresholds), dtype=float, count=m)
+    consistency_min = np.fromiter((t.consistency_min for t in thresholds), dtype=float, count=m)
+
+    direction = np.where(score >= buy, 1, np.where(score <= sell, -1, 0))
+    tier = np.where(abs_score >= plan.strong_threshold, 0, np.where(abs_score >= weak, 1, 2))
+    return list(zip(
+        consistency.tolist(),
+        (consistency < consistency_min).tolist(),
+        (abs_score < weak).tolist(),
+        direction.tolist(),
+        [QUALITY_TIERS[k] for k in tier.tolist()],
+        (inputs.spread_bps > plan.spread_bps_cap).tolist(),
+        (inputs.lag_sec > plan.lag_cap_sec).tolist(),
+    ))
+
+
+def decide_row(
+    *,
+    ts_ms: int,
+    symbol: str,
+    score: float,
+    consistency_raw: float,
+    has_divergence: bool,
+    thresholds: RegimeThresholds,
+    scenario: Optional[str],
+    regime: str,
+    warmup: bool,
+    spread_bps: float,
+    lag_sec: float,
+    reason_codes: List[str],
+    z_ofi: Any,
+    z_cvd: Any,
+    div_type: Any,
+    plan: ThresholdPlan,
+    stats: Any,
+    dir_streak: Dict[str, Tuple[int, int]],
+    last_exit_ts: Mapping[str, int],
+    cooldown_after_exit_sec: float,
+    run_id: str,
+    diag: Any = None,
+    build_decision: bool = True,
+    trace: Optional[Dict[str, Any]] = None,
+    gates: Optional[Tuple[float, bool, bool, int, str, bool, bool]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    单行 v1 下游判定：一致性底座、护栏、质量分档、confirm v1/v2、连击确认、决策构造
+
+    逐行 process_feature_row 与列式 decide_frame 共用此函数，两条路径的判定口径因此只有一份。
+
+    参数:
+        ts_ms/symbol: 已校验、去重的时间戳与大写交易对
+        score: 解析后的融合分数
+        consistency_raw: 融合引擎（或回退公式）输出的一致性
+        has_divergence: 行内是否有背离（div_type 真值）
+        thresholds: plan.lookup(regime, scenario) 的生效阈值
+        scenario: scenario_2x2（仅用于场景覆写诊断）
+        regime/z_ofi/z_cvd/div_type: 原样写入决策
+        warmup/spread_bps/lag_sec/reason_codes: 护栏输入
+        plan: 阈值计划
+        stats: SignalStats，原地累加（processed/deduplicated 由调用方负责）
+        dir_streak: 连击状态，原地推进
+        last_exit_ts: symbol → 最近退出时间戳（毫秒）
+        cooldown_after_exit_sec: 退出后冷静期（秒，<=0 关闭）
+        run_id: 写入决策的 run_id
+        diag: 诊断限频器（report(key, msg, *args)），None 时不报告场景覆写
+        build_decision: 为 False 时只累加统计与状态，不构造决策字典（参数寻优用）
+        trace: 非 None 时输出 CORE_CONFIRM_TRACE 调试记录（可带 activity_tps）
+        gates: frame_gates 预先批量算出的无状态判定量；None 时按 row_gates 逐行计算
+
+    返回:
+        Dict: 决策（build_decision=False 时为 None）
+    """
+    if thresholds.scenario_overridden and diag is not None:
+        diag.report(
+            "SCENARIO_OVERRIDE",
+            "[CoreAlgorithm] F4: 场景%s覆写: weak=%.3f, consistency=%.3f, min_consecutive=%s",
+            scenario, thresholds.weak_signal_threshold, thresholds.consistency_min, thresholds.min_consecutive,
+        )
+    weak_threshold = thresholds.weak_signal_threshold
+    consistency_min = thresholds.consistency_min
+    min_consecutive = thresholds.min_consecutive
+    if gates is None:
+        gates = row_gates(score, consistency_raw, has_divergence, spread_bps, lag_sec, thresholds, plan)
+    consistency, low_consistency, is_weak, candidate_direction, quality_tier, spread_blocked, lag_blocked = gates
+
+    funnel = plan.funnel_diagnostics
+    if funnel:
+        stats.total_signals += 1
+
+    # 硬护栏：冷静期/warmup/spread/lag/上游 reason_codes（v2 模式下 gating 只反映硬护栏）
+    gating_reasons: List[str] = []
+    hard_blocked = False
+    if cooldown_after_exit_sec > 0:
+        exit_ts = last_exit_ts.get(symbol)
+        if exit_ts is not None:
+            elapsed_sec = (ts_ms - exit_ts) / 1000.0
+            if elapsed_sec < cooldown_after_exit_sec:
+                gating_reasons.append(f"cooldown_after_exit({elapsed_sec:.1f}s<{cooldown_after_exit_sec}s)")
+                stats.suppressed += 1
+                hard_blocked = True
+    if warmup:
+        gating_reasons.append("warmup")
+        stats.warmup_blocked += 1
+        hard_blocked = True
+    if spread_blocked:
+        gating_reasons.append(f"spread_bps>{plan.spread_bps_cap}")
+        hard_blocked = True
+    if lag_blocked:
+        gating_reasons.append(f"lag_sec>{plan.lag_cap_sec}")
+        hard_blocked = True
+
+    # 软护栏：低一致性 / 弱信号（NaN 的 >= 与 < 皆为 False，两个方向分别比较）
+    if funnel:
+        if consistency >= consistency_min:
+            stats.pass_consistency_filter += 1
+        if abs(score) >= weak_threshold or warmup:
+            stats.pass_weak_signal_filter += 1
+    if low_consistency:
+        gating_reasons.append("low_consistency")
+    if is_weak and not warmup:
+        gating_reasons.append("weak_signal")
+    if reason_codes:
+        gating_reasons.extend(f"reason:{code}" for code in reason_codes)
+        hard_blocked = True
+
+    confirm = candidate_direction != 0 and not gating_reasons
+    if funnel and confirm:
+        stats.candidate_confirm_true += 1
+
+    # Phase C: 质量分档
+    if quality_tier == "strong":
+        stats.strong_tier_signals += 1
+    elif quality_tier == "normal":
+        stats.normal_tier_signals += 1
+    else:
+        stats.weak_tier_signals += 1
+    quality_flags = []
+    if is_weak:
+        quality_flags.append("weak_signal")
+    if low_consistency:
+        quality_flags.append("low_consistency")
+
+    # confirm_v2：硬护栏永远阻塞；strong 档软护栏只记录，normal 档需无软护栏，weak 档不确认
+    confirm_v2 = False
+    soft_guard_reasons: List[str] = []
+    hard_gating = candidate_direction != 0 and hard_blocked
+    if candidate_direction != 0:
+        if not hard_gating:
+            if quality_tier == "strong":
+                confirm_v2 = True
+                soft_guard_reasons = quality_flags
+            elif quality_tier == "normal":
+                if not quality_flags:
+                    confirm_v2 = True
+                else:
+                    soft_guard_reasons = quality_flags
+        else:
+            soft_guard_reasons = gating_reasons
+    confirm_mode = plan.confirm_mode
+    if confirm_mode == "v2":
+        confirm = confirm_v2
+
+    if confirm:
+        if quality_tier == "strong":
+            stats.strong_tier_confirm += 1
+        elif quality_tier == "normal":
+            stats.normal_tier_confirm += 1
+        else:
+            stats.weak_tier_confirm += 1
+
+    # P0修复: 连击确认（避免一跳即确认），min_consecutive 已场景化
+    streak = None
+    if confirm and min_consecutive > 1:
+        streak = advance_dir_streak(dir_streak, symbol, score)
+        if streak < min_consecutive:
+            confirm = False
+            gating_reasons.append(f"reverse_cooldown_insufficient_ticks({streak}<{min_consecutive})")
+            stats.suppressed += 1
+            if funnel:
+                stats.reverse_prevention_blocked += 1
+
+    if trace is not None:
+        confirm_reason = "ok" if confirm else ",".join(gating_reasons) if gating_reasons else "no_direction"
+        if confirm and min_consecutive > 1:
+            confirm_reason = f"streak_ok({streak}>={min_consecutive})"
+        debug_record = {
+            "ts_ms": ts_ms,
+            "symbol": symbol,
+            "score": score,
+            "direction": candidate_direction,
+            "regime": regime,
+            "activity_tps": trace.get("activity_tps", 0),
+            "consistency_score": consistency,
+            "consistency_min": consistency_min,
+            "consistency_min_per_regime": thresholds.consistency_min_regime,
+            "gating_reasons": gating_reasons,
+            "is_weak_signal": is_weak,
+            "is_low_consistency": low_consistency,
+            "confirm": confirm,
+            "confirm_reason": confirm_reason,
+            "min_consecutive": min_consecutive,
+            "streak": streak,
+        }
+        logger.info(f"[CORE_CONFIRM_TRACE] {json.dumps(debug_record, default=str)}")
+
+    if funnel and confirm:
+        stats.confirm_true += 1
+    if confirm:
+        stats.emitted += 1
+    else:
+        stats.suppressed += 1
+    if not build_decision:
+        return None
+
+    signal_type = "neutral"
+    if confirm:
+        if candidate_direction > 0:
+            signal_type = "strong_buy" if score >= thresholds.strong_buy else "buy"
+        else:
+            signal_type = "strong_sell" if score <= thresholds.strong_sell else "sell"
+    elif candidate_direction != 0:
+        signal_type = "pending"
+
+    # 契约字段统一使用 decision_reason（gate_reason/guard_reason 为兼容字段）；
+    # v2 模式下 gating 只反映硬护栏（confirm=True ⇒ gating=1），v1 模式反映所有护栏
+    decision_reason = ",".join(gating_reasons) if gating_reasons else None
+    if confirm_mode == "v2":
+        gating_value = 0 if hard_gating else 1
+        gating_blocked_value = hard_gating
+    else:
+        gating_value = 1 if not gating_reasons else 0
+        gating_blocked_value = bool(gating_reasons)
+
+    return {
+        "ts_ms": ts_ms,
+        "symbol": symbol,
+        "score": score,
+        "z_ofi": z_ofi,
+        "z_cvd": z_cvd,
+        "regime": regime,
+        "div_type": div_type,
+        "consistency_raw": consistency_raw,  # 原始consistency（Fusion输出）
+        "consistency": consistency,  # 应用floor后的consistency（用于gating）
+        "confirm": confirm,
+        "confirm_v2": confirm_v2,
+        "soft_guard_reasons": soft_guard_reasons,
+        "quality_tier": quality_tier,
+        "quality_flags": quality_flags,
+        "gating": gating_value,
+        "gating_blocked": gating_blocked_value,
+        "signal_type": signal_type,
+        "decision_reason": decision_reason,
+        "gate_reason": decision_reason,
+        "guard_reason": decision_reason,
+        "run_id": run_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),  # 与SQLite的created_at对齐
+    }
+
+
+def decide_frame(
+    inputs: FrameInputs,
+    plan: ThresholdPlan,
+    stats: Any,
+    dir_streak: Dict[str, Tuple[int, int]],
+    last_exit_ts: Mapping[str, int],
+    cooldown_after_exit_sec: float,
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+    diag: Any = None,
+    build_decisions: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    在一套阈值计划上批量判定：无状态判定量由 frame_gates 在数组上批量算出，
+    有状态部分（退出冷静期、统计、连击、决策构造）逐行调用 decide_row（与 process_feature_row 同一实现）
+
+    参数:
+        inputs: 上游阶段输出
+        plan: 阈值计划
+        stats: SignalStats，原地累加（processed/deduplicated 由上游阶段负责）
+        dir_streak: 连击状态，原地推进
+        last_exit_ts: symbol → 最近退出时间戳（毫秒）
+        cooldown_after_exit_sec: 退出后冷静期（秒，<=0 关闭）
+        emit: 每个决策的回调（如 Sink 写出）
+        diag: 诊断限频器（report(key, msg, *args)），None 时不报告场景覆写
+        build_decisions: 为 False 时只累加统计与状态，不构造决策字典（参数寻优用）
+
+    返回:
+        List[Dict]: 决策列表（build_decisions=False 时为空）
+    """
+    run_id = os.getenv("RUN_ID", "")
+    entry_cache: Dict[Any, RegimeThresholds] = {}
+    row_thresholds: List[RegimeThresholds] = []
+    for key in zip(inputs.regimes, inputs.scenarios):
+        thresholds = entry_cache.get(key)
+        if thresholds is None:
+            thresholds = entry_cache[key] = plan.lookup(*key)
+        row_thresholds.append(thresholds)
+    gates = frame_gates(inputs, row_thresholds, plan)
+
+    decisions: List[Dict[str, Any]] = []
+    for j, (regime, scenario, score, consistency_raw, has_divergence, warmup, spread_bps, lag_sec) in enumerate(zip(
+        inputs.regimes, inputs.scenarios, inputs.score.tolist(), inputs.consistency_raw.tolist(),
+        inputs.has_divergence.tolist(), inputs.warmup.tolist(), inputs.spread_bps.tolist(), inputs.lag_sec.tolist(),
+    )):
+        thresholds = row_thresholds[j]
+        decision = decide_row(
+            ts_ms=inputs.ts_ms[j],
+            symbol=inputs.symbols[j],
+            score=score,
+            consistency_raw=consistency_raw,
+            has_divergence=has_divergence,
+            thresholds=thresholds,
+            scenario=scenario,
+            regime=regime,
+            warmup=warmup,
+            spread_bps=spread_bps,
+            lag_sec=lag_sec,
+            reason_codes=inputs.reason_codes[j],
+            z_ofi=inputs.z_ofi[j],
+            z_cvd=inputs.z_cvd[j],
+            div_type=inputs.div_type[j],
+            plan=plan,
+            stats=stats,
+            dir_streak=dir_streak,
+            last_exit_ts=last_exit_ts,
+            cooldown_after_exit_sec=cooldown_after_exit_sec,
+            run_id=run_id,
+            diag=diag,
+            build_decision=build_decisions,
+            gates=gates[j],
+        )
+        if decision is None:
+            continue
+        if emit is not None:
+            emit(decision)
+        decisions.append(decision)
+    return decisions
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+MultiConfigEvaluator - 单遍多配置信号评估（参数寻优用）
+
+同一特征流在 M 套 CoreAlgorithm 配置上评估时，逐配置回放会把列解析、分数解析、融合一致性、
+regime 推断重复 M 遍。这里把 CoreAlgorithm.process_frame 拆成两段：
+
+- 上游（_frame_inputs）：校验、去重、分数、融合一致性、regime —— 只依赖少数配置项
+  （dedupe_ms / recompute_fusion / weights / components.fusion / strategy_mode / activity），
+  上游配置相同的配置归为一组，每组由一个 leader CoreAlgorithm 计算一次
+- 下游（core_batch.decide_frame）：阈值、护栏、confirm、连击 —— 每套配置各自推进轻量状态
+  （ThresholdPlan + SignalStats + 连击/退出冷静期状态）
+
+每套配置的统计与决策和单独用 CoreAlgorithm.process_rows 回放逐位一致（created_at 除外）。
+仅支持 v1 规则路径（signal v2 的 DecisionEngine 另有状态，构造时拒绝）。
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .core_algo import CoreAlgorithm, NullSink, SignalStats, build_core_config
+from .core_batch import decide_frame, parse_columns
+from .threshold_plan import ThresholdPlan
+
+
+def upstream_key(config: Dict[str, Any]) -> str:
+    """上游阶段相关配置项的规范化键（生效配置相同键 → 可共享上游计算）"""
+    activity = config.get("activity", {}) or {}
+    relevant = {
+        "use_signal_v2": bool(config.get("use_signal_v2") or (config.get("core", {}) or {}).get("use_signal_v2")),
+        "dedupe_ms": config.get("dedupe_ms"),
+        "recompute_fusion": bool(config.get("recompute_fusion", False)),
+        "weights": config.get("weights", {}) or {},
+        "fusion": (config.get("components", {}) or {}).get("fusion", {}) or {},
+        "strategy_mode": config.get("strategy_mode", {}) or {},
+        "activity": {k: activity.get(k) for k in ("active_min_tps", "normal_min_tps")},
+    }
+    return json.dumps(relevant, sort_keys=True, default=str)
+
+
+@dataclass
+class ConfigResult:
+    """单套配置的评估结果"""
+
+    index: int
+    config: Dict[str, Any]
+    stats: SignalStats
+    signals: Optional[List[Dict[str, Any]]] = None
+
+
+class _ConfigState:
+    """单套配置的下游状态"""
+
+    __slots__ = ("index", "config", "plan", "stats", "dir_streak", "last_exit_ts", "cooldown_after_exit_sec", "signals")
+
+    def __init__(self, index: int, config: Dict[str, Any], keep_signals: bool):
+        self.index = index
+        self.config = config
+        self.plan = ThresholdPlan(config, int(config.get("min_consecutive_same_dir", 1)))
+        self.stats = SignalStats()
+        self.dir_streak: Dict[str, tuple] = {}
+        self.last_exit_ts: Dict[str, int] = {}
+        self.cooldown_after_exit_sec = int((config.get("strategy", {}) or {}).get("cooldown_after_exit_sec", 0))
+        self.signals: Optional[List[Dict[str, Any]]] = [] if keep_signals else None
+
+
+@dataclass
+class _Group:
+    leader: CoreAlgorithm
+    members: List[_ConfigState] = field(default_factory=list)
+
+
+class MultiConfigEvaluator:
+    """在一遍特征流上同时评估多套 CoreAlgorithm 配置"""
+
+    def __init__(self, configs: Sequence[Optional[Dict[str, Any]]], keep_signals: bool = False):
+        """
+        Args:
+            configs: CoreAlgorithm 配置列表（与 CoreAlgorithm(config=...) 相同格式，支持 signal 小节风格）
+            keep_signals: 是否保留每套配置的决策列表（否则只累计统计，更快）
+
+        Raises:
+            ValueError: 配置启用了 signal v2 路径
+        """
+        self._keep_signals = keep_signals
+        self._states: List[_ConfigState] = []
+        self._groups: Dict[str, _Group] = {}
+        for index, raw in enumerate(configs):
+            config = build_core_config(raw)
+            key = upstream_key(config)
+            group = self._groups.get(key)
+            if group is None:
+                leader = CoreAlgorithm(config=raw, sink=NullSink())
+                if leader._use_v2:
+                    raise ValueError(f"config #{index}: signal v2 path is not supported by MultiConfigEvaluator")
+                group = self._groups[key] = _Group(leader)
+            state = _ConfigState(index, config, keep_signals)
+            group.members.append(state)
+            self._states.append(state)
+
+    @property
+    def n_groups(self) -> int:
+        """上游共享组数（= 实际的上游计算遍数）"""
+        return len(self._groups)
+
+    def process_frame(self, columns: Mapping[str, Sequence[Any]]) -> None:
+        """处理一批列式特征（格式同 CoreAlgorithm.process_frame），推进所有配置"""
+        col, n = parse_columns(columns)
+        if n == 0:
+            return
+        for group in self._groups.values():
+            leader_stats = group.leader.stats
+            processed, deduplicated = leader_stats.processed, leader_stats.deduplicated
+            inputs = group.leader._frame_inputs(col, n)
+            processed = leader_stats.processed - processed
+            deduplicated = leader_stats.deduplicated - deduplicated
+            for state in group.members:
+                state.stats.processed += processed
+                state.stats.deduplicated += deduplicated
+                if inputs is None:
+                    continue
+                decisions = decide_frame(
+                    inputs, state.plan, state.stats, state.dir_streak,
+                    state.last_exit_ts, state.cooldown_after_exit_sec,
+                    build_decisions=self._keep_signals,
+                )
+                if state.signals is not None:
+                    state.signals.extend(decisions)
+
+    def process_rows(self, rows: Iterable[Dict[str, Any]], chunk_size: int = 20000) -> None:
+        """按 chunk_size 行分批转为列后调用 process_frame"""
+        chunk: List[Dict[str, Any]] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                self._process_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._process_chunk(chunk)
+
+    def _process_chunk(self, rows: List[Dict[str, Any]]) -> None:
+        names: Dict[str, None] = {}
+        for row in rows:
+            names.update(dict.fromkeys(row))
+        self.process_frame({name: [row.get(name) for row in rows] for name in names})
+
+    def record_exit(self, symbol: str, ts_ms: int) -> None:
+        """为所有启用退出冷静期的配置记录退出时间（同 CoreAlgorithm.record_exit）"""
+        for state in self._states:
+            if state.cooldown_after_exit_sec > 0:
+                state.last_exit_ts[symbol] = ts_ms
+
+    def results(self) -> List[ConfigResult]:
+        """按输入顺序返回每套配置的结果"""
+        return [ConfigResult(s.index, s.config, s.stats, s.signals) for s in self._states]
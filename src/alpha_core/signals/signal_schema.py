@@ -4,6 +4,7 @@
 统一信号输出契约（signal/v2）与强 Schema 校验
 """
 
+import json
 from enum import Enum
 from typing import Dict, Any, Optional, Literal
 from pydantic import BaseModel, Field, model_validator, field_validator
@@ -115,11 +116,114 @@ class SignalV2(BaseModel):
         """转换为 SQLite 格式（meta 转为 JSON 字符串）"""
         data = self.dict_for_jsonl()
         if data.get("meta") is not None:
-            import json
-            data["meta"] = json.dumps(data["meta"], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+            data["meta"] = meta_json(data["meta"])
         return data
 
 
+def meta_json(meta: Dict[str, Any]) -> str:
+    """meta 的 SQLite 存储格式（紧凑、稳定排序）"""
+    return json.dumps(meta, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+class SignalV2Record:
+    """signal/v2 受信快速记录（CoreAlgorithm/DecisionEngine 输出专用）
+    
+    pydantic v2 的 model_construct 走 Python 逐字段赋值，反而比 Rust 校验慢；
+    受信路径改用 __slots__ 记录，只保证构造期不变量：
+    symbol 大写、枚举转为取值（与 use_enum_values 一致）、confirm=true ⇒ gating=1 && decision_code=OK。
+    JSONL/SQLite 投影直接由字段生成，字段顺序与 SignalV2 一致；完整校验由 SignalWriterV2 按采样/严格模式执行。
+    """
+    
+    __slots__ = (
+        "schema_version", "ts_ms", "symbol", "signal_id", "score", "side_hint", "z_ofi", "z_cvd",
+        "div_type", "regime", "gating", "confirm", "cooldown_ms", "expiry_ms", "decision_code",
+        "decision_reason", "config_hash", "run_id", "meta",
+    )
+    
+    def __init__(
+        self,
+        ts_ms: int,
+        symbol: str,
+        signal_id: str,
+        score: float,
+        side_hint: Any,
+        regime: Any,
+        gating: int,
+        confirm: bool,
+        expiry_ms: int,
+        decision_code: Any,
+        config_hash: str,
+        run_id: str,
+        z_ofi: Optional[float] = None,
+        z_cvd: Optional[float] = None,
+        div_type: Any = None,
+        cooldown_ms: int = 0,
+        decision_reason: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ):
+        decision_code = _enum_value(decision_code)
+        if confirm and (gating != 1 or decision_code != DecisionCode.OK.value):
+            raise ValueError("confirm=true requires gating=1 and decision_code=OK")
+        self.schema_version = "signal/v2"
+        self.ts_ms = ts_ms
+        self.symbol = symbol.upper()
+        self.signal_id = signal_id
+        self.score = score
+        self.side_hint = _enum_value(side_hint)
+        self.z_ofi = z_ofi
+        self.z_cvd = z_cvd
+        self.div_type = _enum_value(div_type)
+        self.regime = _enum_value(regime)
+        self.gating = gating
+        self.confirm = confirm
+        self.cooldown_ms = cooldown_ms
+        self.expiry_ms = expiry_ms
+        self.decision_code = decision_code
+        self.decision_reason = decision_reason
+        self.config_hash = config_hash
+        self.run_id = run_id
+        self.meta = meta
+    
+    def dict_for_jsonl(self) -> Dict[str, Any]:
+        """转换为 JSONL 格式（与 SignalV2.dict_for_jsonl 逐键一致；meta 共享引用，调用方不得原地修改）"""
+        return {
+            "schema_version": self.schema_version,
+            "ts_ms": self.ts_ms,
+            "symbol": self.symbol,
+            "signal_id": self.signal_id,
+            "score": self.score,
+            "side_hint": self.side_hint,
+            "z_ofi": self.z_ofi,
+            "z_cvd": self.z_cvd,
+            "div_type": self.div_type,
+            "regime": self.regime,
+            "gating": self.gating,
+            "confirm": self.confirm,
+            "cooldown_ms": self.cooldown_ms,
+            "expiry_ms": self.expiry_ms,
+            "decision_code": self.decision_code,
+            "decision_reason": self.decision_reason,
+            "config_hash": self.config_hash,
+            "run_id": self.run_id,
+            "meta": self.meta,
+        }
+    
+    def dict_for_sqlite(self) -> Dict[str, Any]:
+        """转换为 SQLite 格式（meta 转为 JSON 字符串）"""
+        data = self.dict_for_jsonl()
+        if self.meta is not None:
+            data["meta"] = meta_json(self.meta)
+        return data
+    
+    def to_model(self) -> SignalV2:
+        """完整 pydantic 校验并返回 SignalV2（失败抛 ValidationError）"""
+        return validate_signal_v2(self.dict_for_jsonl())
+
+
 def validate_signal_v2(data: Dict[str, Any]) -> SignalV2:
     """验证并创建 SignalV2 实例"""
     return SignalV2(**data)
@@ -12,9 +12,12 @@ import sqlite3
 import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 
-from .signal_schema import SignalV2, validate_signal_v2
+from alpha_core.utils import json_codec
+from alpha_core.utils.jsonl_pool import JsonlHandlePool
+
+from .signal_schema import SignalV2, SignalV2Record, meta_json, validate_signal_v2
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +41,15 @@ class SignalWriterV2:
         self.sink_kind = sink_kind.lower()
         self.db_name = db_name
         
+        # 采样强校验：受信快速路径（SignalV2Record）的信号每 N 条做一次完整 pydantic 校验
+        # SIGNAL_V2_VALIDATE_EVERY_N=0 关闭；SIGNAL_V2_STRICT=1（调试模式）逐条校验并拒绝非法信号
+        self._strict = os.getenv("SIGNAL_V2_STRICT", "0") == "1"
+        self._validate_every_n = 1 if self._strict else max(0, int(os.getenv("SIGNAL_V2_VALIDATE_EVERY_N", "100")))
+        self._write_count = 0
+        self._record_count = 0
+        self._validated = 0
+        self._validation_failures = 0
+        
         # 初始化 Sink
         if self.sink_kind == "jsonl":
             self._jsonl_enabled = True
@@ -58,8 +70,13 @@ class SignalWriterV2:
             self._jsonl_lock = threading.Lock()
             # P0 修复1: 批量 fsync 配置（与 v1 JsonlSink 对齐）
             self._jsonl_fsync_every_n = int(os.getenv("FSYNC_EVERY_N", "50"))
-            self._jsonl_write_count = 0
-            self._jsonl_last_hour = None  # 跟踪上一个小时，用于检测文件切换
+            # 常驻句柄池：按 (symbol, 小时) 复用追加句柄，小时轮转/淘汰时 fsync 后关闭
+            self._jsonl_pool = JsonlHandlePool(
+                self.ready_root,
+                fsync_every_n=self._jsonl_fsync_every_n,
+                max_open=int(os.getenv("JSONL_MAX_OPEN", "64")),
+                name="SignalWriterV2",
+            )
             logger.info(f"[SignalWriterV2] JSONL fsync策略: every_n={self._jsonl_fsync_every_n}")
         
         # SQLite 相关
@@ -211,97 +228,90 @@ class SignalWriterV2:
             return False
         return True
     
-    def write(self, signal: SignalV2) -> None:
+    def write(self, signal: Union[SignalV2, SignalV2Record]) -> None:
         """写入 signal/v2 信号
         
         Args:
-            signal: SignalV2 实例
+            signal: SignalV2 实例（已校验）或 SignalV2Record（受信快速路径，按采样强校验）
         """
-        # 验证信号（SignalV2 实例已通过 pydantic 验证，这里跳过）
-        # 如果需要额外验证，可以在这里添加
+        # 扇出：只做一次投影，JSONL 与 SQLite 共用同一份数据
+        data = signal.dict_for_jsonl()
+        
+        # 采样强校验（SignalV2 实例已通过 pydantic 验证，跳过）
+        self._write_count += 1
+        if type(signal) is SignalV2Record and self._validate_every_n:
+            self._record_count += 1
+            if self._record_count % self._validate_every_n == 0 and not self._validate(data) and self._strict:
+                return
         
         # 写入 JSONL
         if self._jsonl_enabled:
             try:
-                self._write_jsonl(signal)
+                self._write_jsonl(data)
             except Exception as e:
                 logger.error(f"[SignalWriterV2] JSONL write failed: {e}")
         
         # 写入 SQLite
         if self._sqlite_enabled:
             try:
-                self._write_sqlite(signal)
+                self._write_sqlite(data)
             except Exception as e:
                 logger.error(f"[SignalWriterV2] SQLite write failed: {e}")
     
-    def _write_jsonl(self, signal: SignalV2) -> None:
+    def _validate(self, data: Dict[str, Any]) -> bool:
+        """完整 pydantic 校验（失败计数并记录，严格模式下由调用方丢弃该信号）"""
+        self._validated += 1
+        try:
+            validate_signal_v2(data)
+            return True
+        except Exception as e:
+            self._validation_failures += 1
+            logger.error(f"[SignalWriterV2] Signal validation failed (signal_id={data.get('signal_id')}): {e}")
+            return False
+    
+    def get_health(self) -> Dict[str, Any]:
+        """写入与采样校验统计"""
+        return {
+            "written": self._write_count,
+            "validate_every_n": self._validate_every_n,
+            "strict": self._strict,
+            "validated": self._validated,
+            "validation_failures": self._validation_failures,
+        }
+    
+    def _write_jsonl(self, data: Dict[str, Any]) -> None:
         """写入 JSONL（参考 TASK-07B：线程安全，按小时轮转，批量 fsync）
         
         P0 修复1: 与 v1 JsonlSink 对齐，支持批量 fsync（到阈值或跨小时才 fsync）
+        句柄由 JsonlHandlePool 常驻复用，不再每条写入 open/close
         """
+        ts_ms = data["ts_ms"]
+        # P0 修复3: 规范 symbol 大写化（与契约一致）
+        symbol = str(data["symbol"]).upper()
+        hour_str = datetime.fromtimestamp(ts_ms / 1000.0, tz=timezone.utc).strftime("%Y%m%d-%H")
+        serialized = json_codec.dumps(data, sort_keys=True)
         with self._jsonl_lock:
-            data = signal.dict_for_jsonl()
-            ts_ms = data["ts_ms"]
-            # P0 修复3: 规范 symbol 大写化（与契约一致）
-            symbol = str(data["symbol"]).upper()
-            
-            dt = datetime.fromtimestamp(ts_ms / 1000.0, tz=timezone.utc)
-            hour_str = dt.strftime("%Y%m%d-%H")
-            current_hour = (symbol, hour_str)
-            
-            # P0 修复1: 如果文件切换（小时轮转），对上一个文件执行补偿 fsync
-            if self._jsonl_last_hour is not None and self._jsonl_last_hour != current_hour:
-                prev_symbol, prev_hour_str = self._jsonl_last_hour
-                prev_file = self.ready_root / prev_symbol / f"signals-{prev_hour_str}.jsonl"
-                if prev_file.exists():
-                    try:
-                        with prev_file.open("r+b") as prev_fp:
-                            prev_fp.flush()
-                            os.fsync(prev_fp.fileno())
-                    except Exception as e:
-                        logger.warning(f"[SignalWriterV2] Failed to fsync previous file {prev_file}: {e}")
-            
-            # 获取或创建文件句柄（每次写入都打开文件，参考 TASK-07B）
-            target_dir = self.ready_root / symbol
-            target_dir.mkdir(parents=True, exist_ok=True)
-            target_file = target_dir / f"signals-{hour_str}.jsonl"
-            
-            # 写入数据（每次打开文件，确保线程安全）
-            with target_file.open("a", encoding="utf-8") as fp:
-                serialized = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
-                fp.write(serialized + "\n")
-                self._jsonl_write_count += 1
-                
-                # P0 修复1: 只在达到阈值时 fsync，移除收尾兜底 fsync
-                if self._jsonl_write_count >= self._jsonl_fsync_every_n:
-                    fp.flush()
-                    os.fsync(fp.fileno())
-                    self._jsonl_write_count = 0
-                else:
-                    # 仍然 flush，但不 fsync（减少系统调用）
-                    fp.flush()
-            
-            self._jsonl_last_hour = current_hour
+            self._jsonl_pool.write(symbol, hour_str, serialized)
     
-    def _write_sqlite(self, signal: SignalV2) -> None:
+    def _write_sqlite(self, data: Dict[str, Any]) -> None:
         """写入 SQLite（P1 修复4: 批处理队列，参考 v1 SqliteSink）
         
         使用持久连接 + 批量提交，显著提升吞吐
         """
         import time
+        # meta 按 dict_for_sqlite 口径序列化为紧凑 JSON 字符串
+        meta = data.get("meta")
+        if meta is not None:
+            meta = meta_json(meta)
+        payload = (
+            data["ts_ms"], data["symbol"], data["signal_id"], data["schema_version"],
+            data["score"], data["side_hint"], data.get("z_ofi"), data.get("z_cvd"),
+            data.get("div_type"), data["regime"], data["gating"], int(data["confirm"]),
+            data["cooldown_ms"], data["expiry_ms"], data["decision_code"],
+            data.get("decision_reason"), data["config_hash"], data["run_id"],
+            meta,
+        )
         with self._sqlite_lock:
-            data = signal.dict_for_sqlite()
-            
-            # P0 修复2: v2 SQLite meta 避免二次序列化 - dict_for_sqlite() 已返回 JSON 字符串，直接使用
-            payload = (
-                data["ts_ms"], data["symbol"], data["signal_id"], data["schema_version"],
-                data["score"], data["side_hint"], data.get("z_ofi"), data.get("z_cvd"),
-                data.get("div_type"), data["regime"], data["gating"], int(data["confirm"]),
-                data["cooldown_ms"], data["expiry_ms"], data["decision_code"],
-                data.get("decision_reason"), data["config_hash"], data["run_id"],
-                data.get("meta"),  # 这里直接用 dict_for_sqlite 返回的字符串（已序列化）
-            )
-            
             # 加入队列
             self._sqlite_batch_queue.append(payload)
             
@@ -436,19 +446,7 @@ class SignalWriterV2:
                     finally:
                         self._sqlite_conn = None
         
-        # TASK-A4优化: JSONL 优雅退出 - 对当前小时文件执行最后一次 fsync
-        # 虽然JSONL采用每次写入都打开/关闭文件的策略，但关闭时需要确保当前文件已fsync
-        if self._jsonl_enabled and self._jsonl_last_hour is not None:
+        # TASK-A4优化: JSONL 优雅退出 - 对所有打开的文件执行最后一次 fsync 并关闭句柄
+        if self._jsonl_enabled:
             with self._jsonl_lock:
-                symbol, hour_str = self._jsonl_last_hour
-                current_file = self.ready_root / symbol / f"signals-{hour_str}.jsonl"
-                if current_file.exists():
-                    try:
-                        # 对当前文件执行最后一次 fsync，确保数据持久化
-                        with current_file.open("r+b") as fp:
-                            fp.flush()
-                            os.fsync(fp.fileno())
-                        logger.debug(f"[SignalWriterV2] Final fsync for {current_file.name}")
-                    except Exception as e:
-                        logger.warning(f"[SignalWriterV2] Failed to final fsync {current_file}: {e}")
-
+                self._jsonl_pool.close()
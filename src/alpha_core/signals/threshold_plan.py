@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+ThresholdPlan - CoreAlgorithm 预编译阈值计划
+
+CoreAlgorithm 的 v1 路径在每行上都要遍历配置字典：debug 开关、漏斗诊断开关、confirm_mode、
+consistency_floor*、scenario_overrides、consistency_min_per_regime 以及 _thresholds_for_regime 的
+base/regime 合并。这些值只随配置变化，因此在构造时（及显式 reconfigure 时）一次性解析为不可变计划：
+
+- 标量开关/阈值（含 dedupe_ms、融合权重、活动度分档）直接作为属性
+- 阈值表按 (regime, scenario_2x2) 索引，每项为 RegimeThresholds（买卖档位 + 场景化后的
+  weak/consistency/min_consecutive），逐行只需一次字典查找和属性访问
+
+与逐行解析的语义一致：
+- 场景覆写（scenario_overrides[scenario] 非空）优先于 consistency_min_per_regime
+- 未出现在 scenario_overrides 中的场景等同于无场景（scenario=None）
+- 表外 regime（自定义 regime）按需现算，不写回计划
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+
+KNOWN_REGIMES = ("base", "active", "normal", "quiet")
+
+
+class RegimeThresholds:
+    """单个 (regime, scenario_2x2) 组合的生效阈值（不可变）"""
+
+    __slots__ = (
+        "buy", "strong_buy", "sell", "strong_sell",
+        "weak_signal_threshold", "consistency_min", "consistency_min_regime",
+        "min_consecutive", "scenario_overridden",
+    )
+
+    def __init__(
+        self,
+        buy: float,
+        strong_buy: float,
+        sell: float,
+        strong_sell: float,
+        weak_signal_threshold: float,
+        consistency_min: float,
+        consistency_min_regime: Optional[float],
+        min_consecutive: int,
+        scenario_overridden: bool,
+    ):
+        """
+        Args:
+            buy/strong_buy/sell/strong_sell: base 与 regime 合并后的档位阈值
+            weak_signal_threshold: 场景化后的弱信号阈值
+            consistency_min: 场景化/分 regime 后的一致性下限
+            consistency_min_regime: consistency_min_per_regime 中该 regime 的原始值（诊断用，可为 None）
+            min_consecutive: 场景化后的连击确认次数
+            scenario_overridden: 是否命中场景覆写
+        """
+        set_ = object.__setattr__
+        set_(self, "buy", buy)
+        set_(self, "strong_buy", strong_buy)
+        set_(self, "sell", sell)
+        set_(self, "strong_sell", strong_sell)
+        set_(self, "weak_signal_threshold", weak_signal_threshold)
+        set_(self, "consistency_min", consistency_min)
+        set_(self, "consistency_min_regime", consistency_min_regime)
+        set_(self, "min_consecutive", min_consecutive)
+        set_(self, "scenario_overridden", scenario_overridden)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class ThresholdPlan:
+    """CoreAlgorithm 逐行判定所需配置的预编译视图（不可变）"""
+
+    __slots__ = (
+        "core_confirm_trace", "funnel_diagnostics", "confirm_mode",
+        "weak_signal_threshold", "strong_threshold", "consistency_min", "min_consecutive",
+        "consistency_floor", "consistency_floor_when_abs_score_ge", "consistency_floor_on_divergence",
+        "spread_bps_cap", "lag_cap_sec", "dedupe_ms", "w_ofi", "w_cvd", "active_min_tps", "normal_min_tps",
+        "_thresholds", "_consistency_min_per_regime", "_scenario_overrides", "_table",
+    )
+
+    def __init__(self, config: Dict[str, Any], min_consecutive: int = 1):
+        """
+        Args:
+            config: CoreAlgorithm 生效配置（默认值已合并）
+            min_consecutive: 全局连击确认次数（CoreAlgorithm.min_consecutive_same_dir）
+        """
+        set_ = object.__setattr__
+        signal_cfg = config.get("signal", {}) or {}
+
+        set_(self, "core_confirm_trace", bool((config.get("debug", {}) or {}).get("core_confirm_trace", False)))
+        set_(self, "funnel_diagnostics", bool(
+            config.get("enable_confirm_funnel_diagnostics")
+            or signal_cfg.get("enable_confirm_funnel_diagnostics", False)
+        ))
+        confirm_mode = config.get("confirm_mode", "v1")
+        if confirm_mode == "v1":  # 未显式设置时回落 signal 小节
+            confirm_mode = signal_cfg.get("confirm_mode", "v1")
+        set_(self, "confirm_mode", confirm_mode)
+
+        set_(self, "weak_signal_threshold", config["weak_signal_threshold"])
+        set_(self, "strong_threshold", config.get("strong_threshold", 0.8))
+        set_(self, "consistency_min", config["consistency_min"])
+        set_(self, "min_consecutive", int(min_consecutive))
+        set_(self, "consistency_floor", config.get("consistency_floor", 0.10))
+        set_(self, "consistency_floor_when_abs_score_ge", config.get("consistency_floor_when_abs_score_ge", 0.4))
+        set_(self, "consistency_floor_on_divergence", config.get("consistency_floor_on_divergence", 0.12))
+        set_(self, "spread_bps_cap", config["spread_bps_cap"])
+        set_(self, "lag_cap_sec", config["lag_cap_sec"])
+        set_(self, "dedupe_ms", config["dedupe_ms"])
+        weights = config.get("weights", {}) or {}
+        set_(self, "w_ofi", weights.get("w_ofi", 0.6))
+        set_(self, "w_cvd", weights.get("w_cvd", 0.4))
+        activity_cfg = config.get("activity", {}) or {}
+        set_(self, "active_min_tps", activity_cfg.get("active_min_tps", 3.0))
+        set_(self, "normal_min_tps", activity_cfg.get("normal_min_tps", 1.0))
+
+        thresholds = config.get("thresholds", {}) or {}
+        per_regime = config.get("consistency_min_per_regime", {}) or {}
+        # 仅保留非空覆写：空覆写与无场景等价
+        overrides = {k: v for k, v in (config.get("scenario_overrides", {}) or {}).items() if v}
+        set_(self, "_thresholds", thresholds)
+        set_(self, "_consistency_min_per_regime", per_regime)
+        set_(self, "_scenario_overrides", overrides)
+
+        regimes = set(KNOWN_REGIMES) | set(thresholds) | set(per_regime)
+        table: Dict[Tuple[str, Optional[str]], RegimeThresholds] = {}
+        for regime in regimes:
+            table[(regime, None)] = self._build_entry(regime, None)
+            for scenario in overrides:
+                table[(regime, scenario)] = self._build_entry(regime, scenario)
+        set_(self, "_table", table)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _build_entry(self, regime: str, scenario: Optional[str]) -> RegimeThresholds:
+        base_cfg = self._thresholds.get("base", {}) or {}
+        regime_cfg = self._thresholds.get(regime or "base", {}) or {}
+        merged = dict(base_cfg)
+        merged.update(regime_cfg)
+
+        weak = self.weak_signal_threshold
+        consistency_min = self.consistency_min
+        min_consecutive = self.min_consecutive
+        override = self._scenario_overrides.get(scenario) if scenario else None
+        if override:
+            weak = weak + override.get("weak_signal_threshold_offset", 0.0)
+            consistency_min = consistency_min + override.get("consistency_min_offset", 0.0)
+            min_consecutive = min_consecutive + override.get("min_consecutive_offset", 0)
+        elif regime in self._consistency_min_per_regime:
+            consistency_min = self._consistency_min_per_regime[regime]
+
+        return RegimeThresholds(
+            buy=merged.get("buy"),
+            strong_buy=merged.get("strong_buy"),
+            sell=merged.get("sell"),
+            strong_sell=merged.get("strong_sell"),
+            weak_signal_threshold=weak,
+            consistency_min=consistency_min,
+            consistency_min_regime=self._consistency_min_per_regime.get(regime),
+            min_consecutive=min_consecutive,
+            scenario_overridden=bool(override),
+        )
+
+    def lookup(self, regime: str, scenario: Optional[str] = None) -> RegimeThresholds:
+        """取 (regime, scenario_2x2) 的生效阈值；未知场景按无场景处理，未知 regime 现算"""
+        entry = self._table.get((regime, scenario))
+        if entry is not None:
+            return entry
+        entry = self._table.get((regime, None))
+        if entry is not None and scenario not in self._scenario_overrides:
+            return entry
+        return self._build_entry(regime, scenario if scenario in self._scenario_overrides else None)
+
+    def regime_thresholds(self, regime: str) -> Dict[str, float]:
+        """base 与 regime 合并后的档位阈值（与旧 _thresholds_for_regime 返回格式一致）"""
+        merged = dict(self._thresholds.get("base", {}) or {})
+        merged.update(self._thresholds.get(regime or "base", {}) or {})
+        return merged
@@ -1,12 +1,20 @@
 # -*- coding: utf-8 -*-
 """Utils Module
 
-工具模块：节流器、重试、规则缓存等
+工具模块：节流器、重试、规则缓存、滑动窗口统计/分位数、采样诊断日志、JSON 编解码、JSONL 句柄池/增量跟随读取、文件尾随读取基础件、文件增量摄取跟踪等
 """
 
 from .rate_limiter import RateLimiter, TokenBucket
 from .retry import RetryPolicy, retry_with_backoff
 from .rules_cache import RulesCache
+from .rolling_stats import RollingWindowStats
+from .rolling_quantile import RollingQuantile
+from .diagnostics import DiagnosticsLogger
+from .json_codec import JsonCodec
+from .jsonl_pool import JsonlHandlePool
+from .file_tail import DirListingCache, DirWatcher, TailCursor
+from .jsonl_follow import JsonlFollower
+from .ingest_tracker import FileIngestTracker
 
 __all__ = [
     "RateLimiter",
@@ -14,5 +22,15 @@ __all__ = [
     "RetryPolicy",
     "retry_with_backoff",
     "RulesCache",
+    "RollingWindowStats",
+    "RollingQuantile",
+    "DiagnosticsLogger",
+    "JsonCodec",
+    "JsonlHandlePool",
+    "DirWatcher",
+    "TailCursor",
+    "DirListingCache",
+    "JsonlFollower",
+    "FileIngestTracker",
 ]
 
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Diagnostics Logger
+
+热路径诊断日志：按键计数 + 令牌桶采样 + 惰性格式化 + 周期汇总
+
+- report() 始终只做一次计数自增；仅当目标级别启用且该键令牌充足时才真正格式化并输出
+  （使用 logging 的 %-参数，未输出的消息不会被格式化）
+- 被采样丢弃的消息计入 suppressed，周期汇总（summary_interval_sec）时以一行输出各键计数
+- 非线程安全（计数为尽力而为），每个计算器/组件持有独立实例
+"""
+
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+
+class DiagnosticsLogger:
+    """采样诊断日志器"""
+
+    __slots__ = (
+        "logger", "name", "rate", "burst", "summary_interval_sec", "summary_level",
+        "_clock", "_counts", "_suppressed", "_tokens", "_token_ts",
+        "_next_summary", "_last_flushed",
+    )
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        name: str = "",
+        rate: float = 1.0,
+        burst: int = 5,
+        summary_interval_sec: float = 60.0,
+        summary_level: int = logging.INFO,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        """初始化诊断日志器
+
+        Args:
+            logger: 目标 logger
+            name: 汇总行前缀（如 "OFI BTCUSDT"）
+            rate: 每个键的令牌填充速率（条/秒）
+            burst: 每个键的突发容量
+            summary_interval_sec: 汇总间隔（秒），<=0 关闭周期汇总
+            summary_level: 汇总行的日志级别
+            clock: 单调时钟（测试注入），默认 time.monotonic
+        """
+        self.logger = logger
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.summary_interval_sec = float(summary_interval_sec)
+        self.summary_level = summary_level
+        self._clock = clock or time.monotonic
+        self._counts: Dict[str, int] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._tokens: Dict[str, float] = {}
+        self._token_ts: Dict[str, float] = {}
+        self._last_flushed: Dict[str, int] = {}
+        now = self._clock()
+        self._next_summary = now + self.summary_interval_sec if self.summary_interval_sec > 0 else None
+
+    def report(self, key: str, msg: str, *args, level: int = logging.DEBUG) -> bool:
+        """记录一次诊断事件
+
+        Args:
+            key: 计数键（如 "OFI_WARMUP"）
+            msg: %-格式消息模板
+            *args: 模板参数（仅在实际输出时格式化）
+            level: 日志级别
+
+        Returns:
+            是否实际输出
+        """
+        counts = self._counts
+        counts[key] = counts.get(key, 0) + 1
+
+        emitted = False
+        if self.logger.isEnabledFor(level):
+            now = self._clock()
+            if self._take_token(key, now):
+                self.logger.log(level, msg, *args)
+                emitted = True
+            else:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            if self._next_summary is not None and now >= self._next_summary:
+                self.flush_summary(now)
+        elif self._next_summary is not None:
+            now = self._clock()
+            if now >= self._next_summary:
+                self.flush_summary(now)
+        return emitted
+
+    def count(self, key: str, n: int = 1) -> None:
+        """仅计数，不输出"""
+        self._counts[key] = self._counts.get(key, 0) + n
+
+    def _take_token(self, key: str, now: float) -> bool:
+        tokens = self._tokens.get(key)
+        if tokens is None:
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, tokens + (now - self._token_ts[key]) * self.rate)
+        self._token_ts[key] = now
+        if tokens >= 1.0:
+            self._tokens[key] = tokens - 1.0
+            return True
+        self._tokens[key] = tokens
+        return False
+
+    def counters(self) -> Dict[str, int]:
+        """各键累计计数（副本）"""
+        return dict(self._counts)
+
+    def suppressed(self) -> Dict[str, int]:
+        """各键被采样丢弃的累计计数（副本）"""
+        return dict(self._suppressed)
+
+    def flush_summary(self, now: Optional[float] = None) -> Optional[str]:
+        """输出自上次汇总以来的计数增量（无新增时不输出）
+
+        Returns:
+            汇总行文本（无新增时为 None）
+        """
+        if now is None:
+            now = self._clock()
+        if self.summary_interval_sec > 0:
+            self._next_summary = now + self.summary_interval_sec
+
+        parts = []
+        for key, total in self._counts.items():
+            delta = total - self._last_flushed.get(key, 0)
+            if delta:
+                parts.append(f"{key}={delta}")
+                self._last_flushed[key] = total
+        if not parts:
+            return None
+        line = f"[DIAG_SUMMARY] {self.name} " + " ".join(parts) if self.name else "[DIAG_SUMMARY] " + " ".join(parts)
+        self.logger.log(self.summary_level, line)
+        return line
+
+    def reset(self) -> None:
+        """清空计数与令牌状态"""
+        self._counts.clear()
+        self._suppressed.clear()
+        self._tokens.clear()
+        self._token_ts.clear()
+        self._last_flushed.clear()
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""File Tail
+
+持续追加文件的增量读取基础件，由 JsonlFollower（策略服务）与 FileIngestTracker（信号服务）的监听模式共用：
+
+- DirWatcher：目录变更唤醒。Linux 下用 inotify（ctypes 调 libc，无第三方依赖），
+  不可用时（非 Linux / 句柄数超限 / 显式关闭）退化为定时轮询；新建子目录自动加入监听
+- TailCursor：单个文件的字节偏移游标
+  - 只交付以换行结尾的完整行，不完整的尾行留在缓冲区等写入方补齐
+  - 读位置（read_pos）与已确认偏移（committed）分离：调用方处理完数据后 commit()，
+    失败时 rewind() 回到已确认偏移重读（至少一次语义）
+  - 文件小于已确认偏移（重启前被重写）或小于读位置（读取中被截断）时从头重读
+- DirListingCache：目录列举按 mtime 缓存，仅在 mtime 变化（新建/删除文件）或每 rescan_sec 兜底时重新 scandir
+- read_checkpoint / write_checkpoint：检查点 JSON 读取与原子写入（tmp + os.replace）
+- decode_record：解析单行 JSON 对象（格式错误或非对象返回 None）
+- 非线程安全
+"""
+
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+# inotify 常量（linux/inotify.h）
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None and sys.platform.startswith("linux"):
+        try:
+            _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            _libc.inotify_init1  # noqa: B018 - 探测符号是否存在
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+class DirWatcher:
+    """目录变更唤醒器（inotify 优先，轮询兜底）"""
+
+    def __init__(self, root: Path, use_inotify: bool = True):
+        """
+        Args:
+            root: 监听根目录（含全部子目录）
+            use_inotify: 是否尝试 inotify（False 时固定为轮询）
+        """
+        self.root = Path(root)
+        self._fd: Optional[int] = None
+        self._wd_paths: Dict[int, Path] = {}
+        self.events = 0
+        if use_inotify:
+            self._init_inotify()
+
+    @property
+    def backend(self) -> str:
+        """当前唤醒方式：inotify | poll"""
+        return "inotify" if self._fd is not None else "poll"
+
+    def _init_inotify(self) -> None:
+        libc = _load_libc()
+        if libc is None or not self.root.is_dir():
+            return
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            logger.warning(f"[DirWatcher] inotify_init1 failed (errno={ctypes.get_errno()}), falling back to polling")
+            return
+        self._fd = fd
+        for dirpath, _, _ in os.walk(self.root):
+            if not self._add_watch(Path(dirpath)):
+                self.close()
+                return
+
+    def _add_watch(self, path: Path) -> bool:
+        wd = _libc.inotify_add_watch(self._fd, os.fsencode(str(path)), _IN_WATCH_MASK)
+        if wd < 0:
+            logger.warning(
+                f"[DirWatcher] inotify_add_watch failed for {path} (errno={ctypes.get_errno()}), falling back to polling"
+            )
+            return False
+        self._wd_paths[wd] = path
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """等待目录内文件变更，最长 timeout 秒
+
+        Returns:
+            是否收到变更事件（轮询模式下睡满 timeout 后返回 False，调用方照常扫描）
+        """
+        if self._fd is None:
+            time.sleep(timeout)
+            return False
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        self._drain()
+        return True
+
+    def _drain(self) -> None:
+        try:
+            buf = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+            name = buf[offset + _EVENT_HEADER.size: offset + _EVENT_HEADER.size + name_len].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + name_len
+            self.events += 1
+            if mask & _IN_Q_OVERFLOW:
+                continue
+            # 新建子目录：递归加入监听（其中可能已有文件，由调用方的目录重扫覆盖）
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                parent = self._wd_paths.get(wd)
+                if parent is not None:
+                    for dirpath, _, _ in os.walk(parent / os.fsdecode(name)):
+                        self._add_watch(Path(dirpath))
+
+    def close(self) -> None:
+        """释放 inotify 句柄（之后退化为轮询）"""
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            finally:
+                self._fd = None
+                self._wd_paths.clear()
+
+
+class TailCursor:
+    """单个追加文件的字节偏移游标"""
+
+    __slots__ = ("path", "committed", "read_pos", "partial", "fp")
+
+    def __init__(self, path: Path, committed: int = 0):
+        """
+        Args:
+            path: 文件路径
+            committed: 已确认偏移（通常来自检查点）
+        """
+        self.path = Path(path)
+        self.committed = committed  # 已确认处理完的字节偏移（写入检查点）
+        self.read_pos = committed  # 已读字节数（含 partial）
+        self.partial = b""  # 未以换行结尾的尾行
+        self.fp = None
+
+    @property
+    def read_end(self) -> int:
+        """已读出的最后一个完整行之后的字节偏移"""
+        return self.read_pos - len(self.partial)
+
+    def read_lines(self, keep_open: bool = True) -> List[bytes]:
+        """读取自上次以来新增的完整行（不含换行符）
+
+        Args:
+            keep_open: 读完后是否保持句柄打开（仍在追加的文件常驻打开，只读新增字节）
+
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
+        try:
+            if self.fp is None:
+                self.fp = self.path.open("rb")
+                if os.fstat(self.fp.fileno()).st_size < self.committed:
+                    logger.warning(f"[TailCursor] {self.path} shrank below checkpoint, rereading from start")
+                    self.committed = 0
+                self.read_pos = self.committed
+                self.partial = b""
+                self.fp.seek(self.read_pos)
+            chunk = self.fp.read()
+            if not chunk and os.fstat(self.fp.fileno()).st_size < self.read_pos:
+                logger.warning(f"[TailCursor] {self.path} truncated, rereading from start")
+                self.read_pos = 0
+                self.partial = b""
+                self.fp.seek(0)
+                chunk = self.fp.read()
+        finally:
+            if not keep_open:
+                self.close()
+        if not chunk:
+            return []
+        self.read_pos += len(chunk)
+        lines = (self.partial + chunk).split(b"\n")
+        self.partial = lines.pop()
+        return lines
+
+    def commit(self, position: Optional[int] = None) -> None:
+        """确认偏移（默认确认到 read_end）"""
+        self.committed = self.read_end if position is None else position
+
+    def rewind(self) -> None:
+        """放弃未确认的读取：关闭句柄，下次 read_lines() 从已确认偏移重读"""
+        self.close()
+        self.read_pos = self.committed
+        self.partial = b""
+
+    def close(self) -> None:
+        if self.fp is not None:
+            try:
+                self.fp.close()
+            finally:
+                self.fp = None
+
+
+class DirListing:
+    """一次目录列举的结果"""
+
+    __slots__ = ("mtime_ns", "files", "subdirs")
+
+    def __init__(self, mtime_ns: int, files: List[str], subdirs: List[str]):
+        self.mtime_ns = mtime_ns
+        self.files = files  # 文件名（按名称排序）
+        self.subdirs = subdirs  # 子目录名（按名称排序）
+
+
+class DirListingCache:
+    """按目录 mtime 缓存的列举结果（每 rescan_sec 兜底强制重扫一次）"""
+
+    def __init__(self, rescan_sec: float = 30.0):
+        self.rescan_sec = rescan_sec
+        self._listings: Dict[str, DirListing] = {}
+        self._last_full_scan = 0.0
+        self._force = False
+        self.rescans = 0
+
+    def start_pass(self) -> None:
+        """开始一轮扫描（距上次兜底重扫超过 rescan_sec 时本轮全部强制重扫）"""
+        now = time.monotonic()
+        self._force = now - self._last_full_scan >= self.rescan_sec
+        if self._force:
+            self._last_full_scan = now
+
+    def list(self, directory: Path) -> Tuple[Optional[DirListing], bool]:
+        """列举目录
+
+        Returns:
+            (列举结果, 本次是否重新列举)；目录不存在时为 (None, False)
+        """
+        key = str(directory)
+        try:
+            mtime_ns = os.stat(key).st_mtime_ns
+        except FileNotFoundError:
+            self._listings.pop(key, None)
+            return None, False
+        listing = self._listings.get(key)
+        if listing is not None and not self._force and listing.mtime_ns == mtime_ns:
+            return listing, False
+        files: List[str] = []
+        subdirs: List[str] = []
+        with os.scandir(key) as it:
+            for entry in it:
+                (subdirs if entry.is_dir() else files).append(entry.name)
+        files.sort()
+        subdirs.sort()
+        listing = self._listings[key] = DirListing(mtime_ns, files, subdirs)
+        self.rescans += 1
+        return listing, True
+
+
+def read_checkpoint(path: Optional[Path], section: str) -> Dict[str, Any]:
+    """读取检查点中的 section 字典（文件不存在或不可读时返回空字典）"""
+    if path is None or not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as fp:
+            data = json.load(fp)
+        section_data = data.get(section) or {}
+        if not isinstance(section_data, dict):
+            raise ValueError(f"{section} is not an object")
+        return section_data
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return {}
+
+
+def write_checkpoint(path: Path, section: str, data: Dict[str, Any]) -> None:
+    """原子写入检查点（tmp + os.replace，进程中途退出不会留下半个文件）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as fp:
+        json.dump({"version": 1, section: data}, fp, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def decode_record(line: bytes) -> Optional[Dict[str, Any]]:
+    """解析单行 JSON 对象；格式错误或非对象（数组/数字等）返回 None"""
+    try:
+        record = json_codec.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""File Ingest Tracker
+
+监听目录中特征文件（JSONL / Parquet）的增量摄取状态，替代每轮 rglob + 已处理集合：
+
+- 每个文件记录 (size, mtime_ns, offset, row_groups)
+  - JSONL：offset 为最后一个完整行之后的字节偏移；文件增长时从 offset 续读，不完整尾行留待补齐
+  - Parquet：row_groups 为已消费的行组数；文件被重写（行组数变少）时从头读取
+- changed_files() 只返回 (size, mtime) 与记录不同的文件；目录按 mtime 缓存列举结果，
+  仅在 mtime 变化或每 rescan_sec 兜底时重新 scandir
+- 偏移在调用方消费完一行 / 一个行组后才推进，文件读尽后才记录 (size, mtime)（至少一次语义），
+  save_checkpoint() 原子写入检查点，重启后续读
+- JSONL 偏移游标、目录列举缓存与检查点读写复用 file_tail（与策略服务的 JsonlFollower 共用）
+- 非线程安全
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .file_tail import DirListingCache, TailCursor, decode_record, read_checkpoint, write_checkpoint
+
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - 取决于环境
+    pq = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class _FileState:
+    """单个文件的摄取状态"""
+
+    __slots__ = ("size", "mtime_ns", "cursor", "row_groups")
+
+    def __init__(self, path: str, size: int = -1, mtime_ns: int = -1, offset: int = 0, row_groups: int = 0):
+        self.size = size  # 上次处理时观测到的大小（-1 表示未处理）
+        self.mtime_ns = mtime_ns
+        self.cursor = TailCursor(Path(path), offset)  # JSONL 字节偏移
+        self.row_groups = row_groups
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "offset": self.cursor.committed,
+            "row_groups": self.row_groups,
+        }
+
+
+class FileIngestTracker:
+    """目录内特征文件的增量摄取跟踪器"""
+
+    def __init__(
+        self,
+        root: Path,
+        checkpoint_path: Optional[Path] = None,
+        suffixes: Sequence[str] = (".jsonl", ".parquet"),
+        rescan_sec: float = 30.0,
+    ):
+        """
+        Args:
+            root: 监听根目录（递归）
+            checkpoint_path: 检查点文件（None 表示不持久化）
+            suffixes: 跟踪的文件后缀；changed_files 按此顺序分组，组内按路径排序
+            rescan_sec: 目录 mtime 未变化时的兜底重扫间隔
+        """
+        self.root = Path(root)
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.suffixes = tuple(suffixes)
+        self._files: Dict[str, _FileState] = self._load_checkpoint()
+        self._listings = DirListingCache(rescan_sec)
+        self._dirty = False
+        self.bad_lines = 0
+
+    @property
+    def rescans(self) -> int:
+        """目录重新列举次数"""
+        return self._listings.rescans
+
+    def _load_checkpoint(self) -> Dict[str, _FileState]:
+        files = {}
+        for key, value in read_checkpoint(self.checkpoint_path, "files").items():
+            try:
+                files[str(key)] = _FileState(str(key), **value)
+            except TypeError as e:
+                logger.warning(f"[FileIngestTracker] Ignoring bad checkpoint entry for {key}: {e}")
+        return files
+
+    def changed_files(self) -> List[Path]:
+        """返回有新数据（大小或 mtime 与上次处理不同）的文件"""
+        self._listings.start_pass()
+        groups: Dict[str, List[str]] = {suffix: [] for suffix in self.suffixes}
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            listing, _ = self._listings.list(directory)
+            if listing is None:
+                continue
+            stack.extend(os.path.join(directory, name) for name in listing.subdirs)
+            for name in listing.files:
+                if not name.endswith(self.suffixes):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                state = self._files.get(path)
+                if state is not None and state.size == st.st_size and state.mtime_ns == st.st_mtime_ns:
+                    continue
+                for suffix in self.suffixes:
+                    if name.endswith(suffix):
+                        groups[suffix].append(path)
+                        break
+        return [p for suffix in self.suffixes for p in sorted(map(Path, groups[suffix]))]
+
+    def _state(self, path: Path) -> Tuple[_FileState, os.stat_result]:
+        key = str(path)
+        state = self._files.get(key)
+        if state is None:
+            state = self._files[key] = _FileState(key)
+        return state, os.stat(key)
+
+    def iter_jsonl(self, path: Path) -> Iterator[Dict[str, Any]]:
+        """从上次偏移续读 JSONL 的完整行（每行被消费后推进偏移；格式错误或非对象的行跳过）"""
+        state, st = self._state(path)
+        cursor = state.cursor
+        cursor.rewind()  # 从已确认偏移读取：上一轮中途放弃时未确认的行重放
+        lines = cursor.read_lines(keep_open=False)
+        self._dirty = True
+        position = cursor.committed
+        for line in lines:
+            position += len(line) + 1
+            if line.strip():
+                record = decode_record(line)
+                if record is None:
+                    self.bad_lines += 1
+                else:
+                    yield record
+            cursor.commit(position)
+        # 读尽后才记录 (size, mtime)：调用方中途放弃时下一轮从 offset 续读
+        state.size, state.mtime_ns = st.st_size, st.st_mtime_ns
+
+    def iter_parquet_row_groups(self, path: Path) -> Iterator[Any]:
+        """从上次消费的行组续读 Parquet（每个 pyarrow.Table 被消费后推进行组计数）
+
+        Raises:
+            RuntimeError: pyarrow 未安装
+        """
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is required to read parquet files")
+        state, st = self._state(path)
+        key = str(path)
+        self._dirty = True
+        try:
+            parquet_file = pq.ParquetFile(key)
+        except Exception:
+            # 写入中/损坏的文件：记录 (size, mtime)，文件再次变化时才重试
+            state.size, state.mtime_ns = st.st_size, st.st_mtime_ns
+            raise
+        num_row_groups = parquet_file.num_row_groups
+        if num_row_groups < state.row_groups:
+            logger.warning(f"[FileIngestTracker] {path} was rewritten with fewer row groups, rereading from start")
+            state.row_groups = 0
+        for index in range(state.row_groups, num_row_groups):
+            yield parquet_file.read_row_group(index)
+            state.row_groups = index + 1
+        state.size, state.mtime_ns = st.st_size, st.st_mtime_ns
+
+    def forget(self, path: Path) -> None:
+        """丢弃文件的摄取状态（下次从头读取）"""
+        if self._files.pop(str(path), None) is not None:
+            self._dirty = True
+
+    def position(self, path: Path) -> Dict[str, int]:
+        """文件当前记录的摄取状态"""
+        state = self._files.get(str(path))
+        return (state if state is not None else _FileState(str(path))).to_dict()
+
+    def save_checkpoint(self) -> None:
+        """原子写入检查点（无变化时跳过；已删除文件的状态一并清理）"""
+        if self.checkpoint_path is None or not self._dirty:
+            return
+        for key in [k for k in self._files if not os.path.exists(k)]:
+            del self._files[key]
+        write_checkpoint(self.checkpoint_path, "files", {k: v.to_dict() for k, v in self._files.items()})
+        self._dirty = False
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 编解码层（orjson / msgspec 可选加速，缺失时回落标准库）
+
+- dumps(obj, sort_keys=False) -> str：紧凑分隔符、不转义非 ASCII，
+  与 json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=...) 逐字节一致
+- loads(s)：接受 str / bytes，结果与 json.loads 一致，解析失败抛 json.JSONDecodeError
+
+逐字节一致是回放可复现契约的一部分（同一输入在装/未装加速库的环境下产出相同文件），因此：
+- 加速库只处理标准库输出可确定复现的对象：键为 str 的 dict、list/tuple、str/int/bool/None，
+  以及十进制定点表示的有限 float（repr 不使用科学计数法：0 或 1e-4 <= |x| < 1e16）
+- 其余对象（NaN/Inf、科学计数法浮点、非 str 键、numpy 标量、超 64 位整数、孤立代理字符等）
+  整条交由标准库编码；解码遇到加速库不接受或解释不同的输入（NaN 字面量、超 64 位整数等）同样回落标准库
+
+后端选择：环境变量 ALPHA_JSON_BACKEND=orjson|msgspec|stdlib，未设置时按 orjson → msgspec → stdlib
+的顺序取第一个可用的。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Any, Callable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - 取决于环境
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:  # pragma: no cover - 取决于环境
+    msgspec = None
+    MSGSPEC_AVAILABLE = False
+
+BACKENDS = ("orjson", "msgspec", "stdlib")
+
+_STDLIB_SEPARATORS = (",", ":")
+_FLOAT_FIXED_MIN = 1e-4
+_FLOAT_FIXED_MAX = 1e16
+# orjson 把超出 64 位的整数字面量静默解码为 float（|x| >= 2**63）：解码结果含此量级 float 时整条交由标准库
+_WIDE_FLOAT = 9.2e18
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool = False) -> str:
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, separators=_STDLIB_SEPARATORS)
+
+
+def _is_plain(obj: Any) -> bool:
+    """对象是否可交给加速库编码且与标准库输出逐字节一致"""
+    t = type(obj)
+    if t is str or t is int or t is bool or obj is None:
+        return True
+    if t is float:
+        a = obj if obj >= 0 else -obj
+        return a == 0.0 or _FLOAT_FIXED_MIN <= a < _FLOAT_FIXED_MAX  # NaN 两个比较均为 False
+    if t is dict:
+        for k, v in obj.items():
+            if type(k) is not str or not _is_plain(v):
+                return False
+        return True
+    if t is list or t is tuple:
+        for v in obj:
+            if not _is_plain(v):
+                return False
+        return True
+    return False
+
+
+def _has_wide_float(obj: Any) -> bool:
+    """解码结果中是否有 |x| >= 9.2e18 的 float（可能来自超 64 位整数字面量）"""
+    t = type(obj)
+    if t is dict:
+        values = obj.values()
+    elif t is list:
+        values = obj
+    else:
+        return t is float and not (-_WIDE_FLOAT < obj < _WIDE_FLOAT)
+    for v in values:
+        tv = type(v)
+        if tv is float:
+            if not (-_WIDE_FLOAT < v < _WIDE_FLOAT):
+                return True
+        elif (tv is dict or tv is list) and _has_wide_float(v):
+            return True
+    return False
+
+
+class JsonCodec:
+    """绑定具体后端的 JSON 编解码器"""
+
+    def __init__(self, backend: Optional[str] = None):
+        """
+        Args:
+            backend: orjson / msgspec / stdlib，None 表示自动选择首个可用后端
+
+        Raises:
+            ValueError: 后端名未知
+            ImportError: 指定的后端未安装
+        """
+        if backend is None:
+            backend = "orjson" if ORJSON_AVAILABLE else "msgspec" if MSGSPEC_AVAILABLE else "stdlib"
+        backend = backend.lower()
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend: {backend} (expected one of {BACKENDS})")
+        if backend == "orjson" and not ORJSON_AVAILABLE:
+            raise ImportError("orjson is not installed")
+        if backend == "msgspec" and not MSGSPEC_AVAILABLE:
+            raise ImportError("msgspec is not installed")
+        self.backend = backend
+
+        self._encode: Optional[Callable[[Any], bytes]] = None
+        self._encode_sorted: Optional[Callable[[Any], bytes]] = None
+        self._decode: Optional[Callable[[Union[str, bytes]], Any]] = None
+        self._fast_errors: tuple = ()
+        if backend == "orjson":
+            self._encode = orjson.dumps
+            self._encode_sorted = lambda obj: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+            self._decode = orjson.loads
+            self._fast_errors = (orjson.JSONEncodeError, orjson.JSONDecodeError)
+        elif backend == "msgspec":
+            self._encode = msgspec.json.Encoder().encode
+            self._encode_sorted = msgspec.json.Encoder(order="sorted").encode
+            self._decode = msgspec.json.Decoder().decode
+            self._fast_errors = (msgspec.EncodeError, msgspec.DecodeError, TypeError, OverflowError)
+
+    def dumps(self, obj: Any, sort_keys: bool = False) -> str:
+        """编码为紧凑 JSON 文本（与标准库 ensure_ascii=False 输出逐字节一致）"""
+        if self._encode is not None and _is_plain(obj):
+            try:
+                return (self._encode_sorted if sort_keys else self._encode)(obj).decode("utf-8")
+            except self._fast_errors:
+                pass  # 超 64 位整数、孤立代理字符等：交由标准库
+        return _stdlib_dumps(obj, sort_keys)
+
+    def loads(self, s: Union[str, bytes, bytearray]) -> Any:
+        """解码 JSON 文本；失败时抛 json.JSONDecodeError（与标准库一致）"""
+        if self._decode is not None:
+            try:
+                obj = self._decode(s)
+                if not _has_wide_float(obj):
+                    return obj
+            except self._fast_errors:
+                pass  # NaN 字面量、孤立代理字符或非法输入：交由标准库（非法输入由其抛错）
+        return json.loads(s)
+
+
+_default_codec = JsonCodec(os.getenv("ALPHA_JSON_BACKEND") or None)
+logger.debug(f"[json_codec] backend={_default_codec.backend}")
+
+
+def get_codec() -> JsonCodec:
+    """进程默认编解码器"""
+    return _default_codec
+
+
+def set_backend(backend: Optional[str]) -> JsonCodec:
+    """切换进程默认后端（测试/基准用），返回新的编解码器"""
+    global _default_codec
+    _default_codec = JsonCodec(backend)
+    return _default_codec
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """用默认后端编码（见 JsonCodec.dumps）"""
+    return _default_codec.dumps(obj, sort_keys)
+
+
+def loads(s: Union[str, bytes, bytearray]) -> Any:
+    """用默认后端解码（见 JsonCodec.loads）"""
+    return _default_codec.loads(s)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""JSONL Follower
+
+持续追加的 JSONL 目录的增量跟随读取（tail -F 语义），替代每轮 glob + 重开 + 读到 EOF 即标记完成。
+偏移游标、目录列举缓存与检查点读写复用 file_tail（与信号服务的 FileIngestTracker 共用）：
+
+- 按文件维护 TailCursor：不完整的尾行留待补齐，检查点只记录完整行；文件被截断时从头重读
+- 每种命名格式下最新的文件（当前小时）常驻打开，只读新增字节；出现更新的文件后旧文件读尽即关闭
+- 目录仅在 mtime 变化（新建/删除文件）或每 rescan_sec 兜底时重新列举
+- poll() 只推进内存读位置；调用方处理完该批后 commit() 才确认偏移并原子写入检查点，
+  处理失败时 rollback() 回到已确认偏移重读（至少一次语义）；重启后从检查点续读
+- 非 JSON 对象的行（数组/数字等）与格式错误的行一样计入 bad_lines 并跳过
+- symbols 过滤预先构造为集合，逐行 O(1)
+- 非线程安全
+"""
+
+import fnmatch
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .file_tail import DirListingCache, TailCursor, decode_record, read_checkpoint, write_checkpoint
+
+logger = logging.getLogger(__name__)
+
+
+class _Followed:
+    """单个被跟随的文件"""
+
+    __slots__ = ("cursor", "filter", "active", "done")
+
+    def __init__(self, path: Path, offset: int, filter_symbols: bool):
+        self.cursor = TailCursor(path, offset)
+        self.filter = filter_symbols
+        self.active = True  # 同一命名格式下最新的文件（可能仍在追加，常驻打开）
+        self.done = False  # 非最新文件且已读尽
+
+
+class JsonlFollower:
+    """按字节偏移增量跟随读取 JSONL 目录"""
+
+    def __init__(
+        self,
+        root: Path,
+        symbols: Optional[Iterable[str]] = None,
+        patterns: Sequence[str] = ("signals-*.jsonl", "signals_*.jsonl"),
+        checkpoint_path: Optional[Path] = None,
+        subdirs: bool = True,
+        rescan_sec: float = 30.0,
+    ):
+        """
+        Args:
+            root: 根目录（读取 root/<pattern> 以及 root/<SYMBOL>/<pattern>）
+            symbols: 交易对过滤（None 表示全部子目录；顶层文件按记录的 symbol 字段过滤）
+            patterns: 文件名匹配模式，按顺序拼接（每个模式内按文件名排序）
+            checkpoint_path: 偏移检查点文件（None 表示不持久化）
+            subdirs: 是否读取子目录
+            rescan_sec: 目录 mtime 未变化时的兜底重扫间隔
+        """
+        self.root = Path(root)
+        symbol_order = tuple(dict.fromkeys(s.upper() for s in symbols)) if symbols else ()
+        self._symbol_order = symbol_order
+        self.symbols = frozenset(symbol_order) if symbols else None
+        self.patterns = tuple(patterns)
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.subdirs = subdirs
+        self._listings = DirListingCache(rescan_sec)
+        self._dirs: Dict[Path, List[_Followed]] = {}
+        self._dir_list: List[Path] = []
+        self._files: Dict[str, _Followed] = {}
+        # 已确认（写入检查点）的偏移
+        self._offsets: Dict[str, int] = {
+            str(k): int(v) for k, v in read_checkpoint(self.checkpoint_path, "offsets").items()
+        }
+        self._pending: Dict[str, int] = {}  # 已读出、待 commit 的偏移
+        self._dirty = False
+        self.lines = 0
+        self.bad_lines = 0
+
+    @property
+    def rescans(self) -> int:
+        """目录重新列举次数"""
+        return self._listings.rescans
+
+    def _refresh(self) -> bool:
+        self._listings.start_pass()
+        listing, changed = self._listings.list(self.root)
+        if listing is None:
+            return False
+        if changed:
+            # 根目录变化：子目录集合可能变化
+            self._dir_list = [self.root]
+            if self.subdirs:
+                if self.symbols is not None:
+                    self._dir_list.extend(self.root / s for s in self._symbol_order)
+                else:
+                    self._dir_list.extend(self.root / name for name in listing.subdirs)
+            self._refresh_dir(self.root, listing.files)
+        for directory in self._dir_list[1:]:
+            sub_listing, sub_changed = self._listings.list(directory)
+            if sub_changed:
+                self._refresh_dir(directory, sub_listing.files)
+        return True
+
+    def _refresh_dir(self, directory: Path, names: List[str]) -> None:
+        paths: List[Path] = []
+        active = set()
+        for pattern in self.patterns:
+            matched = [directory / name for name in names if fnmatch.fnmatchcase(name, pattern)]
+            if matched:
+                active.add(str(matched[-1]))
+            paths.extend(matched)
+        filter_symbols = self.symbols is not None and directory == self.root
+        files = []
+        for path in paths:
+            key = str(path)
+            followed = self._files.get(key)
+            if followed is None:
+                followed = self._files[key] = _Followed(path, self._offsets.get(key, 0), filter_symbols)
+            elif followed.done:
+                # 已读尽的旧文件若被追加，重新打开读取
+                try:
+                    if path.stat().st_size > followed.cursor.read_end:
+                        followed.done = False
+                except FileNotFoundError:
+                    pass
+            followed.active = key in active
+            files.append(followed)
+        # 已删除的文件移出跟随
+        present = {str(p) for p in paths}
+        for followed in self._dirs.get(directory, ()):
+            key = str(followed.cursor.path)
+            if key not in present:
+                followed.cursor.close()
+                self._files.pop(key, None)
+                self._pending.pop(key, None)
+                if self._offsets.pop(key, None) is not None:
+                    self._dirty = True
+        self._dirs[directory] = files
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """读取所有文件自上次以来新增的完整行"""
+        out: List[Dict[str, Any]] = []
+        if not self._refresh():
+            return out
+        for directory in self._dir_list:
+            for followed in self._dirs.get(directory, ()):
+                if not followed.done:
+                    self._drain(followed, out)
+        return out
+
+    def _drain(self, followed: _Followed, out: List[Dict[str, Any]]) -> None:
+        cursor = followed.cursor
+        try:
+            # 同一命名格式下已有更新的文件：该文件不会再被追加，读尽后关闭
+            lines = cursor.read_lines(keep_open=followed.active)
+        except FileNotFoundError:
+            cursor.close()
+            followed.done = True
+            return
+        if not followed.active:
+            followed.done = True
+        if not lines:
+            return
+        symbols = self.symbols if followed.filter else None
+        for line in lines:
+            if not line.strip():
+                continue
+            record = decode_record(line)
+            if record is None:
+                self.bad_lines += 1
+                logger.warning(f"[JsonlFollower] Skipping malformed or non-object line in {cursor.path}")
+                continue
+            if symbols is not None and str(record.get("symbol", "")).upper() not in symbols:
+                continue
+            self.lines += 1
+            out.append(record)
+        self._pending[str(cursor.path)] = cursor.read_end
+
+    def commit(self) -> None:
+        """确认上次 poll() 以来读出的数据已处理：推进已确认偏移并写入检查点"""
+        for key, position in self._pending.items():
+            followed = self._files.get(key)
+            if followed is not None:
+                followed.cursor.commit(position)
+            self._offsets[key] = position
+            self._dirty = True
+        self._pending.clear()
+        self.save_checkpoint()
+
+    def rollback(self) -> None:
+        """放弃未确认的读取：各文件回到已确认偏移，下次 poll() 重新读出"""
+        for key in self._pending:
+            followed = self._files.get(key)
+            if followed is not None:
+                followed.cursor.rewind()
+                followed.done = False
+        self._pending.clear()
+
+    def save_checkpoint(self) -> None:
+        """原子写入已确认偏移的检查点（无变化时跳过）"""
+        if self.checkpoint_path is None or not self._dirty:
+            return
+        write_checkpoint(self.checkpoint_path, "offsets", self._offsets)
+        self._dirty = False
+
+    @property
+    def open_count(self) -> int:
+        """当前常驻打开的文件数"""
+        return sum(1 for f in self._files.values() if f.cursor.fp is not None)
+
+    def close(self) -> None:
+        """写入已确认偏移的检查点并关闭所有文件（未 commit 的读取不落盘）"""
+        self.save_checkpoint()
+        for followed in self._files.values():
+            followed.cursor.close()
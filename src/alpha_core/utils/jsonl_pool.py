@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""JSONL Handle Pool
+
+按 (symbol, 小时) 轮转的 JSONL 文件句柄池：LRU 常驻打开的追加句柄，替代每条写入 open/close
+
+- 目录创建按 symbol 缓存，只 mkdir 一次
+- 每个句柄独立计数，累计 fsync_every_n 次写入执行一次 fsync（批量 fsync 语义不变）
+- 任一 symbol 进入新小时（小时轮转）时，所有更早小时的句柄 flush + fsync 后关闭
+  （低频 symbol 的旧小时文件不会长期带着未 fsync 的写入保持打开）；LRU 淘汰与 close() 同样先 fsync
+- 每次写入后 flush（下游 tail 读取立即可见），不 fsync
+- 非线程安全，由调用方加锁
+"""
+
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Handle:
+    """单个打开的 JSONL 文件"""
+
+    __slots__ = ("path", "fp", "pending")
+
+    def __init__(self, path: Path, fp: IO[str]):
+        self.path = path
+        self.fp = fp
+        self.pending = 0  # 自上次 fsync 以来的写入次数
+
+
+class JsonlHandlePool:
+    """JSONL 追加句柄池（LRU，按 symbol/小时 分文件）"""
+
+    def __init__(
+        self,
+        root: Path,
+        fsync_every_n: int = 50,
+        max_open: int = 64,
+        file_prefix: str = "signals",
+        name: str = "JsonlHandlePool",
+    ):
+        """
+        Args:
+            root: 根目录（文件位于 root/<symbol>/<prefix>-<hour>.jsonl）
+            fsync_every_n: 每个句柄累计写入多少次执行一次 fsync
+            max_open: 最多同时打开的句柄数（超出时淘汰最久未用的句柄）
+            file_prefix: 文件名前缀
+            name: 日志前缀
+        """
+        self.root = Path(root)
+        self.fsync_every_n = max(1, int(fsync_every_n))
+        self.max_open = max(1, int(max_open))
+        self.file_prefix = file_prefix
+        self.name = name
+        self._handles: "OrderedDict[Tuple[str, str], _Handle]" = OrderedDict()
+        self._current_hour: Dict[str, str] = {}  # symbol -> 当前小时
+        self._latest_hour = ""  # 已见过的最新小时（"%Y%m%d-%H" 字典序即时间序）
+        self._dirs: Dict[str, Path] = {}  # symbol -> 已创建的目录
+        self.opened = 0
+        self.evicted = 0
+        self.fsyncs = 0
+
+    def path_for(self, symbol: str, hour_str: str) -> Path:
+        """(symbol, 小时) 对应的文件路径"""
+        return self.root / symbol / f"{self.file_prefix}-{hour_str}.jsonl"
+
+    def write(self, symbol: str, hour_str: str, line: str) -> None:
+        """追加一行（line 不含换行符）"""
+        key = (symbol, hour_str)
+        handle = self._handles.get(key)
+        if handle is None:
+            handle = self._open(symbol, hour_str)
+        else:
+            self._handles.move_to_end(key)
+
+        handle.fp.write(line + "\n")
+        handle.pending += 1
+        handle.fp.flush()
+        if handle.pending >= self.fsync_every_n:
+            os.fsync(handle.fp.fileno())
+            handle.pending = 0
+            self.fsyncs += 1
+
+    def _open(self, symbol: str, hour_str: str) -> _Handle:
+        # 小时轮转：关闭所有更早小时的句柄（fsync 补偿）
+        if hour_str > self._latest_hour:
+            self._latest_hour = hour_str
+            for key in [k for k in self._handles if k[1] < hour_str]:
+                self._close_key(key)
+        # 同一 symbol 切换小时（含乱序回到旧小时）：关闭其上一个小时的句柄
+        prev_hour = self._current_hour.get(symbol)
+        if prev_hour is not None and prev_hour != hour_str:
+            self._close_key((symbol, prev_hour))
+        self._current_hour[symbol] = hour_str
+
+        target_dir = self._dirs.get(symbol)
+        if target_dir is None:
+            target_dir = self.root / symbol
+            target_dir.mkdir(parents=True, exist_ok=True)
+            self._dirs[symbol] = target_dir
+
+        while len(self._handles) >= self.max_open:
+            old_key = next(iter(self._handles))
+            self._close_key(old_key)
+            self.evicted += 1
+
+        path = target_dir / f"{self.file_prefix}-{hour_str}.jsonl"
+        handle = _Handle(path, path.open("a", encoding="utf-8"))
+        self._handles[(symbol, hour_str)] = handle
+        self.opened += 1
+        return handle
+
+    def _close_key(self, key: Tuple[str, str]) -> None:
+        handle = self._handles.pop(key, None)
+        if handle is None:
+            return
+        try:
+            handle.fp.flush()
+            if handle.pending:
+                os.fsync(handle.fp.fileno())
+                self.fsyncs += 1
+        except Exception as e:
+            logger.warning(f"[{self.name}] Failed to fsync {handle.path}: {e}")
+        finally:
+            handle.fp.close()
+
+    def sync(self) -> None:
+        """对所有有未 fsync 写入的句柄执行 fsync（不关闭）"""
+        for handle in self._handles.values():
+            if handle.pending:
+                try:
+                    handle.fp.flush()
+                    os.fsync(handle.fp.fileno())
+                    handle.pending = 0
+                    self.fsyncs += 1
+                except Exception as e:
+                    logger.warning(f"[{self.name}] Failed to fsync {handle.path}: {e}")
+
+    def close(self) -> None:
+        """fsync 并关闭所有句柄"""
+        for key in list(self._handles):
+            self._close_key(key)
+        self._current_hour.clear()
+        self._latest_hour = ""
+
+    @property
+    def open_count(self) -> int:
+        """当前打开的句柄数"""
+        return len(self._handles)
+
+    @property
+    def pending_writes(self) -> int:
+        """所有句柄上未 fsync 的写入总数"""
+        return sum(h.pending for h in self._handles.values())
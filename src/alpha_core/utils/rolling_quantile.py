@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Rolling Quantile
+
+FIFO 滑动窗口 + 有序视图：中位数 / MAD / 任意分位数
+
+实现说明：
+- 有序视图为 bisect 维护的有序数组：定位 O(log n)，插入/删除为 C 层 memmove，
+  在本项目的窗口规模（数十到数千）下比纯 Python 跳表/双堆更快
+- 分位数按下标直接读取 O(1)，插值口径与 numpy.percentile(method="linear") 一致
+- MAD 通过"两个有序序列第 k 小"二分求解，O(log n)，无需排序 |x - median|
+- 不支持 NaN（调用方需保证输入为有限值）
+"""
+
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Deque, Iterator, List, Optional
+
+
+class RollingQuantile:
+    """滑动窗口顺序统计量（中位数 / MAD / 分位数）"""
+
+    __slots__ = ("maxlen", "_fifo", "_sorted")
+
+    def __init__(self, maxlen: Optional[int] = None):
+        """初始化窗口
+
+        Args:
+            maxlen: 窗口长度，None 表示不限长（由调用方 popleft 淘汰，如按时间修剪）
+        """
+        if maxlen is not None and int(maxlen) <= 0:
+            raise ValueError("maxlen must be positive")
+        self.maxlen = int(maxlen) if maxlen is not None else None
+        self._fifo: Deque[float] = deque()
+        self._sorted: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._fifo)
+
+    def __iter__(self) -> Iterator[float]:
+        """按写入顺序迭代"""
+        return iter(self._fifo)
+
+    def append(self, x: float) -> Optional[float]:
+        """写入一个样本；窗口满时淘汰最旧样本并返回它"""
+        x = float(x)
+        evicted = None
+        if self.maxlen is not None and len(self._fifo) >= self.maxlen:
+            evicted = self.popleft()
+        self._fifo.append(x)
+        insort(self._sorted, x)
+        return evicted
+
+    def popleft(self) -> float:
+        """淘汰最旧样本"""
+        x = self._fifo.popleft()
+        s = self._sorted
+        i = bisect_left(s, x)
+        if i < len(s) and s[i] == x:
+            del s[i]
+        else:
+            # 防御：有序视图与 FIFO 不一致（如混入 NaN）时退化为线性查找
+            for j, v in enumerate(s):
+                if v == x or (v != v and x != x):
+                    del s[j]
+                    break
+        return x
+
+    def clear(self) -> None:
+        self._fifo.clear()
+        self._sorted.clear()
+
+    def resize(self, maxlen: Optional[int]) -> None:
+        """调整窗口长度，保留最近的样本"""
+        if maxlen is not None and int(maxlen) <= 0:
+            raise ValueError("maxlen must be positive")
+        self.maxlen = int(maxlen) if maxlen is not None else None
+        if self.maxlen is not None:
+            while len(self._fifo) > self.maxlen:
+                self.popleft()
+
+    def sorted_values(self) -> List[float]:
+        """返回有序视图的副本"""
+        return list(self._sorted)
+
+    def kth(self, k: int) -> float:
+        """第 k 小（0 起始）"""
+        return self._sorted[k]
+
+    def quantile(self, q: float) -> float:
+        """线性插值分位数，q ∈ [0, 1]（与 numpy 'linear' 口径一致）"""
+        s = self._sorted
+        n = len(s)
+        if n == 0:
+            raise ValueError("quantile of empty window")
+        q = min(1.0, max(0.0, float(q)))
+        pos = q * (n - 1)
+        lo = int(pos)
+        if lo >= n - 1:
+            return s[n - 1]
+        g = pos - lo
+        a = s[lo]
+        b = s[lo + 1]
+        diff = b - a
+        # 与 numpy._lerp 相同：g >= 0.5 时从上端回推，保证单调与端点精确
+        return b - diff * (1.0 - g) if g >= 0.5 else a + diff * g
+
+    def percentile(self, p: float) -> float:
+        """百分位数，p ∈ [0, 100]"""
+        return self.quantile(float(p) / 100.0)
+
+    def median(self) -> float:
+        """中位数（偶数个样本取中间两数均值）"""
+        s = self._sorted
+        n = len(s)
+        if n == 0:
+            raise ValueError("median of empty window")
+        h = n // 2
+        if n % 2:
+            return s[h]
+        return (s[h - 1] + s[h]) / 2
+
+    def mad(self, center: Optional[float] = None) -> float:
+        """中位数绝对偏差 median(|x - center|)，center 默认取窗口中位数"""
+        n = len(self._sorted)
+        if n == 0:
+            raise ValueError("mad of empty window")
+        if center is None:
+            center = self.median()
+        h = n // 2
+        if n % 2:
+            return self._kth_abs_dev(center, h)
+        return (self._kth_abs_dev(center, h - 1) + self._kth_abs_dev(center, h)) / 2
+
+    def _kth_abs_dev(self, c: float, k: int) -> float:
+        """|x - c| 的第 k 小（0 起始）
+
+        以 c 为界把有序数组拆成左右两段：左段距离 c - s[p-1-i] 随 i 递增，
+        右段距离 s[p+j] - c 随 j 递增，问题化为两个有序序列的第 k 小，二分求解。
+        """
+        s = self._sorted
+        p = bisect_left(s, c)
+        nl = p
+        nr = len(s) - p
+        # 取 i 个左段元素、k+1-i 个右段元素
+        lo = max(0, k + 1 - nr)
+        hi = min(k + 1, nl)
+        while lo < hi:
+            i = (lo + hi) // 2
+            j = k + 1 - i
+            # 左段第 i 个（下一个待取）比右段已取的最后一个更近 → 需要多取左段
+            if (c - s[p - 1 - i]) < (s[p + j - 1] - c):
+                lo = i + 1
+            else:
+                hi = i
+        i = lo
+        j = k + 1 - i
+        best = None
+        if i > 0:
+            best = c - s[p - i]
+        if j > 0:
+            r = s[p + j - 1] - c
+            if best is None or r > best:
+                best = r
+        return best
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Rolling Window Stats
+
+固定长度滑动窗口统计：O(1) 均值/方差（Welford 增删 + 周期性重锚定）
+
+数值口径：
+- 增量更新采用 Welford 形式（对大偏移量的累计值如 CVD 比 sum/sum-of-squares 稳定）
+- 每写入 anchor_every 个样本后用两遍法从窗口原始值重新计算 mean/M2，消除累积漂移
+- 与两遍法（sum(x)/n, sum((x-m)^2)/(n-ddof)）的差异为浮点舍入级别（相对误差 < 1e-9）
+"""
+
+from collections import deque
+from typing import Deque, Iterator, Optional, Tuple
+import math
+
+
+class RollingWindowStats:
+    """滑动窗口 + 增量均值/方差
+
+    兼容 deque 的常用只读操作（len/iter/bool/索引），可直接替换 deque(maxlen=N) 的历史窗口。
+    """
+
+    __slots__ = ("maxlen", "anchor_every", "_buf", "_mean", "_m2", "_since_anchor")
+
+    def __init__(self, maxlen: int, anchor_every: Optional[int] = None):
+        """初始化滑动窗口
+
+        Args:
+            maxlen: 窗口长度（>0）
+            anchor_every: 每写入多少个样本做一次精确重锚定，默认等于窗口长度（均摊 O(1)）
+        """
+        if maxlen is None or int(maxlen) <= 0:
+            raise ValueError("maxlen must be positive")
+        self.maxlen = int(maxlen)
+        self.anchor_every = max(1, int(anchor_every)) if anchor_every else self.maxlen
+        self._buf: Deque[float] = deque(maxlen=self.maxlen)
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_anchor = 0
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._buf)
+
+    def __getitem__(self, idx: int) -> float:
+        return self._buf[idx]
+
+    def append(self, x: float) -> None:
+        """写入一个样本（窗口满时淘汰最旧样本）"""
+        x = float(x)
+        buf = self._buf
+        n = len(buf)
+        if n == self.maxlen:
+            old = buf[0]
+            buf.append(x)
+            mean_old = self._mean
+            self._mean = mean_old + (x - old) / n
+            self._m2 += (x - old) * ((x - self._mean) + (old - mean_old))
+        else:
+            buf.append(x)
+            d = x - self._mean
+            self._mean += d / (n + 1)
+            self._m2 += d * (x - self._mean)
+
+        self._since_anchor += 1
+        if self._since_anchor >= self.anchor_every:
+            self._reanchor()
+
+    def clear(self) -> None:
+        """清空窗口"""
+        self._buf.clear()
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._since_anchor = 0
+
+    def resize(self, maxlen: int) -> None:
+        """调整窗口长度，保留最近的样本"""
+        if int(maxlen) <= 0:
+            raise ValueError("maxlen must be positive")
+        self.maxlen = int(maxlen)
+        self.anchor_every = self.maxlen
+        self._buf = deque(list(self._buf)[-self.maxlen:], maxlen=self.maxlen)
+        self._reanchor()
+
+    def _reanchor(self) -> None:
+        """两遍法精确重算 mean/M2"""
+        n = len(self._buf)
+        self._since_anchor = 0
+        if n == 0:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        m = sum(self._buf) / n
+        self._mean = m
+        self._m2 = sum((v - m) * (v - m) for v in self._buf)
+
+    def mean_std(self, ddof: int = 0, exclude_last: bool = False) -> Tuple[float, float]:
+        """返回 (均值, 标准差)
+
+        Args:
+            ddof: 自由度修正（0=总体标准差，1=样本标准差）
+            exclude_last: 是否排除最近写入的样本（"上一窗口"口径，O(1) 代数剔除）
+
+        Returns:
+            样本不足时与两遍法一致：n==0 → (0.0, 0.0)，n-ddof<=0 → (mean, 0.0)
+        """
+        n = len(self._buf)
+        mean = self._mean
+        m2 = self._m2
+        if exclude_last and n > 0:
+            y = self._buf[-1]
+            n -= 1
+            if n == 0:
+                return 0.0, 0.0
+            mean_ex = mean - (y - mean) / n
+            m2 -= (y - mean) * (y - mean_ex)
+            mean = mean_ex
+        if n == 0:
+            return 0.0, 0.0
+        if n - ddof <= 0:
+            return mean, 0.0
+        var = m2 / (n - ddof)
+        if var < 0.0:
+            var = 0.0
+        return mean, math.sqrt(var)
@@ -47,6 +47,7 @@ logger = logging.getLogger(__name__)
 from alpha_core.strategy.policy import (
     StrategyEmulator,
 )
+from alpha_core.utils import json_codec
 
 
 
@@ -219,7 +220,7 @@ class PriceCache:
                             if not line:
                                 continue
 
-                            feature = json.loads(line)
+                            feature = json_codec.loads(line)
                             ts_ms = int(feature.get('ts_ms', 0))
 
                             # 按优先级查找价格字段
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""ActivityAggregator 测试
+
+运行和增量聚合与逐次重算（deque + np.std / sum）一致，含容量上限、窗口清空与漂移重算；
+CoreAlgorithm 到达率兜底口径不变
+"""
+
+import math
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+
+from alpha_core.microstructure.activity import ActivityAggregator
+
+
+def _stream(n, seed):
+    rng = random.Random(seed)
+    ts = 1_700_000_000_000
+    price = 100.0
+    for _ in range(n):
+        ts += rng.choice([1, 5, 20, 200, 3000]) if rng.random() < 0.97 else 70_000  # 含空窗
+        if rng.random() < 0.6:
+            yield ("quote", ts, None, None)
+        else:
+            price = max(0.01, price * math.exp(rng.gauss(0, 1e-4)))
+            qty = rng.choice([0.0, rng.random() * 3])
+            yield ("trade", ts, price, qty)
+
+
+def _reference(events, window_ms=60_000, caps=(3000, 6000, 600, 3000)):
+    trades, quotes = deque(maxlen=caps[0]), deque(maxlen=caps[1])
+    rets, vols = deque(maxlen=caps[2]), deque(maxlen=caps[3])
+    last = None
+    out = []
+    for kind, ts, price, qty in events:
+        if kind == "quote":
+            quotes.append(ts)
+        else:
+            trades.append(ts)
+            if last and last > 0 and price > 0:
+                rets.append((ts, math.log(price / last)))
+            if qty > 0:
+                vols.append((ts, price * qty))
+            last = price
+        for dq, key in ((trades, None), (quotes, None), (rets, 0), (vols, 0)):
+            while dq and (ts - (dq[0] if key is None else dq[0][key])) > window_ms:
+                dq.popleft()
+        vol = float(np.std([r for _, r in rets]) * 10000.0) if len(rets) >= 2 else 0.0
+        out.append(((len(trades) / 60.0) * 60.0, (len(quotes) / 60.0 * 60.0) / 60.0,
+                    vol, float(sum(v for _, v in vols))))
+    return out
+
+
+@pytest.mark.parametrize("caps", [(3000, 6000, 600, 3000), (50, 80, 30, 40)])
+def test_matches_recompute(caps):
+    events = list(_stream(20_000, seed=len(caps) + caps[0]))
+    ref = _reference(events, caps=caps)
+    agg = ActivityAggregator(max_trades=caps[0], max_quotes=caps[1], max_returns=caps[2], max_volumes=caps[3])
+    for (kind, ts, price, qty), (tr, qr, vol, usd) in zip(events, ref):
+        if kind == "quote":
+            agg.on_quote(ts)
+        else:
+            agg.on_trade(ts, price, qty)
+        snap = agg.snapshot(ts)
+        assert snap["trade_rate"] == tr
+        assert snap["quote_rate"] == qr
+        assert snap["realized_vol_bps"] == pytest.approx(vol, rel=1e-6, abs=1e-9)
+        assert snap["volume_usd"] == pytest.approx(usd, rel=1e-9, abs=1e-9)
+
+
+def test_periodic_resync(monkeypatch):
+    monkeypatch.setattr(ActivityAggregator, "RESYNC_EVERY", 7)
+    agg = ActivityAggregator(window_ms=1000, max_returns=5, max_volumes=5)
+    price = 100.0
+    for i in range(500):
+        price *= 1.0 + (1e-3 if i % 3 else -2e-3)
+        agg.on_trade(i * 10, price, 1e6 if i % 2 else 1e-6)  # 量级悬殊，放大增减误差
+    rets = [r for _, r in agg._rets]
+    assert agg._vol_sum == pytest.approx(math.fsum(v for _, v in agg._vols), rel=1e-12)
+    assert agg.realized_vol_bps() == pytest.approx(float(np.std(rets) * 1e4), rel=1e-6)
+    agg.prune(10**9)
+    assert agg.snapshot(10**9) == {"trade_rate": 0.0, "quote_rate": 0.0, "realized_vol_bps": 0.0, "volume_usd": 0.0}
+    assert agg._ret_sum == 0.0 and agg._vol_sum == 0.0
+
+
+def test_arrival_tps_matches_core_fallback():
+    rng = random.Random(3)
+    agg = ActivityAggregator(window_ms=60_000, max_trades=6000)
+    dq = deque(maxlen=6000)
+    ts = 1_700_000_000_000
+    for _ in range(5000):
+        ts += rng.choice([5, 50, 500, 61_000])
+        dq.append(ts)
+        while dq and (ts - dq[0]) > 60_000:
+            dq.popleft()
+        expected = (len(dq) - 1) / max(1.0, (dq[-1] - dq[0]) / 1000.0) if len(dq) > 1 else 0.0
+        agg.on_arrival(ts)
+        agg.prune(ts)
+        assert agg.arrival_tps() == expected
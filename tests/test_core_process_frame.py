@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""CoreAlgorithm.process_frame 测试
+
+在录制的特征文件（tests/data/features_recorded.jsonl.gz）与覆盖边界情况的合成特征上，
+列式批量路径与逐行 process_rows 的决策、统计、Sink 输出以及后续逐行状态一致
+
+features_recorded.jsonl.gz：FeaturePipe（sink=jsonl）对 BTCUSDT/ETHUSDT 各 60 秒 depth(5档)+aggTrade
+回放流的原样输出（OFI/CVD/Fusion/Divergence/活动度字段均由生产组件计算）
+"""
+
+import gzip
+import json
+import math
+import random
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from alpha_core.microstructure.feature_writer import JsonlFeatureWriter
+from alpha_core.signals import CoreAlgorithm
+from alpha_core.signals.core_algo import SignalSink
+
+SYMBOLS = ["BTCUSDT", "ethusdt", "BNBUSDT"]
+RECORDED_FEATURES = Path(__file__).parent / "data" / "features_recorded.jsonl.gz"
+
+
+class ListSink(SignalSink):
+    def __init__(self):
+        self.entries = []
+
+    def emit(self, entry):
+        self.entries.append(dict(entry))
+
+
+def _synthetic_rows(n, seed):
+    rng = random.Random(seed)
+    ts = 1730790000000
+    rows = []
+    for i in range(n):
+        ts += rng.choice([0, 1, 100, 300, 1000])  # 含重复/去重窗口内的时间戳
+        z_ofi = rng.gauss(0, 2)
+        z_cvd = z_ofi * rng.uniform(-0.5, 1.5) + rng.gauss(0, 0.5)
+        row = {
+            "ts_ms": ts,
+            "symbol": rng.choice(SYMBOLS),
+            "z_ofi": z_ofi,
+            "z_cvd": z_cvd,
+            "spread_bps": rng.uniform(0, 25),
+            "lag_sec": rng.choice([0.05, 0.2, 0.6, 4.0]),
+            "consistency": rng.random(),
+            "warmup": rng.random() < 0.05,
+            "fusion_score": rng.gauss(0, 1.5),
+            "activity": {"tps": rng.choice([0.5, 2.0, 5.0])},
+            "div_type": rng.choice([None, None, None, "bull_div", "bear_div"]),
+            "scenario_2x2": rng.choice([None, "A_H", "Q_H", "A_L", "Q_L"]),
+            "reason_codes": rng.choice([[], [], [], ["lag_bad_price"]]),
+            "trade_rate": rng.uniform(0, 600),
+        }
+        r = rng.random()
+        if r < 0.04:
+            row.pop("fusion_score")
+        elif r < 0.06:
+            row["z_ofi"] = 0.0
+            row["ofi_z"] = rng.gauss(0, 2)
+        elif r < 0.08:
+            row["z_cvd"] = None
+        elif r < 0.09:
+            row.pop("spread_bps")
+            row.pop("lag_sec")
+        elif r < 0.10:
+            row["symbol"] = None
+        elif r < 0.11:
+            row.pop("activity")
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture(scope="module")
+def recorded_rows():
+    """FeaturePipe 录制的特征文件"""
+    with gzip.open(RECORDED_FEATURES, "rt", encoding="utf-8") as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+@pytest.fixture(scope="module")
+def synthetic_rows(tmp_path_factory):
+    """合成特征（缺列、别名列、重复时间戳、reason_codes 等边界情况），经 JsonlFeatureWriter 写出再读回"""
+    path = tmp_path_factory.mktemp("features") / "features.jsonl"
+    writer = JsonlFeatureWriter(path)
+    for row in _synthetic_rows(4000, seed=5):
+        writer.write(row)
+    writer.close()
+    with path.open(encoding="utf-8") as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+@pytest.fixture(params=["recorded", "synthetic"])
+def feature_rows(request):
+    return request.getfixturevalue(f"{request.param}_rows")
+
+
+def _columns(rows):
+    names = sorted({k for row in rows for k in row})
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def _strip(decisions):
+    return [{k: v for k, v in d.items() if k != "created_at"} for d in decisions]
+
+
+CONFIGS = {
+    "default": {},
+    "confirm_v2": {
+        "confirm_mode": "v2",
+        "enable_confirm_funnel_diagnostics": True,
+        "min_consecutive_same_dir": 2,
+        "scenario_overrides": {"A_H": {"weak_signal_threshold_offset": -0.05, "min_consecutive_offset": 1},
+                               "Q_L": {"consistency_min_offset": 0.05}},
+    },
+    "strategy_mode": {"strategy_mode": {"mode": "auto", "triggers": {"market": {"min_trades_per_min": 60}}}},
+    "recompute": {"recompute_fusion": True, "weights": {"w_ofi": 0.7, "w_cvd": 0.3},
+                  "strategy": {"cooldown_after_exit_sec": 5}},
+}
+
+
+@pytest.mark.parametrize("name", sorted(CONFIGS))
+def test_frame_matches_row_by_row(feature_rows, name):
+    cfg = dict(CONFIGS[name])
+    row_sink, frame_sink = ListSink(), ListSink()
+    by_row = CoreAlgorithm(config=cfg, sink=row_sink)
+    by_frame = CoreAlgorithm(config=cfg, sink=frame_sink)
+    for algo in (by_row, by_frame):
+        algo.record_exit("BTCUSDT", feature_rows[100]["ts_ms"])
+
+    split = len(feature_rows) // 2
+    expected = by_row.process_rows(feature_rows[:split])
+    got = by_frame.process_frame(_columns(feature_rows[:split]))
+    assert _strip(got) == _strip(expected)
+    assert _strip(frame_sink.entries) == _strip(row_sink.entries)
+    assert asdict(by_frame.stats) == asdict(by_row.stats)
+    assert any(d["confirm"] for d in expected)
+
+    # 批量之后继续逐行：去重/连击/融合暖启动状态一致
+    tail = feature_rows[split:]
+    assert _strip(by_frame.process_rows(tail)) == _strip(by_row.process_rows(tail))
+    assert asdict(by_frame.stats) == asdict(by_row.stats)
+
+
+def test_frame_warmup_spans_batches(recorded_rows):
+    """融合引擎暖启动跨多个小批次推进，与逐行一致"""
+    by_row = CoreAlgorithm(config={}, sink=ListSink())
+    by_frame = CoreAlgorithm(config={}, sink=ListSink())
+    rows = recorded_rows[:300]
+    expected = by_row.process_rows(rows)
+    got = []
+    for start in range(0, len(rows), 7):
+        got.extend(by_frame.process_frame(_columns(rows[start:start + 7])))
+    assert _strip(got) == _strip(expected)
+
+
+def test_frame_accepts_dataframe(recorded_rows):
+    pd = pytest.importorskip("pandas")
+    rows = [r for r in recorded_rows[:500] if r.get("symbol") and r.get("z_cvd") is not None]
+    rows = [{k: r.get(k) for k in ("ts_ms", "symbol", "z_ofi", "z_cvd", "spread_bps", "lag_sec", "warmup",
+                                   "fusion_score")} for r in rows]
+    rows = [r for r in rows if all(v is not None for v in r.values())]
+    expected = CoreAlgorithm(config={}, sink=ListSink()).process_rows(rows)
+    got = CoreAlgorithm(config={}, sink=ListSink()).process_frame(pd.DataFrame(rows))
+    assert _strip(got) == _strip(expected)
+
+
+def test_empty_and_invalid_frames():
+    algo = CoreAlgorithm(config={}, sink=ListSink())
+    assert algo.process_frame({}) == []
+    assert algo.process_frame({"ts_ms": [1, 2], "symbol": [None, None]}) == []
+    assert algo.stats.processed == 0
+    with pytest.raises(ValueError):
+        algo.process_frame({"ts_ms": [1, 2], "symbol": ["BTCUSDT"]})
+
+
+def test_nan_scores_match_row_path():
+    rows = [{"ts_ms": 1730790000000 + i * 1000, "symbol": "BTCUSDT", "z_ofi": 1.0, "z_cvd": 1.0,
+             "fusion_score": math.nan if i % 2 else 1.0, "warmup": False} for i in range(20)]
+    expected = CoreAlgorithm(config={}, sink=ListSink()).process_rows(rows)
+    got = CoreAlgorithm(config={}, sink=ListSink()).process_frame(_columns(rows))
+    assert json.dumps(_strip(got)) == json.dumps(_strip(expected))
+
+
+def test_frame_gates_match_row_gates():
+    """批量无状态判定量在阈值边界、±0、NaN 上与逐行 row_gates 逐位一致"""
+    import numpy as np
+
+    from alpha_core.signals.core_batch import FrameInputs, frame_gates, row_gates
+
+    plan = CoreAlgorithm(config={}, sink=ListSink())._plan
+    th = plan.lookup("normal")
+    scores = [0.0, -0.0, th.buy, th.sell, plan.strong_threshold, -plan.strong_threshold,
+              th.weak_signal_threshold, plan.consistency_floor_when_abs_score_ge, 0.05, math.nan]
+    raws = [0.0, -0.0, -0.2, plan.consistency_floor, plan.consistency_floor_on_divergence, th.consistency_min, math.nan]
+    caps = [(0.0, 0.0), (plan.spread_bps_cap, plan.lag_cap_sec), (plan.spread_bps_cap + 1, plan.lag_cap_sec + 1),
+            (math.nan, math.nan)]
+    cases = [(s, c, d, sp, lag) for s in scores for c in raws for d in (False, True) for sp, lag in caps]
+    s, c, d, sp, lag = (list(col) for col in zip(*cases))
+    m = len(cases)
+    inputs = FrameInputs(
+        ts_ms=[0] * m, symbols=["BTCUSDT"] * m, score=np.array(s), consistency_raw=np.array(c),
+        spread_bps=np.array(sp), lag_sec=np.array(lag), warmup=np.zeros(m, dtype=bool),
+        has_divergence=np.array(d), reason_codes=[[]] * m, regimes=["normal"] * m, scenarios=[None] * m,
+        z_ofi=[None] * m, z_cvd=[None] * m, div_type=[None] * m,
+    )
+    expected = [row_gates(*case, th, plan) for case in cases]
+    assert json.dumps(frame_gates(inputs, [th] * m, plan)) == json.dumps(expected)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""compute_cvd_batch 等价性测试
+
+批量CVD内核与 RealCVDCalculator.update_with_trade 逐笔结果一致
+（合成流覆盖 Tick Rule 传播限制、坏数据、空窗软/硬冻结、混合尺度MAD地板、level模式；
+录制流 tests/data/aggtrades_recorded.jsonl.gz 为 BTCUSDT/ETHUSDT 各 60 秒的 aggTrade，
+即 depth_recorded / features_recorded 所用回放流中的成交行）
+
+流式计算的MAD缓存按墙钟（time.time）失效，逐笔结果一致依赖 no_mad_cache 假时钟
+"""
+
+import gzip
+import json
+import math
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from alpha_core.microstructure.cvd import RealCVDCalculator, CVDConfig, compute_cvd_batch
+
+RECORDED_TRADES = Path(__file__).parent / "data" / "aggtrades_recorded.jsonl.gz"
+
+
+@pytest.fixture
+def no_mad_cache(monkeypatch):
+    """流式MAD缓存依赖墙钟：令每次调用间隔1秒，使缓存始终失效（批量口径）"""
+    clock = {"t": 1_000_000.0}
+
+    def fake_time():
+        clock["t"] += 1.0
+        return clock["t"]
+
+    monkeypatch.setattr(time, "time", fake_time)
+
+
+def _make_trades(n, seed=0, unknown_side=0.2):
+    """生成随机成交流（价格不变段、未知方向、坏数量、活跃/安静段与空窗）"""
+    rng = random.Random(seed)
+    price = 50_000.0
+    ts = 1_700_000_000_000
+    rows = []
+    for i in range(n):
+        quiet = (i // 500) % 2 == 1
+        r = rng.random()
+        if r < 0.004:
+            ts += rng.choice([4500, 6000])  # 软/硬冻结
+        elif r < 0.01:
+            ts += 2500  # Tick Rule 时间限制
+        else:
+            ts += rng.randint(200, 3000) if quiet else rng.randint(1, 120)
+        if rng.random() < 0.4:
+            price += rng.choice([-0.5, 0.5])
+        qty = rng.lognormvariate(-3, 1.2)
+        if rng.random() < 0.01:
+            qty = rng.choice([0.0, -1.0, float("nan")])
+        is_buy = None if rng.random() < unknown_side else rng.random() < 0.5
+        rows.append((price, qty, is_buy, ts))
+    return rows
+
+
+def _assert_parity(rows, cfg_factory, symbol):
+    calc = RealCVDCalculator(symbol, cfg_factory())
+    stream = [calc.update_with_trade(price=p, qty=q, is_buy=b, event_time_ms=t) for p, q, b, t in rows]
+
+    price, qty, is_buy, ts = zip(*rows)
+    res = compute_cvd_batch(np.array(price), np.array(qty), np.array(is_buy, dtype=object),
+                            np.array(ts), cfg_factory(), symbol=symbol)
+
+    assert res["bad_points"] == stream[-1]["meta"]["bad_points"]
+    n_z = 0
+    for i, r in enumerate(stream):
+        assert res["cvd"][i] == r["cvd"]
+        if r["ema_cvd"] is None:
+            assert math.isnan(res["ema_cvd"][i])
+        else:
+            assert res["ema_cvd"][i] == r["ema_cvd"]
+        assert bool(res["warmup"][i]) == r["meta"]["warmup"]
+        assert bool(res["std_zero"][i]) == r["meta"]["std_zero"]
+        if r["z_cvd"] is None:
+            assert math.isnan(res["z_cvd"][i])
+        else:
+            n_z += 1
+            assert res["z_cvd"][i] == pytest.approx(r["z_cvd"], rel=1e-9, abs=1e-12)
+    return n_z
+
+
+@pytest.mark.parametrize("symbol,cfg_factory", [
+    ("BTCUSDT", CVDConfig),
+    ("SOLUSDT", lambda: CVDConfig(mad_window_trades=120, freeze_min=30, scale_fast_weight=0.5)),
+    ("ETHUSDT", lambda: CVDConfig(scale_mode="ewma")),
+    ("ETHUSDT", lambda: CVDConfig(z_mode="level", z_window=80)),
+])
+def test_batch_matches_streaming(no_mad_cache, symbol, cfg_factory):
+    rows = _make_trades(4000, seed=len(symbol))
+    assert _assert_parity(rows, cfg_factory, symbol) > 1000
+
+
+@pytest.mark.parametrize("symbol", ["BTCUSDT", "ETHUSDT"])
+@pytest.mark.parametrize("cfg_factory", [CVDConfig, lambda: CVDConfig(scale_mode="ewma")])
+def test_batch_matches_streaming_on_recorded_trades(no_mad_cache, symbol, cfg_factory):
+    with gzip.open(RECORDED_TRADES, "rt", encoding="utf-8") as fp:
+        rows = [(r["price"], r["qty"], r["side"] == "buy", r["ts_ms"])
+                for r in map(json.loads, fp) if r["symbol"] == symbol]
+    assert len(rows) > 500
+    assert _assert_parity(rows, cfg_factory, symbol) > 500
+
+
+def test_known_sides_fast_path(no_mad_cache):
+    """aggTrade 口径：方向齐全（bool 数组），不走逐笔 Tick Rule"""
+    rows = _make_trades(3000, seed=7, unknown_side=0.0)
+    _assert_parity(rows, CVDConfig, "BTCUSDT")
+    price, qty, is_buy, ts = (np.array(c) for c in zip(*rows))
+    res = compute_cvd_batch(price, qty, is_buy.astype(bool), ts, CVDConfig(), symbol="BTCUSDT")
+    ref = compute_cvd_batch(price, qty, is_buy.astype(object), ts, CVDConfig(), symbol="BTCUSDT")
+    np.testing.assert_array_equal(res["z_cvd"], ref["z_cvd"])
+
+
+def test_tick_rule_propagation_limit():
+    price = np.array([100.0, 100.5] + [100.5] * 7)
+    qty = np.ones(9)
+    is_buy = np.array([False] + [None] * 8, dtype=object)
+    ts = np.arange(9, dtype=np.int64) * 100 + 1000
+    res = compute_cvd_batch(price, qty, is_buy, ts, CVDConfig())
+    # 上涨→买入；价格不变最多沿用5笔，第6笔放弃并重置计数
+    assert res["side"].tolist() == [-1, 1, 1, 1, 1, 1, 1, 0, 1]
+    assert res["cvd"].tolist() == [-1.0, 0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 5.0, 6.0]
+    # 相对上一有效成交超过2秒不再沿用
+    res = compute_cvd_batch(np.array([100.0, 100.5, 100.5]), np.ones(3),
+                            np.array([True, None, None], dtype=object),
+                            np.array([1000, 1100, 3200], dtype=np.int64), CVDConfig())
+    assert res["side"].tolist() == [1, 1, 0]
+    assert res["bad_points"] == 1
+
+
+def test_tps_window_matches_deque():
+    from collections import deque
+    from alpha_core.microstructure.cvd.cvd_batch import tps_window_start
+
+    rng = random.Random(5)
+    t = 1_700_000_000.0
+    tsec = []
+    for _ in range(3000):
+        t += rng.choice([0.001, 0.05, 0.3, 7.0])
+        tsec.append(round(t, 3))
+    for seq in (tsec, tsec[:1500] + [tsec[1400]] + tsec[1500:]):  # 单调 / 含乱序
+        win, expected = deque(), []
+        for k, cur in enumerate(seq):
+            win.append(k)
+            while cur - seq[win[0]] > 60.0:
+                win.popleft()
+            expected.append(win[0])
+        assert tps_window_start(np.array(seq)).tolist() == expected
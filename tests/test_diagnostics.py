@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""DiagnosticsLogger 单元测试
+
+按键计数、令牌桶采样、惰性格式化、周期汇总，以及OFI热路径不再写stdout
+"""
+
+import logging
+import random
+
+from alpha_core.utils.diagnostics import DiagnosticsLogger
+from alpha_core.microstructure.ofi import RealOFICalculator, OFIConfig
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+class _Explode:
+    """被格式化即失败：用于验证未输出的消息不做格式化"""
+
+    def __str__(self):
+        raise AssertionError("formatted while disabled")
+
+
+def _make(level=logging.DEBUG, **kw):
+    lg = logging.getLogger(f"test.diag.{random.random()}")
+    lg.setLevel(level)
+    lg.propagate = False
+    records = []
+
+    class _H(logging.Handler):
+        def emit(self, record):
+            records.append(record.getMessage())
+
+    lg.addHandler(_H())
+    clock = _Clock()
+    return DiagnosticsLogger(lg, name="T", clock=clock, **kw), clock, records
+
+
+def test_token_bucket_sampling():
+    diag, clock, records = _make(rate=1.0, burst=3, summary_interval_sec=0)
+    emitted = [diag.report("K", "msg %d", i) for i in range(10)]
+    assert emitted == [True] * 3 + [False] * 7
+    assert diag.counters() == {"K": 10}
+    assert diag.suppressed() == {"K": 7}
+    clock.t = 2.0  # 补充2个令牌
+    assert diag.report("K", "msg") and diag.report("K", "msg") and not diag.report("K", "msg")
+    # 不同键独立限流
+    assert diag.report("OTHER", "x")
+    assert len(records) == 6
+
+
+def test_lazy_when_disabled():
+    diag, clock, records = _make(level=logging.WARNING, summary_interval_sec=0)
+    for _ in range(100):
+        assert not diag.report("K", "value=%s", _Explode())
+    assert diag.counters() == {"K": 100}
+    assert records == []
+
+
+def test_periodic_summary():
+    diag, clock, records = _make(level=logging.INFO, summary_interval_sec=60.0)
+    for _ in range(5):
+        diag.report("A", "a")  # DEBUG 未启用，仅计数
+    diag.report("B", "b")
+    assert records == []
+    clock.t = 61.0
+    diag.report("A", "a")
+    assert records == ["[DIAG_SUMMARY] T A=6 B=1"]
+    # 无新增时不输出，增量计数
+    assert diag.flush_summary() is None
+    diag.report("B", "b")
+    assert diag.flush_summary() == "[DIAG_SUMMARY] T B=1"
+
+
+def test_ofi_hot_path_is_silent(capsys):
+    calc = RealOFICalculator("BTCUSDT", OFIConfig(z_window=20, z_clip=0.5))
+    rng = random.Random(3)
+    for i in range(300):
+        bids = [(100.0 - 0.1 * k, rng.uniform(1, 10)) for k in range(5)]
+        asks = [(100.1 + 0.1 * k, rng.uniform(1, 10)) for k in range(5)]
+        calc.update_with_snapshot(bids, asks, event_time_ms=1_700_000_000_000 + 100 * i)
+    assert capsys.readouterr().out == ""
+    counts = calc.get_state()["diag_counts"]
+    assert counts["OFI_WARMUP"] == 5
+    assert counts["OFI_Z_CLIP"] > 0
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""FeaturePipe 去重索引测试
+
+DedupeWindow 与原线性扫描实现判定一致（逐行成本随窗口的变化见 scripts/bench_dedupe_window.py）
+"""
+
+import random
+from collections import deque
+
+from alpha_core.microstructure.feature_pipe import DedupeWindow, FeaturePipe
+
+
+def _linear_reference(window_ms):
+    """原实现：deque + 线性扫描"""
+    seen = deque()
+
+    def check(ts_ms, row_id):
+        while seen and (ts_ms - seen[0][0]) > window_ms:
+            seen.popleft()
+        for seen_ts, seen_id in seen:
+            if seen_ts == ts_ms or (row_id and seen_id == row_id):
+                return True
+        seen.append((ts_ms, row_id))
+        return False
+
+    return check
+
+
+def test_matches_linear_scan():
+    rng = random.Random(0)
+    for window_ms in (0, 50, 1000):
+        ref = _linear_reference(window_ms)
+        win = DedupeWindow(window_ms)
+        ts = 1_700_000_000_000
+        for i in range(20_000):
+            r = rng.random()
+            if r < 0.05:
+                t = ts - rng.randint(0, 1500)  # 重放 / 乱序
+            else:
+                ts += rng.randint(0, 7)
+                t = ts
+            row_id = rng.choice([None, "", f"id-{rng.randint(0, 3000)}"])
+            assert win.check_and_add(t, row_id) == ref(t, row_id), (window_ms, i)
+
+
+def test_memory_cap():
+    win = DedupeWindow(10**9, max_entries=100)
+    for i in range(1000):
+        assert not win.check_and_add(i, f"r{i}")
+    assert len(win) == 100
+    assert not win.check_and_add(5, "r5")  # 已淘汰
+    assert win.check_and_add(999, None)
+
+
+def test_pipe_uses_index(tmp_path):
+    pipe = FeaturePipe(output_dir=str(tmp_path), dedupe_ms=1000)
+    assert not pipe._is_duplicate("BTCUSDT", 1000, "a")
+    assert pipe._is_duplicate("BTCUSDT", 1000, "b")
+    assert pipe._is_duplicate("BTCUSDT", 1500, "a")
+    assert not pipe._is_duplicate("ETHUSDT", 1000, "a")  # 按 symbol 隔离
+    assert not pipe._is_duplicate("BTCUSDT", 2600, "a")  # 已出窗
+    pipe.close()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""ShardedFeatureRunner 测试
+
+按 symbol 分片的多进程结果与单进程 FeaturePipe 一致（按 (ts_ms, symbol) 归并）、
+分发确定、统计汇总
+"""
+
+import json
+import random
+import sqlite3
+import time
+
+import pytest
+
+from alpha_core.microstructure.feature_pipe import FeaturePipe
+from alpha_core.microstructure.feature_runner import ShardedFeatureRunner, shard_of
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT", "XRPUSDT"]
+
+
+@pytest.fixture
+def no_mad_cache(monkeypatch):
+    """CVD 流式MAD缓存依赖墙钟：令每次调用间隔1秒，使结果与调度无关（fork 子进程继承）"""
+    clock = {"t": 1_000_000.0}
+
+    def fake_time():
+        clock["t"] += 1.0
+        return clock["t"]
+
+    monkeypatch.setattr(time, "time", fake_time)
+
+
+def _rows(n_per_symbol=150, seed=0):
+    rng = random.Random(seed)
+    prices = {s: 100.0 * (i + 1) for i, s in enumerate(SYMBOLS)}
+    rows = []
+    ts = 1730790000000
+    for i in range(n_per_symbol):
+        for s in SYMBOLS:
+            ts += rng.randint(1, 20)
+            p = prices[s] = prices[s] + rng.choice([-0.1, 0.0, 0.1])
+            if rng.random() < 0.5:
+                rows.append({"ts_ms": ts, "symbol": s, "src": "depth",
+                             "bids": [[p - 0.05, rng.random() * 10]], "asks": [[p + 0.05, rng.random() * 10]]})
+            else:
+                rows.append({"ts_ms": ts, "symbol": s, "src": "aggTrade", "price": p,
+                             "qty": rng.random(), "side": rng.choice(["buy", "sell"]), "row_id": f"{s}-{i}"})
+    rows.append(dict(rows[-1]))  # 重复行（去重窗口内）
+    rows.append({"ts_ms": ts + 1, "src": "depth"})  # 缺 symbol
+    return rows
+
+
+def _single(rows, out_dir, **kwargs):
+    pipe = FeaturePipe(output_dir=str(out_dir), **kwargs)
+    for r in rows:
+        pipe.on_row(r)
+    counters = pipe._diag.counters()
+    pipe.close()
+    return counters
+
+
+def _key(line):
+    row = json.loads(line)
+    return row["ts_ms"], row["symbol"]
+
+
+def test_shard_of_is_stable():
+    assert [shard_of(s, 4) for s in SYMBOLS] == [shard_of(s, 4) for s in SYMBOLS]
+    assert {shard_of(s, 3) for s in SYMBOLS} == {0, 1, 2}
+
+
+def test_sharded_jsonl_matches_single_process(tmp_path, no_mad_cache):
+    rows = _rows()
+    counters = _single(rows, tmp_path / "single")
+    single = (tmp_path / "single" / "features.jsonl").read_text(encoding="utf-8").splitlines()
+
+    runner = ShardedFeatureRunner(n_workers=3, chunk_rows=64, start_method="fork",
+                                  output_dir=str(tmp_path / "sharded"))
+    stats = runner.run(rows)
+    merged = (tmp_path / "sharded" / "features.jsonl").read_text(encoding="utf-8").splitlines()
+
+    assert merged == sorted(single, key=_key)
+    assert stats["rows_in"] == len(rows)
+    assert stats["feature_rows"] == len(single) == stats["writer"]["written"]
+    assert stats["diagnostics"] == counters
+    assert stats["symbols"] == sorted(SYMBOLS)
+    assert not (tmp_path / "sharded" / "shards").exists()
+
+    # 再跑一次：输出逐字节一致
+    ShardedFeatureRunner(n_workers=3, chunk_rows=7, start_method="fork",
+                         output_dir=str(tmp_path / "again")).run(rows)
+    assert (tmp_path / "again" / "features.jsonl").read_text(encoding="utf-8").splitlines() == merged
+
+
+def test_sharded_sqlite_and_whitelist(tmp_path, no_mad_cache):
+    rows = _rows(n_per_symbol=60, seed=1)
+    symbols = ["BTCUSDT", "SOLUSDT"]
+    _single(rows, tmp_path / "single", sink="sqlite", symbols=symbols)
+    stats = ShardedFeatureRunner(n_workers=2, start_method="fork", sink="sqlite", symbols=symbols,
+                                 output_dir=str(tmp_path / "sharded")).run(rows)
+
+    query = "SELECT ts_ms, symbol, z_ofi, z_cvd, fusion_score, signal FROM features ORDER BY ts_ms, symbol"
+    a = sqlite3.connect(str(tmp_path / "single" / "features.db"))
+    b = sqlite3.connect(str(tmp_path / "sharded" / "features.db"))
+    assert a.execute(query).fetchall() == b.execute(query).fetchall()
+    a.close()
+    b.close()
+    assert stats["symbols"] == symbols
+    assert stats["rows_dispatched"] < len(rows)  # 白名单外的行未分发
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""FeatureWriter 测试
+
+组提交（batch_n/flush_ms）、flush 屏障可见性、SQLite WAL/持久化级别、背压指标、
+Parquet 小时分区布局与行组排序
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from alpha_core.microstructure.feature_writer import (
+    PARQUET_AVAILABLE,
+    JsonlFeatureWriter,
+    SqliteFeatureWriter,
+    build_feature_writer,
+)
+
+
+def _row(i, symbol="BTCUSDT"):
+    return {
+        "ts_ms": 1730790000000 + i,
+        "symbol": symbol,
+        "z_ofi": 0.1 * i,
+        "z_cvd": -0.1 * i,
+        "price": 70000.0 + i,
+        "lag_sec": 0.0,
+        "spread_bps": 1.0,
+        "fusion_score": 0.02 * i,
+        "consistency": 0.5,
+        "dispersion": 0.0,
+        "sign_agree": -1,
+        "div_type": None,
+        "activity": {"tps": 2.0},
+        "warmup": False,
+        "signal": "neutral",
+    }
+
+
+def test_jsonl_group_commit_and_flush(tmp_path):
+    w = JsonlFeatureWriter(tmp_path / "features.jsonl", batch_n=100, flush_ms=60_000)
+    rows = [_row(i) for i in range(250)]
+    for r in rows:
+        w.write(r)
+    assert w.flush(timeout=5)
+    lines = (tmp_path / "features.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(x) for x in lines] == rows
+    assert lines[0] == json.dumps(rows[0], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    health = w.get_health()
+    assert health["written"] == 250 and health["batches"] == 3  # 100 + 100 + 屏障提交50
+    w.close()
+    assert w.get_health()["queue_size"] == 0
+
+
+def test_time_triggered_commit(tmp_path):
+    w = JsonlFeatureWriter(tmp_path / "features.jsonl", batch_n=10_000, flush_ms=20)
+    w.write(_row(0))
+    deadline = time.time() + 5
+    while w.get_health()["written"] == 0 and time.time() < deadline:
+        time.sleep(0.005)
+    assert w.get_health()["batches"] == 1
+    assert len((tmp_path / "features.jsonl").read_text(encoding="utf-8").splitlines()) == 1
+    w.close()
+
+
+@pytest.mark.parametrize("durability,sync_level", [("off", 0), ("normal", 1), ("full", 2)])
+def test_sqlite_batches_and_pragmas(tmp_path, durability, sync_level):
+    w = SqliteFeatureWriter(tmp_path / "features.db", batch_n=64, flush_ms=60_000, durability=durability)
+    assert w.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert w.conn.execute("PRAGMA synchronous").fetchone()[0] == sync_level
+    for i in range(200):
+        w.write(_row(i))
+    w.write(_row(0))  # 主键冲突：INSERT OR REPLACE 覆盖
+    w.close()
+    conn = sqlite3.connect(str(tmp_path / "features.db"))
+    assert conn.execute("SELECT COUNT(*), MIN(ts_ms), MAX(activity_tps) FROM features").fetchone() == (
+        200, 1730790000000, 2.0)
+    conn.close()
+    assert w.get_health()["batches"] == 4
+
+
+def test_backpressure_metrics(tmp_path):
+    gate = threading.Event()
+
+    class SlowWriter(JsonlFeatureWriter):
+        def _write_batch(self, batch):
+            gate.wait(5)
+            super()._write_batch(batch)
+
+    w = SlowWriter(tmp_path / "features.jsonl", batch_n=1, flush_ms=0, queue_max=2)
+    threading.Timer(0.1, gate.set).start()
+    for i in range(6):
+        w.write(_row(i))
+    health = w.get_health()
+    assert health["backpressure_count"] >= 1
+    assert health["backpressure_wait_ms"] > 0
+    assert 1 <= health["max_queue_depth"] <= 2
+    w.close()
+    assert w.get_health()["written"] == 6
+
+
+def test_invalid_mode_and_write_after_close(tmp_path):
+    with pytest.raises(ValueError):
+        build_feature_writer("jsonl", tmp_path, durability="eventual")
+    with pytest.raises(ValueError):
+        build_feature_writer("csv", tmp_path)
+    w = build_feature_writer("jsonl", tmp_path)
+    w.close()
+    w.write(_row(0))
+    assert w.get_health()["dropped_count"] == 1
+
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow not available")
+def test_parquet_hourly_layout_sorted_row_groups(tmp_path):
+    import pyarrow.parquet
+    from alpha_core.backtest.reader import DataReader
+    from alpha_core.microstructure.feature_writer import ParquetFeatureWriter
+
+    hour0 = 1730790000000 - 1730790000000 % 3_600_000
+    rows = []
+    for i in range(300):
+        ts = hour0 + 3_590_000 + i * 97  # 跨越小时边界
+        rows.append(dict(_row(0, "BTCUSDT" if i % 3 else "ETHUSDT"), ts_ms=ts, price=70000.0 + i))
+    rows[10], rows[11] = rows[11], rows[10]  # 乱序到达
+
+    w = ParquetFeatureWriter(tmp_path, row_group_rows=64, batch_n=50, flush_ms=60_000)
+    for r in rows:
+        w.write(r)
+    w.close()
+
+    files = sorted(tmp_path.glob("date=*/hour=*/symbol=*/kind=features/*.parquet"))
+    assert len(files) == 4  # 2 symbols × 2 hours
+    assert files[0].name.startswith("features-") and not list(tmp_path.rglob("*.tmp"))
+    total = 0
+    for f in files:
+        pf = pyarrow.parquet.ParquetFile(f)
+        for g in range(pf.num_row_groups):
+            ts = pf.read_row_group(g, columns=["ts_ms"]).column(0).to_pylist()
+            assert ts == sorted(ts)
+        table = pf.read()
+        assert "activity_tps" in table.column_names and "activity" not in table.column_names
+        total += table.num_rows
+    assert total == len(rows)
+
+    # DataReader 小时分区直接读取：行还原为写入前的 JSONL 形态（activity_tps -> activity.tps）
+    date = files[0].parts[-5].split("=")[1]
+    reader = DataReader(tmp_path, date=date, kinds=["features"])
+    got = list(reader.read_features())
+    assert reader.get_stats()["file_count"] == 4
+    # DataReader 按 (symbol, 秒) 去重，每秒保留最早的一行
+    expected = {}
+    for r in sorted(rows, key=lambda r: r["ts_ms"]):
+        expected.setdefault((r["symbol"], r["ts_ms"] // 1000), r)
+    assert len(got) == len(expected)
+    for g in got:
+        assert g == expected[(g["symbol"], g["ts_ms"] // 1000)]
+
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow not available")
+def test_signal_server_parquet_rows_match_jsonl_input(tmp_path):
+    pd = pytest.importorskip("pandas")
+    from alpha_core.microstructure.feature_writer import ParquetFeatureWriter
+    from mcp.signal_server.app import _normalize_parquet_record
+
+    rows = [_row(i) for i in range(5)]
+    w = ParquetFeatureWriter(tmp_path)
+    for r in rows:
+        w.write(r)
+    w.close()
+    (path,) = tmp_path.rglob("*.parquet")
+    got = [_normalize_parquet_record(rec.to_dict()) for _, rec in pd.read_parquet(path).iterrows()]
+    assert [g["activity"] for g in got] == [r["activity"] for r in rows]
+    assert all("activity_tps" not in g for g in got)
+
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow not available")
+def test_feature_pipe_parquet_sink(tmp_path):
+    import pyarrow.parquet
+    from alpha_core.microstructure.feature_pipe import FeaturePipe
+
+    pipe = FeaturePipe(symbols=["BTCUSDT"], sink="parquet", output_dir=str(tmp_path))
+    emitted = []
+    for i in range(40):
+        ts = 1730790000000 + i * 200
+        for row in ({"ts_ms": ts, "symbol": "BTCUSDT", "src": "depth",
+                     "bids": [[70321.4 - i * 0.1, 10.5]], "asks": [[70321.6 - i * 0.1, 11.2]]},
+                    {"ts_ms": ts + 50, "symbol": "BTCUSDT", "src": "aggTrade",
+                     "price": 70321.5 - i * 0.1, "qty": 0.01, "side": "buy"}):
+            out = pipe.on_row(row)
+            if out:
+                emitted.append(out)
+    pipe.close()
+    files = list(tmp_path.glob("date=*/hour=*/symbol=btcusdt/kind=features/*.parquet"))
+    assert len(files) == 1
+    table = pyarrow.parquet.read_table(files[0])
+    assert len(emitted) > 40
+    assert table.column("ts_ms").to_pylist() == [r["ts_ms"] for r in emitted]
+    assert table.column("activity_tps").to_pylist() == [r["activity"]["tps"] for r in emitted]
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""file_tail 测试：TailCursor 尾行缓冲/确认/回退/截断、目录列举缓存、检查点、DirWatcher 唤醒"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from alpha_core.utils.file_tail import (
+    DirListingCache,
+    DirWatcher,
+    TailCursor,
+    decode_record,
+    read_checkpoint,
+    write_checkpoint,
+)
+
+
+def _append(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fp:
+        fp.write(text)
+
+
+def test_cursor_holds_back_partial_line(tmp_path):
+    path = tmp_path / "a.jsonl"
+    _append(path, "1\n2\n3")
+    cursor = TailCursor(path)
+    assert cursor.read_lines() == [b"1", b"2"]
+    assert cursor.read_end == 4
+    _append(path, "4\n")
+    assert cursor.read_lines() == [b"34"]
+    assert cursor.read_lines() == []
+    cursor.close()
+
+
+def test_cursor_rewind_rereads_uncommitted(tmp_path):
+    path = tmp_path / "a.jsonl"
+    _append(path, "1\n2\n")
+    cursor = TailCursor(path)
+    cursor.read_lines()
+    cursor.commit(2)
+    cursor.rewind()
+    assert cursor.fp is None
+    assert cursor.read_lines(keep_open=False) == [b"2"]
+    assert cursor.fp is None
+
+
+def test_cursor_rereads_after_truncation_or_shrunk_checkpoint(tmp_path):
+    path = tmp_path / "a.jsonl"
+    _append(path, "1\n2\n")
+    cursor = TailCursor(path)
+    assert cursor.read_lines() == [b"1", b"2"]
+    path.write_text("9\n", encoding="utf-8")
+    assert cursor.read_lines() == [b"9"]
+    cursor.close()
+
+    assert TailCursor(path, committed=100).read_lines(keep_open=False) == [b"9"]
+
+
+def test_listing_cached_until_mtime_changes(tmp_path):
+    _append(tmp_path / "sub" / "a.jsonl", "1\n")
+    cache = DirListingCache(rescan_sec=3600)
+    cache.start_pass()
+    listing, changed = cache.list(tmp_path)
+    assert changed and listing.subdirs == ["sub"] and listing.files == []
+    cache.start_pass()
+    assert cache.list(tmp_path) == (listing, False)
+
+    _append(tmp_path / "b.jsonl", "1\n")
+    listing, changed = cache.list(tmp_path)
+    assert changed and listing.files == ["b.jsonl"]
+    assert cache.rescans == 2
+    assert cache.list(tmp_path / "missing") == (None, False)
+
+
+def test_checkpoint_roundtrip_and_unreadable(tmp_path):
+    ckpt = tmp_path / "state" / "ckpt.json"
+    write_checkpoint(ckpt, "offsets", {"a": 1})
+    assert json.loads(ckpt.read_text()) == {"version": 1, "offsets": {"a": 1}}
+    assert read_checkpoint(ckpt, "offsets") == {"a": 1}
+    assert not ckpt.with_name("ckpt.json.tmp").exists()
+
+    ckpt.write_text("{broken", encoding="utf-8")
+    assert read_checkpoint(ckpt, "offsets") == {}
+    assert read_checkpoint(tmp_path / "missing.json", "offsets") == {}
+
+
+def test_decode_record_rejects_non_objects():
+    assert decode_record(b'{"a": 1}') == {"a": 1}
+    for line in (b"[1]", b"42", b'"x"', b"not json"):
+        assert decode_record(line) is None
+
+
+def test_dir_watcher_wakes_on_append(tmp_path):
+    watcher = DirWatcher(tmp_path)
+    if watcher.backend != "inotify":
+        pytest.skip("inotify not available")
+    sub = tmp_path / "BTCUSDT"
+    sub.mkdir()
+    assert watcher.wait(1.0)
+    assert not watcher.wait(0.05)
+
+    threading.Timer(0.05, _append, args=(sub / "signals-20241105-07.jsonl", "{}\n")).start()
+    start = time.monotonic()
+    assert watcher.wait(5.0)
+    assert time.monotonic() - start < 1.0
+    watcher.close()
+
+
+def test_dir_watcher_poll_fallback(tmp_path):
+    watcher = DirWatcher(tmp_path, use_inotify=False)
+    assert watcher.backend == "poll"
+    assert watcher.wait(0.01) is False
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""compute_fusion_batch / compute_divergence_batch 等价性测试
+
+批量融合（降级、去噪迟滞/冷却/最小持续/翻转重臂）与批量背离（三通道枢轴、配对去重、
+冷却、冲突、降权）与流式 OFI_CVD_Fusion / DivergenceDetector 逐行一致
+"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from alpha_core.microstructure.fusion import (
+    OFI_CVD_Fusion, OFICVDFusionConfig, compute_fusion_batch, advance_fusion_consistency, SIGNAL_NAMES,
+)
+from alpha_core.microstructure.divergence import (
+    DivergenceDetector, DivergenceConfig, compute_divergence_batch,
+)
+
+
+def _rows(n, seed):
+    """振荡的 z/价格序列（含无效输入、滞后超限、疏密不一的时间间隔）"""
+    rng = random.Random(seed)
+    price = 100.0
+    ts = 1_700_000_000.0
+    rows = []
+    for i in range(n):
+        ts += rng.choice([0.05, 0.1, 0.5])
+        price += 0.3 * math.sin(i / 15.0) + rng.gauss(0, 0.05)
+        z_ofi = 2.5 * math.sin(i / 9.0) + rng.gauss(0, 0.5)
+        z_cvd = (-2.0 if (i // 400) % 2 else 2.2) * math.sin(i / 11.0) + rng.gauss(0, 0.5)
+        lag = rng.choice([0.0, 0.1, 0.28, 0.6])
+        if rng.random() < 0.01:
+            z_ofi = rng.choice([None, float("nan"), float("inf")])
+        rows.append((ts, price, z_ofi, z_cvd, lag))
+    return rows
+
+
+@pytest.mark.parametrize("cfg_factory", [
+    OFICVDFusionConfig,
+    lambda: OFICVDFusionConfig(min_consecutive=2, cooldown_secs=1.0, hysteresis_exit=0.4),
+    lambda: OFICVDFusionConfig(adaptive_cooldown_enabled=False, rearm_on_flip=False, w_ofi=0.3, w_cvd=0.7),
+])
+def test_fusion_batch_matches_streaming(cfg_factory):
+    rows = _rows(5000, seed=1)
+    fus = OFI_CVD_Fusion(cfg_factory())
+    stream = [fus.update(zo, zc, ts, lag_sec=lag) for ts, _, zo, zc, lag in rows]
+
+    ts, _, zo, zc, lag = zip(*rows)
+    res = compute_fusion_batch(np.array(zo, dtype=object), np.array(zc), np.array(ts), np.array(lag),
+                               cfg_factory(), with_reasons=True)
+    signals = set()
+    for i, r in enumerate(stream):
+        assert res["fusion_score"][i] == r["fusion_score"]
+        assert res["consistency"][i] == r["consistency"]
+        assert SIGNAL_NAMES[int(res["signal_code"][i])] == r["signal"]
+        assert (res["ofi_weight"][i], res["cvd_weight"][i]) == (r["ofi_weight"], r["cvd_weight"])
+        assert bool(res["warmup"][i]) == r["warmup"]
+        assert res["reason_codes"][i] == r["reason_codes"]
+        signals.add(r["signal"])
+    assert len(signals) == 5
+
+
+def test_advance_fusion_consistency_continues_engine_state():
+    """分批推进已有引擎：一致性与全程逐行 update 一致，暖启动与统计计数同步"""
+    rows = _rows(600, seed=3)
+    cfg = OFICVDFusionConfig(min_warmup_samples=40)
+    ref = OFI_CVD_Fusion(cfg)
+    expected = [ref.update(zo, zc, ts, lag_sec=lag)["consistency"] for ts, _, zo, zc, lag in rows]
+
+    fus = OFI_CVD_Fusion(cfg)
+    got = []
+    for start in range(0, len(rows), 17):
+        _, _, zo, zc, lag = zip(*rows[start:start + 17])
+        got.extend(advance_fusion_consistency(fus, np.array(zo, dtype=object), zc, lag).tolist())
+    assert got == expected
+    assert (fus._warmup_count, fus._is_warmup) == (ref._warmup_count, ref._is_warmup)
+    for key in ("total_updates", "invalid_inputs", "warmup_returns", "lag_exceeded", "downgrades"):
+        assert fus._stats[key] == ref._stats[key], key
+
+
+@pytest.mark.parametrize("cfg_factory", [
+    DivergenceConfig,
+    lambda: DivergenceConfig(swing_L=5, min_separation=3, cooldown_secs=3.0, warmup_min=300),
+    lambda: DivergenceConfig(swing_L=8, use_fusion=False, max_pivots=4),
+])
+def test_divergence_batch_matches_streaming(cfg_factory):
+    rows = _rows(6000, seed=2)
+    fus = compute_fusion_batch(*(np.array(c, dtype=object) for c in list(zip(*rows))[2:4]),
+                               np.array([r[0] for r in rows]), np.array([r[4] for r in rows]))
+    fusion = fus["fusion_score"].copy()
+    fusion[::37] = np.nan  # Fusion 通道偶发缺失
+    det = DivergenceDetector(cfg_factory())
+    stream = []
+    for i, (ts, p, zo, zc, lag) in enumerate(rows):
+        f = None if np.isnan(fusion[i]) else float(fusion[i])
+        stream.append(det.update(ts, p, zo, zc, fusion_score=f,
+                                 consistency=float(fus["consistency"][i]), lag_sec=lag))
+
+    ts, price, zo, zc, lag = zip(*rows)
+    res = compute_divergence_batch(np.array(ts), np.array(price), np.array(zo, dtype=object),
+                                   np.array(zc), fusion_score=fusion, consistency=fus["consistency"],
+                                   lag_sec=np.array(lag), cfg=cfg_factory())
+
+    expected = [(i, e) for i, e in enumerate(stream) if e is not None]
+    assert len(expected) > 10
+    assert res["event_index"].tolist() == [i for i, _ in expected]
+    for (i, e), got in zip(expected, res["events"]):
+        assert (got.ts, got.type, got.divergence_type) == (e["ts"], e["type"], e.get("divergence_type"))
+        assert got.score == e["score"]
+        assert (got.channels, got.reason_codes, got.warmup) == (e["channels"], e["reason_codes"], e["warmup"])
+    assert res["pivots_by_channel"] == det.get_stats()["pivots_by_channel"]
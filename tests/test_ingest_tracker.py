@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""FileIngestTracker 测试：JSONL 续读、Parquet 行组续读、检查点重启、目录列举缓存"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from alpha_core.utils.ingest_tracker import FileIngestTracker
+
+
+def _append(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fp:
+        fp.write(text)
+
+
+def _rows(n0: int, n1: int) -> str:
+    return "".join(json.dumps({"symbol": "BTCUSDT", "ts_ms": i}) + "\n" for i in range(n0, n1))
+
+
+def _drain(tracker: FileIngestTracker):
+    out = []
+    for path in tracker.changed_files():
+        if path.suffix == ".parquet":
+            for table in tracker.iter_parquet_row_groups(path):
+                out.extend(r["ts_ms"] for r in table.to_pylist())
+        else:
+            out.extend(r["ts_ms"] for r in tracker.iter_jsonl(path))
+    return out
+
+
+def test_jsonl_growth_resumes_mid_file(tmp_path):
+    path = tmp_path / "BTCUSDT" / "features-20241105-07.jsonl"
+    _append(path, _rows(0, 3) + '{"symbol": "BTCUSDT", ')
+    tracker = FileIngestTracker(tmp_path)
+    assert _drain(tracker) == [0, 1, 2]
+    assert tracker.changed_files() == []
+
+    _append(path, '"ts_ms": 3}\n' + _rows(4, 6))
+    assert tracker.changed_files() == [path]
+    assert _drain(tracker) == [3, 4, 5]
+    assert tracker.position(path)["offset"] == path.stat().st_size
+
+
+def test_abandoned_read_resumes_from_last_consumed_row(tmp_path):
+    path = tmp_path / "features.jsonl"
+    _append(path, _rows(0, 5))
+    tracker = FileIngestTracker(tmp_path)
+    rows = tracker.iter_jsonl(path)
+    assert [next(rows)["ts_ms"], next(rows)["ts_ms"]] == [0, 1]
+    rows.close()
+    assert tracker.changed_files() == [path]
+    assert _drain(tracker) == [1, 2, 3, 4]  # 至少一次：最后交付但未确认的行重放
+
+
+def test_checkpoint_survives_restart(tmp_path):
+    root = tmp_path / "features"
+    ckpt = tmp_path / "ckpt.json"
+    path = root / "a.jsonl"
+    _append(path, _rows(0, 2))
+    tracker = FileIngestTracker(root, checkpoint_path=ckpt)
+    assert _drain(tracker) == [0, 1]
+    tracker.save_checkpoint()
+
+    restarted = FileIngestTracker(root, checkpoint_path=ckpt)
+    assert restarted.changed_files() == []
+    _append(path, _rows(2, 3))
+    assert _drain(restarted) == [2]
+
+
+def test_directory_listing_cached_until_mtime_changes(tmp_path):
+    _append(tmp_path / "BTCUSDT" / "a.jsonl", _rows(0, 1))
+    tracker = FileIngestTracker(tmp_path)
+    _drain(tracker)
+    rescans = tracker.rescans
+    for i in range(1, 4):
+        _append(tmp_path / "BTCUSDT" / "a.jsonl", _rows(i, i + 1))
+        assert _drain(tracker) == [i]
+    assert tracker.rescans == rescans
+
+    _append(tmp_path / "BTCUSDT" / "b.jsonl", _rows(10, 11))
+    assert _drain(tracker) == [10]
+    assert tracker.rescans == rescans + 1
+
+
+def test_parquet_row_groups_resume(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    def write(n_groups):
+        with pq.ParquetWriter(tmp_path / "f.parquet", pa.schema([("ts_ms", pa.int64())])) as writer:
+            for g in range(n_groups):
+                writer.write_table(pa.table({"ts_ms": [g * 10, g * 10 + 1]}))
+
+    write(2)
+    tracker = FileIngestTracker(tmp_path)
+    assert _drain(tracker) == [0, 1, 10, 11]
+    assert tracker.position(tmp_path / "f.parquet")["row_groups"] == 2
+
+    write(3)
+    os.utime(tmp_path / "f.parquet", ns=(1, 1))
+    assert _drain(tracker) == [20, 21]
+
+
+def test_unreadable_parquet_retried_only_after_change(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "partial.parquet"
+    path.write_bytes(b"PAR1 incomplete")
+    tracker = FileIngestTracker(tmp_path)
+    with pytest.raises(Exception):
+        list(tracker.iter_parquet_row_groups(path))
+    assert tracker.changed_files() == []
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""json_codec 测试
+
+各后端编码与标准库逐字节一致（sort_keys 稳定输出）、解码结果一致、异常类型一致；
+JSONL 写入器在不同后端下产出相同文件
+"""
+
+import json
+import math
+import random
+import struct
+
+import pytest
+
+from alpha_core.utils import json_codec
+from alpha_core.utils.json_codec import BACKENDS, JsonCodec
+
+
+def _available():
+    out = []
+    for name in BACKENDS:
+        try:
+            JsonCodec(name)
+            out.append(name)
+        except ImportError:
+            pass
+    return out
+
+
+def _stdlib(obj, sort_keys):
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":"))
+
+
+def _random_value(rng, depth=0):
+    r = rng.random()
+    if r < 0.25:
+        return struct.unpack("d", struct.pack("Q", rng.getrandbits(64)))[0]  # 含 NaN/Inf/次正规数
+    if r < 0.45:
+        return rng.random() * 10 ** rng.randint(-8, 20) * rng.choice([1, -1])
+    if r < 0.55:
+        return rng.randint(-2**70, 2**70) if rng.random() < 0.5 else rng.randint(-2**64, 2**64)
+    if r < 0.65:
+        return rng.choice([None, True, False, "x é\x00\x1f\"\\/", "😀", -0.0, 0.0, 1e-4, 1e16, ("t", 1)])
+    if r < 0.82 and depth < 3:
+        return {rng.choice(["a", "B", "é", "k1", "1", "ts_ms"]): _random_value(rng, depth + 1)
+                for _ in range(rng.randint(0, 4))}
+    if depth < 3:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return "s"
+
+
+@pytest.mark.parametrize("backend", _available())
+def test_dumps_byte_identical_to_stdlib(backend):
+    codec = JsonCodec(backend)
+    rng = random.Random(7)
+    for _ in range(30_000):
+        obj = _random_value(rng)
+        for sort_keys in (True, False):
+            assert codec.dumps(obj, sort_keys=sort_keys) == _stdlib(obj, sort_keys), obj
+
+
+@pytest.mark.parametrize("backend", _available())
+def test_dumps_falls_back_for_non_plain_objects(backend):
+    codec = JsonCodec(backend)
+    np = pytest.importorskip("numpy")
+    for obj in ({1: "int key"}, {"v": np.float64(0.5)}, {"s": "\ud800"}, {"big": 2**80}, {"nan": math.nan}):
+        assert codec.dumps(obj, sort_keys=True) == _stdlib(obj, True)
+    with pytest.raises(TypeError):
+        codec.dumps({"x": object()})
+
+
+@pytest.mark.parametrize("backend", _available())
+def test_loads_matches_stdlib(backend):
+    codec = JsonCodec(backend)
+    rng = random.Random(11)
+    for _ in range(30_000):
+        text = _stdlib(_random_value(rng), True)
+        expected = json.loads(text)
+        assert repr(codec.loads(text)) == repr(expected)
+        assert repr(codec.loads(text.encode("utf-8"))) == repr(expected)
+    for text in ("NaN", "[Infinity]", "1e400", "123456789012345678901234567890", "-9999999999999999999", '"\\ud800"'):
+        assert repr(codec.loads(text)) == repr(json.loads(text))
+    for bad in ("", "{", "[1,]", "{'a': 1}"):
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads(bad)
+
+
+def test_backend_selection(monkeypatch):
+    with pytest.raises(ValueError):
+        JsonCodec("yaml")
+    assert JsonCodec("STDLIB").backend == "stdlib"
+    try:
+        codec = json_codec.set_backend("stdlib")
+        assert json_codec.get_codec() is codec
+        assert json_codec.dumps({"b": 1, "a": [1.5, None]}, sort_keys=True) == '{"a":[1.5,null],"b":1}'
+        assert json_codec.loads(b'{"a":1}') == {"a": 1}
+    finally:
+        json_codec.set_backend(None)
+
+
+@pytest.mark.parametrize("backend", _available())
+def test_feature_writer_output_independent_of_backend(tmp_path, backend):
+    from alpha_core.microstructure.feature_writer import JsonlFeatureWriter
+
+    rng = random.Random(3)
+    rows = [{"ts_ms": 1730790000000 + i, "symbol": "BTCUSDT", "z_ofi": rng.gauss(0, 1),
+             "lag_sec": rng.random() * 1e-5, "reason_codes": ["lag"], "activity": {"tps": rng.random()},
+             "div_type": None, "warmup": i < 3} for i in range(200)]
+    try:
+        json_codec.set_backend(backend)
+        writer = JsonlFeatureWriter(tmp_path / f"{backend}.jsonl")
+        for row in rows:
+            writer.write(row)
+        writer.close()
+    finally:
+        json_codec.set_backend(None)
+    expected = "".join(_stdlib(r, True) + "\n" for r in rows)
+    assert (tmp_path / f"{backend}.jsonl").read_text(encoding="utf-8") == expected
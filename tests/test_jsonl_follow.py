@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""JsonlFollower 测试：尾行缓冲、常驻句柄、检查点续读/确认/回退，以及策略服务批量读取"""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from alpha_core.utils.jsonl_follow import JsonlFollower
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def _append(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fp:
+        fp.write(text)
+
+
+def _line(symbol: str, i: int) -> str:
+    return json.dumps({"symbol": symbol, "ts_ms": i}) + "\n"
+
+
+def test_partial_line_waits_for_newline(tmp_path):
+    path = tmp_path / "BTCUSDT" / "signals-20241105-07.jsonl"
+    _append(path, _line("BTCUSDT", 1) + '{"symbol": "BTCUSDT", ')
+    follower = JsonlFollower(tmp_path)
+    assert [r["ts_ms"] for r in follower.poll()] == [1]
+    assert follower.poll() == []
+    _append(path, '"ts_ms": 2}\n' + _line("BTCUSDT", 3))
+    assert [r["ts_ms"] for r in follower.poll()] == [2, 3]
+    follower.close()
+
+
+def test_active_file_stays_open_and_old_hour_closes(tmp_path):
+    d = tmp_path / "BTCUSDT"
+    _append(d / "signals-20241105-07.jsonl", _line("BTCUSDT", 1))
+    follower = JsonlFollower(tmp_path)
+    follower.poll()
+    with patch("pathlib.Path.open", autospec=True, side_effect=Path.open) as opened:
+        for i in range(2, 6):
+            _append(d / "signals-20241105-07.jsonl", _line("BTCUSDT", i))
+            assert [r["ts_ms"] for r in follower.poll()] == [i]
+        reads = [call for call in opened.call_args_list if call.args[1:] == ("rb",)]
+    assert reads == []
+    assert follower.open_count == 1
+
+    # 小时轮转：旧文件补读剩余行后关闭，新文件常驻
+    _append(d / "signals-20241105-07.jsonl", _line("BTCUSDT", 6))
+    _append(d / "signals-20241105-08.jsonl", _line("BTCUSDT", 7))
+    assert [r["ts_ms"] for r in follower.poll()] == [6, 7]
+    assert follower.open_count == 1
+    follower.close()
+
+
+def test_directory_listed_only_on_change(tmp_path):
+    _append(tmp_path / "BTCUSDT" / "signals-20241105-07.jsonl", _line("BTCUSDT", 1))
+    follower = JsonlFollower(tmp_path, symbols=["btcusdt"])
+    follower.poll()
+    rescans = follower.rescans
+    for i in range(5):
+        _append(tmp_path / "BTCUSDT" / "signals-20241105-07.jsonl", _line("BTCUSDT", i))
+        follower.poll()
+    assert follower.rescans == rescans
+    follower.close()
+
+
+def test_checkpoint_resumes_after_restart(tmp_path):
+    root = tmp_path / "signal"
+    ckpt = tmp_path / "offsets.json"
+    path = root / "ETHUSDT" / "signals-20241105-07.jsonl"
+    _append(path, _line("ETHUSDT", 1) + _line("ETHUSDT", 2) + '{"symbol"')
+    follower = JsonlFollower(root, checkpoint_path=ckpt)
+    assert len(follower.poll()) == 2
+    follower.commit()
+    follower.close()
+    assert json.loads(ckpt.read_text())["offsets"] == {str(path): len(_line("ETHUSDT", 1)) * 2}
+
+    _append(path, ': "ETHUSDT", "ts_ms": 3}\n')
+    follower = JsonlFollower(root, checkpoint_path=ckpt)
+    assert [r["ts_ms"] for r in follower.poll()] == [3]
+    follower.close()
+
+
+def test_uncommitted_batch_is_not_checkpointed_and_rollback_rereads(tmp_path):
+    ckpt = tmp_path / "offsets.json"
+    path = tmp_path / "signal" / "signals-20241105-07.jsonl"
+    _append(path, _line("BTCUSDT", 1))
+    follower = JsonlFollower(tmp_path / "signal", checkpoint_path=ckpt)
+    assert [r["ts_ms"] for r in follower.poll()] == [1]
+    follower.commit()
+
+    _append(path, _line("BTCUSDT", 2) + _line("BTCUSDT", 3))
+    assert [r["ts_ms"] for r in follower.poll()] == [2, 3]
+    follower.rollback()  # 处理失败：回到已确认偏移
+    assert [r["ts_ms"] for r in follower.poll()] == [2, 3]
+    follower.close()  # 未 commit 的读取不落盘
+    assert json.loads(ckpt.read_text())["offsets"] == {str(path): len(_line("BTCUSDT", 1))}
+
+    follower = JsonlFollower(tmp_path / "signal", checkpoint_path=ckpt)
+    assert [r["ts_ms"] for r in follower.poll()] == [2, 3]
+    follower.close()
+
+
+def test_truncated_file_is_reread(tmp_path):
+    path = tmp_path / "signals-20241105-07.jsonl"
+    _append(path, _line("BTCUSDT", 1) + _line("BTCUSDT", 2))
+    follower = JsonlFollower(tmp_path, subdirs=False)
+    assert len(follower.poll()) == 2
+    path.write_text(_line("BTCUSDT", 9), encoding="utf-8")
+    assert [r["ts_ms"] for r in follower.poll()] == [9]
+    follower.close()
+
+
+def test_top_level_symbol_filter_and_bad_lines(tmp_path):
+    _append(tmp_path / "signals-20241105-07.jsonl", _line("BTCUSDT", 1) + "not json\n" + _line("ETHUSDT", 2))
+    follower = JsonlFollower(tmp_path, symbols=["BTCUSDT"])
+    assert [r["symbol"] for r in follower.poll()] == ["BTCUSDT"]
+    assert follower.bad_lines == 1
+    follower.close()
+
+
+def test_read_signals_from_jsonl_keeps_active_file_incremental(tmp_path):
+    from mcp.strategy_server.app import read_signals_from_jsonl
+
+    d = tmp_path / "BTCUSDT"
+    _append(d / "signals-20241105-07.jsonl", _line("BTCUSDT", 1))
+    _append(d / "signals-20241105-08.jsonl", _line("BTCUSDT", 2) + '{"symbol": "BTC')
+    processed, positions = set(), {}
+    assert [r["ts_ms"] for r in read_signals_from_jsonl(tmp_path, ["BTCUSDT"], processed, positions)] == [1, 2]
+    assert processed == {str(d / "signals-20241105-07.jsonl")}
+
+    _append(d / "signals-20241105-08.jsonl", 'USDT", "ts_ms": 3}\n')
+    assert [r["ts_ms"] for r in read_signals_from_jsonl(tmp_path, ["BTCUSDT"], processed, positions)] == [3]
+
+
+def test_non_object_json_lines_are_skipped(tmp_path):
+    _append(tmp_path / "signals-20241105-07.jsonl", "[1, 2]\n42\n\"BTCUSDT\"\n" + _line("BTCUSDT", 1))
+    follower = JsonlFollower(tmp_path, symbols=["BTCUSDT"])
+    assert [r["ts_ms"] for r in follower.poll()] == [1]
+    assert follower.bad_lines == 3
+    follower.close()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""JsonlHandlePool 测试：句柄复用、小时轮转 fsync、LRU 淘汰，以及 JsonlSink/SignalWriterV2 接入"""
+
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from alpha_core.signals.core_algo import JsonlSink
+from alpha_core.utils.jsonl_pool import JsonlHandlePool
+
+HOUR_MS = 3_600_000
+TS0 = 1730790000000  # 2024-11-05 07:00 UTC
+
+
+def _lines(path: Path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_reuses_handle_and_batches_fsync(tmp_path):
+    pool = JsonlHandlePool(tmp_path, fsync_every_n=3)
+    with patch("alpha_core.utils.jsonl_pool.os.fsync", wraps=os.fsync) as fsync:
+        for i in range(7):
+            pool.write("BTCUSDT", "20241105-07", json.dumps({"i": i}))
+        assert pool.opened == 1
+        assert fsync.call_count == 2
+        assert pool.pending_writes == 1
+        # flush 每条执行：未关闭时内容已可读
+        assert [r["i"] for r in _lines(pool.path_for("BTCUSDT", "20241105-07"))] == list(range(7))
+        pool.close()
+        assert fsync.call_count == 3
+    assert pool.open_count == 0
+
+
+def test_hour_rollover_closes_all_older_handles(tmp_path):
+    pool = JsonlHandlePool(tmp_path, fsync_every_n=100)
+    with patch("alpha_core.utils.jsonl_pool.os.fsync", wraps=os.fsync) as fsync:
+        pool.write("BTCUSDT", "20241105-07", "{}")
+        pool.write("ETHUSDT", "20241105-07", "{}")
+        pool.write("BTCUSDT", "20241105-08", "{}")
+        # 低频的 ETHUSDT 未写新小时，其旧小时句柄同样补偿 fsync 并关闭
+        assert fsync.call_count == 2
+    assert pool.open_count == 1
+    assert pool.pending_writes == 1
+    assert pool.path_for("ETHUSDT", "20241105-07").exists()
+
+    pool.write("ETHUSDT", "20241105-08", "{}")
+    assert pool.open_count == 2
+    pool.close()
+
+
+def test_lru_eviction_fsyncs_and_reopens(tmp_path):
+    pool = JsonlHandlePool(tmp_path, fsync_every_n=100, max_open=2)
+    for symbol in ("A", "B", "C", "A"):
+        pool.write(symbol, "20241105-07", json.dumps({"s": symbol}))
+    assert pool.open_count == 2
+    assert pool.evicted == 2
+    assert pool.opened == 4
+    pool.close()
+    assert [r["s"] for r in _lines(pool.path_for("A", "20241105-07"))] == ["A", "A"]
+
+
+def test_directory_created_once(tmp_path):
+    pool = JsonlHandlePool(tmp_path, max_open=1)
+    with patch.object(Path, "mkdir", autospec=True, side_effect=Path.mkdir) as mkdir:
+        for hour in ("20241105-07", "20241105-08", "20241105-09"):
+            pool.write("BTCUSDT", hour, "{}")
+    assert mkdir.call_count == 1
+    pool.close()
+
+
+def test_jsonl_sink_keeps_files_open_and_reads_run_id_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("RUN_ID", "run-a")
+    sink = JsonlSink(tmp_path, fsync_every_n=1000)
+    monkeypatch.setenv("RUN_ID", "run-b")
+    with patch("pathlib.Path.open", autospec=True, side_effect=Path.open) as opened:
+        for i in range(5):
+            sink.emit({"ts_ms": TS0 + i * 1000, "symbol": "BTCUSDT", "score": 0.1})
+        sink.emit({"ts_ms": TS0 + HOUR_MS, "symbol": "BTCUSDT", "score": 0.2})
+    assert opened.call_count == 2
+    assert sink.get_health()["open_files"] == 1
+    sink.close()
+
+    root = tmp_path / "ready" / "signal" / "BTCUSDT"
+    first = _lines(root / "signals-20241105-07.jsonl")
+    assert len(first) == 5
+    assert {r["run_id"] for r in first} == {"run-a"}
+    assert first[0]["_writer"] == "core_jsonl_v406"
+    assert len(_lines(root / "signals-20241105-08.jsonl")) == 1
+
+
+def test_signal_writer_v2_uses_pool(tmp_path):
+    pytest.importorskip("pydantic")
+    from alpha_core.signals.signal_schema import DecisionCode, Regime, SideHint, SignalV2
+    from alpha_core.signals.signal_writer import SignalWriterV2
+
+    writer = SignalWriterV2(tmp_path, sink_kind="jsonl")
+    for i in range(3):
+        writer.write(SignalV2(
+            ts_ms=TS0 + i, symbol="BTCUSDT", signal_id=f"r-BTCUSDT-{i}", score=0.5, side_hint=SideHint.BUY,
+            regime=Regime.TREND, gating=1, confirm=True, expiry_ms=60000,
+            decision_code=DecisionCode.OK, config_hash="abc", run_id="r",
+        ))
+    assert writer._jsonl_pool.opened == 1
+    writer.close()
+    rows = _lines(tmp_path / "ready" / "signal" / "BTCUSDT" / "signals-20241105-07.jsonl")
+    assert [r["signal_id"] for r in rows] == ["r-BTCUSDT-0", "r-BTCUSDT-1", "r-BTCUSDT-2"]
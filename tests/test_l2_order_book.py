@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""L2OrderBook / update_with_l2_delta 测试
+
+增量订单簿与暴力重建一致、序列缺口检测与快照重新对齐、增量OFI与快照OFI一致
+"""
+
+import random
+
+import pytest
+
+from alpha_core.microstructure.ofi import RealOFICalculator, OFIConfig, L2OrderBook
+
+
+def _brute_top_k(bids, asks, k):
+    b = sorted(((p, q) for p, q in bids.items() if q > 0), key=lambda x: -x[0])[:k]
+    a = sorted(((p, q) for p, q in asks.items() if q > 0), key=lambda x: x[0])[:k]
+    return b, a
+
+
+def _random_deltas(n, seed=0):
+    """随机深度增量流（Binance depthUpdate 语义：绝对数量，0 删除）"""
+    rng = random.Random(seed)
+    out = []
+    u = 1000
+    for i in range(n):
+        mid = 100 + rng.randint(-5, 5) * 0.1
+        b = [[round(mid - 0.1 * rng.randint(1, 15), 1), rng.choice([0.0, rng.uniform(0.1, 5)])] for _ in range(3)]
+        a = [[round(mid + 0.1 * rng.randint(1, 15), 1), rng.choice([0.0, rng.uniform(0.1, 5)])] for _ in range(3)]
+        first = u + 1
+        u = first + rng.randint(0, 3)
+        out.append({"b": b, "a": a, "U": first, "u": u, "pu": first - 1, "E": 1_700_000_000_000 + 100 * i})
+    # pu 语义：上一事件的 u
+    for prev, cur in zip(out, out[1:]):
+        cur["pu"] = prev["u"]
+    return out
+
+
+class TestL2OrderBook:
+
+    def test_matches_brute_force(self):
+        book = L2OrderBook("BTCUSDT")
+        bids, asks = {}, {}
+        for d in _random_deltas(2000, seed=1):
+            assert book.apply_delta(d["b"], d["a"], d["U"], d["u"], d["pu"]) == "applied"
+            for p, q in d["b"]:
+                bids[p] = q
+            for p, q in d["a"]:
+                asks[p] = q
+            assert book.top_k(5) == _brute_top_k(bids, asks, 5)
+        assert book.depth() == (sum(q > 0 for q in bids.values()), sum(q > 0 for q in asks.values()))
+
+    def test_gap_and_resync(self):
+        book = L2OrderBook()
+        book.load_snapshot([[100.0, 1.0]], [[100.1, 2.0]], last_update_id=10)
+        # 过期事件丢弃
+        assert book.apply_delta([[100.0, 5.0]], [], first_id=5, last_id=9, prev_last_id=4) == "stale"
+        # 快照后首事件覆盖 lastUpdateId
+        assert book.apply_delta([[100.0, 3.0]], [], first_id=9, last_id=12, prev_last_id=8) == "applied"
+        assert book.best_bid() == (100.0, 3.0)
+        # pu 不连续 → 缺口，之后拒绝增量
+        assert book.apply_delta([[99.9, 1.0]], [], first_id=15, last_id=16, prev_last_id=14) == "gap"
+        assert book.apply_delta([[99.9, 1.0]], [], first_id=17, last_id=18, prev_last_id=16) == "unsynced"
+        assert book.gap_count == 1
+        book.load_snapshot([[99.8, 1.0]], [[100.2, 1.0]], last_update_id=20)
+        assert book.apply_delta([], [[100.2, 0.0]], first_id=21, last_id=22, prev_last_id=20) == "applied"
+        assert book.best_ask() is None
+
+    def test_bad_levels_ignored(self):
+        book = L2OrderBook()
+        book.apply_delta([[float("nan"), 1.0], ["x", 1.0], [100.0, 2.0]], [])
+        assert book.bad_levels == 2
+        assert book.top_k(5) == ([(100.0, 2.0)], [])
+
+
+def test_l2_delta_ofi_matches_snapshot_path():
+    cfg = OFIConfig(z_window=50)
+    delta_calc = RealOFICalculator("ETHUSDT", cfg)
+    snap_calc = RealOFICalculator("ETHUSDT", cfg)
+    bids, asks = {}, {}
+    for d in _random_deltas(500, seed=2):
+        res = delta_calc.update_with_l2_delta(d)
+        for p, q in d["b"]:
+            bids[p] = q
+        for p, q in d["a"]:
+            asks[p] = q
+        b, a = _brute_top_k(bids, asks, 5)
+        ref = snap_calc.update_with_snapshot(b, a, event_time_ms=d["E"])
+        assert res["ofi"] == ref["ofi"]
+        assert res["z_ofi"] == ref["z_ofi"]
+        assert res["meta"]["l2_last_id"] == d["u"]
+
+
+def test_l2_delta_gap_returns_none():
+    calc = RealOFICalculator("ETHUSDT", OFIConfig())
+    calc.load_l2_snapshot([[100.0, 1.0]], [[100.1, 1.0]], last_update_id=100)
+    assert calc.update_with_l2_delta({"b": [[100.0, 2.0]], "a": [], "U": 101, "u": 101, "pu": 100}) is not None
+    assert calc.update_with_l2_delta({"bids": [], "asks": [], "first_id": 110, "last_id": 111,
+                                      "prev_last_id": 109}) is None
+
+
+def test_l2_gap_warns_once_until_resync(caplog):
+    calc = RealOFICalculator("ETHUSDT", OFIConfig())
+    calc.load_l2_snapshot([[100.0, 1.0]], [[100.1, 1.0]], last_update_id=100)
+    with caplog.at_level("WARNING", logger="alpha_core.microstructure.ofi.real_ofi_calculator"):
+        calc.update_with_l2_delta({"b": [], "a": [], "U": 110, "u": 111, "pu": 109})
+        for i in range(50):
+            assert calc.update_with_l2_delta({"b": [], "a": [], "U": 112 + i, "u": 112 + i, "pu": 111 + i}) is None
+    assert len([r for r in caplog.records if "[OFI_L2]" in r.getMessage()]) == 1
+    counts = calc.get_diagnostics()["diag_counts"]
+    assert (counts["OFI_L2_GAP"], counts["OFI_L2_UNSYNCED"]) == (1, 50)
+
+
+def test_reset_drops_l2_book():
+    calc = RealOFICalculator("ETHUSDT", OFIConfig())
+    calc.load_l2_snapshot([[100.0, 1.0]], [[100.1, 1.0]], last_update_id=100)
+    calc.reset()
+    assert "l2_last_id" not in calc.get_diagnostics()
+    # 重置后无序列号的增量直接从空簿构建
+    res = calc.update_with_l2_delta({"b": [[99.0, 2.0]], "a": [[99.1, 1.0]]})
+    assert res["meta"]["l2_last_id"] is None
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""MultiConfigEvaluator 测试：单遍多配置评估与逐配置 CoreAlgorithm 回放一致"""
+
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from alpha_core.report.optimizer import ParameterOptimizer
+from alpha_core.signals import CoreAlgorithm
+from alpha_core.signals.core_algo import NullSink
+from alpha_core.signals.multi_eval import MultiConfigEvaluator
+
+from test_core_process_frame import _strip, _synthetic_rows
+
+CONFIGS = [
+    {},
+    {"weak_signal_threshold": 0.1, "consistency_min": 0.05},
+    {"weak_signal_threshold": 0.3, "min_consecutive_same_dir": 3, "strategy": {"cooldown_after_exit_sec": 5}},
+    {"confirm_mode": "v2", "enable_confirm_funnel_diagnostics": True,
+     "scenario_overrides": {"A_H": {"weak_signal_threshold_offset": -0.05, "min_consecutive_offset": 1}}},
+    {"thresholds": {"active": {"buy": 0.4, "sell": -0.4}}},
+    {"signal": {"weak_signal_threshold": 0.15, "consistency_min": 0.1}},
+    {"dedupe_ms": 50},  # 上游配置不同 → 独立分组
+    {"recompute_fusion": True, "weights": {"w_ofi": 0.7, "w_cvd": 0.3}},
+    {"recompute_fusion": True, "weights": {"w_ofi": 0.7, "w_cvd": 0.3}, "min_consecutive_same_dir": 2},
+]
+
+
+@pytest.fixture(scope="module")
+def rows():
+    return json.loads(json.dumps(_synthetic_rows(3000, seed=11)))
+
+
+def _replay(config, rows, exit_ts):
+    algo = CoreAlgorithm(config=config, sink=NullSink())
+    algo.record_exit("BTCUSDT", exit_ts)
+    return algo.process_rows(rows), algo.stats
+
+
+def test_matches_individual_replays(rows):
+    evaluator = MultiConfigEvaluator(CONFIGS, keep_signals=True)
+    assert evaluator.n_groups == 3
+    evaluator.record_exit("BTCUSDT", rows[100]["ts_ms"])
+    evaluator.process_rows(rows, chunk_size=700)
+
+    results = evaluator.results()
+    assert [r.index for r in results] == list(range(len(CONFIGS)))
+    emitted = set()
+    for config, result in zip(CONFIGS, results):
+        decisions, stats = _replay(config, rows, rows[100]["ts_ms"])
+        assert asdict(result.stats) == asdict(stats)
+        assert _strip(result.signals) == _strip(decisions)
+        emitted.add(stats.emitted)
+    assert len(emitted) > 3  # 各配置结果确实不同
+
+
+def test_stats_only_mode(rows):
+    evaluator = MultiConfigEvaluator(CONFIGS[:3])
+    evaluator.process_rows(rows)
+    for config, result in zip(CONFIGS, evaluator.results()):
+        assert result.signals is None
+        assert asdict(result.stats) == asdict(_replay(config, rows, 0)[1])
+
+
+def test_rejects_signal_v2():
+    pytest.importorskip("alpha_core.signals.decision_engine")
+    with pytest.raises(ValueError):
+        MultiConfigEvaluator([{}, {"use_signal_v2": True}])
+
+
+def test_optimizer_screen_signal_trials(rows, tmp_path):
+    optimizer = ParameterOptimizer(
+        base_config_path=Path("config/backtest.yaml"),
+        search_space={"signal.weak_signal_threshold": [0.1, 0.2, 0.3], "signal.consistency_min": [0.05, 0.15]},
+        output_dir=tmp_path,
+    )
+    trials = optimizer.generate_trials("grid")
+    screened = optimizer.screen_signal_trials(trials, rows)
+    assert [s["params"] for s in screened] == [t["params"] for t in trials]
+    for trial, item in zip(trials, screened):
+        _, stats = _replay(optimizer._signal_config(trial["config"]), rows, 0)
+        assert item["signal_stats"] == asdict(stats)
+        assert item["confirm_rate"] == pytest.approx(stats.emitted / stats.processed)
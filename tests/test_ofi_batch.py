@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""compute_ofi_batch 等价性测试
+
+批量OFI内核与 RealOFICalculator.update_with_snapshot 逐行结果一致
+（合成流覆盖时间间隔重置、UTC日切换、坏数据清洗、MAD软截与z_clip；
+录制流 tests/data/depth_recorded.jsonl.gz 为 BTCUSDT/ETHUSDT 各 60 秒的 5 档 depth 快照，
+即 features_recorded.jsonl.gz 所用回放流中的 depth 行）
+"""
+
+import gzip
+import json
+import math
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from alpha_core.microstructure.ofi import RealOFICalculator, OFIConfig, compute_ofi_batch
+
+RECORDED_DEPTH = Path(__file__).parent / "data" / "depth_recorded.jsonl.gz"
+
+
+def _make_book_stream(n, K=5, seed=0):
+    """生成随机游走的订单簿快照流（含价跃迁、时间空窗与跨UTC日）"""
+    rng = random.Random(seed)
+    mid = 100.0
+    ts = 86_400_000 * 20000 - 30_000  # 距UTC日切换30秒
+    bids, asks, tss = [], [], []
+    for i in range(n):
+        if rng.random() < 0.2:
+            mid += rng.choice([-0.1, 0.1])
+        ts += 100 if rng.random() > 0.01 else 2500  # 偶发空窗触发会话重置
+        bid = [[round(mid - 0.05 - 0.1 * k, 2), rng.uniform(0.5, 20)] for k in range(K)]
+        ask = [[round(mid + 0.05 + 0.1 * k, 2), rng.uniform(0.5, 20)] for k in range(K)]
+        if rng.random() < 0.005:
+            bid[2][1] = float("nan")  # 坏数据
+        bids.append(bid)
+        asks.append(ask)
+        tss.append(ts)
+    return bids, asks, tss
+
+
+@pytest.mark.parametrize("cfg", [
+    OFIConfig(),
+    OFIConfig(z_window=40, z_clip=2.5, levels=3, weights=[0.5, 0.3, 0.2]),
+    OFIConfig(z_window=120, z_clip=0, reset_on_session_change=False),
+])
+def test_batch_matches_streaming(cfg):
+    bids, asks, ts = _make_book_stream(1500, K=cfg.levels, seed=cfg.z_window)
+    calc = RealOFICalculator("BTCUSDT", cfg)
+    stream = [calc.update_with_snapshot(b, a, event_time_ms=t) for b, a, t in zip(bids, asks, ts)]
+
+    res = compute_ofi_batch(np.array(bids), np.array(asks), np.array(ts), cfg)
+
+    assert res["session_reset"].any()
+    _assert_parity(res, stream)
+
+
+def _assert_parity(res, stream):
+    for i, r in enumerate(stream):
+        assert res["ofi"][i] == pytest.approx(r["ofi"], rel=1e-12, abs=1e-12)
+        assert res["k_components"][i].tolist() == pytest.approx(r["k_components"], rel=1e-12, abs=1e-12)
+        assert res["ema_ofi"][i] == pytest.approx(r["ema_ofi"], rel=1e-12, abs=1e-12)
+        assert bool(res["warmup"][i]) == r["meta"]["warmup"]
+        assert bool(res["std_zero"][i]) == r["meta"]["std_zero"]
+        assert bool(res["session_reset"][i]) == r["meta"]["session_reset"]
+        if r["z_ofi"] is None:
+            assert math.isnan(res["z_ofi"][i])
+        else:
+            assert res["z_ofi"][i] == pytest.approx(r["z_ofi"], rel=1e-12, abs=1e-12)
+
+
+@pytest.mark.parametrize("symbol", ["BTCUSDT", "ETHUSDT"])
+@pytest.mark.parametrize("cfg", [OFIConfig(), OFIConfig(z_window=40, z_clip=2.5)])
+def test_batch_matches_streaming_on_recorded_book(symbol, cfg):
+    with gzip.open(RECORDED_DEPTH, "rt", encoding="utf-8") as fp:
+        rows = [r for r in map(json.loads, fp) if r["symbol"] == symbol]
+    assert len(rows) > 400
+    calc = RealOFICalculator(symbol, cfg)
+    stream = [calc.update_with_snapshot(r["bids"], r["asks"], event_time_ms=r["ts_ms"]) for r in rows]
+
+    res = compute_ofi_batch(np.array([r["bids"] for r in rows]), np.array([r["asks"] for r in rows]),
+                            np.array([r["ts_ms"] for r in rows]), cfg)
+
+    assert (res["ofi"] != 0).any() and not np.isnan(res["z_ofi"]).all()
+    _assert_parity(res, stream)
+
+
+def test_batch_input_validation():
+    with pytest.raises(ValueError):
+        compute_ofi_batch(np.zeros((3, 5)), np.zeros((3, 5, 2)), np.arange(3))
+    with pytest.raises(ValueError):
+        compute_ofi_batch(np.zeros((3, 5, 2)), np.zeros((2, 5, 2)), np.arange(3))
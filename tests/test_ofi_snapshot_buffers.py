@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""RealOFICalculator 双缓冲订单簿测试
+
+缓冲区复用（不重新分配）、presorted 快速路径与默认路径一致、坏数据清洗与补零
+"""
+
+import random
+
+from alpha_core.microstructure.ofi import RealOFICalculator, OFIConfig
+
+
+def _book(rng, K=5):
+    mid = 100.0 + rng.choice([-0.1, 0.0, 0.1])
+    bids = [(round(mid - 0.05 - 0.1 * k, 2), rng.uniform(0.5, 10)) for k in range(K)]
+    asks = [(round(mid + 0.05 + 0.1 * k, 2), rng.uniform(0.5, 10)) for k in range(K)]
+    return bids, asks
+
+
+def test_buffers_are_reused():
+    calc = RealOFICalculator("BTCUSDT", OFIConfig())
+    ids = {id(calc.bids), id(calc.prev_bids)}
+    level_ids = {id(lv) for lv in calc.bids + calc.prev_bids}
+    rng = random.Random(0)
+    for i in range(50):
+        bids, asks = _book(rng)
+        calc.update_with_snapshot(bids, asks, event_time_ms=1_700_000_000_000 + 100 * i)
+        assert {id(calc.bids), id(calc.prev_bids)} == ids
+        assert {id(lv) for lv in calc.bids + calc.prev_bids} == level_ids
+    # 上一帧保留的是上一次写入的快照
+    prev_expected = [list(x) for x in calc.bids]
+    bids, asks = _book(rng)
+    calc.update_with_snapshot(bids, asks, event_time_ms=1_700_000_000_000 + 100 * 50)
+    assert [list(x) for x in calc.prev_bids] == prev_expected
+    assert [tuple(x) for x in calc.bids] == bids
+
+
+def test_presorted_matches_default():
+    a = RealOFICalculator("ETHUSDT", OFIConfig(z_window=30))
+    b = RealOFICalculator("ETHUSDT", OFIConfig(z_window=30))
+    rng = random.Random(1)
+    for i in range(300):
+        bids, asks = _book(rng)
+        ts = 1_700_000_000_000 + 100 * i
+        ra = a.update_with_snapshot(bids, asks, event_time_ms=ts)
+        rb = b.update_with_snapshot(bids, asks, event_time_ms=ts, presorted=True)
+        assert (ra["ofi"], ra["z_ofi"], ra["ema_ofi"]) == (rb["ofi"], rb["z_ofi"], rb["ema_ofi"])
+
+
+def test_short_and_bad_levels_are_zero_filled():
+    calc = RealOFICalculator("ETHUSDT", OFIConfig())
+    calc.update_with_snapshot([(100.0, 1.0), (99.9, 2.0)], [(100.1, 1.0)] * 5, event_time_ms=1)
+    calc.update_with_snapshot([(100.0, float("nan"))], [(100.1, -1.0)], event_time_ms=2)
+    assert calc.bids == [[100.0, 0.0]] + [[0.0, 0.0]] * 4
+    assert calc.asks == [[100.1, 0.0]] + [[0.0, 0.0]] * 4
+    assert calc.prev_bids[1] == [99.9, 2.0]
+    assert calc.bad_points == 2
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""PivotDetector 测试
+
+单调队列滑动极值与暴力左右窗口比较一致、枢轴历史与去重集合有界、
+环形缓冲大小不影响背离事件
+"""
+
+import math
+import random
+
+from alpha_core.microstructure.divergence import DivergenceDetector, DivergenceConfig
+from alpha_core.microstructure.divergence.ofi_cvd_divergence import PivotDetector
+
+
+def _brute_pivots(ts, prices, inds, L):
+    out = []
+    seen = set()
+    for c in range(L, len(prices) - L):
+        if ts[c] in seen:
+            continue
+        p, z = prices[c], inds[c]
+        lp, rp = prices[c - L:c], prices[c + 1:c + L + 1]
+        lz, rz = inds[c - L:c], inds[c + 1:c + L + 1]
+        hi = p >= max(lp) and p >= max(rp)
+        lo = p <= min(lp) and p <= min(rp)
+        if hi or lo:
+            seen.add(ts[c])
+            out.append((c, ts[c], hi, lo,
+                        z >= max(lz) and z >= max(rz), z <= min(lz) and z <= min(rz)))
+    return out
+
+
+def _series(n, seed):
+    rng = random.Random(seed)
+    ts, prices, inds = [], [], []
+    price = 100.0
+    for i in range(n):
+        price += rng.choice([-0.1, 0.0, 0.0, 0.1])  # 含平台（相等值）
+        ts.append(1_700_000_000.0 + (i // 2 if rng.random() < 0.1 else i))  # 偶发重复时间戳
+        prices.append(round(price, 1))
+        inds.append(round(rng.gauss(0, 1), 1))
+    return ts, prices, inds
+
+
+def test_sliding_extrema_matches_brute_force():
+    ts, prices, inds = _series(3000, seed=1)
+    for L in (1, 3, 12):
+        det = PivotDetector(L, max_pivots=100_000)
+        for t, p, z in zip(ts, prices, inds):
+            det.add_point_and_detect(t, p, z)
+        got = [(pv['index'], pv['ts'], pv['is_price_high'], pv['is_price_low'],
+                pv['is_indicator_high'], pv['is_indicator_low']) for pv in det.pivots]
+        assert got == _brute_pivots(ts, prices, inds, L)
+
+
+def test_history_is_bounded():
+    det = PivotDetector(2, max_pivots=16)
+    rng = random.Random(2)
+    for i in range(20_000):
+        det.add_point_and_detect(float(i + 1), rng.random(), rng.random())
+    assert len(det.pivots) == 16
+    assert det._seen_ts == {pv['ts'] for pv in det.pivots}
+    assert len(det._price_max) <= 5 and len(det._price_min) <= 5
+    lows = [pv for pv in det.pivots if pv['is_price_low']]
+    assert det.last_two('L') == lows[-2:]
+
+
+def test_ring_size_does_not_change_events():
+    small = DivergenceDetector(DivergenceConfig(max_pivots=2, warmup_min=50))
+    large = DivergenceDetector(DivergenceConfig(max_pivots=100_000, warmup_min=50))
+    rng = random.Random(3)
+    price = 100.0
+    events = 0
+    for i in range(4000):
+        ts = 1_700_000_000.0 + i * 0.5
+        price += 0.3 * math.sin(i / 15.0) + rng.gauss(0, 0.05)
+        z_ofi = 2.5 * math.sin(i / 9.0) + rng.gauss(0, 0.3)
+        z_cvd = -2.0 * math.sin(i / 11.0) + rng.gauss(0, 0.3)
+        fusion = 0.5 * (z_ofi + z_cvd)
+        a = small.update(ts, price, z_ofi, z_cvd, fusion_score=fusion, consistency=0.5)
+        b = large.update(ts, price, z_ofi, z_cvd, fusion_score=fusion, consistency=0.5)
+        assert (a is None) == (b is None)
+        if a is not None:
+            events += 1
+            assert (a["type"], a["score"], a["channels"]) == (b["type"], b["score"], b["channels"])
+    assert events > 0
+    assert len(small.price_ofi_detector.pivots) == 2
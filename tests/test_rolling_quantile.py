@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""RollingQuantile 单元测试
+
+验证滑动窗口中位数/MAD/分位数与 numpy 口径一致，以及三个调用点（OFI 软截、CVD MAD 地板、
+StrategyMode 窗口统计）切换后结果不变
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from alpha_core.utils.rolling_quantile import RollingQuantile
+from alpha_core.microstructure.cvd.real_cvd_calculator import RealCVDCalculator, CVDConfig
+from alpha_core.risk.strategy_mode import StrategyModeManager, MarketActivity
+
+
+class TestRollingQuantile:
+    """RollingQuantile 测试"""
+
+    @pytest.mark.parametrize("maxlen", [1, 2, 7, 50])
+    def test_matches_numpy(self, maxlen):
+        """中位数/MAD/分位数逐步与 numpy 完全一致（含重复值）"""
+        rng = random.Random(maxlen)
+        win = RollingQuantile(maxlen)
+        ref = []
+        for _ in range(400):
+            x = float(rng.choice([rng.gauss(0.0, 2.0), rng.randint(-3, 3)]))
+            win.append(x)
+            ref = (ref + [x])[-maxlen:]
+            arr = np.array(ref)
+            med = np.median(arr)
+            assert win.median() == med
+            assert win.mad() == np.median(np.abs(arr - med))
+            for p in (0, 5, 25, 50, 95, 100):
+                assert win.percentile(p) == np.percentile(arr, p)
+
+    def test_fifo_eviction_and_popleft(self):
+        win = RollingQuantile(3)
+        assert win.append(3.0) is None
+        win.append(1.0)
+        win.append(2.0)
+        assert win.append(5.0) == 3.0
+        assert list(win) == [1.0, 2.0, 5.0]
+        assert win.sorted_values() == [1.0, 2.0, 5.0]
+        assert win.popleft() == 1.0
+        assert win.median() == 3.5
+
+    def test_unbounded_and_resize(self):
+        win = RollingQuantile()
+        for x in range(10):
+            win.append(float(x))
+        assert len(win) == 10
+        win.resize(4)
+        assert list(win) == [6.0, 7.0, 8.0, 9.0]
+        assert win.quantile(0.5) == 7.5
+
+    def test_empty_window(self):
+        win = RollingQuantile(5)
+        with pytest.raises(ValueError):
+            win.median()
+        with pytest.raises(ValueError):
+            RollingQuantile(0)
+
+
+class TestCallSites:
+    """调用点口径回归"""
+
+    def test_cvd_mad_sigma(self):
+        calc = RealCVDCalculator("SOLUSDT", CVDConfig(mad_window_trades=120))
+        rng = random.Random(9)
+        for _ in range(300):
+            calc._mad_buf.append(rng.gauss(0.0, 1.5))
+        calc._mad_cache_value = None
+        arr = np.array(list(calc._mad_buf))
+        expected = calc.cfg.mad_scale_factor * np.median(np.abs(arr - np.median(arr)))
+        assert calc._robust_mad_sigma() == pytest.approx(expected, rel=1e-12)
+
+    @pytest.mark.parametrize("use_median", [True, False])
+    @pytest.mark.parametrize("winsorize_percentile", [95, 100])
+    def test_strategy_mode_window_center(self, use_median, winsorize_percentile):
+        cfg = {"strategy": {"triggers": {"market": {
+            "use_median": use_median, "winsorize_percentile": winsorize_percentile,
+            "max_samples_per_sec": 1, "window_secs": 40,
+        }}}}
+        mgr = StrategyModeManager(config=cfg)
+        rng = random.Random(13)
+        for _ in range(100):
+            act = MarketActivity()
+            act.trades_per_min = rng.uniform(0, 500)
+            act.quote_updates_per_sec = rng.uniform(0, 100)
+            act.spread_bps = rng.uniform(-1, 10)
+            act.volatility_bps = rng.uniform(0, 20)
+            act.volume_usd = rng.uniform(0, 1e6)
+            mgr.check_market_active(act)
+
+            samples = list(mgr.market_samples)
+            for field in StrategyModeManager._MARKET_FIELDS:
+                values = [getattr(s, field) for s in samples]
+                p_high = winsorize_percentile if winsorize_percentile < 100 else None
+                p_low = 100 - winsorize_percentile if p_high is not None else None
+                if field == "spread_bps":
+                    values = [max(0.0, v) for v in values]
+                    p_low = None
+                if p_high is not None:
+                    hi = np.percentile(values, p_high)
+                    values = [min(v, hi) for v in values]
+                if p_low is not None:
+                    lo = np.percentile([getattr(s, field) for s in samples], p_low)
+                    values = [max(lo, v) for v in values]
+                expected = np.median(values) if use_median else np.mean(values)
+                got = mgr._winsorized_center(mgr._market_order[field], p_low, p_high)
+                assert got == pytest.approx(expected, rel=1e-12)
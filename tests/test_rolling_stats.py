@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""RollingWindowStats 单元测试
+
+验证增量均值/方差与两遍法的等价性，以及 OFI/CVD "上一窗口"口径保持不变
+"""
+
+import math
+import random
+
+import pytest
+
+from alpha_core.utils.rolling_stats import RollingWindowStats
+from alpha_core.microstructure.ofi.real_ofi_calculator import RealOFICalculator, OFIConfig
+from alpha_core.microstructure.cvd.real_cvd_calculator import RealCVDCalculator, CVDConfig
+
+
+def _two_pass(values, ddof):
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0
+    m = sum(values) / n
+    if n - ddof <= 0:
+        return m, 0.0
+    return m, math.sqrt(sum((x - m) ** 2 for x in values) / (n - ddof))
+
+
+class TestRollingWindowStats:
+    """RollingWindowStats 测试"""
+
+    @pytest.mark.parametrize("ddof", [0, 1])
+    @pytest.mark.parametrize("offset", [0.0, 1e6])
+    def test_matches_two_pass(self, ddof, offset):
+        """滑动过程中每一步都与两遍法一致（含大偏移量，模拟CVD累计值）"""
+        rng = random.Random(7)
+        win = RollingWindowStats(50)
+        ref = []
+        for _ in range(1000):
+            x = offset + rng.gauss(0.0, 3.0)
+            win.append(x)
+            ref = (ref + [x])[-50:]
+            m, s = win.mean_std(ddof=ddof)
+            m_ref, s_ref = _two_pass(ref, ddof)
+            assert m == pytest.approx(m_ref, rel=1e-9, abs=1e-9)
+            assert s == pytest.approx(s_ref, rel=1e-6, abs=1e-9)
+
+    def test_exclude_last(self):
+        """exclude_last 与去掉最后一个样本的两遍法一致"""
+        rng = random.Random(11)
+        win = RollingWindowStats(20)
+        for _ in range(200):
+            win.append(rng.uniform(-5, 5))
+            vals = list(win)
+            m, s = win.mean_std(ddof=0, exclude_last=True)
+            m_ref, s_ref = _two_pass(vals[:-1], 0)
+            assert m == pytest.approx(m_ref, abs=1e-9)
+            assert s == pytest.approx(s_ref, abs=1e-9)
+
+    def test_small_samples_and_resize(self):
+        """样本不足边界与 resize 保留最近样本"""
+        win = RollingWindowStats(5)
+        assert win.mean_std(ddof=1) == (0.0, 0.0)
+        win.append(2.0)
+        assert win.mean_std(ddof=1) == (2.0, 0.0)
+        assert win.mean_std(exclude_last=True) == (0.0, 0.0)
+        for x in (3.0, 4.0, 5.0, 6.0, 7.0):
+            win.append(x)
+        assert list(win) == [3.0, 4.0, 5.0, 6.0, 7.0]
+        win.resize(3)
+        assert list(win) == [5.0, 6.0, 7.0]
+        assert win.mean_std(ddof=1) == _two_pass([5.0, 6.0, 7.0], 1)
+        win.clear()
+        assert len(win) == 0 and not win
+
+    def test_invalid_maxlen(self):
+        with pytest.raises(ValueError):
+            RollingWindowStats(0)
+
+
+class TestCalculatorBaseline:
+    """OFI/CVD 使用 RollingWindowStats 后 z-score 与两遍法基线一致"""
+
+    def test_ofi_z_matches_reference(self):
+        rng = random.Random(3)
+        calc = RealOFICalculator("BTCUSDT", OFIConfig(z_window=40, z_clip=0))
+        calc.winsor_k_mad = 1e9  # 关闭软截，单独验证均值/标准差口径
+        ts = 1_700_000_000_000
+        for _ in range(300):
+            ts += 100
+            bids = [[100.0 - 0.1 * i, rng.uniform(1, 10)] for i in range(5)]
+            asks = [[100.1 + 0.1 * i, rng.uniform(1, 10)] for i in range(5)]
+            prev = list(calc.ofi_hist)
+            res = calc.update_with_snapshot(bids, asks, event_time_ms=ts)
+            if res["z_ofi"] is None:
+                continue
+            m, s = RealOFICalculator._mean_std(prev)
+            s = max(s, calc.std_floor)
+            assert res["z_ofi"] == pytest.approx((res["ofi"] - m) / s, rel=1e-7, abs=1e-9)
+
+    def test_cvd_level_z_matches_reference(self):
+        rng = random.Random(5)
+        calc = RealCVDCalculator("XRPUSDT", CVDConfig(z_mode="level", z_window=30))
+        for i in range(300):
+            res = calc.update_with_trade(price=1.0, qty=rng.uniform(0.1, 5), is_buy=rng.random() < 0.6,
+                                         event_time_ms=1_700_000_000_000 + i * 50)
+            if res["z_cvd"] is None:
+                continue
+            arr = list(calc._hist)[:-1]
+            m, s = RealCVDCalculator._mean_std(arr)
+            expected = 0.0 if s <= 1e-9 else (calc.cvd - m) / s
+            assert res["z_cvd"] == pytest.approx(expected, rel=1e-7, abs=1e-9)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""SignalV2Record 受信快速路径测试：投影与 pydantic 校验结果一致、采样/严格模式强校验"""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from alpha_core.signals.signal_schema import DecisionCode, DivType, Regime, SideHint, SignalV2, SignalV2Record
+from alpha_core.signals.signal_writer import SignalWriterV2
+
+TS0 = 1730790000000  # 2024-11-05 07:00 UTC
+
+
+def _fields(i=0, **overrides):
+    fields = dict(
+        ts_ms=TS0 + i, symbol="btcusdt", signal_id=f"r-BTCUSDT-{i}", score=0.8, side_hint=SideHint.BUY,
+        z_ofi=1.5, z_cvd=None, div_type=DivType.BULL, regime=Regime.TREND, gating=1, confirm=True,
+        cooldown_ms=1000, expiry_ms=60000, decision_code=DecisionCode.OK, decision_reason=None,
+        config_hash="abc", run_id="r", meta={"window_ms": 60000, "quality_flags": ["weak_signal"]},
+    )
+    fields.update(overrides)
+    return fields
+
+
+def _lines(path: Path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"side_hint": SideHint.FLAT, "confirm": False, "gating": 0, "decision_code": DecisionCode.FAIL_GATING,
+     "decision_reason": "spread", "div_type": None},
+    {"regime": Regime.QUIET, "meta": {}},
+])
+def test_record_projections_match_validated(overrides):
+    validated = SignalV2(**_fields(**overrides))
+    record = SignalV2Record(**_fields(**overrides))
+    assert record.symbol == "BTCUSDT"
+    assert record.dict_for_jsonl() == validated.dict_for_jsonl()
+    assert list(record.dict_for_jsonl()) == list(validated.dict_for_jsonl())
+    assert record.dict_for_sqlite() == validated.dict_for_sqlite()
+    assert record.to_model() == validated
+
+
+def test_record_defaults_match_schema():
+    fields = _fields()
+    for key in ("z_ofi", "z_cvd", "div_type", "cooldown_ms", "decision_reason", "meta"):
+        fields.pop(key)
+    assert SignalV2Record(**fields).dict_for_sqlite() == SignalV2(**fields).dict_for_sqlite()
+
+
+def test_record_enforces_confirm_invariant():
+    with pytest.raises(ValueError):
+        SignalV2Record(**_fields(gating=0))
+    with pytest.raises(ValueError):
+        SignalV2Record(**_fields(decision_code=DecisionCode.COOLDOWN))
+
+
+def test_writer_validates_every_nth_signal(tmp_path, monkeypatch):
+    monkeypatch.setenv("SIGNAL_V2_VALIDATE_EVERY_N", "3")
+    writer = SignalWriterV2(tmp_path, sink_kind="jsonl")
+    with patch("alpha_core.signals.signal_writer.validate_signal_v2", wraps=lambda d: SignalV2(**d)) as validate:
+        for i in range(9):
+            writer.write(SignalV2Record(**_fields(i)))
+        writer.write(SignalV2(**_fields(9)))  # 已校验实例不重复校验
+    assert validate.call_count == 3
+    assert writer.get_health()["validated"] == 3
+    assert writer.get_health()["written"] == 10
+    writer.close()
+
+
+def test_sampled_failure_is_counted_but_written(tmp_path, monkeypatch):
+    monkeypatch.setenv("SIGNAL_V2_VALIDATE_EVERY_N", "1")
+    writer = SignalWriterV2(tmp_path, sink_kind="jsonl")
+    writer.write(SignalV2Record(**_fields(side_hint="up")))
+    writer.close()
+    assert writer.get_health()["validation_failures"] == 1
+    rows = _lines(tmp_path / "ready" / "signal" / "BTCUSDT" / "signals-20241105-07.jsonl")
+    assert [r["side_hint"] for r in rows] == ["up"]
+
+
+def test_strict_mode_rejects_invalid_signal(tmp_path, monkeypatch):
+    monkeypatch.setenv("SIGNAL_V2_STRICT", "1")
+    monkeypatch.setenv("SIGNAL_V2_VALIDATE_EVERY_N", "0")
+    writer = SignalWriterV2(tmp_path, sink_kind="dual")
+    writer.write(SignalV2Record(**_fields(0, side_hint="up")))
+    writer.write(SignalV2Record(**_fields(1)))
+    writer.close()
+    health = writer.get_health()
+    assert health["validate_every_n"] == 1
+    assert (health["validated"], health["validation_failures"]) == (2, 1)
+    rows = _lines(tmp_path / "ready" / "signal" / "BTCUSDT" / "signals-20241105-07.jsonl")
+    assert [r["signal_id"] for r in rows] == ["r-BTCUSDT-1"]
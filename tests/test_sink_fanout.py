@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""MultiSink 扇出测试：一次规范化/序列化，子 Sink 共享记录，输出与单 Sink 一致"""
+
+import json
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from alpha_core.signals.core_algo import JsonlSink, MultiSink, SignalRecord, SignalSink, SqliteSink, build_sink
+from alpha_core.utils import json_codec
+
+TS0 = 1730790000000
+
+
+class RecordingSink(SignalSink):
+    """未实现 emit_record 的第三方 Sink：走默认的 emit 副本路径"""
+
+    def __init__(self):
+        self.entries = []
+
+    def emit(self, entry):
+        entry["mutated"] = True
+        self.entries.append(entry)
+
+
+def _entry(i):
+    return {"ts_ms": TS0 + i, "symbol": "BTCUSDT", "score": 0.5 + i, "z_ofi": 1.0, "z_cvd": 0.5,
+            "regime": "active", "div_type": None, "signal_type": "buy", "confirm": True, "gating": 1,
+            "guard_reason": None, "created_at": "2024-11-05T07:00:00+00:00"}
+
+
+def test_dual_sink_serializes_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("RUN_ID", "run-x")
+    sink = build_sink("dual", tmp_path)
+    assert isinstance(sink, MultiSink)
+    entries = [_entry(i) for i in range(5)]
+    with patch.object(json_codec, "dumps", wraps=json_codec.dumps) as dumps:
+        for entry in entries:
+            sink.emit(entry)
+    assert dumps.call_count == 5
+    assert all("run_id" not in e for e in entries)  # 调用方的 entry 不被改写
+    sink.close()
+
+    lines = (tmp_path / "ready" / "signal" / "BTCUSDT" / "signals-20241105-07.jsonl").read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [r["score"] for r in records] == [e["score"] for e in entries]
+    assert {r["run_id"] for r in records} == {"run-x"}
+    assert records[0]["_writer"] == "core_jsonl_v406"
+
+    conn = sqlite3.connect(tmp_path / "signals.db")
+    try:
+        rows = conn.execute("SELECT ts_ms, score, run_id, signal_type FROM signals ORDER BY ts_ms").fetchall()
+    finally:
+        conn.close()
+    assert rows == [(r["ts_ms"], r["score"], "run-x", "buy") for r in records]
+
+
+def test_fanout_matches_single_jsonl_sink(tmp_path, monkeypatch):
+    monkeypatch.setenv("RUN_ID", "run-y")
+    single = JsonlSink(tmp_path / "single")
+    multi = MultiSink([JsonlSink(tmp_path / "multi")])
+    for i in range(3):
+        single.emit(_entry(i))
+        multi.emit(_entry(i))
+    single.close()
+    multi.close()
+    rel = "ready/signal/BTCUSDT/signals-20241105-07.jsonl"
+    assert (tmp_path / "single" / rel).read_bytes() == (tmp_path / "multi" / rel).read_bytes()
+
+
+def test_sink_without_emit_record_gets_private_copy(tmp_path):
+    other, jsonl = RecordingSink(), JsonlSink(tmp_path)
+    sink = MultiSink([other, jsonl])
+    sink.emit(_entry(0))
+    assert other.entries[0]["mutated"] is True
+    assert other.entries[0]["run_id"] == ""
+    sink.close()
+    line = (tmp_path / "ready" / "signal" / "BTCUSDT" / "signals-20241105-07.jsonl").read_text()
+    assert "mutated" not in json.loads(line)
+
+
+def test_record_is_immutable_and_fills_defaults():
+    record = SignalRecord({"ts_ms": TS0, "symbol": "ETHUSDT"}, "r1")
+    assert record.entry["signal_type"] == "neutral"
+    assert record.entry["created_at"]
+    assert record.sqlite_row[-1] == "r1"
+    assert record.json_line is record.json_line
+    with pytest.raises(AttributeError):
+        record.run_id = "r2"
+
+
+def test_sqlite_sink_emit_and_emit_record_agree(tmp_path):
+    sink = SqliteSink(tmp_path, batch_n=1, flush_ms=0)
+    sink.emit(_entry(0))
+    sink.emit_record(SignalRecord(_entry(1), sink._run_id))
+    sink.close()
+    conn = sqlite3.connect(tmp_path / "signals.db")
+    try:
+        rows = conn.execute("SELECT score, confirm, gating, signal_type FROM signals ORDER BY ts_ms").fetchall()
+    finally:
+        conn.close()
+    assert rows == [(0.5, 1, 1, "buy"), (1.5, 1, 1, "buy")]
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""slim 结果模式测试
+
+OFI/CVD/Fusion/Divergence 的精简记录与完整字典结果逐行一致，诊断信息经 get_diagnostics() 拉取
+"""
+
+import math
+import random
+
+from alpha_core.microstructure.ofi import RealOFICalculator, OFIConfig, OFIResult
+from alpha_core.microstructure.cvd import RealCVDCalculator, CVDConfig, CVDResult
+from alpha_core.microstructure.fusion import OFI_CVD_Fusion, FusionResult
+from alpha_core.microstructure.divergence import DivergenceDetector, DivergenceResult
+
+
+def test_ofi_slim_matches_full():
+    full = RealOFICalculator("BTCUSDT", OFIConfig(z_window=30))
+    slim = RealOFICalculator("BTCUSDT", OFIConfig(z_window=30))
+    rng = random.Random(1)
+    ts = 1_700_000_000_000
+    for i in range(400):
+        ts += 100 if rng.random() > 0.02 else 3000
+        bids = [(100.0 - 0.1 * k, rng.uniform(1, 10)) for k in range(5)]
+        asks = [(100.1 + 0.1 * k, rng.uniform(1, 10)) for k in range(5)]
+        r = full.update_with_snapshot(bids, asks, event_time_ms=ts)
+        s = slim.update_with_snapshot(bids, asks, event_time_ms=ts, slim=True)
+        assert isinstance(s, OFIResult)
+        assert (s.ofi, s.z_ofi, s.ema_ofi) == (r["ofi"], r["z_ofi"], r["ema_ofi"])
+        assert (s.warmup, s.std_zero, s.session_reset) == (
+            r["meta"]["warmup"], r["meta"]["std_zero"], r["meta"]["session_reset"])
+    diag = slim.get_diagnostics()
+    for key in ("bad_points", "p_gt2_cnt", "p_gt3_cnt", "total_cnt", "p_gt2_percent", "weights"):
+        assert diag[key] == r["meta"][key]
+
+
+def test_cvd_slim_matches_full():
+    full = RealCVDCalculator("ETHUSDT", CVDConfig())
+    slim = RealCVDCalculator("ETHUSDT", CVDConfig())
+    rng = random.Random(2)
+    ts = 1_700_000_000_000
+    price = 3000.0
+    for i in range(600):
+        ts += rng.randint(10, 500)
+        price += rng.choice([-0.5, 0.0, 0.5])
+        qty = rng.choice([rng.uniform(0.01, 3.0), 0.0])  # 含坏数据
+        is_buy = rng.choice([True, False, None])
+        r = full.update_with_trade(price=price, qty=qty, is_buy=is_buy, event_time_ms=ts)
+        s = slim.update_with_trade(price=price, qty=qty, is_buy=is_buy, event_time_ms=ts, slim=True)
+        assert isinstance(s, CVDResult)
+        assert (s.cvd, s.z_cvd, s.ema_cvd) == (r["cvd"], r["z_cvd"], r["ema_cvd"])
+        assert (s.warmup, s.std_zero, s.event_time_ms) == (
+            r["meta"]["warmup"], r["meta"]["std_zero"], r["meta"]["event_time_ms"])
+    assert slim.get_diagnostics()["bad_points"] == r["meta"]["bad_points"]
+
+
+def test_fusion_and_divergence_slim_match_full():
+    fus_full, fus_slim = OFI_CVD_Fusion(), OFI_CVD_Fusion()
+    div_full, div_slim = DivergenceDetector(), DivergenceDetector()
+    rng = random.Random(3)
+    price = 100.0
+    events = 0
+    for i in range(3000):
+        ts = 1_700_000_000.0 + i * 0.5
+        price += 0.3 * math.sin(i / 15.0) + rng.gauss(0, 0.05)
+        z_ofi = 2.5 * math.sin(i / 9.0) + rng.gauss(0, 0.3)
+        z_cvd = -2.0 * math.sin(i / 11.0) + rng.gauss(0, 0.3)
+        lag = rng.choice([0.0, 0.1, 0.6])
+
+        r = fus_full.update(z_ofi, z_cvd, ts, price=price, lag_sec=lag)
+        s = fus_slim.update(z_ofi, z_cvd, ts, price=price, lag_sec=lag, slim=True)
+        assert isinstance(s, FusionResult)
+        assert (s.fusion_score, s.signal, s.consistency, s.reason_codes, s.warmup) == (
+            r["fusion_score"], r["signal"], r["consistency"], r["reason_codes"], r["warmup"])
+
+        d = div_full.update(ts, price, z_ofi, z_cvd, fusion_score=r["fusion_score"],
+                            consistency=r["consistency"], lag_sec=lag)
+        e = div_slim.update(ts, price, z_ofi, z_cvd, fusion_score=s.fusion_score,
+                            consistency=s.consistency, lag_sec=lag, slim=True)
+        if d is None:
+            assert e is None
+        else:
+            events += 1
+            assert isinstance(e, DivergenceResult)
+            assert (e.ts, e.type, e.score, e.channels) == (d["ts"], d["type"], d["score"], d["channels"])
+
+    assert events > 0
+    assert fus_slim.get_diagnostics()["stats"] == fus_full.get_stats()
+    assert div_slim.get_diagnostics()["stats"]["events_total"] == div_full.get_stats()["events_total"]
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""SqliteSink 后台写线程测试：定时器提交、写失败不阻塞调用方、队列满丢弃计数、WAL 检查点"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from alpha_core.signals.core_algo import SqliteSink
+
+
+def _entry(i):
+    return {"ts_ms": 1730790000000 + i, "symbol": "BTCUSDT", "score": 0.5, "signal_type": "buy",
+            "confirm": True, "gating": 1, "guard_reason": None}
+
+
+def _count(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_timer_commits_quiet_batch(tmp_path):
+    """安静期无新信号时，flush_ms 定时器仍会提交未满批次"""
+    sink = SqliteSink(tmp_path, batch_n=1000, flush_ms=50)
+    for i in range(3):
+        sink.emit(_entry(i))
+    assert _wait_for(lambda: _count(sink.db_path) == 3)
+    health = sink.get_health()
+    assert health["written"] == 3 and health["batches"] >= 1
+    assert health["queue_size"] == 0
+    sink.close()
+
+
+def test_flush_barrier_and_close_drain(tmp_path):
+    sink = SqliteSink(tmp_path, batch_n=1000, flush_ms=60_000)
+    for i in range(10):
+        sink.emit(_entry(i))
+    assert sink.flush(timeout=5)
+    assert _count(sink.db_path) == 10
+    for i in range(10, 25):
+        sink.emit(_entry(i))
+    sink.close()
+    assert _count(sink.db_path) == 25
+    sink.emit(_entry(99))  # 关闭后写入计入丢弃
+    assert sink.get_health()["dropped_count"] == 1
+
+
+def test_slow_disk_does_not_block_emit(tmp_path, monkeypatch):
+    """提交（含失败重试退避）在写线程执行，emit 不等待磁盘"""
+    monkeypatch.setenv("SQLITE_QUEUE_FULL", "drop")
+    sink = SqliteSink(tmp_path, batch_n=1, flush_ms=0)
+    release = threading.Event()
+    original = sink._flush_batch
+
+    def slow_flush(batch):
+        release.wait(5)
+        original(batch)
+
+    monkeypatch.setattr(sink, "_flush_batch", slow_flush)
+    t0 = time.perf_counter()
+    for i in range(50):
+        sink.emit(_entry(i))
+    assert time.perf_counter() - t0 < 0.5
+    release.set()
+    sink.close()
+    assert _count(sink.db_path) == 50
+
+
+def test_queue_full_drops_and_counts(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_QUEUE_MAX", "4")
+    monkeypatch.setenv("SQLITE_QUEUE_FULL", "drop")
+    sink = SqliteSink(tmp_path, batch_n=1, flush_ms=0)
+    release = threading.Event()
+    original = sink._flush_batch
+    monkeypatch.setattr(sink, "_flush_batch", lambda batch: (release.wait(5), original(batch)))
+    for i in range(20):
+        sink.emit(_entry(i))
+    health = sink.get_health()
+    assert health["dropped_count"] > 0
+    assert health["max_queue_depth"] <= 4
+    release.set()
+    sink.close()
+    assert _count(sink.db_path) + sink.get_health()["dropped_count"] == 20
+
+
+def test_periodic_wal_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_CHECKPOINT_SEC", "0.05")
+    sink = SqliteSink(tmp_path, batch_n=1, flush_ms=0)
+    sink.emit(_entry(0))
+    assert _wait_for(lambda: sink.get_health()["checkpoints"] >= 2)
+    sink.close()
+
+
+@pytest.mark.parametrize("replay_mode, expected", [("1", "block"), ("0", "drop")])
+def test_queue_full_policy_defaults(tmp_path, monkeypatch, replay_mode, expected):
+    monkeypatch.delenv("SQLITE_QUEUE_FULL", raising=False)
+    monkeypatch.setenv("V13_REPLAY_MODE", replay_mode)
+    sink = SqliteSink(tmp_path)
+    assert sink.queue_full_policy == expected
+    sink.close()
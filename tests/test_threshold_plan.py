@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""ThresholdPlan 测试：预编译阈值与逐行解析语义一致、不可变、reconfigure 生效"""
+
+import pytest
+
+from alpha_core.signals import CoreAlgorithm
+from alpha_core.signals.core_algo import DEFAULT_SIGNAL_CONFIG, NullSink, _merge_dict
+from alpha_core.signals.threshold_plan import ThresholdPlan
+
+SCENARIO_CFG = {
+    "weak_signal_threshold": 0.25,
+    "consistency_min": 0.2,
+    "min_consecutive_same_dir": 2,
+    "consistency_min_per_regime": {"active": 0.08, "quiet": 0.3},
+    "scenario_overrides": {
+        "A_H": {"weak_signal_threshold_offset": -0.05, "consistency_min_offset": 0.02, "min_consecutive_offset": 1},
+        "Q_L": {},
+    },
+    "thresholds": {"active": {"buy": 0.4}, "custom": {"sell": -0.3}},
+}
+
+
+def _legacy(config, regime, scenario):
+    """旧版 process_feature_row 的逐行解析（参照实现）"""
+    weak = config["weak_signal_threshold"]
+    cmin = config["consistency_min"]
+    min_consec = int(config.get("min_consecutive_same_dir", 1))
+    overrides = config.get("scenario_overrides", {})
+    if overrides and scenario and overrides.get(scenario, {}):
+        o = overrides[scenario]
+        weak += o.get("weak_signal_threshold_offset", 0.0)
+        cmin += o.get("consistency_min_offset", 0.0)
+        min_consec += o.get("min_consecutive_offset", 0)
+    per_regime = config.get("consistency_min_per_regime", {})
+    if per_regime and regime in per_regime and not (overrides and scenario and overrides.get(scenario)):
+        cmin = per_regime[regime]
+    thresholds = _merge_dict(config["thresholds"].get("base", {}), config["thresholds"].get(regime or "base", {}))
+    return weak, cmin, min_consec, thresholds
+
+
+@pytest.mark.parametrize("regime", ["active", "normal", "quiet", "base", "custom", "unseen"])
+@pytest.mark.parametrize("scenario", [None, "A_H", "Q_L", "Z_Z"])
+def test_lookup_matches_legacy_resolution(regime, scenario):
+    config = _merge_dict(DEFAULT_SIGNAL_CONFIG, SCENARIO_CFG)
+    plan = ThresholdPlan(config, config["min_consecutive_same_dir"])
+    entry = plan.lookup(regime, scenario)
+    weak, cmin, min_consec, thresholds = _legacy(config, regime, scenario)
+    assert entry.weak_signal_threshold == pytest.approx(weak)
+    assert entry.consistency_min == pytest.approx(cmin)
+    assert entry.min_consecutive == min_consec
+    assert (entry.buy, entry.strong_buy, entry.sell, entry.strong_sell) == (
+        thresholds.get("buy"), thresholds.get("strong_buy"), thresholds.get("sell"), thresholds.get("strong_sell"))
+    assert entry.scenario_overridden == (scenario == "A_H")
+    assert plan.regime_thresholds(regime) == thresholds
+
+
+def test_plan_is_immutable():
+    plan = ThresholdPlan(_merge_dict(DEFAULT_SIGNAL_CONFIG, {}))
+    with pytest.raises(AttributeError):
+        plan.weak_signal_threshold = 0.0
+    with pytest.raises(AttributeError):
+        plan.lookup("active").buy = 0.0
+
+
+def test_confirm_mode_and_funnel_flags_fall_back_to_signal_section():
+    plan = ThresholdPlan(_merge_dict(DEFAULT_SIGNAL_CONFIG, {
+        "signal": {"confirm_mode": "v2", "enable_confirm_funnel_diagnostics": True},
+        "debug": {"core_confirm_trace": True},
+    }))
+    assert plan.confirm_mode == "v2"
+    assert plan.funnel_diagnostics is True
+    assert plan.core_confirm_trace is True
+
+
+def test_reconfigure_rebuilds_plan():
+    algo = CoreAlgorithm(config={"sink": {"kind": "null"}}, sink=NullSink())
+    row = {
+        "ts_ms": 1730790000000, "symbol": "BTCUSDT", "z_ofi": 0.3, "z_cvd": 0.3, "spread_bps": 1.0,
+        "lag_sec": 0.05, "consistency": 0.5, "warmup": False, "fusion_score": 0.3,
+        "activity": {"tps": 5.0}, "div_type": None,
+    }
+    assert "weak_signal" not in (algo.process_feature_row(row)["decision_reason"] or "")
+
+    algo.reconfigure({"weak_signal_threshold": 0.5})
+    assert algo._plan.weak_signal_threshold == 0.5
+    row["ts_ms"] += 10_000
+    assert "weak_signal" in algo.process_feature_row(row)["decision_reason"]